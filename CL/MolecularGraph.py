@@ -611,16 +611,16 @@ class TrainingGraph(MolecularGraph):
         self.node_features = atom_feature_vector.unsqueeze(dim=0)
 
         self.edge_features = torch.Tensor([[[0] * self.n_edge_features]],
-                                          device="cuda")
+                                          device=self.C.device)
 
         # initialize the padded graph representation arrays
         node_features_padded = torch.zeros((self.C.max_n_nodes,
                                             self.C.n_node_features),
-                                           device="cuda")
+                                           device=self.C.device)
         edge_features_padded = torch.zeros((self.C.max_n_nodes,
                                             self.C.max_n_nodes,
                                             self.C.n_edge_features),
-                                           device="cuda")
+                                           device=self.C.device)
 
         # pad up to size of largest graph
         node_features_padded[:self.n_nodes, :] = self.node_features
@@ -80,9 +80,9 @@ class Workflow:
         if self.C.restart:
             print("-- Loading model from previous saved state.", flush=True)
             self.restart_epoch = util.get_restart_epoch()
-            self.agent_model = torch.load(f"{job_dir}model_restart_{self.restart_epoch}.pth")
-            self.prior_model = torch.load(f"{model_dir}pretrained_model.pth")
-            self.prev_model = torch.load(f"{model_dir}pretrained_model.pth")
+            self.agent_model = torch.load(f"{job_dir}model_restart_{self.restart_epoch}.pth", map_location=self.C.device)
+            self.prior_model = torch.load(f"{model_dir}pretrained_model.pth", map_location=self.C.device)
+            self.prev_model = torch.load(f"{model_dir}pretrained_model.pth", map_location=self.C.device)
             # Load sklearn activity model
             with open(self.C.data_path + "qsar_model.pickle", 'rb') as file:
                 model_dict = pickle.load(file)                                      
@@ -101,9 +101,9 @@ class Workflow:
 
         else:
             print("-- Initializing model from scratch.", flush=True)
-            self.agent_model = torch.load(f"{model_dir}pretrained_model.pth")
-            self.prior_model = torch.load(f"{model_dir}pretrained_model.pth")
-            self.prev_model = torch.load(f"{model_dir}pretrained_model.pth")
+            self.agent_model = torch.load(f"{model_dir}pretrained_model.pth", map_location=self.C.device)
+            self.prior_model = torch.load(f"{model_dir}pretrained_model.pth", map_location=self.C.device)
+            self.prev_model = torch.load(f"{model_dir}pretrained_model.pth", map_location=self.C.device)
             with open(self.C.data_path + "qsar_model.pickle", 'rb') as file:
                 model_dict = pickle.load(file)                                      
                 self.jak3_model = model_dict["classifier_sv"]
@@ -142,12 +142,12 @@ class Workflow:
         self.get_ts_properties()
 
         model_dir = self.C.dataset_dir
-        self.prior_model = torch.load(f"{model_dir}pretrained_model.pth")
+        self.prior_model = torch.load(f"{model_dir}pretrained_model.pth", map_location=self.C.device)
 
         self.restart_epoch = self.C.generation_epoch
         print(f"* Loading model from previous saved state (Epoch {self.restart_epoch}).", flush=True)
         model_path = self.C.job_dir + f"model_restart_{self.restart_epoch}.pth"
-        self.agent_model = torch.load(model_path)
+        self.agent_model = torch.load(model_path, map_location=self.C.device)
 
         with open(self.C.data_path + "qsar_model.pickle", 'rb') as file:
             model_dict = pickle.load(file)                                      
@@ -219,7 +219,7 @@ class Workflow:
             n_generation_batches += 1
 
         # generate graphs in batches
-        score = torch.tensor([], device="cuda")
+        score = torch.tensor([], device=self.C.device)
         for idx in range(0, n_generation_batches):
             print("Batch", idx +1, "of", n_generation_batches)
 
@@ -318,7 +318,7 @@ class Workflow:
 
         uniqueness_tensor = util.get_unique_tensor(smiles)
         score = compute_score(g[1], t, validity_tensor, uniqueness_tensor, smiles, self.jak3_model)
-        uniqueness_tensor = torch.where(score > self.best_avg_score, uniqueness_tensor, torch.zeros(len(score), device="cuda"))
+        uniqueness_tensor = torch.where(score > self.best_avg_score, uniqueness_tensor, torch.zeros(len(score), device=self.C.device))
         loss += self.C.alpha * torch.mean(compute_loss(score, a, p, uniqueness_tensor))  
 
         # backpropagate
@@ -197,19 +197,10 @@ class GlobalReadout(torch.nn.Module):
     def forward(self, node_level_output, graph_embedding_batch):
         """ Defines forward pass.
         """
-        self.fAddNet1 = self.fAddNet1.to("cuda", non_blocking=True)
-        self.fConnNet1 = self.fConnNet1.to("cuda", non_blocking=True)
-        self.fAddNet2 = self.fAddNet2.to("cuda", non_blocking=True)
-        self.fConnNet2 = self.fConnNet2.to("cuda", non_blocking=True)
-        self.fTermNet2 = self.fTermNet2.to("cuda", non_blocking=True)
-
         # get preliminary f_add and f_conn
         f_add_1 = self.fAddNet1(node_level_output)
         f_conn_1 = self.fConnNet1(node_level_output)
 
-        f_add_1 = f_add_1.to("cuda", non_blocking=True)
-        f_conn_1 = f_conn_1.to("cuda", non_blocking=True)
-
         # reshape preliminary APDs into flattenened vectors (e.g. one vector per
         # graph in batch)
         f_add_1_size = f_add_1.size()
@@ -222,10 +213,6 @@ class GlobalReadout(torch.nn.Module):
         f_conn_2 = self.fConnNet2(torch.cat((f_conn_1, graph_embedding_batch), dim=1).unsqueeze(dim=1))
         f_term_2 = self.fTermNet2(graph_embedding_batch)
 
-        f_add_2 = f_add_2.to("cuda", non_blocking=True)
-        f_conn_2 = f_conn_2.to("cuda", non_blocking=True)
-        f_term_2 = f_term_2.to("cuda", non_blocking=True)
-
         # flatten and concatenate
         cat = torch.cat((f_add_2.squeeze(dim=1), f_conn_2.squeeze(dim=1), f_term_2), dim=1)
 
@@ -300,19 +287,10 @@ class LinkerGlobalReadout(torch.nn.Module):
     def forward(self, node_level_output, graph_embedding_batch):
         """ Defines forward pass.
         """
-        # self.fAddNet1 = self.fAddNet1.to("cuda", non_blocking=True)
-        self.fConnNet1 = self.fConnNet1.to("cuda", non_blocking=True)
-        # self.fAddNet2 = self.fAddNet2.to("cuda", non_blocking=True)
-        self.fConnNet2 = self.fConnNet2.to("cuda", non_blocking=True)
-        self.fTermNet2 = self.fTermNet2.to("cuda", non_blocking=True)
-
         # get preliminary f_add and f_conn
         
         f_conn_1 = self.fConnNet1(node_level_output)
 
-        
-        f_conn_1 = f_conn_1.to("cuda", non_blocking=True)
-
         # reshape preliminary APDs into flattenened vectors (e.g. one vector per
         # graph in batch)
         
@@ -324,10 +302,6 @@ class LinkerGlobalReadout(torch.nn.Module):
         f_conn_2 = self.fConnNet2(torch.cat((f_conn_1, graph_embedding_batch), dim=1).unsqueeze(dim=1))
         f_term_2 = self.fTermNet2(graph_embedding_batch)
 
-        
-        f_conn_2 = f_conn_2.to("cuda", non_blocking=True)
-        f_term_2 = f_term_2.to("cuda", non_blocking=True)
-
         # flatten and concatenate
         
         cat = torch.cat((f_conn_2.squeeze(dim=1), f_term_2), dim=1)
@@ -0,0 +1,189 @@
+# load general packages and functions
+import itertools
+import multiprocessing
+from collections import namedtuple
+from rdkit import Chem
+
+# defines the component which joins generated linkers to their fragments; the
+# attachment points of each fragment pair are found once, and molecules are
+# joined by adding bonds (instead of by editing SMILES strings), optionally in a
+# pool of processes
+
+
+# failure reasons reported in `StitchResult.failure`
+INVALID_LINKER = "invalid linker"
+INVALID_FRAGMENTS = "invalid fragments"
+BAD_ATTACHMENT_POINTS = "fragments need exactly two attachment points ('*'), each bonded to one atom"
+NO_VALID_BOND = "no valid bonds found within the attempt budget"
+
+# result of stitching one linker: `smiles` is `None` if stitching failed, in
+# which case `failure` gives the reason
+StitchResult = namedtuple("StitchResult", ["smiles", "failure"])
+
+# fragments without their dummy atoms, with the atoms that were bonded to the
+# dummy atoms ("anchors") and the types of those bonds
+FragmentAttachments = namedtuple("FragmentAttachments", ["mol", "anchors", "bond_types"])
+
+
+class LinkerStitcher:
+    """ Joins linkers to a pair of fragments, by bonding the two (predicted)
+    linker atoms to the atoms attached to the two dummy atoms ('*') of the
+    fragments. If the predicted bonds give an invalid molecule, other pairs of
+    linker atoms are tried, up to `max_attempts` pairs in total, starting with
+    the pairs sharing an atom with the predicted pair.
+
+    Args:
+      max_attempts (int) : Maximum number of pairs of linker atoms tried per
+        molecule.
+      n_workers (int) : Number of subprocesses used for stitching (0 stitches
+        in the current process).
+    """
+    def __init__(self, max_attempts=10, n_workers=0):
+
+        self.max_attempts = max_attempts  # `int`
+        self.n_workers = n_workers        # `int`
+        self.attachments = {}             # fragments SMILES -> `FragmentAttachments`
+        self.pool = None
+
+    def __getstate__(self):
+        # the pool cannot be pickled
+        state = self.__dict__.copy()
+        state["pool"] = None
+        return state
+
+    def get_attachments(self, fragments_smi):
+        """ Returns the `FragmentAttachments` of the fragments in `fragments_smi`
+        (computed once per fragment pair), or the failure reason (`str`).
+        """
+        if fragments_smi not in self.attachments:
+            self.attachments[fragments_smi] = get_fragment_attachments(fragments_smi)
+        return self.attachments[fragments_smi]
+
+    def stitch(self, fragments_smi, linker_smi, linker_atoms):
+        """ Joins a linker to its fragments and returns a `StitchResult`.
+
+        Args:
+          fragments_smi (str) : SMILES of the fragments, with two dummy atoms.
+          linker_smi (str) : SMILES of the linker.
+          linker_atoms (list) : Indices of the two linker atoms to bond to the
+            fragments.
+        """
+        attachments = self.get_attachments(fragments_smi)
+        if isinstance(attachments, str):
+            return StitchResult(None, attachments)
+
+        linker = Chem.MolFromSmiles(linker_smi) if linker_smi else None
+        if linker is None or linker.GetNumAtoms() == 0:
+            return StitchResult(None, INVALID_LINKER)
+
+        combo = Chem.CombineMols(attachments.mol, linker)
+        offset = attachments.mol.GetNumAtoms()
+        for atom_pair in itertools.islice(get_linker_atom_pairs(linker, linker_atoms), self.max_attempts):
+            mol = Chem.RWMol(combo)
+            for anchor, linker_atom, bond_type in zip(attachments.anchors, atom_pair, attachments.bond_types):
+                mol.AddBond(anchor, offset + linker_atom, bond_type)
+            try:
+                Chem.SanitizeMol(mol)
+            except (ValueError, RuntimeError):
+                continue
+            return StitchResult(Chem.MolToSmiles(mol), None)
+
+        return StitchResult(None, NO_VALID_BOND)
+
+    def stitch_batch(self, fragments_smi, linker_smi_list, linker_atoms_list):
+        """ Joins each linker in `linker_smi_list` to its fragments and returns
+        the `StitchResult`s (`list`), in the same order.
+
+        Args:
+          fragments_smi (str or list) : SMILES of the fragments, either shared
+            by all linkers or one per linker.
+          linker_smi_list (list) : SMILES of the linkers.
+          linker_atoms_list (list) : Pairs of linker atoms to bond to the
+            fragments (e.g. a `torch.Tensor` of shape {n_linkers, 2}).
+        """
+        if isinstance(fragments_smi, str):
+            fragments_smi = [fragments_smi] * len(linker_smi_list)
+        jobs = [(fragments_smi_i, linker_smi, [int(atom) for atom in linker_atoms])
+                for fragments_smi_i, linker_smi, linker_atoms
+                in zip(fragments_smi, linker_smi_list, linker_atoms_list)]
+
+        if self.n_workers == 0:
+            return [self.stitch(*job) for job in jobs]
+
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.n_workers,
+                                             initializer=init_worker,
+                                             initargs=(self,))
+        chunksize = max(1, len(jobs) // (4 * self.n_workers))
+        return self.pool.starmap(stitch_in_worker, jobs, chunksize=chunksize)
+
+    def close(self):
+        """ Terminates the pool of subprocesses, if any.
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+
+def get_fragment_attachments(fragments_smi):
+    """ Removes the two dummy atoms from the fragments in `fragments_smi` and
+    returns their `FragmentAttachments`, or the failure reason (`str`).
+    """
+    fragments = Chem.MolFromSmiles(fragments_smi) if fragments_smi else None
+    if fragments is None:
+        return INVALID_FRAGMENTS
+
+    dummies = [atom for atom in fragments.GetAtoms() if atom.GetAtomicNum() == 0]
+    if len(dummies) != 2 or any(dummy.GetDegree() != 1 for dummy in dummies):
+        return BAD_ATTACHMENT_POINTS
+
+    bonds = [dummy.GetBonds()[0] for dummy in dummies]
+    anchors = [bond.GetOtherAtomIdx(dummy.GetIdx()) for bond, dummy in zip(bonds, dummies)]
+    bond_types = [bond.GetBondType() for bond in bonds]
+
+    # remove the dummy atoms (highest index first), then shift the anchors
+    dummy_idc = sorted((dummy.GetIdx() for dummy in dummies), reverse=True)
+    mol = Chem.RWMol(fragments)
+    for dummy_idx in dummy_idc:
+        mol.RemoveAtom(dummy_idx)
+    anchors = [anchor - sum(dummy_idx < anchor for dummy_idx in dummy_idc) for anchor in anchors]
+
+    return FragmentAttachments(mol.GetMol(), anchors, bond_types)
+
+
+def get_linker_atom_pairs(linker, linker_atoms):
+    """ Yields pairs of distinct atoms of `linker` to bond to the fragments:
+    first the predicted pair `linker_atoms` (if valid), then the other pairs
+    sharing an atom with it, then all remaining pairs. Only atoms with at least
+    one (implicit or explicit) hydrogen can form the new bonds.
+    """
+    n_atoms = linker.GetNumAtoms()
+    if n_atoms == 1:
+        # a single atom is bonded to both fragments
+        yield (0, 0)
+        return
+
+    free_atoms = [atom.GetIdx() for atom in linker.GetAtoms() if atom.GetTotalNumHs() > 0]
+    predicted = [atom for atom in linker_atoms if 0 <= atom < n_atoms]
+
+    seen = set()
+    candidates = itertools.chain([tuple(predicted)] if len(predicted) == 2 else [],
+                                 ((atom, other) for atom in predicted for other in free_atoms),
+                                 itertools.permutations(free_atoms, 2))
+    for atom_pair in candidates:
+        if atom_pair[0] != atom_pair[1] and atom_pair not in seen:
+            seen.add(atom_pair)
+            yield atom_pair
+
+
+def init_worker(stitcher):
+    """ Stores a copy of the stitcher in each subprocess of the pool.
+    """
+    global worker_stitcher
+    worker_stitcher = stitcher
+
+
+def stitch_in_worker(fragments_smi, linker_smi, linker_atoms):
+    """ Stitches a molecule in a subprocess, using its copy of the stitcher.
+    """
+    return worker_stitcher.stitch(fragments_smi, linker_smi, linker_atoms)
@@ -6,6 +6,7 @@ import os
 import rdkit
 from rdkit.Chem.rdchem import BondType
 import sys
+import torch
 
 # load program-specific functions
 sys.path.insert(1, "./parameters/")  # search "parameters/" directory
@@ -132,6 +133,31 @@ def override_params(all_params):
     return all_params
 
 
+def get_device(device):
+    """ Resolves the `device` parameter ('auto', 'cpu', or 'cuda:N') to the name
+    of the `torch.device` on which all tensors are allocated.
+
+    Args:
+      device (str) : Requested device.
+
+    Returns:
+      device (str) : Resolved device; 'auto' becomes 'cuda:0' if a GPU is
+        available, and 'cpu' otherwise.
+    """
+    if device == "auto":
+        return "cuda:0" if torch.cuda.is_available() else "cpu"
+    elif device == "cpu":
+        return device
+    elif device.split(":")[0] == "cuda":
+        if not torch.cuda.is_available():
+            raise ValueError(f"Device '{device}' requested, but CUDA is not available.")
+        return device
+    else:
+        raise ValueError(
+            f"Unknown `device`: {device}. Please use 'auto', 'cpu', or 'cuda:N'."
+        )
+
+
 def collect_global_constants(parameters, job_dir):
     """ Collects constants defined in `features.py` with those defined by the
     ArgParser (`args.py`), and returns the bundle as a `namedtuple`.
@@ -152,6 +178,21 @@ def collect_global_constants(parameters, job_dir):
             f"Cannot use explicit H's and ignore H's "
             f"at the same time. Please fix flags."
         )
+
+    # check the window of steps captured with `torch.profiler`
+    steps = parameters["torch_profiler_steps"]
+    if steps is not None and (len(steps) != 2 or steps[0] > steps[1]):
+        raise ValueError(
+            f"Invalid `torch_profiler_steps`: {steps}. "
+            f"Please use [first_step, last_step] or None."
+        )
+
+    # select how the Tanimoto similarities are computed
+    if parameters["fingerprint_backend"] not in ("numpy", "rdkit"):
+        raise ValueError(
+            f"Unknown `fingerprint_backend`: {parameters['fingerprint_backend']}. "
+            f"Please use 'numpy' or 'rdkit'."
+        )
     
     # define edge feature (rdkit `GetBondType()` result -> `int`) constants
     bondtype_to_int = {BondType.SINGLE: 0, BondType.DOUBLE: 1, BondType.TRIPLE: 2}
@@ -210,6 +251,9 @@ def collect_global_constants(parameters, job_dir):
     
     # join with `features.args_dict`
     constants_dict.update(parameters)
+
+    # resolve the device on which to allocate tensors
+    constants_dict["device"] = get_device(parameters["device"])
     
     # define path to dataset splits
     constants_dict["test_set"] = parameters["dataset_dir"] + "test.smi"
@@ -29,6 +29,21 @@ General settings for the generative model:
     Note: if `n_samples` > 100000 molecules, these will be generated in batches
     of 100000.
   n_workers (int) : Number of subprocesses to use during data loading.
+  max_stitching_attempts (int) : Maximum number of pairs of linker atoms tried
+    when joining a generated linker to its fragments.
+  n_stitching_workers (int) : Number of subprocesses used to join generated
+    linkers to their fragments (0 joins them in the main process).
+  fingerprint_backend (str) : How the Tanimoto similarities of the rewards/scores
+    are computed ('numpy', or 'rdkit'); 'numpy' computes those of a whole batch
+    at once, 'rdkit' one molecule at a time (the similarities are the same).
+  fingerprint_cache_size (int) : Maximum number of reference (e.g. ground truth)
+    fingerprints kept in memory.
+  device (str) : Device on which to run the job ('auto', 'cpu', or 'cuda:N');
+    'auto' uses the first GPU if one is available, and the CPU otherwise.
+  n_cpu_threads (int or None) : If specified, number of threads used by PyTorch
+    for intra-op parallelism on the CPU.
+  n_interop_threads (int or None) : If specified, number of threads used by
+    PyTorch for inter-op parallelism on the CPU.
   restart (bool) : If specified, will restart training from previous saved state.
     Can only be used for preprocessing or training jobs.
   max_n_nodes (int) : Maximum number of allowed nodes in graph. Must be greater
@@ -47,6 +62,13 @@ General settings for the generative model:
     added to graphs after generation is terminated.
   use_tensorboard (bool) : If specified, enables the use of tensorboard during training.
   tensorboard_dir (str) : Path to directory in which to write tensorboard things.
+  profiling (bool) : If specified, times each phase of the training/learning
+    steps (wall-clock time, CPU time and RSS), writing the timings to
+    "profile.csv", tensorboard, and the Chrome trace "profile_trace.json" in
+    the job directory.
+  torch_profiler_steps (list or None) : If specified, first and last step
+    (inclusive) to capture with `torch.profiler`, exported as the Chrome trace
+    "torch_trace.json" in the job directory.
 """
 # general job parameters
 params_dict = {
@@ -58,6 +80,13 @@ params_dict = {
     "generation_epoch": 115,
     "n_samples": 200,  #5000,
     "n_workers": 0,
+    "max_stitching_attempts": 10,
+    "n_stitching_workers": 0,
+    "fingerprint_backend": "numpy",
+    "fingerprint_cache_size": 100000,
+    "device": "auto",
+    "n_cpu_threads": None,
+    "n_interop_threads": None,
     "restart": False,
     "max_n_nodes": 50,
     "job_type": "train_0",
@@ -69,6 +98,8 @@ params_dict = {
     "use_explicit_H": False,
     "ignore_H": True,
     "tensorboard_dir": "tensorboard/",
+    "profiling": False,
+    "torch_profiler_steps": None,
     "generate_fragments":'*c1sccc1.s1cccc1*',
 }
 """ MPNN hyperparameters (common ones):
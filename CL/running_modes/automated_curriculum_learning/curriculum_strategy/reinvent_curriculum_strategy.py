@@ -49,6 +49,7 @@ class ReinventCurriculumStrategy(BaseCurriculumStrategy):
                                               merging_threshold=sf_configuration.score_threshold,prior=self._prior,optimizer=self._optimizer,
                                               )
             self.save_and_flush_memory(agent=self._agent, memory_name=f"_merge_{item_id}")
+        util.get_step_profiler().close()
         is_successful_curriculum = step_counter < self._parameters.max_num_iterations
         outcome_dto = CurriculumOutcomeDTO(self._agent, step_counter, successful_curriculum=is_successful_curriculum)
 
@@ -58,23 +59,30 @@ class ReinventCurriculumStrategy(BaseCurriculumStrategy):
 
     def take_step(self, agent: GenerativeModelBase, scoring_function: BaseScoringFunction,
                   step:int, start_time: float,prior,optimizer) -> float:
+        with util.get_step_profiler().step(step):
+            return self._take_step(agent=agent, scoring_function=scoring_function, step=step,
+                                   start_time=start_time, prior=prior, optimizer=optimizer)
 
-        
+    def _take_step(self, agent: GenerativeModelBase, scoring_function: BaseScoringFunction,
+                   step:int, start_time: float,prior,optimizer) -> float:
+
+        profiler = util.get_step_profiler()
         #generate problems
         self.start_time = time.time()
         self.get_ts_properties()
-        g, a, p, t ,two_idx_agent,two_idx_prior= generate.build_graphs(agent_model=agent,
-                                           prior_model=prior,
-                                           n_graphs_to_generate=self.C.batch_size,
-                                           batch_size=self.C.batch_size,
-                                           mols_too=True
-                                          )
+        with profiler.span("generation"):
+            g, a, p, t ,two_idx_agent,two_idx_prior= generate.build_graphs(agent_model=agent,
+                                               prior_model=prior,
+                                               n_graphs_to_generate=self.C.batch_size,
+                                               batch_size=self.C.batch_size,
+                                               mols_too=True
+                                              )
 
         smi_list = []
         from rdkit import Chem
         from rdkit.Chem import AllChem
         import random
-        validity_tensor = torch.zeros(len(g[0]), device="cuda")
+        validity_tensor = torch.zeros(len(g[0]), device=C.device)
 
         for idxm, molecular_graph in enumerate(g[0]):
             try:
@@ -85,65 +93,20 @@ class ReinventCurriculumStrategy(BaseCurriculumStrategy):
                 Chem.SanitizeMol(mol)
             except (ValueError, RuntimeError, AttributeError):
                 smi_list.append('C')
+        # join the linkers to the fragments; molecules which could not be
+        # stitched get the fragments joined without a linker, and stay invalid
+        fragments_smi = self.C.generate_fragments
+        with profiler.span("stitching"):
+            stitch_results = util.stitch_linkers(fragments_smi, smi_list, two_idx_agent.tolist())
         connect_smi_list = []
-        for id,atom_idx in enumerate(two_idx):
-            try:
-                fragments_smi = self.C.generate_fragments
-                fragments = Chem.MolFromSmiles(fragments_smi)
-                linker_smi_1 = smi_list[id]
-                
-                linker = Chem.MolFromSmiles(linker_smi_1)
-                #connect
-                combo = Chem.CombineMols(fragments,linker)
-                idx_list = []
-                for atom in fragments.GetAtoms():
-                    if atom.GetSymbol() == '*':
-                        f2 = atom.GetIdx()
-                        idx_list.append(f2)
-
-                du = Chem.MolFromSmiles('*')
-                combo = AllChem.DeleteSubstructs(combo,du)
-                edcombo = Chem.EditableMol(combo)
-                try:
-                    edcombo.AddBond(idx_list[0],atom_idx[0]+idx_list[1]-2,order=Chem.rdchem.BondType.SINGLE)
-                    edcombo.AddBond(idx_list[1]-2,atom_idx[1]+idx_list[1]-2,order=Chem.rdchem.BondType.SINGLE)
-                    final_connect_mol = edcombo.GetMol()
-                except:
-            
-                    fragment_smi_0 = fragments_smi.split('.')[0]
-                    fragment_smi_1 = fragments_smi.split('.')[1]
-                    
-                    match = '****sfs'
-                    for _ in range(1000):
-                        if not Chem.MolFromSmiles(match):
-                            s = linker_smi_1
-                            inStr = "(*)"
-                            for i in range(2):
-                                index = random.randint(0, len(s))
-                                s = "".join([s[:index], inStr, s[index:]])
-                            match = s
-                        else:
-                            break
-                    smi_linker = []
-                    for _ in range(1000):
-                        smi_link = Chem.MolToSmiles(Chem.MolFromSmiles(s), doRandom=True)
-                        if smi_link[0] == "*" and smi_link[-1] == '*':
-                            smi_linker.append(smi_link)
-                    
-                        
-                    final_smi = (fragment_smi_1 + smi_linker[0] + fragment_smi_0).replace("*", "")
-
-                    final_connect_mol = Chem.MolFromSmiles(final_smi)
-                    
-                final_connect_smi = Chem.MolToSmiles(final_connect_mol)
-                validity_tensor[idx] = 1
-
-            except:
+        for id, result in enumerate(stitch_results):
+            if result.smiles is None:
                 fragment_smi_0 = fragments_smi.split('.')[0]
                 fragment_smi_1 = fragments_smi.split('.')[1]
-                    
-                final_connect_smi = (fragment_smi_1 + fragment_smi_0).replace("*", "")
-            connect_smi_list.append(final_connect_smi)
+                connect_smi_list.append((fragment_smi_1 + fragment_smi_0).replace("*", ""))
+            else:
+                connect_smi_list.append(result.smiles)
+                validity_tensor[id] = 1
             
 
         
@@ -158,36 +121,42 @@ class ReinventCurriculumStrategy(BaseCurriculumStrategy):
 
 
         # analyze properties of new graphs and save results
-        validity_linker_tensor, linker_smiles = anal.evaluate_generated_graphs(generated_graphs=g[0],
-                                                                termination=t,
-                                                                agent_lls=a,
-                                                                prior_lls=p,
-                                                                start_time=self.start_time,
-                                                                ts_properties=self.ts_properties,
-                                                                generation_batch_idx=idx)
+        with profiler.span("evaluation"):
+            validity_linker_tensor, linker_smiles = anal.evaluate_generated_graphs(generated_graphs=g[0],
+                                                                    termination=t,
+                                                                    agent_lls=a,
+                                                                    prior_lls=p,
+                                                                    start_time=self.start_time,
+                                                                    ts_properties=self.ts_properties,
+                                                                    generation_batch_idx=idx)
 
         uniqueness_tensor = util.get_unique_tensor(connect_smi_list)
         # score = compute_score(g[1], t, validity_tensor, uniqueness_tensor, connect_smi_list, self.drd2_model)
         
         
         
-        score, score_summary = self._scoring(scoring_function, connect_smi_list, step)
-        score_tensor = torch.tensor(score)
-        augmented_likelihood = p + C.sigma*score_tensor
-        loss = (1-self.C.alpha) * torch.mean(self.compute_loss(score_tensor, a, p, uniqueness_tensor))  
-
-        self._logging(agent=agent, start_time=self.start_time, step=step,
-                      score_summary=score_summary, agent_likelihood=a,
-                      prior_likelihood=p, augmented_likelihood=augmented_likelihood)
+        with profiler.span("scoring"):
+            score, score_summary = self._scoring(scoring_function, connect_smi_list, step)
+        with profiler.span("loss"):
+            score_tensor = torch.tensor(score)
+            augmented_likelihood = p + C.sigma*score_tensor
+            loss = (1-self.C.alpha) * torch.mean(self.compute_loss(score_tensor, a, p, uniqueness_tensor))  
+
+        with profiler.span("logging"):
+            self._logging(agent=agent, start_time=self.start_time, step=step,
+                          score_summary=score_summary, agent_likelihood=a,
+                          prior_likelihood=p, augmented_likelihood=augmented_likelihood)
 
         score_write = torch.mean(torch.clone(score_tensor)).item()
         loss_write = torch.clone(loss)
         a_write = torch.clone(a)
         p_write = torch.clone(p)
         optimizer.zero_grad()
-        loss.backward()
+        with profiler.span("backward"):
+            loss.backward()
 
-        optimizer.step()
+        with profiler.span("optimizer"):
+            optimizer.step()
 
         score = score.mean()
         return score
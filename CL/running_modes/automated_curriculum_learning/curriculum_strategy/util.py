@@ -491,7 +491,7 @@ def write_graphs_to_smi(smi_filename, molecular_graphs_list):
     """ Writes the `TrainingGraph`s in `molecular_graphs_list` to a SMILES
     file, where the full path/filename is specified by `smi_filename`.
     """
-    validity_tensor = torch.zeros(len(molecular_graphs_list), device="cuda")
+    validity_tensor = torch.zeros(len(molecular_graphs_list), device=C.device)
     smiles = []
 
     with open(smi_filename, "w") as smi_file:
@@ -632,7 +632,7 @@ def write_validity(validity_file_path, validity_tensor):
 
 def get_unique_tensor(smiles):
 
-    unique_tensor = torch.ones(len(smiles), device="cuda")
+    unique_tensor = torch.ones(len(smiles), device=C.device)
     smiles_set = []
 
     for idx, smile in enumerate(smiles):
@@ -5,13 +5,14 @@ from typing import Tuple, List
 from reinvent_chemistry.conversions import Conversions
 
 from running_modes.configurations import InceptionConfiguration
+from running_modes.reinforcement_learning.inception_memory import InceptionMemory
 
 
 class Inception:
     def __init__(self, configuration: InceptionConfiguration, scoring_function, prior):
         self.configuration = configuration
         self._chemistry = Conversions()
-        self.memory: pd.DataFrame = pd.DataFrame(columns=['smiles', 'score', 'likelihood'])
+        self._memory = InceptionMemory(self.configuration.memory_size)
         self._load_to_memory(scoring_function, prior, self.configuration.smiles)
 
 
@@ -21,30 +22,28 @@ class Inception:
             standardized = [smile for smile in standardized_and_nulls if smile is not None]
             self.evaluate_and_add(standardized, scoring_function, prior)
 
-    def _purge_memory(self):
-        unique_df = self.memory.drop_duplicates(subset=["smiles"])
-        sorted_df = unique_df.sort_values('score', ascending=False)
-        self.memory = sorted_df.head(self.configuration.memory_size)
+    @property
+    def memory(self) -> pd.DataFrame:
+        """The memory as a table with the columns "smiles", "score" and "likelihood", best scores first."""
+        return self._memory.as_dataframe()
+
+    def save_memory(self, path: str):
+        self._memory.save(path)
+
+    def load_memory(self, path: str):
+        self._memory = InceptionMemory.load(path, capacity=self.configuration.memory_size)
 
     def evaluate_and_add(self, smiles, scoring_function, prior):
         if len(smiles) > 0:
             score = scoring_function.get_final_score(smiles)
             likelihood = prior.likelihood_smiles(smiles)
-            df = pd.DataFrame({"smiles": smiles, "score": score.total_score, "likelihood": -likelihood.detach().cpu().numpy()})
-            self.memory = self.memory.append(df)
-            self._purge_memory()
+            self._memory.add(smiles, score.total_score, -likelihood.detach().cpu().numpy())
 
     def add(self, smiles, score, neg_likelihood):
-        df = pd.DataFrame({"smiles": smiles, "score": score, "likelihood": neg_likelihood.detach().cpu().numpy()})
-        self.memory = self.memory.append(df)
-        self._purge_memory()
+        self._memory.add(smiles, score, neg_likelihood.detach().cpu().numpy())
 
     def sample(self) -> Tuple[List[str], np.array, np.array]:
-        sample_size = min(len(self.memory), self.configuration.sample_size)
+        sample_size = min(len(self._memory), self.configuration.sample_size)
         if sample_size > 0:
-            sampled = self.memory.sample(sample_size)
-            smiles = sampled["smiles"].values
-            scores = sampled["score"].values
-            prior_likelihood = sampled["likelihood"].values
-            return smiles, scores, prior_likelihood
+            return self._memory.sample(sample_size)
         return [], [], []
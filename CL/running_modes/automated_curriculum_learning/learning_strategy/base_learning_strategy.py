@@ -28,10 +28,9 @@ class BaseLearningStrategy(ABC):
     def _calculate_loss(self, *args, **kwargs):
         raise NotImplementedError("_calculate_loss() method is not implemented")
 
-    def _to_tensor(self, array, use_cuda=True):
-        if torch.cuda.is_available() and use_cuda:
-            return torch.tensor(array, device=torch.device("cuda"))
-        return torch.tensor(array, device=torch.device("cpu"))
+    def _to_tensor(self, array, device):
+        # allocate next to the (NLL) tensors which the array is combined with
+        return torch.tensor(array, device=device)
 
     def _disable_prior_gradients(self):
         # There might be a more elegant way of disabling gradients
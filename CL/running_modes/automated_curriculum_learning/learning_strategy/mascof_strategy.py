@@ -21,7 +21,7 @@ class MASCOFStrategy(BaseDoubleQueryLearningStrategy):
         critic_nlls = self.critic_model.likelihood(*batch.input, *batch.output)
         negative_critic_nlls = -critic_nlls
         negative_actor_nlls = -likelihood_dto.likelihood
-        augmented_nlls = self._to_tensor(score)
-        loss = -torch.sum(self._to_tensor(score)) * torch.sum(negative_actor_nlls)
+        augmented_nlls = self._to_tensor(score, negative_actor_nlls.device)
+        loss = -torch.sum(self._to_tensor(score, negative_actor_nlls.device)) * torch.sum(negative_actor_nlls)
         dto = UpdatedLikelihoodsDTO(negative_actor_nlls, negative_critic_nlls, augmented_nlls, loss)
         return dto
\ No newline at end of file
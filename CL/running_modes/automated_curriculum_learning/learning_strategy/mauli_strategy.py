@@ -23,7 +23,7 @@ class MAULIStrategy(BaseDoubleQueryLearningStrategy):
         critic_nlls = self.critic_model.likelihood(*batch.input, *batch.output)
         negative_critic_nlls = -critic_nlls
         negative_actor_nlls = -likelihood_dto.likelihood
-        augmented_nlls = negative_critic_nlls + self._sigma * self._to_tensor(score)
+        augmented_nlls = negative_critic_nlls + self._sigma * self._to_tensor(score, negative_actor_nlls.device)
         loss = -(sum(augmented_nlls) * sum(negative_actor_nlls))
         dto = UpdatedLikelihoodsDTO(negative_actor_nlls, negative_critic_nlls, augmented_nlls, loss)
         return dto
\ No newline at end of file
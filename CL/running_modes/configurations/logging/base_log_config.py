@@ -1,6 +1,8 @@
 from typing import Optional
 from pydantic import BaseModel
 
+from running_modes.enums.remote_logging_drop_policy_enum import RemoteLoggingDropPolicyEnum
+
 
 class BaseLoggerConfiguration(BaseModel):
     recipient: str
@@ -8,3 +10,10 @@ class BaseLoggerConfiguration(BaseModel):
     sender: str = ""
     job_name: str = "default_name"
     job_id: Optional[str] = ""
+    # remote logging: records are posted asynchronously, in batches of up to "remote_batch_size" records
+    remote_queue_size: int = 1000
+    remote_batch_size: int = 1
+    remote_max_retries: int = 3
+    remote_backoff_seconds: float = 1.0
+    remote_timeout_seconds: float = 10.0
+    remote_drop_policy: str = RemoteLoggingDropPolicyEnum.DROP_OLDEST
@@ -55,7 +55,7 @@ class CurriculumLearningModeConstructor:
         base_config = BaseConfiguration.parse_obj(self._configuration.parameters)
 
         if base_config.curriculum_type == cl_enum.MANUAL:
-            set_default_device_cuda()
+            set_default_device_cuda(dont_use_cuda=C.device == "cpu")
             runner = CurriculumRunner(self._configuration)
         elif base_config.curriculum_type == cl_enum.AUTOMATED:
             
@@ -144,7 +144,7 @@ class CurriculumLearningModeConstructor:
         base_config = BaseConfiguration.parse_obj(self._configuration.parameters)
 
         if base_config.curriculum_type == cl_enum.MANUAL:
-            set_default_device_cuda()
+            set_default_device_cuda(dont_use_cuda=C.device == "cpu")
             runner = CurriculumRunner(self._configuration)
         elif base_config.curriculum_type == cl_enum.AUTOMATED:
             
@@ -162,10 +162,10 @@ class CurriculumLearningModeConstructor:
         start_epoch, end_epoch = self.define_model_and_optimizer()
 
         if model_type.DEFAULT == configuration.model_type:
-            set_default_device_cuda()
+            set_default_device_cuda(dont_use_cuda=C.device == "cpu")
             config = AutomatedCurriculumLearningInputConfiguration.parse_obj(configuration.parameters)
         elif model_type.LINK_INVENT == configuration.model_type:
-            set_default_device_cuda()
+            set_default_device_cuda(dont_use_cuda=C.device == "cpu")
             config = AutomatedCurriculumLearningInputConfiguration.parse_obj(configuration.parameters)
         else:
             raise KeyError(f"Incorrect model type: `{configuration.model_type}` provided")
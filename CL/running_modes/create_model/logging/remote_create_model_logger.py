@@ -1,10 +1,11 @@
-import requests
-
 from running_modes.create_model.logging.base_create_model_logger import BaseCreateModelLogger
-from running_modes.configurations.logging import get_remote_logging_auth_token
+from running_modes.utils.remote_logging_transport import RemoteLoggingTransport
 
 
 class RemoteCreateModelLogger(BaseCreateModelLogger):
+    def __init__(self, configuration):
+        super().__init__(configuration)
+        self._transports = {}
 
     def log_message(self, message: str):
         data = {"Message": message}
@@ -12,20 +13,8 @@ class RemoteCreateModelLogger(BaseCreateModelLogger):
         self._notify_server(data, f"{self._log_config.recipient}/jobLog/log-id/{self._log_config.job_id}")
 
     def _notify_server(self, data, to_address):
-        """This is called every time we are posting data to server"""
-        try:
-            self._common_logger.warning(f"posting to {to_address}")
-            headers = {
-                'Accept': 'application/json', 'Content-Type': 'application/json',
-                'Authorization': get_remote_logging_auth_token()
-            }
-            response = requests.post(to_address, json=data, headers=headers)
-
-            if response.status_code == requests.codes.ok:
-                self._common_logger.warning(f"SUCCESS: {response.status_code}")
-            else:
-                self._common_logger.warning(f"PROBLEM: {response.status_code}")
-        except Exception as e:
-            self._common_logger.error("Exception occurred", exc_info=True)
-            self._common_logger.error(f"Attempted posting the following data:")
-            self._common_logger.error(data, exc_info=False)
+        """This is called every time we are posting data to server; the data is posted in the background"""
+        if to_address not in self._transports:
+            self._transports[to_address] = RemoteLoggingTransport.from_configuration(to_address, self._log_config,
+                                                                                      self._common_logger)
+        self._transports[to_address].send(data)
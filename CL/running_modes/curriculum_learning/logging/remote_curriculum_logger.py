@@ -1,7 +1,6 @@
 import os
 
 import numpy as np
-import requests
 import torch
 
 import running_modes.utils.configuration as ull
@@ -12,7 +11,7 @@ from running_modes.curriculum_learning.logging import BaseCurriculumLogger
 from reinvent_scoring.scoring.diversity_filters.reinvent_core.base_diversity_filter import BaseDiversityFilter
 from reinvent_scoring.scoring.score_summary import FinalSummary
 from reinvent_scoring.scoring.enums.scoring_function_component_enum import ScoringFunctionComponentNameEnum
-from running_modes.configurations.logging import get_remote_logging_auth_token
+from running_modes.utils.remote_logging_transport import RemoteLoggingTransport
 
 
 class RemoteCurriculumLogger(BaseCurriculumLogger):
@@ -23,6 +22,7 @@ class RemoteCurriculumLogger(BaseCurriculumLogger):
         self._sample_size = self._rows * self._columns
         self._sf_component_enum = ScoringFunctionComponentNameEnum()
         self._is_dev = ull._is_development_environment()
+        self._transports = {}
 
     def log_message(self, message: str):
         self._logger.info(message)
@@ -45,27 +45,11 @@ class RemoteCurriculumLogger(BaseCurriculumLogger):
         self.save_diversity_memory(scaffold_filter)
 
     def _notify_server(self, data, to_address):
-        """This is called every time we are posting data to server"""
-        try:
-            self._logger.warning(f"posting to {to_address}")
-            headers = {
-                'Accept': 'application/json', 'Content-Type': 'application/json',
-                'Authorization': get_remote_logging_auth_token()
-            }
-            response = requests.post(to_address, json=data, headers=headers)
-
-            if self._is_dev:
-                """logs out the response content only when running a test instance"""
-                if response.status_code == requests.codes.ok:
-                    self._logger.info(f"SUCCESS: {response.status_code}")
-                    self._logger.info(response.content)
-                else:
-                    self._logger.info(f"PROBLEM: {response.status_code}")
-                    self._logger.exception(data, exc_info=False)
-        except Exception as t_ex:
-            self._logger.exception("Exception occurred", exc_info=True)
-            self._logger.exception(f"Attempted posting the following data:")
-            self._logger.exception(data, exc_info=False)
+        """This is called every time we are posting data to server; the data is posted in the background"""
+        if to_address not in self._transports:
+            self._transports[to_address] = RemoteLoggingTransport.from_configuration(to_address, self._log_config,
+                                                                                      self._logger, self._is_dev)
+        self._transports[to_address].send(data)
 
     def _get_matching_substructure_from_config(self, score_summary: FinalSummary):
         smarts_pattern = ""
@@ -0,0 +1,92 @@
+import heapq
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class InceptionMemory:
+    """Fixed-capacity memory of the best scoring SMILES, with their scores and (negative) prior likelihoods.
+
+    Scores and likelihoods are stored in preallocated arrays of "capacity" slots; a SMILES -> slot map rejects
+    duplicates (the SMILES already in memory is kept) and a min-heap over the scores of the filled slots finds the
+    entry to evict, once the memory is full and a better scoring SMILES is added. Adding a batch of n SMILES thus
+    takes O(n log(capacity)) time, instead of re-sorting the whole memory, and sampling draws slot indices only."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._smiles = np.empty(capacity, dtype=object)
+        self._scores = np.zeros(capacity, dtype=np.float64)
+        self._likelihoods = np.zeros(capacity, dtype=np.float64)
+        self._slot_of = {}
+        # (score, insertion counter, slot) of every filled slot; the counter breaks ties in favour of older entries
+        self._heap = []
+        self._counter = 0
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def __contains__(self, smile: str):
+        return smile in self._slot_of
+
+    def add(self, smiles, scores, likelihoods):
+        """Add a batch of SMILES, keeping the "capacity" best scoring unique SMILES."""
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        likelihoods = np.asarray(likelihoods, dtype=np.float64).reshape(-1)
+        if len(smiles) != len(scores) or len(smiles) != len(likelihoods):
+            raise ValueError("The number of SMILES, scores and likelihoods must be equal.")
+        if self.capacity <= 0 or len(smiles) == 0:
+            return
+
+        candidates = np.arange(len(smiles))
+        if len(self) == self.capacity:
+            # when the memory is full, only SMILES scoring better than the worst entry can get in
+            candidates = candidates[scores > self._heap[0][0]]
+        for idx in candidates:
+            self._add_one(smiles[idx], scores[idx], likelihoods[idx])
+
+    def _add_one(self, smile: str, score: float, likelihood: float):
+        if smile in self._slot_of:
+            return
+        if len(self) < self.capacity:
+            slot = len(self)
+            heapq.heappush(self._heap, (score, self._counter, slot))
+        else:
+            if score <= self._heap[0][0]:
+                return
+            _, _, slot = heapq.heapreplace(self._heap, (score, self._counter, self._heap[0][2]))
+            del self._slot_of[self._smiles[slot]]
+        self._counter += 1
+        self._slot_of[smile] = slot
+        self._smiles[slot] = smile
+        self._scores[slot] = score
+        self._likelihoods[slot] = likelihood
+
+    def sample(self, sample_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the SMILES, scores and likelihoods of "sample_size" distinct entries drawn at random."""
+        sample_size = min(len(self), sample_size)
+        slots = np.random.choice(len(self), sample_size, replace=False)
+        return self._smiles[slots], self._scores[slots], self._likelihoods[slots]
+
+    def as_dataframe(self) -> pd.DataFrame:
+        """Return the memory as a table with the columns "smiles", "score" and "likelihood", best scores first."""
+        size = len(self)
+        order = np.argsort(-self._scores[:size], kind="stable")
+        return pd.DataFrame({"smiles": self._smiles[:size][order],
+                             "score": self._scores[:size][order],
+                             "likelihood": self._likelihoods[:size][order]},
+                            columns=["smiles", "score", "likelihood"])
+
+    def save(self, path: str):
+        """Write a snapshot of the memory to a ".npz" file, which can be read with "InceptionMemory.load()"."""
+        size = len(self)
+        np.savez(path, capacity=self.capacity, smiles=self._smiles[:size].astype(str),
+                 scores=self._scores[:size], likelihoods=self._likelihoods[:size])
+
+    @classmethod
+    def load(cls, path: str, capacity: int = None) -> "InceptionMemory":
+        """Read a snapshot written by "save()"; a different capacity keeps the best scoring entries only."""
+        with np.load(path, allow_pickle=False) as snapshot:
+            memory = cls(int(snapshot["capacity"]) if capacity is None else capacity)
+            memory.add(snapshot["smiles"].tolist(), snapshot["scores"], snapshot["likelihoods"])
+        return memory
@@ -19,7 +19,7 @@ class DAPStrategy(BaseLearningStrategy):
         critic_nlls = self.critic_model.likelihood(*scaffold_batch, *decorator_batch)
         negative_critic_nlls = -critic_nlls
         negative_actor_nlls = -actor_nlls
-        augmented_nlls = negative_critic_nlls + self._sigma * self._to_tensor(score)
+        augmented_nlls = negative_critic_nlls + self._sigma * self._to_tensor(score, negative_actor_nlls.device)
         loss = torch.pow((augmented_nlls - negative_actor_nlls), 2)
         loss = loss.mean()
         return loss, negative_actor_nlls, negative_critic_nlls, augmented_nlls
@@ -18,7 +18,7 @@ class MASCOFStrategy(BaseLearningStrategy):
         critic_nlls = self.critic_model.likelihood(*scaffold_batch, *decorator_batch)
         negative_critic_nlls = -critic_nlls
         negative_actor_nlls = -actor_nlls
-        augmented_nlls = self._to_tensor(score)
+        augmented_nlls = self._to_tensor(score, negative_actor_nlls.device)
 
-        loss = -torch.sum(self._to_tensor(score)) * torch.sum(negative_actor_nlls)
+        loss = -torch.sum(self._to_tensor(score, negative_actor_nlls.device)) * torch.sum(negative_actor_nlls)
         return loss, negative_actor_nlls, negative_critic_nlls, augmented_nlls
\ No newline at end of file
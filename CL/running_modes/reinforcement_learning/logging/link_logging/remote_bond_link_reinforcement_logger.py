@@ -1,6 +1,5 @@
 import os
 import numpy as np
-import requests
 import torch
 from reinvent_scoring import ScoringFunctionComponentNameEnum, FinalSummary, ComponentSpecificParametersEnum
 from reinvent_scoring.scoring.diversity_filters.lib_invent.base_diversity_filter import BaseDiversityFilter
@@ -9,8 +8,8 @@ import running_modes.utils.configuration as ull
 import reinvent_chemistry.logging as ul_rl
 import running_modes.utils.general as ul_gen
 
-from running_modes.configurations import GeneralConfigurationEnvelope, ReinforcementLoggerConfiguration, \
-    get_remote_logging_auth_token
+from running_modes.configurations import GeneralConfigurationEnvelope, ReinforcementLoggerConfiguration
+from running_modes.utils.remote_logging_transport import RemoteLoggingTransport
 from running_modes.reinforcement_learning.logging.link_logging.base_reinforcement_logger import BaseReinforcementLogger
 
 
@@ -23,6 +22,7 @@ class RemoteLinkReinforcementLogger(BaseReinforcementLogger):
         self._sf_component_enum = ScoringFunctionComponentNameEnum()
         self._specific_parameters_enum = ComponentSpecificParametersEnum()
         self._is_dev = ull._is_development_environment()
+        self._transports = {}
 
     def log_message(self, message: str):
         self._logger.info(message)
@@ -51,27 +51,11 @@ class RemoteLinkReinforcementLogger(BaseReinforcementLogger):
         self.log_out_input_configuration()
 
     def _notify_server(self, data, to_address):
-        """This is called every time we are posting data to server"""
-        try:
-            self._logger.warning(f"posting to {to_address}")
-            headers = {
-                'Accept': 'application/json', 'Content-Type': 'application/json',
-                'Authorization': get_remote_logging_auth_token()
-            }
-            response = requests.post(to_address, json=data, headers=headers)
-
-            if self._is_dev:
-                """logs out the response content only when running a test instance"""
-                if response.status_code == requests.codes.ok:
-                    self._logger.info(f"SUCCESS: {response.status_code}")
-                    self._logger.info(response.content)
-                else:
-                    self._logger.info(f"PROBLEM: {response.status_code}")
-                    self._logger.exception(data, exc_info=False)
-        except Exception as t_ex:
-            self._logger.exception("Exception occurred", exc_info=True)
-            self._logger.exception(f"Attempted posting the following data:")
-            self._logger.exception(data, exc_info=False)
+        """This is called every time we are posting data to server; the data is posted in the background"""
+        if to_address not in self._transports:
+            self._transports[to_address] = RemoteLoggingTransport.from_configuration(to_address, self._log_config,
+                                                                                      self._logger, self._is_dev)
+        self._transports[to_address].send(data)
 
     def _get_matching_substructure_from_config(self, score_summary: FinalSummary):
         smarts_pattern = ""
@@ -2,7 +2,6 @@ import os
 
 import numpy as np
 import reinvent_chemistry.logging as ul_rl
-import requests
 import torch
 from reinvent_scoring.scoring.diversity_filters.reinvent_core.base_diversity_filter import BaseDiversityFilter
 from reinvent_scoring.scoring.enums.scoring_function_component_enum import ScoringFunctionComponentNameEnum
@@ -13,7 +12,7 @@ import running_modes.utils.general
 from running_modes.configurations import ReinforcementLoggerConfiguration
 from running_modes.configurations.general_configuration_envelope import GeneralConfigurationEnvelope
 from running_modes.reinforcement_learning.logging.base_reinforcement_logger import BaseReinforcementLogger
-from running_modes.configurations.logging import get_remote_logging_auth_token
+from running_modes.utils.remote_logging_transport import RemoteLoggingTransport
 
 
 class RemoteReinforcementLogger(BaseReinforcementLogger):
@@ -24,6 +23,7 @@ class RemoteReinforcementLogger(BaseReinforcementLogger):
         self._sample_size = self._rows * self._columns
         self._sf_component_enum = ScoringFunctionComponentNameEnum()
         self._is_dev = ull._is_development_environment()
+        self._transports = {}
 
     def log_message(self, message: str):
         self._logger.info(message)
@@ -47,27 +47,11 @@ class RemoteReinforcementLogger(BaseReinforcementLogger):
         self.log_out_input_configuration()
 
     def _notify_server(self, data, to_address):
-        """This is called every time we are posting data to server"""
-        try:
-            self._logger.warning(f"posting to {to_address}")
-            headers = {
-                'Accept': 'application/json', 'Content-Type': 'application/json',
-                'Authorization': get_remote_logging_auth_token()
-            }
-            response = requests.post(to_address, json=data, headers=headers)
-
-            if self._is_dev:
-                """logs out the response content only when running a test instance"""
-                if response.status_code == requests.codes.ok:
-                    self._logger.info(f"SUCCESS: {response.status_code}")
-                    self._logger.info(response.content)
-                else:
-                    self._logger.info(f"PROBLEM: {response.status_code}")
-                    self._logger.exception(data, exc_info=False)
-        except Exception as t_ex:
-            self._logger.exception("Exception occurred", exc_info=True)
-            self._logger.exception(f"Attempted posting the following data:")
-            self._logger.exception(data, exc_info=False)
+        """This is called every time we are posting data to server; the data is posted in the background"""
+        if to_address not in self._transports:
+            self._transports[to_address] = RemoteLoggingTransport.from_configuration(to_address, self._log_config,
+                                                                                      self._logger, self._is_dev)
+        self._transports[to_address].send(data)
 
     def _get_matching_substructure_from_config(self, score_summary: FinalSummary):
         smarts_pattern = ""
@@ -1,38 +1,21 @@
-import requests
-
 import running_modes.utils.configuration as utils_log
 from running_modes.configurations.general_configuration_envelope import GeneralConfigurationEnvelope
 from running_modes.scoring.logging.base_scoring_logger import BaseScoringLogger
-from running_modes.configurations.logging import get_remote_logging_auth_token
+from running_modes.utils.remote_logging_transport import RemoteLoggingTransport
 
 
 class RemoteScoringLogger(BaseScoringLogger):
     def __init__(self, configuration: GeneralConfigurationEnvelope):
         super().__init__(configuration)
         self._is_dev = utils_log._is_development_environment()
+        self._transports = {}
 
     def log_message(self, message: str):
         self._logger.info(message)
 
     def _notify_server(self, data, to_address):
-        """This is called every time we are posting data to server"""
-        try:
-            self._logger.warning(f"posting to {to_address}")
-            headers = {
-                'Accept': 'application/json', 'Content-Type': 'application/json',
-                'Authorization': get_remote_logging_auth_token()
-            }
-            response = requests.post(to_address, json=data, headers=headers)
-
-            if self._is_dev:
-                """logs out the response content only when running a test instance"""
-                if response.status_code == requests.codes.ok:
-                    self._logger.info(f"SUCCESS: {response.status_code}")
-                    self._logger.info(response.content)
-                else:
-                    self._logger.info(f"PROBLEM: {response.status_code}")
-                    self._logger.exception(data, exc_info=False)
-        except Exception as t_ex:
-            self._logger.exception("Exception occurred", exc_info=True)
-            self._logger.exception(f"Attempted posting the following data:")
-            self._logger.exception(data, exc_info=False)
\ No newline at end of file
+        """This is called every time we are posting data to server; the data is posted in the background"""
+        if to_address not in self._transports:
+            self._transports[to_address] = RemoteLoggingTransport.from_configuration(to_address, self._log_config,
+                                                                                      self._logger, self._is_dev)
+        self._transports[to_address].send(data)
@@ -1,12 +1,11 @@
 import numpy as np
-import requests
 from reinvent_chemistry.conversions import Conversions
 
 import running_modes.utils.configuration as utils_log
 from reinvent_chemistry.logging import fraction_valid_smiles
 from running_modes.configurations.general_configuration_envelope import GeneralConfigurationEnvelope
 from running_modes.transfer_learning.logging.base_transfer_learning_logger import BaseTransferLearningLogger
-from running_modes.configurations.logging import get_remote_logging_auth_token
+from running_modes.utils.remote_logging_transport import RemoteLoggingTransport
 
 
 class RemoteTransferLearningLogger(BaseTransferLearningLogger):
@@ -14,33 +13,18 @@ class RemoteTransferLearningLogger(BaseTransferLearningLogger):
     def __init__(self, configuration: GeneralConfigurationEnvelope):
         super().__init__(configuration)
         self._is_dev = utils_log._is_development_environment()
+        self._transports = {}
         self._conversions = Conversions()
 
     def log_message(self, message: str):
         self._logger.info(message)
 
     def _notify_server(self, data, to_address):
-        """This is called every time we are posting data to server"""
-        try:
-            self._logger.warning(f"posting to {to_address}")
-            headers = {
-                'Accept': 'application/json', 'Content-Type': 'application/json',
-                'Authorization': get_remote_logging_auth_token()
-            }
-            response = requests.post(to_address, json=data, headers=headers)
-
-            if self._is_dev:
-                """logs out the response content only when running a test instance"""
-                if response.status_code == requests.codes.ok:
-                    self._logger.info(f"SUCCESS: {response.status_code}")
-                    self._logger.info(response.content)
-                else:
-                    self._logger.info(f"PROBLEM: {response.status_code}")
-                    self._logger.exception(data, exc_info=False)
-        except Exception as t_ex:
-            self._logger.exception("Exception occurred", exc_info=True)
-            self._logger.exception(f"Attempted posting the following data:")
-            self._logger.exception(data, exc_info=False)
+        """This is called every time we are posting data to server; the data is posted in the background"""
+        if to_address not in self._transports:
+            self._transports[to_address] = RemoteLoggingTransport.from_configuration(to_address, self._log_config,
+                                                                                      self._logger, self._is_dev)
+        self._transports[to_address].send(data)
 
     def log_timestep(self, lr, epoch, sampled_smiles, sampled_nlls,
                      validation_nlls, training_nlls, jsd_data, jsd_joined_data, model, model_path):
@@ -0,0 +1,189 @@
+import atexit
+import queue
+import threading
+import time
+
+import requests
+
+from running_modes.configurations.logging.base_log_config import BaseLoggerConfiguration
+from running_modes.configurations.logging.remote_logging import get_remote_logging_auth_token
+from running_modes.enums.remote_logging_drop_policy_enum import RemoteLoggingDropPolicyEnum
+
+
+class _ControlRecord:
+    """Placed on the queue to make the background thread post everything before it and signal "done"."""
+    def __init__(self, stop: bool):
+        self.stop = stop
+        self.done = threading.Event()
+
+
+class RemoteLoggingTransport:
+    """Posts log records to a remote endpoint from a background thread, so that the caller (e.g. a reinforcement
+    learning step) never waits on the network. Records are placed on a bounded queue; the background thread posts
+    them in batches (a single record is posted as is, several records as a JSON list), retrying failed posts with
+    exponential backoff. When the queue is full, the oldest or the newest record is dropped, or the caller blocks,
+    depending on the drop policy. Pending records are flushed when the interpreter exits."""
+
+    def __init__(self, to_address: str, logger, is_dev=False, queue_size=1000, batch_size=1, max_retries=3,
+                 backoff_seconds=1.0, timeout_seconds=10.0,
+                 drop_policy=RemoteLoggingDropPolicyEnum.DROP_OLDEST):
+        policies = RemoteLoggingDropPolicyEnum()
+        if drop_policy not in [policies.DROP_OLDEST, policies.DROP_NEWEST, policies.BLOCK]:
+            raise ValueError(f"Unknown remote logging drop policy: {drop_policy}")
+        self._to_address = to_address
+        self._logger = logger
+        self._is_dev = is_dev
+        self._batch_size = max(batch_size, 1)
+        self._max_retries = max_retries
+        self._backoff_seconds = backoff_seconds
+        self._timeout_seconds = timeout_seconds
+        self._drop_policy = drop_policy
+        self._policies = policies
+
+        self.n_posted = 0
+        self.n_dropped = 0
+        self.n_failed = 0
+
+        # only the log records count towards the queue size (each holds a slot until the background thread takes
+        # it), so that the control records of flush() and close() are never dropped
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(max(queue_size, 1))
+        self._lock = threading.Lock()
+        self._closed = False
+        self._session = requests.Session()
+        self._thread = threading.Thread(target=self._run, name="remote-logging", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_configuration(cls, to_address: str, log_config: BaseLoggerConfiguration, logger, is_dev=False):
+        return cls(to_address, logger, is_dev=is_dev,
+                   queue_size=log_config.remote_queue_size,
+                   batch_size=log_config.remote_batch_size,
+                   max_retries=log_config.remote_max_retries,
+                   backoff_seconds=log_config.remote_backoff_seconds,
+                   timeout_seconds=log_config.remote_timeout_seconds,
+                   drop_policy=log_config.remote_drop_policy)
+
+    def send(self, data):
+        """Queue a record (any JSON-serializable object) for posting and return immediately (unless the queue is
+        full and the drop policy is to block)."""
+        if self._closed:
+            self._logger.warning("Remote logging transport is closed, dropping record.")
+            self.n_dropped += 1
+            return
+        if self._drop_policy == self._policies.BLOCK:
+            self._slots.acquire()
+            self._queue.put(data)
+            return
+
+        with self._lock:
+            if not self._slots.acquire(blocking=False):
+                self.n_dropped += 1
+                if self._drop_policy == self._policies.DROP_NEWEST:
+                    return
+                # drop the oldest record and take over its slot; if the background thread took it meanwhile, its
+                # slot is about to be freed
+                if not self._drop_oldest_record():
+                    self._slots.acquire()
+            self._queue.put(data)
+
+    def _drop_oldest_record(self) -> bool:
+        """Remove the oldest log record from the queue; return False if there is none. Control records taken on the
+        way are queued again, so that they still get signalled."""
+        controls = []
+        dropped = False
+        while not dropped:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _ControlRecord):
+                controls.append(item)
+            else:
+                dropped = True
+        for control in controls:
+            self._queue.put(control)
+        return dropped
+
+    def flush(self, timeout=None) -> bool:
+        """Wait until all records queued so far are posted (or given up on); return False on timeout."""
+        return self._put_control_record(stop=False, timeout=timeout)
+
+    def close(self, timeout=30.0) -> bool:
+        """Flush the pending records and stop the background thread; return False on timeout. Called automatically
+        at exit."""
+        if self._closed:
+            return True
+        self._closed = True
+        flushed = self._put_control_record(stop=True, timeout=timeout)
+        self._thread.join(timeout)
+        self._session.close()
+        return flushed
+
+    def _put_control_record(self, stop: bool, timeout) -> bool:
+        if not self._thread.is_alive():
+            return True
+        record = _ControlRecord(stop=stop)
+        self._queue.put(record)
+        return record.done.wait(timeout)
+
+    def _run(self):
+        while True:
+            # wait for the next record, then take whatever else is queued up to the batch size
+            batch = []
+            control = None
+            item = self._queue.get()
+            while True:
+                if isinstance(item, _ControlRecord):
+                    control = item
+                    break
+                self._slots.release()
+                batch.append(item)
+                if len(batch) >= self._batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if len(batch) > 0:
+                self._post(batch)
+            if control is not None:
+                control.done.set()
+                if control.stop:
+                    return
+
+    def _post(self, batch: list):
+        data = batch[0] if self._batch_size == 1 else batch
+        headers = {
+            'Accept': 'application/json', 'Content-Type': 'application/json',
+            'Authorization': get_remote_logging_auth_token()
+        }
+        for attempt in range(self._max_retries + 1):
+            if attempt > 0:
+                time.sleep(self._backoff_seconds * 2 ** (attempt - 1))
+            try:
+                response = self._session.post(self._to_address, json=data, headers=headers,
+                                              timeout=self._timeout_seconds)
+            except Exception:
+                self._logger.warning(f"Posting to {self._to_address} failed (attempt {attempt + 1}).", exc_info=True)
+                continue
+
+            if response.status_code == requests.codes.ok:
+                self.n_posted += len(batch)
+                if self._is_dev:
+                    """logs out the response content only when running a test instance"""
+                    self._logger.info(f"SUCCESS: {response.status_code}")
+                    self._logger.info(response.content)
+                return
+
+            self._logger.info(f"PROBLEM: {response.status_code}")
+            # client errors (apart from rate limiting) will not go away by retrying
+            if 400 <= response.status_code < 500 and response.status_code != requests.codes.too_many_requests:
+                break
+
+        self.n_failed += len(batch)
+        self._logger.error(f"Giving up posting {len(batch)} record(s) to {self._to_address}.")
+        if self._is_dev:
+            self._logger.error(data, exc_info=False)
@@ -19,20 +19,20 @@ def compute_score(graphs, termination_tensor, validity_tensor, uniqueness_tensor
         n_nodes = graphs[2]
         n_graphs = len(n_nodes)
         max_nodes = C.max_n_nodes
-        score = torch.ones(n_graphs, device="cuda") - torch.abs(n_nodes - 10.) / (max_nodes - 10 + 1)
+        score = torch.ones(n_graphs, device=C.device) - torch.abs(n_nodes - 10.) / (max_nodes - 10 + 1)
     
     elif C.score_type == "augment":
         # Augment size
         n_nodes = graphs[2].float()
         n_graphs = len(n_nodes)
         max_nodes = C.max_n_nodes
-        score = torch.ones(n_graphs, device="cuda") - torch.abs(n_nodes - 40.) / (max_nodes - 40)
+        score = torch.ones(n_graphs, device=C.device) - torch.abs(n_nodes - 40.) / (max_nodes - 40)
         
     
     elif C.score_type == "qed":
         # QED
         score = [QED.qed(MolFromSmiles(smi)) for smi in smiles]
-        score = torch.tensor(score, device="cuda")
+        score = torch.tensor(score, device=C.device)
 
 
     elif C.score_type == "activity":
@@ -42,11 +42,11 @@ def compute_score(graphs, termination_tensor, validity_tensor, uniqueness_tensor
 
         # QED
         qed = [QED.qed(mol) for mol in mols]
-        qed = torch.tensor(qed, device="cuda")
-        qedMask = torch.where(qed > 0.5, torch.ones(n_mols, device="cuda", dtype=torch.uint8), torch.zeros(n_mols, device="cuda", dtype=torch.uint8))
+        qed = torch.tensor(qed, device=C.device)
+        qedMask = torch.where(qed > 0.5, torch.ones(n_mols, device=C.device, dtype=torch.uint8), torch.zeros(n_mols, device=C.device, dtype=torch.uint8))
         
         activity = compute_activity(mols, jak3_model)
-        activityMask = torch.where(activity > 0.5, torch.ones(n_mols, device="cuda", dtype=torch.uint8), torch.zeros(n_mols, device="cuda", dtype=torch.uint8))
+        activityMask = torch.where(activity > 0.5, torch.ones(n_mols, device=C.device, dtype=torch.uint8), torch.zeros(n_mols, device=C.device, dtype=torch.uint8))
 
 
         score = qedMask*activityMask
@@ -78,7 +78,7 @@ def compute_score(graphs, termination_tensor, validity_tensor, uniqueness_tensor
             except Exception:
                 score_l =0
                 score_list.append(score_l)
-        score = torch.tensor(score_list, device="cuda")
+        score = torch.tensor(score_list, device=C.device)
 
     elif C.score_type == 'SA':
         
@@ -94,7 +94,7 @@ def compute_score(graphs, termination_tensor, validity_tensor, uniqueness_tensor
                     score_list.append(0)
             except:
                 score_list.append(0)
-        score = torch.tensor(score_list, device="cuda")
+        score = torch.tensor(score_list, device=C.device)
     
     elif C.score_type == 'logp':
 
@@ -113,7 +113,7 @@ def compute_score(graphs, termination_tensor, validity_tensor, uniqueness_tensor
             else:
                 score_list.append(0)
             score_list.append(0)
-        score = torch.tensor(score_list, device="cuda")
+        score = torch.tensor(score_list, device=C.device)
     
     elif C.score_type == '3DSMI_tanimoto':
         """3d similary with 2d tanimoto"""
@@ -146,7 +146,7 @@ def compute_score(graphs, termination_tensor, validity_tensor, uniqueness_tensor
                 score_list.append(score_l)
             except Exception:
                 score_list.append(score_l)
-        score = torch.tensor(score_list, device='cuda')
+        score = torch.tensor(score_list, device=C.device)
     
     elif C.score_type == 'tanimoto':
         """2d similarity"""
@@ -169,7 +169,7 @@ def compute_score(graphs, termination_tensor, validity_tensor, uniqueness_tensor
             score = DataStructs.TanimotoSimilarity(query_fp, fp)
             score_l = min(score, k) / k
             score_list.append(float(score_l))
-        score = torch.tensor(score_list,device='cuda')
+        score = torch.tensor(score_list,device=C.device)
     
     elif C.score_type == 'M_SIM_QED':
     # Multi-objective optimization
@@ -198,7 +198,7 @@ def compute_score(graphs, termination_tensor, validity_tensor, uniqueness_tensor
                 tanimoto_score = DataStructs.TanimotoSimilarity(query_fp, fp)
                 score = w*tanimoto_score + (1-w)*qed_score
                 score_list.append(float(score))
-        score = torch.tensor(score_list,device='cuda')
+        score = torch.tensor(score_list,device=C.device)
 
 
     elif C.score_type == 'docking_score':
@@ -227,7 +227,7 @@ def compute_score(graphs, termination_tensor, validity_tensor, uniqueness_tensor
             a = dict(zip(ligand_id, docking_score))
             print('dict_a',a)
         docking_score.sort(reverse = False)
-        score = torch.tensor(docking_score[:len(smiles)],device='cuda')
+        score = torch.tensor(docking_score[:len(smiles)],device=C.device)
         
 
 
@@ -260,7 +260,7 @@ def compute_activity(mols, jak3_model):
 
     n_mols = len(mols)
 
-    activity = torch.zeros(n_mols, device="cuda")
+    activity = torch.zeros(n_mols, device=C.device)
 
     for idx, mol in enumerate(mols):
         fp = AllChem.GetMorganFingerprintAsBitVect(mol, 2, nBits=2048)   
@@ -279,11 +279,11 @@ def compute_activity_score(graphs, termination_tensor, validity_tensor, uniquene
 
     # QED
     qed = [QED.qed(mol) for mol in mols]
-    qed = torch.tensor(qed, device="cuda")
-    qedMask = torch.where(qed > 0.5, torch.ones(n_mols, device="cuda", dtype=torch.uint8), torch.zeros(n_mols, device="cuda", dtype=torch.uint8))
+    qed = torch.tensor(qed, device=C.device)
+    qedMask = torch.where(qed > 0.5, torch.ones(n_mols, device=C.device, dtype=torch.uint8), torch.zeros(n_mols, device=C.device, dtype=torch.uint8))
     
     activity = compute_activity(mols)
-    activityMask = torch.where(activity > 0.5, torch.ones(n_mols, device="cuda", dtype=torch.uint8), torch.zeros(n_mols, device="cuda", dtype=torch.uint8))
+    activityMask = torch.where(activity > 0.5, torch.ones(n_mols, device=C.device, dtype=torch.uint8), torch.zeros(n_mols, device=C.device, dtype=torch.uint8))
 
 
     score = qedMask*activityMask
@@ -0,0 +1,226 @@
+# load general packages and functions
+import json
+import os
+import resource
+import sys
+import time
+import torch
+
+# defines the profiler of the training/learning steps; each step, and each
+# phase within a step (e.g. generation, stitching, scoring, loss, optimizer),
+# is a span, whose wall-clock time, CPU time and resident memory (RSS) are
+# written to CSV, tensorboard and a Chrome trace (both files are written as the
+# steps go, so that neither the spans nor the file handles are kept per step);
+# additionally, a window of steps can be captured with `torch.profiler`
+
+
+class NullSpan:
+    """ Context manager which does nothing (as `contextlib.nullcontext`, which
+    is only available from Python 3.7).
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+# returned by `StepProfiler.span()` when nothing is recorded, so that disabled
+# spans cost no more than entering and exiting an empty context manager
+NULL_SPAN = NullSpan()
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+class StepProfiler:
+    """ Times the steps of a training/learning loop, and the phases within them,
+    using spans (context managers):
+
+        with profiler.step(step_idx):
+            with profiler.span("generation"):
+                ...
+
+    Spans can be nested. For every span, writes a row to "profile.csv" and an
+    event to the Chrome trace "profile_trace.json" (in the JSON array format,
+    which can be opened in chrome://tracing or https://ui.perfetto.dev even if
+    the job stopped before `close()`); both files are flushed at the end of
+    every step, when the summed wall-clock and CPU time of each phase, and the
+    RSS, are also written to tensorboard. If
+    `torch_profiler_steps` is specified, the steps in that window are also
+    captured with `torch.profiler` (during which the spans are annotated in its
+    trace), and exported as the Chrome trace "torch_trace.json".
+
+    Args:
+      enabled (bool) : If `False`, the spans are not recorded.
+      output_dir (str) : Directory in which to write the CSV and traces.
+      device (str) : Device of the job; on a GPU, the spans wait for the queued
+        kernels to finish, so that each phase is charged for its own kernels.
+      tb_writer (torch.utils.tensorboard.SummaryWriter or None) : Writer of the
+        tensorboard scalars.
+      torch_profiler_steps (list or None) : First and last step (inclusive) to
+        capture with `torch.profiler`.
+    """
+    def __init__(self, enabled, output_dir, device="cpu", tb_writer=None, torch_profiler_steps=None):
+
+        self.enabled = enabled                                         # `bool`
+        self.csv_path = output_dir + "profile.csv"                     # `str`
+        self.trace_path = output_dir + "profile_trace.json"            # `str`
+        self.torch_trace_path = output_dir + "torch_trace.json"        # `str`
+        self.use_cuda = device.split(":")[0] == "cuda"                 # `bool`
+        self.tb_writer = tb_writer
+        self.torch_profiler_steps = torch_profiler_steps               # `list` or `None`
+        self.torch_profiler = None                                     # `torch.profiler.profile` or `None`
+
+        self.step_idx = None     # index of the current step
+        self.step_spans = []     # (name, wall-clock time, CPU time, RSS) of the spans in the current step
+        self.csv_file = None     # open "profile.csv", if enabled
+        self.trace_file = None   # open "profile_trace.json", if enabled
+        self.trace_separator = ""
+        self.origin = time.perf_counter()
+
+        if self.enabled:
+            self.csv_file = open(self.csv_path, "w")
+            self.csv_file.write("step,span,start_s,wall_s,cpu_s,rss_mb\n")
+            self.trace_file = open(self.trace_path, "w")
+            self.trace_file.write("[")
+
+    def step(self, step_idx):
+        """ Returns the span of the whole step `step_idx` (`int`); the spans of
+        its phases are opened within it.
+        """
+        if self.torch_profiler_steps is not None and self.torch_profiler is None:
+            first_step, last_step = self.torch_profiler_steps
+            if first_step <= step_idx <= last_step:
+                self.start_torch_profiler()
+        if not self.enabled and self.torch_profiler is None:
+            return NULL_SPAN
+        self.step_idx = step_idx
+        self.step_spans = []
+        return Span(self, "step")
+
+    def span(self, name):
+        """ Returns the span of the phase `name` (`str`) of the current step.
+        """
+        if not self.enabled and self.torch_profiler is None:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def record(self, name, start, wall_time, cpu_time):
+        """ Records a finished span; ends the step if the span is the step.
+        """
+        if self.enabled:
+            rss = get_rss_mb()
+            self.step_spans.append((name, wall_time, cpu_time, rss))
+            trace_event = json.dumps({
+                "name": name,
+                "cat": "step" if name == "step" else "phase",
+                "ph": "X",
+                "ts": 1e6 * (start - self.origin),
+                "dur": 1e6 * wall_time,
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": {"step": self.step_idx, "cpu_s": cpu_time, "rss_mb": rss},
+            })
+            self.trace_file.write(f"{self.trace_separator}\n{trace_event}")
+            self.trace_separator = ","
+            self.csv_file.write(f"{self.step_idx},{name},{start - self.origin:.6f},{wall_time:.6f},"
+                                f"{cpu_time:.6f},{rss:.1f}\n")
+        if name == "step":
+            self.end_step()
+
+    def end_step(self):
+        """ Flushes the CSV and trace, writes the stats of the finished step to
+        tensorboard, and stops the `torch.profiler` capture after its last step.
+        """
+        if self.enabled:
+            self.csv_file.flush()
+            self.trace_file.flush()
+
+        if self.enabled and self.tb_writer is not None:
+            wall_times, cpu_times = {}, {}
+            for name, wall_time, cpu_time, _ in self.step_spans:
+                wall_times[name] = wall_times.get(name, 0.0) + wall_time
+                cpu_times[name] = cpu_times.get(name, 0.0) + cpu_time
+            for name in wall_times:
+                self.tb_writer.add_scalar(f"Profile/{name}_wall_s", wall_times[name], self.step_idx)
+                self.tb_writer.add_scalar(f"Profile/{name}_cpu_s", cpu_times[name], self.step_idx)
+            self.tb_writer.add_scalar("Profile/rss_mb", self.step_spans[-1][3], self.step_idx)
+
+        if self.torch_profiler is not None and self.step_idx >= self.torch_profiler_steps[1]:
+            self.stop_torch_profiler()
+
+    def start_torch_profiler(self):
+        """ Starts capturing with `torch.profiler`.
+        """
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if self.use_cuda:
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        self.torch_profiler = torch.profiler.profile(activities=activities, record_shapes=True)
+        self.torch_profiler.start()
+
+    def stop_torch_profiler(self):
+        """ Stops capturing with `torch.profiler`, and exports the trace.
+        """
+        self.torch_profiler.stop()
+        self.torch_profiler.export_chrome_trace(self.torch_trace_path)
+        self.torch_profiler = None
+        self.torch_profiler_steps = None  # the window is only captured once
+        print(f"-- Wrote torch.profiler trace to {self.torch_trace_path}.", flush=True)
+
+    def close(self):
+        """ Closes the CSV and the Chrome trace, and stops the `torch.profiler`
+        capture if the last step of its window was not reached.
+        """
+        if self.torch_profiler is not None:
+            self.stop_torch_profiler()
+        if self.csv_file is not None:
+            self.csv_file.close()
+            self.csv_file = None
+        if self.trace_file is not None:
+            self.trace_file.write("\n]\n")
+            self.trace_file.close()
+            self.trace_file = None
+
+
+class Span:
+    """ Context manager timing one span of a `StepProfiler`.
+    """
+    def __init__(self, profiler, name):
+
+        self.profiler = profiler  # `StepProfiler`
+        self.name = name          # `str`
+        self.start = None
+        self.start_cpu = None
+        self.torch_record = None  # `torch.profiler.record_function` or `None`
+
+    def __enter__(self):
+        if self.profiler.use_cuda:
+            torch.cuda.synchronize()
+        if self.profiler.torch_profiler is not None:
+            self.torch_record = torch.profiler.record_function(self.name)
+            self.torch_record.__enter__()
+        self.start = time.perf_counter()
+        self.start_cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profiler.use_cuda:
+            torch.cuda.synchronize()
+        wall_time = time.perf_counter() - self.start
+        cpu_time = time.process_time() - self.start_cpu
+        if self.torch_record is not None:
+            self.torch_record.__exit__(*exc_info)
+        self.profiler.record(self.name, self.start, wall_time, cpu_time)
+        return False
+
+
+def get_rss_mb():
+    """ Returns the resident memory (RSS) of this process in MB; where `/proc` is
+    not available, returns the peak RSS instead.
+    """
+    try:
+        with open("/proc/self/statm") as statm_file:
+            return int(statm_file.read().split()[1]) * PAGE_SIZE / 1e6
+    except OSError:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # bytes on macOS, kB on Linux
+        return peak_rss / 1e6 if sys.platform == "darwin" else peak_rss / 1e3
@@ -7,4 +7,5 @@ from unittest_reinvent.running_modes.reinforcement_tests import *
 from unittest_reinvent.running_modes.sample_model_tests import *
 from unittest_reinvent.running_modes.scoring_runner_tests import *
 from unittest_reinvent.running_modes.transfer_learning_tests import *
-from unittest_reinvent.running_modes.lib_invent_tests import *
\ No newline at end of file
+from unittest_reinvent.running_modes.lib_invent_tests import *
+from unittest_reinvent.running_modes.remote_logger_tests import *
\ No newline at end of file
@@ -2,4 +2,6 @@ from unittest_reinvent.running_modes.curriculum_tests.test_manual_curriculum_lea
     TestManualCurriculumLearning
 
 from unittest_reinvent.running_modes.curriculum_tests.test_automated_curriculum_learning import \
-    TestAutomatedCurriculumLearning
\ No newline at end of file
+    TestAutomatedCurriculumLearning
+
+from unittest_reinvent.running_modes.curriculum_tests.test_fingerprint_engine import TestFingerprintEngine
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+from rdkit import Chem, DataStructs
+from rdkit.Chem import AllChem
+
+from fingerprints import FingerprintEngine
+from unittest_reinvent.fixtures.test_data import ASPIRIN, CELECOXIB, IBUPROFEN, ETHANE, METAMIZOLE, CAFFEINE, \
+    COCAINE, BENZENE, TOLUENE, AMOXAPINE, GENTAMICIN, CELECOXIB_FRAGMENT, INVALID
+
+
+class TestFingerprintEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.smiles = [ASPIRIN, CELECOXIB, IBUPROFEN, ETHANE, METAMIZOLE, CAFFEINE, COCAINE, BENZENE, TOLUENE,
+                       AMOXAPINE, GENTAMICIN, CELECOXIB_FRAGMENT]
+        self.mols = [Chem.MolFromSmiles(smi) for smi in self.smiles]
+        self.engines = [FingerprintEngine(backend="numpy"), FingerprintEngine(backend="rdkit")]
+
+    def _rdkit_similarity(self, mol, ref_smiles):
+        ref_fp = AllChem.GetMorganFingerprint(Chem.MolFromSmiles(ref_smiles), 2, useCounts=True, useFeatures=True)
+        fp = AllChem.GetMorganFingerprint(mol, 2, useCounts=True, useFeatures=True)
+        return DataStructs.TanimotoSimilarity(ref_fp, fp)
+
+    def test_paired_similarity_matches_rdkit(self):
+        ref_smiles = self.smiles[::-1]
+        expected = [self._rdkit_similarity(mol, ref) for mol, ref in zip(self.mols, ref_smiles)]
+        for engine in self.engines:
+            similarity = engine.paired_similarity(self.mols, ref_smiles)
+            np.testing.assert_allclose(similarity, expected, rtol=0, atol=1e-12)
+
+    def test_paired_similarity_to_itself(self):
+        for engine in self.engines:
+            similarity = engine.paired_similarity(self.mols, self.smiles)
+            np.testing.assert_allclose(similarity, np.ones(len(self.smiles)), rtol=0, atol=1e-12)
+
+    def test_bulk_similarity_matches_rdkit(self):
+        for ref in [CELECOXIB, ETHANE, GENTAMICIN]:
+            expected = [self._rdkit_similarity(mol, ref) for mol in self.mols]
+            for engine in self.engines:
+                similarity = engine.bulk_similarity(self.mols, ref)
+                np.testing.assert_allclose(similarity, expected, rtol=0, atol=1e-12)
+
+    def test_invalid_molecules(self):
+        mols = [self.mols[0], Chem.MolFromSmiles(INVALID), self.mols[1]]
+        for engine in self.engines:
+            paired = engine.paired_similarity(mols, [ASPIRIN, ASPIRIN, INVALID])
+            self.assertEqual(paired[0], 1.0)
+            self.assertTrue(np.isnan(paired[1]))
+            self.assertTrue(np.isnan(paired[2]))
+            bulk = engine.bulk_similarity(mols, CELECOXIB)
+            self.assertTrue(np.isnan(bulk[1]))
+            self.assertTrue(np.isnan(engine.bulk_similarity(mols, INVALID)).all())
+
+    def test_reference_cache(self):
+        engine = FingerprintEngine(max_cache_size=2)
+        engine.paired_similarity(self.mols[:3], self.smiles[:3])
+        self.assertEqual(list(engine.cache), self.smiles[1:3])
@@ -4,3 +4,4 @@ from unittest_reinvent.running_modes.inception_tests.test_eval_add_tanimoto impo
 from unittest_reinvent.running_modes.inception_tests.test_empty_add import TestInceptionEmptyAddSmiles
 from unittest_reinvent.running_modes.inception_tests.test_empty_eval_add_tanimoto import \
     TestInceptionEmptyEvalAddTanimoto
+from unittest_reinvent.running_modes.inception_tests.test_inception_memory import TestInceptionMemory
@@ -0,0 +1,53 @@
+import os
+import shutil
+import unittest
+
+import numpy as np
+import numpy.testing as nt
+
+from running_modes.reinforcement_learning.inception_memory import InceptionMemory
+from unittest_reinvent.fixtures.paths import MAIN_TEST_PATH
+from unittest_reinvent.fixtures.test_data import ETHANE, PROPANE, BUTANE, HEXANE, ASPIRIN
+
+
+class TestInceptionMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.memory = InceptionMemory(capacity=3)
+        self.memory.add([ETHANE, PROPANE, BUTANE], [0.1, 0.5, 0.3], np.array([1., 5., 3.]))
+
+    def tearDown(self):
+        if os.path.isdir(MAIN_TEST_PATH):
+            shutil.rmtree(MAIN_TEST_PATH)
+
+    def test_duplicates_are_rejected(self):
+        self.memory.add([PROPANE], [0.9], np.array([9.]))
+        self.assertEqual(len(self.memory), 3)
+        nt.assert_almost_equal(self.memory.as_dataframe()["score"].values, [0.5, 0.3, 0.1])
+
+    def test_worst_entry_is_evicted(self):
+        self.memory.add([HEXANE, ASPIRIN], [0.2, 0.05], np.array([2., 0.5]))
+        memory_df = self.memory.as_dataframe()
+        self.assertListEqual(memory_df["smiles"].tolist(), [PROPANE, BUTANE, HEXANE])
+        nt.assert_almost_equal(memory_df["likelihood"].values, [5., 3., 2.])
+        self.assertNotIn(ETHANE, self.memory)
+
+    def test_sample(self):
+        smiles, scores, likelihoods = self.memory.sample(2)
+        self.assertEqual(len(set(smiles)), 2)
+        memory_df = self.memory.as_dataframe().set_index("smiles")
+        nt.assert_almost_equal(scores, memory_df.loc[smiles, "score"].values)
+        nt.assert_almost_equal(likelihoods, memory_df.loc[smiles, "likelihood"].values)
+        self.assertEqual(len(self.memory.sample(10)[0]), 3)
+
+    def test_save_and_load(self):
+        os.makedirs(MAIN_TEST_PATH, exist_ok=True)
+        path = os.path.join(MAIN_TEST_PATH, "memory.npz")
+        self.memory.save(path)
+
+        loaded = InceptionMemory.load(path)
+        self.assertEqual(loaded.capacity, 3)
+        self.assertTrue(self.memory.as_dataframe().equals(loaded.as_dataframe()))
+
+        smaller = InceptionMemory.load(path, capacity=2)
+        self.assertListEqual(smaller.as_dataframe()["smiles"].tolist(), [PROPANE, BUTANE])
@@ -0,0 +1 @@
+from unittest_reinvent.running_modes.remote_logger_tests.test_remote_logging_transport import TestRemoteLoggingTransport
@@ -0,0 +1,152 @@
+import json
+import logging
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from running_modes.enums.remote_logging_drop_policy_enum import RemoteLoggingDropPolicyEnum
+from running_modes.utils.remote_logging_transport import RemoteLoggingTransport
+
+
+class _SlowServer(HTTPServer):
+    """Local logging endpoint which answers every post after a delay and records the posted payloads."""
+    def __init__(self, delay: float, failures: int = 0):
+        super().__init__(("127.0.0.1", 0), _SlowHandler)
+        self.delay = delay
+        self.failures = failures
+        self.payloads = []
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(self.server.delay)
+        if self.server.failures > 0:
+            self.server.failures -= 1
+            self.send_response(500)
+        else:
+            self.server.payloads.append(json.loads(body))
+            self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestRemoteLoggingTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("remote_logging_test")
+        self.policies = RemoteLoggingDropPolicyEnum()
+        self.server = None
+
+    def tearDown(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def _start_server(self, delay: float, failures: int = 0) -> str:
+        self.server = _SlowServer(delay, failures)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def test_send_does_not_wait_for_server(self):
+        address = self._start_server(delay=0.5)
+        transport = RemoteLoggingTransport(address, self.logger)
+
+        start = time.time()
+        for step in range(5):
+            transport.send({"step": step})
+        self.assertLess(time.time() - start, 0.5)
+
+        self.assertTrue(transport.close())
+        self.assertEqual(transport.n_posted, 5)
+        self.assertListEqual(self.server.payloads, [{"step": step} for step in range(5)])
+
+    def test_batching(self):
+        address = self._start_server(delay=0.2)
+        transport = RemoteLoggingTransport(address, self.logger, batch_size=10)
+        for step in range(10):
+            transport.send({"step": step})
+        self.assertTrue(transport.flush(timeout=10))
+
+        # several records are posted together as a list, in the order they were sent
+        self.assertTrue(all(isinstance(payload, list) for payload in self.server.payloads))
+        self.assertLess(len(self.server.payloads), 10)
+        self.assertListEqual([record for payload in self.server.payloads for record in payload],
+                             [{"step": step} for step in range(10)])
+        transport.close()
+
+    def test_drop_oldest(self):
+        address = self._start_server(delay=0.5)
+        transport = RemoteLoggingTransport(address, self.logger, queue_size=2,
+                                           drop_policy=self.policies.DROP_OLDEST)
+        transport.send({"step": 0})
+        time.sleep(0.1)
+        for step in range(1, 5):
+            transport.send({"step": step})
+        transport.close()
+
+        # the first record is being posted while the queue fills up; of the others, only the newest two are kept
+        self.assertEqual(transport.n_dropped, 2)
+        self.assertListEqual(self.server.payloads, [{"step": 0}, {"step": 3}, {"step": 4}])
+
+    def test_drop_oldest_keeps_pending_flush(self):
+        address = self._start_server(delay=0.5)
+        transport = RemoteLoggingTransport(address, self.logger, queue_size=2,
+                                           drop_policy=self.policies.DROP_OLDEST)
+        transport.send({"step": 0})
+        time.sleep(0.1)
+        transport.send({"step": 1})
+
+        # the records sent while the flush is pending evict the older records, but not the flush itself
+        flushed = []
+        flush_thread = threading.Thread(target=lambda: flushed.append(transport.flush()), daemon=True)
+        flush_thread.start()
+        time.sleep(0.1)
+        for step in range(2, 5):
+            transport.send({"step": step})
+        flush_thread.join(timeout=10)
+        transport.close()
+
+        self.assertListEqual(flushed, [True])
+        self.assertEqual(transport.n_dropped, 2)
+        self.assertListEqual(self.server.payloads, [{"step": 0}, {"step": 3}, {"step": 4}])
+
+    def test_drop_newest(self):
+        address = self._start_server(delay=0.5)
+        transport = RemoteLoggingTransport(address, self.logger, queue_size=2,
+                                           drop_policy=self.policies.DROP_NEWEST)
+        transport.send({"step": 0})
+        time.sleep(0.1)
+        for step in range(1, 5):
+            transport.send({"step": step})
+        transport.close()
+
+        self.assertEqual(transport.n_dropped, 2)
+        self.assertListEqual(self.server.payloads, [{"step": 0}, {"step": 1}, {"step": 2}])
+
+    def test_retry_on_server_error(self):
+        address = self._start_server(delay=0.0, failures=2)
+        transport = RemoteLoggingTransport(address, self.logger, max_retries=3, backoff_seconds=0.01)
+        transport.send({"step": 0})
+        transport.close()
+
+        self.assertEqual(transport.n_posted, 1)
+        self.assertEqual(transport.n_failed, 0)
+        self.assertListEqual(self.server.payloads, [{"step": 0}])
+
+    def test_give_up_after_retries(self):
+        address = self._start_server(delay=0.0, failures=10)
+        transport = RemoteLoggingTransport(address, self.logger, max_retries=1, backoff_seconds=0.01)
+        transport.send({"step": 0})
+        transport.close()
+
+        self.assertEqual(transport.n_posted, 0)
+        self.assertEqual(transport.n_failed, 1)
+
+    def test_unknown_drop_policy(self):
+        with self.assertRaises(ValueError):
+            RemoteLoggingTransport("http://127.0.0.1:1/", self.logger, drop_policy="drop_all")
@@ -1,4 +1,5 @@
 # load general packages and functions
+import collections
 import csv
 import numpy as np
 import torch
@@ -8,6 +9,9 @@ import os
 
 # load program-specific functions
 from parameters.constants import constants as C
+from linker_stitcher import LinkerStitcher
+from step_profiler import StepProfiler
+from fingerprints import FingerprintEngine
 
 # contains miscellaneous useful functions
 
@@ -491,7 +495,7 @@ def write_graphs_to_smi(smi_filename, molecular_graphs_list):
     """ Writes the `TrainingGraph`s in `molecular_graphs_list` to a SMILES
     file, where the full path/filename is specified by `smi_filename`.
     """
-    validity_tensor = torch.zeros(len(molecular_graphs_list), device="cuda")
+    validity_tensor = torch.zeros(len(molecular_graphs_list), device=C.device)
     smiles = []
 
     with open(smi_filename, "w") as smi_file:
@@ -632,7 +636,7 @@ def write_validity(validity_file_path, validity_tensor):
 
 def get_unique_tensor(smiles):
 
-    unique_tensor = torch.ones(len(smiles), device="cuda")
+    unique_tensor = torch.ones(len(smiles), device=C.device)
     smiles_set = []
 
     for idx, smile in enumerate(smiles):
@@ -641,4 +645,66 @@ def get_unique_tensor(smiles):
         else:
             smiles_set.append(smile)
 
-    return unique_tensor
\ No newline at end of file
+    return unique_tensor
+
+
+linker_stitcher = None
+
+
+def get_linker_stitcher():
+    """ Returns the `LinkerStitcher` used to join generated linkers to their
+    fragments (created on first use, so that its pool is only started if
+    needed).
+    """
+    global linker_stitcher
+    if linker_stitcher is None:
+        linker_stitcher = LinkerStitcher(max_attempts=C.max_stitching_attempts,
+                                         n_workers=C.n_stitching_workers)
+    return linker_stitcher
+
+
+def stitch_linkers(fragments_smi, linker_smi_list, linker_atoms_list):
+    """ Joins the linkers in `linker_smi_list` to their fragments (see
+    `LinkerStitcher.stitch_batch()`) and returns the `StitchResult`s; prints
+    how many molecules could not be stitched, and why.
+    """
+    results = get_linker_stitcher().stitch_batch(fragments_smi, linker_smi_list, linker_atoms_list)
+    failures = collections.Counter(result.failure for result in results if result.failure is not None)
+    if failures:
+        reasons = ", ".join(f"{reason} ({count})" for reason, count in failures.most_common())
+        print(f"-- Stitching failed for {sum(failures.values())} of {len(results)} molecules: {reasons}.",
+              flush=True)
+    return results
+
+
+step_profiler = None
+
+
+def get_step_profiler():
+    """ Returns the `StepProfiler` timing the phases of the training/learning
+    steps (created on first use); its spans are no-ops unless `profiling` or
+    `torch_profiler_steps` is specified.
+    """
+    global step_profiler
+    if step_profiler is None:
+        step_profiler = StepProfiler(enabled=C.profiling,
+                                     output_dir=C.job_dir,
+                                     device=C.device,
+                                     tb_writer=tb_writer,
+                                     torch_profiler_steps=C.torch_profiler_steps)
+    return step_profiler
+
+
+fingerprint_engine = None
+
+
+def get_fingerprint_engine():
+    """ Returns the `FingerprintEngine` computing the Tanimoto similarities used
+    as rewards/scores (created on first use, so that the cache of reference
+    fingerprints is shared by all steps).
+    """
+    global fingerprint_engine
+    if fingerprint_engine is None:
+        fingerprint_engine = FingerprintEngine(max_cache_size=C.fingerprint_cache_size,
+                                               backend=C.fingerprint_backend)
+    return fingerprint_engine
@@ -8,11 +8,7 @@ import argparse
 
 from dockstream.containers.docking_container import DockingContainer
 
-from dockstream.core.rDock.rDock_docker import rDock
-from dockstream.core.OpenEye.OpenEye_docker import OpenEye
-from dockstream.core.Schrodinger.Glide_docker import Glide
-from dockstream.core.AutodockVina.AutodockVina_docker import AutodockVina
-#from dockstream.core.OpenEyeHybrid.OpenEyeHybrid_docker import OpenEyeHybrid
+from dockstream.core.docker import initialize_docker
 
 from dockstream.utils.entry_point_functions.header import initialize_logging, set_environment
 from dockstream.utils.entry_point_functions.embedding import embed_ligands
@@ -147,20 +143,7 @@ if __name__ == "__main__":
         for docking_run_number, docking_run in enumerate(config[_DE.DOCKING][_DE.DOCKING_RUNS]):
             logger.log(f"Starting docking run {docking_run[_DE.RUN_ID]}.", _LE.INFO)
             try:
-                if docking_run[_DE.BACKEND] == _DE.BACKEND_RDOCK:
-                    docker = rDock(**docking_run)
-                elif docking_run[_DE.BACKEND] == _DE.BACKEND_OPENEYE:
-                    docker = OpenEye(**docking_run)
-                elif docking_run[_DE.BACKEND] == _DE.BACKEND_OPENEYEHYBRID:
-                    docker = OpenEyeHybrid(**docking_run)
-                elif docking_run[_DE.BACKEND] == _DE.BACKEND_GLIDE:
-                    docker = Glide(**docking_run)
-                elif docking_run[_DE.BACKEND] == _DE.BACKEND_GOLD:
-                    docker = Gold(**docking_run)
-                elif docking_run[_DE.BACKEND] == _DE.BACKEND_AUTODOCKVINA:
-                    docker = AutodockVina(**docking_run)
-                else:
-                    raise Exception("Backend is unknown.")
+                docker = initialize_docker(docking_run)
 
                 # merge all specified pools for this run together
                 if isinstance(docking_run[_DE.INPUT_POOLS], str):
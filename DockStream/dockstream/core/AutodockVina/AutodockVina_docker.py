@@ -1,8 +1,11 @@
 import os
+import atexit
 import tempfile
 import shutil
-import multiprocessing
-from copy import deepcopy
+import subprocess
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from typing import Optional, List, Any
 
 import rdkit.Chem as Chem
@@ -51,29 +54,76 @@ class AutodockVinaParameters(BaseModel):
     search_space: SearchSpace
     seed: int = 42
     number_poses: int = 1
+    time_limit_per_compound: Optional[int] = None
 
     def get(self, key: str) -> Any:
         """Temporary method to support nested_get"""
         return self.dict()[key]
 
 
+class _WorkerPool:
+    """Pool of "AutoDock Vina" worker processes together with the scratch directory of its workers. It is kept
+    outside of the (pydantic) docker, which does not support weak references, so that the exit handler of a docker
+    can refer to it weakly."""
+
+    def __init__(self):
+        self.executor = None
+        self.size = 0
+        self.scratch_dir = None
+
+    def start(self, size: int, prefix_execution: Optional[str], binary_location: Optional[str]) -> ProcessPoolExecutor:
+        self.close()
+        self.scratch_dir = tempfile.mkdtemp(prefix="ADV_")
+        self.executor = ProcessPoolExecutor(max_workers=size,
+                                            initializer=_initialize_worker,
+                                            initargs=(self.scratch_dir, prefix_execution, binary_location))
+        self.size = size
+        return self.executor
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            self.size = 0
+        if self.scratch_dir is not None:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+            self.scratch_dir = None
+
+
+def _close_worker_pool(worker_pool_ref: weakref.ref):
+    # exit handler of a docker: close its pool, unless the docker (and thus the pool) has been garbage-collected
+    worker_pool = worker_pool_ref()
+    if worker_pool is not None:
+        worker_pool.close()
+
+
 class AutodockVina(Docker, BaseModel):
-    """Interface to the "AutoDock Vina" backend."""
+    """Interface to the "AutoDock Vina" backend. Ligands are docked one at a time in a persistent pool of
+    "number_cores" worker processes, which is kept between subsequent calls of "dock()": every worker picks up the
+    next ligand as soon as it is done with the previous one (so that a slow ligand does not stall the other cores),
+    works in its own scratch directory and hands the docked poses back to the docker directly. If
+    "time_limit_per_compound" is set, ligands for which "AutoDock Vina" runs longer are treated as failed."""
 
     backend: Literal["AutoDockVina"] = "AutoDockVina"
     parameters: AutodockVinaParameters
 
     _ADV_executor: AutodockVinaExecutor = None
     _OpenBabel_executor: OpenBabelExecutor = None
+    _worker_pool: _WorkerPool = None
 
     class Config:
         underscore_attrs_are_private = True
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._worker_pool = _WorkerPool()
+        atexit.register(_close_worker_pool, weakref.ref(self._worker_pool))
 
     def _initialize_executors(self):
-        """Initialize executors and check if they are available."""
+        """Initialize executors and check if they are available (only once, so that they are kept between
+        subsequent calls of "dock()")."""
+        if self._ADV_executor is not None and self._OpenBabel_executor is not None:
+            return
 
         self._ADV_executor = AutodockVinaExecutor(
             prefix_execution=self.parameters.prefix_execution, 
@@ -115,121 +165,81 @@ class AutodockVina(Docker, BaseModel):
         # generate temporary copy as PDB
         temp_pdb = gen_temp_file(suffix=".pdb")
         Chem.MolToPDBFile(mol=molecule, filename=temp_pdb)
-
-        # Note: In contrast to the target preparation,
-        # we will use a tree-based flexibility treatment here -
-        # thus, the option "-xr" is NOT used.
-        arguments = [temp_pdb,
-                     _BEE.OBABEL_OUTPUT_FORMAT_PDBQT,
-                     "".join([_BEE.OBABEL_O, path]),
-                     _BEE.OBABEL_PARTIALCHARGE, _BEE.OBABEL_PARTIALCHARGE_GASTEIGER]
-        self._OpenBabel_executor.execute(command=_BEE.OBABEL,
-                                         arguments=arguments,
-                                         check=False)
-
-        if os.path.exists(path):
-            return True
-        else:
-            return False
-
-    def _generate_temporary_input_output_files(self, start_indices, sublists):
-        # in case singletons are handed over, wrap them in a list for "zipping" later
-        if not isinstance(start_indices, list):
-            start_indices = [start_indices]
-        if not isinstance(sublists, list):
-            sublists = [sublists]
-
-        tmp_output_dirs = []
-        tmp_input_paths = []
-        tmp_output_paths = []
-        ligand_identifiers = []
-        for start_index, sublist in zip(start_indices, sublists):
-            # for "AutoDock Vina", only single molecules can be handled so every sublist is guaranteed at this stage
-            # to have only one element
-            # TODO: in the course of the redesign of the docking class-backends, also "beautify" this part
-            for ligand in sublist:
-                # generate temporary input files and output directory
-                cur_tmp_output_dir = tempfile.mkdtemp()
-                cur_tmp_input_pdbqt = gen_temp_file(prefix=str(start_index), suffix=".pdbqt", dir=cur_tmp_output_dir)
-                cur_tmp_output_sdf = gen_temp_file(prefix=str(start_index), suffix=".sdf", dir=cur_tmp_output_dir)
-
-                # write-out the temporary input file
-                if ligand.get_molecule() is None:
-                    if os.path.isdir(cur_tmp_output_dir):
-                        shutil.rmtree(cur_tmp_output_dir)
-                    continue
-                mol = deepcopy(ligand.get_molecule())
-                self._write_molecule_to_pdbqt(cur_tmp_input_pdbqt, mol)
-                tmp_output_dirs.append(cur_tmp_output_dir)
-                tmp_input_paths.append(cur_tmp_input_pdbqt)
-                tmp_output_paths.append(cur_tmp_output_sdf)
-                ligand_identifiers.append(ligand.get_identifier())
-
-        return tmp_output_dirs, tmp_input_paths, tmp_output_paths, ligand_identifiers
+        return _convert_pdb_to_pdbqt(self._OpenBabel_executor, temp_pdb, path)
+
+    def _get_pool(self, number_cores) -> ProcessPoolExecutor:
+        """Return the pool of worker processes, (re-)starting it if it is not running or the number of cores has
+        changed. Every worker gets its own scratch directory, which it reuses for all of its ligands."""
+        if self._worker_pool.executor is not None and self._worker_pool.size == number_cores:
+            return self._worker_pool.executor
+
+        pool = self._worker_pool.start(size=number_cores,
+                                       prefix_execution=self.parameters.prefix_execution,
+                                       binary_location=self.parameters.binary_location)
+        self._logger.log(f"Started pool of {number_cores} AutoDock Vina workers.", _LE.DEBUG)
+        return pool
+
+    def close(self):
+        """Shut down the pool of worker processes (if it is running) and remove their scratch directories. The pool
+        is started again by the next call of "dock()". This is also done when the interpreter exits."""
+        self._worker_pool.close()
+
+    def _get_vina_arguments(self) -> list:
+        # set up the arguments shared by all ligands; the ligand input and output are added by the workers
+        # TODO: support "ensemble docking" - currently, only the first entry is used
+        search_space = self.parameters.search_space
+        return [_EE.VINA_RECEPTOR, self.parameters.receptor_pdbqt_path[0],
+                _EE.VINA_CPU, str(1),
+                _EE.VINA_SEED, self.parameters.seed,
+                _EE.VINA_CENTER_X, str(search_space.center_x),
+                _EE.VINA_CENTER_Y, str(search_space.center_y),
+                _EE.VINA_CENTER_Z, str(search_space.center_z),
+                _EE.VINA_SIZE_X, str(search_space.size_x),
+                _EE.VINA_SIZE_Y, str(search_space.size_y),
+                _EE.VINA_SIZE_Z, str(search_space.size_z),
+                _EE.VINA_NUM_MODES, self.parameters.number_poses]
 
     def _dock(self, number_cores):
 
         self._initialize_executors()
 
-        start_indices, sublists = self.get_sublists_for_docking(number_cores=number_cores, enforce_singletons=True)
-        number_sublists = len(sublists)
-        self._logger.log(f"Split ligands into {number_sublists} sublists for docking.", _LE.DEBUG)
-
         if not os.path.exists(self.parameters.receptor_pdbqt_path[0]):
             raise DockingRunFailed("Specified PDBQT path to target (receptor) does not exist - abort.")
 
-        sublists_submitted = 0
-        slices_per_iteration = min(number_cores, number_sublists)
-        while sublists_submitted < len(sublists):
-            upper_bound_slice = min((sublists_submitted + slices_per_iteration), len(sublists))
-            cur_slice_start_indices = start_indices[sublists_submitted:upper_bound_slice]
-            cur_slice_sublists = sublists[sublists_submitted:upper_bound_slice]
-
-            # generate paths and initialize molecules (so that if they fail, this can be covered)
-            tmp_output_dirs, tmp_input_paths, tmp_output_paths, \
-            ligand_identifiers = self._generate_temporary_input_output_files(cur_slice_start_indices,
-                                                                             cur_slice_sublists)
-
-            # run in parallel; wait for all subjobs to finish before proceeding
-            processes = []
-            for chunk_index in range(len(tmp_output_dirs)):
-                p = multiprocessing.Process(target=self._dock_subjob, args=(tmp_input_paths[chunk_index],
-                                                                            tmp_output_paths[chunk_index]))
-                processes.append(p)
-                p.start()
-            for p in processes:
-                p.join()
-
-            # add the number of input sublists rather than the output temporary folders to account for cases where
-            # entire sublists failed to produce an input structure
-            sublists_submitted += len(cur_slice_sublists)
-
-            # parse the resulting sdf files
-            for path_sdf_results, cur_identifier in zip(tmp_output_paths, ligand_identifiers):
-                # add conformations
-                if not os.path.isfile(path_sdf_results) or os.path.getsize(path_sdf_results) == 0:
-                    continue
-
-                for molecule in Chem.SDMolSupplier(path_sdf_results, removeHs=False):
-                    if molecule is None:
-                        continue
-
-                    # extract the score from the AutoDock Vina output and update some tags
-                    score = self._extract_score_from_VinaResult(molecule=molecule)
-                    molecule.SetProp("_Name", cur_identifier)
-                    molecule.SetProp(_RKA.SDF_TAG_SCORE, score)
-                    molecule.ClearProp(_ROE.REMARK_TAG)
-
-                    # add molecule to the appropriate ligand
-                    for ligand in self.ligands:
-                        if ligand.get_identifier() == cur_identifier:
-                            ligand.add_conformer(molecule)
-                            break
-
-            # clean-up
-            for path in tmp_output_dirs:
-                shutil.rmtree(path)
-            self._log_docking_progress(number_done=sublists_submitted, number_total=number_sublists)
+        # submit all ligands at once (ligands, for which the preparation failed, are skipped); idle workers pick up
+        # the next ligand from the queue as soon as they are done
+        pool = self._get_pool(number_cores)
+        arguments = self._get_vina_arguments()
+        futures = {}
+        for ligand in self.ligands:
+            if ligand.get_molecule() is None:
+                continue
+            future = pool.submit(_dock_ligand_in_worker,
+                                 Chem.MolToPDBBlock(ligand.get_molecule()),
+                                 arguments,
+                                 self.parameters.time_limit_per_compound)
+            futures[future] = ligand
+        number_ligands = len(futures)
+        self._logger.log(f"Submitted {number_ligands} ligands for docking.", _LE.DEBUG)
+
+        # collect the docked poses in the order in which the ligands finish
+        pool_broken = False
+        for number_done, future in enumerate(as_completed(futures), start=1):
+            ligand = futures[future]
+            try:
+                sdf_block = future.result()
+            except BrokenProcessPool:
+                # a worker died (e.g. it was killed); the remaining ligands fail and the pool is restarted next time
+                pool_broken = True
+                sdf_block = ""
+            self._add_docked_poses(ligand, sdf_block)
+
+            if number_done % number_cores == 0 or number_done == number_ligands:
+                self._log_docking_progress(number_done=number_done, number_total=number_ligands)
+        if pool_broken:
+            self._logger.log("AutoDock Vina worker pool broke down, it will be restarted for the next run.",
+                             _LE.WARNING)
+            self.close()
 
         # the conformers are already sorted, but some tags are missing
         # -> <ligand_number>:<enumeration>:<conformer_number>
@@ -240,52 +250,35 @@ class AutodockVina(Docker, BaseModel):
         self._docking_fail_check()
 
         # generate docking results as dataframe
-        result_parser = AutodockResultParser(ligands=[ligand.get_clone() for ligand in self.ligands])
+        result_parser = AutodockResultParser(ligands=self.ligands)
         self._df_results = result_parser.as_dataframe()
 
         # set docking flag
         self._docking_performed = True
 
+    def _add_docked_poses(self, ligand, sdf_block: str):
+        # parse the poses returned by a worker (an empty block means the ligand failed) and add them as conformers
+        if not sdf_block:
+            return
+        supplier = Chem.SDMolSupplier()
+        supplier.SetData(sdf_block, removeHs=False)
+        for molecule in supplier:
+            if molecule is None:
+                continue
+
+            # extract the score from the AutoDock Vina output and update some tags
+            score = self._extract_score_from_VinaResult(molecule=molecule)
+            molecule.SetProp("_Name", ligand.get_identifier())
+            molecule.SetProp(_RKA.SDF_TAG_SCORE, score)
+            molecule.ClearProp(_ROE.REMARK_TAG)
+            ligand.add_conformer(molecule)
+
     def _extract_score_from_VinaResult(self, molecule) -> str:
         result_tag_lines = molecule.GetProp(_ROE.REMARK_TAG).split("\n")
         result_line = [line for line in result_tag_lines if _ROE.RESULT_LINE_IDENTIFIER in line][0]
         parts = result_line.split()
         return parts[_ROE.RESULT_LINE_POS_SCORE]
 
-    def _dock_subjob(self, input_path_pdbqt, output_path_sdf):
-
-        # set up arguments list and execute
-        # TODO: support "ensemble docking" - currently, only the first entry is used
-        tmp_pdbqt_docked = gen_temp_file(suffix=".pdbqt", dir=os.path.dirname(input_path_pdbqt))
-        search_space = self.parameters.search_space
-        arguments = [_EE.VINA_RECEPTOR, self.parameters.receptor_pdbqt_path[0],
-                     _EE.VINA_LIGAND, input_path_pdbqt,
-                     _EE.VINA_CPU, str(1),
-                     _EE.VINA_SEED, self.parameters.seed,
-                     _EE.VINA_OUT, tmp_pdbqt_docked,
-                     _EE.VINA_CENTER_X, str(search_space.center_x),
-                     _EE.VINA_CENTER_Y, str(search_space.center_y),
-                     _EE.VINA_CENTER_Z, str(search_space.center_z),
-                     _EE.VINA_SIZE_X, str(search_space.size_x),
-                     _EE.VINA_SIZE_Y, str(search_space.size_y),
-                     _EE.VINA_SIZE_Z, str(search_space.size_z),
-                     _EE.VINA_NUM_MODES, self.parameters.number_poses]
-
-        execution_result = self._ADV_executor.execute(command=_EE.VINA,
-                                                      arguments=arguments,
-                                                      check=True)
-        self._delay4file_system(path=tmp_pdbqt_docked)
-
-        # translate the parsed output PDBQT into an SDF
-        arguments = [tmp_pdbqt_docked,
-                     _BEE.OBABLE_INPUTFORMAT_PDBQT,
-                     _BEE.OBABEL_OUTPUT_FORMAT_SDF,
-                     "".join([_BEE.OBABEL_O, output_path_sdf])]
-        self._OpenBabel_executor.execute(command=_BEE.OBABEL,
-                                         arguments=arguments,
-                                         check=False)
-        self._delay4file_system(path=output_path_sdf)
-
     def write_docked_ligands(self, path, mode="all"):
         """This method overrides the parent class, docker.py write_docked_ligands method. This method writes docked
         ligands binding poses and conformers to a file. There is the option to output the best predicted binding pose
@@ -303,3 +296,69 @@ class AutodockVina(Docker, BaseModel):
         :raises ValueError: This error is raised if the ligands are neither RDkit nor OpenEye readable
         """
         self._write_docked_ligands(path, mode, mol_type=_LP.TYPE_RDKIT)
+
+
+def _convert_pdb_to_pdbqt(OpenBabel_executor: OpenBabelExecutor, pdb_path: str, pdbqt_path: str) -> bool:
+    # Note: In contrast to the target preparation,
+    # we will use a tree-based flexibility treatment here -
+    # thus, the option "-xr" is NOT used.
+    arguments = [pdb_path,
+                 _BEE.OBABEL_OUTPUT_FORMAT_PDBQT,
+                 "".join([_BEE.OBABEL_O, pdbqt_path]),
+                 _BEE.OBABEL_PARTIALCHARGE, _BEE.OBABEL_PARTIALCHARGE_GASTEIGER]
+    OpenBabel_executor.execute(command=_BEE.OBABEL,
+                               arguments=arguments,
+                               check=False)
+    return os.path.exists(pdbqt_path)
+
+
+# state of a worker process of the "AutoDock Vina" pool, set once per worker by "_initialize_worker()"
+_worker_state = {}
+
+
+def _initialize_worker(scratch_dir: str, prefix_execution: Optional[str], binary_location: Optional[str]):
+    _worker_state["scratch_dir"] = tempfile.mkdtemp(prefix="worker_", dir=scratch_dir)
+    _worker_state["ADV_executor"] = AutodockVinaExecutor(prefix_execution=prefix_execution,
+                                                         binary_location=binary_location)
+    _worker_state["OpenBabel_executor"] = OpenBabelExecutor()
+
+
+def _dock_ligand_in_worker(pdb_block: str, arguments: list, time_limit: Optional[int]) -> str:
+    """Dock a single ligand (handed over as PDB block) in the scratch directory of this worker and return the
+    docked poses as SDF block, which is empty if the ligand could not be docked (e.g. because "AutoDock Vina" did
+    not finish within "time_limit" seconds)."""
+    scratch_dir = _worker_state["scratch_dir"]
+    input_pdb, input_pdbqt, docked_pdbqt, docked_sdf = [os.path.join(scratch_dir, file_name) for file_name in
+                                                        ["ligand.pdb", "ligand.pdbqt", "docked.pdbqt", "docked.sdf"]]
+
+    # the scratch directory is reused for every ligand, so remove the files of the previous one first
+    for path in [input_pdb, input_pdbqt, docked_pdbqt, docked_sdf]:
+        if os.path.exists(path):
+            os.remove(path)
+
+    with open(input_pdb, "w") as f:
+        f.write(pdb_block)
+    if not _convert_pdb_to_pdbqt(_worker_state["OpenBabel_executor"], input_pdb, input_pdbqt):
+        return ""
+
+    try:
+        _worker_state["ADV_executor"].execute(command=_EE.VINA,
+                                              arguments=arguments + [_EE.VINA_LIGAND, input_pdbqt,
+                                                                     _EE.VINA_OUT, docked_pdbqt],
+                                              check=True,
+                                              timeout=time_limit)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return ""
+
+    # translate the parsed output PDBQT into an SDF
+    arguments = [docked_pdbqt,
+                 _BEE.OBABLE_INPUTFORMAT_PDBQT,
+                 _BEE.OBABEL_OUTPUT_FORMAT_SDF,
+                 "".join([_BEE.OBABEL_O, docked_sdf])]
+    _worker_state["OpenBabel_executor"].execute(command=_BEE.OBABEL,
+                                                arguments=arguments,
+                                                check=False)
+    if not os.path.isfile(docked_sdf):
+        return ""
+    with open(docked_sdf, "r") as f:
+        return f.read()
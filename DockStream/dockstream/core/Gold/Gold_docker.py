@@ -20,6 +20,7 @@ from dockstream.utils.enums.logging_enums import LoggingConfigEnum
 from dockstream.utils.execute_external.Gold import GoldExecutor
 
 from dockstream.core.docker import Docker
+from dockstream.core.ligand.ligand_store import LigandStore
 from dockstream.core.Gold.Gold_result_parser import GoldResultParser
 from dockstream.utils.enums.Gold_enums import GoldLigandPreparationEnum
 from dockstream.utils.enums.Gold_enums import GoldTargetKeywordEnum, GoldExecutablesEnum, GoldOutputEnum
@@ -202,6 +203,9 @@ class Gold(Docker):
         start_indices, sublists = self.get_sublists_for_docking(number_cores=number_cores)
         number_sublists = len(sublists)
         self._logger.log(f"Split ligands into {number_sublists} sublists for docking.", _LE.DEBUG)
+        # index the ligands by their identifier, so that the docked poses can be attached directly
+        ligand_store = LigandStore(self.ligands)
+
         sublists_submitted = 0
         slices_per_iteration = min(number_cores, number_sublists)
 
@@ -248,10 +252,7 @@ class Gold(Docker):
                     cur_conformer_name = str(molecule.GetProp("_Name")).split(sep='|')[0]
 
                     # add molecule to the appropriate ligand
-                    for ligand in self.ligands:
-                        if ligand.get_identifier() == cur_conformer_name:
-                            ligand.add_conformer(molecule)
-                            break
+                    ligand_store.attach_conformer(cur_conformer_name, molecule)
 
             # clean-up
             for path in tmp_output_dirs:
@@ -271,7 +272,7 @@ class Gold(Docker):
         self._docking_fail_check()
 
         # generate docking results as dataframe
-        result_parser = GoldResultParser(ligands=[ligand.get_clone() for ligand in self.ligands],
+        result_parser = GoldResultParser(ligands=self.ligands,
                                          fitness_function=self.parameters.fitness_function,
                                          response_value=self.parameters.response_value)
         self._df_results = result_parser.as_dataframe()
@@ -172,7 +172,7 @@ class OpenEye(Docker):
 
         # use self.docker.GetHighScoresAreBetter() to get a boolean indicating whether the particular scoring function
         # used considers "lower" values to be better or not; but the compounds are ordered properly here
-        result_parser = OpenEyeResultParser(ligands=[ligand.get_clone() for ligand in self.ligands])
+        result_parser = OpenEyeResultParser(ligands=self.ligands)
         self._df_results = result_parser.as_dataframe()
         self._logger.log(f"Successfully docked {len(self.ligands)} molecules.", _LE.DEBUG)
 
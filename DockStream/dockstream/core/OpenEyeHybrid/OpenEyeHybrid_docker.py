@@ -15,6 +15,7 @@ from dockstream.utils.enums.logging_enums import LoggingConfigEnum
 from dockstream.utils.execute_external.OE_Hybrid import OpenEyeHybridExecutor
 
 from dockstream.core.docker import Docker
+from dockstream.core.ligand.ligand_store import LigandStore
 from dockstream.core.OpenEyeHybrid.OpenEyeHybrid_result_parser import OpenEyeHybridResultParser
 from dockstream.utils.enums.OE_Hybrid_enums import OpenEyeHybridLigandPreparationEnum
 from dockstream.utils.enums.OE_Hybrid_enums import OpenEyeHybridExecutablesEnum, OpenEyeHybridOutputKeywordsEnum
@@ -133,6 +134,9 @@ class OpenEyeHybrid(Docker):
         start_indices, sublists = self.get_sublists_for_docking(number_cores=number_cores)
         number_sublists = len(sublists)
         self._logger.log(f"Split ligands into {number_sublists} sublists for docking.", _LE.DEBUG)
+        # index the ligands by their identifier, so that the docked poses can be attached directly
+        ligand_store = LigandStore(self.ligands)
+
         sublists_submitted = 0
         slices_per_iteration = min(number_cores, number_sublists)
 
@@ -175,10 +179,7 @@ class OpenEyeHybrid(Docker):
                     cur_conformer_name = str(molecule.GetProp("_Name"))
 
                     # add molecule to the appropriate ligand
-                    for ligand in self.ligands:
-                        if ligand.get_identifier() == cur_conformer_name:
-                            ligand.add_conformer(molecule)
-                            break
+                    ligand_store.attach_conformer(cur_conformer_name, molecule)
 
             # clean-up
             for path in tmp_output_dirs:
@@ -197,7 +198,7 @@ class OpenEyeHybrid(Docker):
         self._docking_fail_check()
 
         # parse the result of the docking step
-        result_parser = OpenEyeHybridResultParser(ligands=[ligand.get_clone() for ligand in self.ligands])
+        result_parser = OpenEyeHybridResultParser(ligands=self.ligands)
         self._df_results = result_parser.as_dataframe()
 
         # set docking flag
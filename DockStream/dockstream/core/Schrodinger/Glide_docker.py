@@ -14,6 +14,7 @@ import rdkit.Chem as Chem
 from pydantic import PrivateAttr, BaseModel, Field
 
 from dockstream.core.docker import Docker, _LE
+from dockstream.core.ligand.ligand_store import LigandStore
 from dockstream.core.Schrodinger.license_token_guard import SchrodingerLicenseTokenGuard
 from dockstream.core.Schrodinger.Glide_result_parser import GlideResultParser
 from dockstream.utils.execute_external.Schrodinger import SchrodingerExecutor
@@ -398,6 +399,9 @@ class Glide(Docker, BaseModel):
         number_sublists = len(sublists)
         number_ligands_per_sublist = len(sublists[0])
         self._logger.log(f"Split ligands into {number_sublists} sublists for docking.", _LE.DEBUG)
+        # index the ligands by their identifier, so that the docked poses can be attached directly
+        ligand_store = LigandStore(self.ligands)
+
         sublists_submitted = 0
         slices_per_iteration = min(number_cores, number_sublists)
 
@@ -444,10 +448,7 @@ class Glide(Docker, BaseModel):
                     cur_conformer_name = str(molecule.GetProp("_Name"))
 
                     # add molecule to the appropriate ligand
-                    for ligand in self.ligands:
-                        if ligand.get_identifier() == cur_conformer_name:
-                            ligand.add_conformer(molecule)
-                            break
+                    ligand_store.attach_conformer(cur_conformer_name, molecule)
 
             # clean-up
             for path in tmp_output_dirs:
@@ -465,7 +466,7 @@ class Glide(Docker, BaseModel):
         self._docking_fail_check()
 
         # generate docking results as dataframe
-        result_parser = GlideResultParser(ligands=[ligand.get_clone() for ligand in self.ligands])
+        result_parser = GlideResultParser(ligands=self.ligands)
         self._df_results = result_parser.as_dataframe()
 
         # set docking flag
@@ -0,0 +1,104 @@
+import time
+from typing import Optional, Any
+
+import rdkit.Chem as Chem
+from pydantic import BaseModel
+from typing_extensions import Literal
+
+from dockstream.core.Schrodinger.Glide_docker import Parallelization
+from dockstream.core.docker import Docker
+from dockstream.core.Stub.Stub_result_parser import StubResultParser
+from dockstream.utils.enums.logging_enums import LoggingConfigEnum
+from dockstream.utils.enums.Stub_enums import StubResultKeywordsEnum
+from dockstream.utils.enums.RDkit_enums import RDkitLigandPreparationEnum
+
+from dockstream.utils.translations.molecule_translator import MoleculeTranslator
+
+_LE = LoggingConfigEnum()
+_LP = RDkitLigandPreparationEnum()
+_RK = StubResultKeywordsEnum()
+
+
+class StubParameters(BaseModel):
+    parallelization: Optional[Parallelization]
+    score_per_heavy_atom: float = -0.5
+    delay_per_ligand_sec: float = 0.0
+
+    def get(self, key: str) -> Any:
+        """Temporary method to support nested_get"""
+        return self.dict()[key]
+
+
+class Stub(Docker):
+    """Local "Stub" backend, which does not call any external docking binaries. Every prepared ligand is "docked"
+    as is (one pose, the embedded input molecule) and gets the deterministic score "score_per_heavy_atom" times
+    its number of heavy atoms, so that docking workflows (e.g. the "DockingSession" API) can be tested and
+    benchmarked without any docking software installed. Optionally, "delay_per_ligand_sec" emulates the time
+    a real backend spends per ligand."""
+
+    backend: Literal["Stub"] = "Stub"
+    parameters: StubParameters = StubParameters()
+
+    class Config:
+        underscore_attrs_are_private = True
+
+    def __init__(self, **run_parameters):
+        super().__init__(**run_parameters)
+
+    def _get_score_from_conformer(self, conformer):
+        return float(conformer.GetProp(_RK.SDF_TAG_SCORE))
+
+    def add_molecules(self, molecules: list):
+        """This method overrides the parent class, docker.py add_molecules method. This method appends prepared
+        ligands to a list for subsequent docking.
+
+        :param molecules: A list that is to contain all prepared ligands for subsequent docking
+        :type molecules: list
+        """
+        mol_trans = MoleculeTranslator(self.ligands, force_mol_type=_LP.TYPE_RDKIT)
+        mol_trans.add_molecules(molecules)
+        self.ligands = mol_trans.get_as_rdkit()
+        self._docking_performed = False
+
+    def _dock(self, number_cores):
+        for ligand in self.ligands:
+            # ligands, for which the preparation failed, do not get a pose
+            if ligand.get_molecule() is None:
+                continue
+            time.sleep(self.parameters.delay_per_ligand_sec)
+
+            conformer = Chem.Mol(ligand.get_molecule())
+            score = self.parameters.score_per_heavy_atom * conformer.GetNumHeavyAtoms()
+            conformer.SetProp("_Name", ligand.get_identifier())
+            conformer.SetProp(_RK.SDF_TAG_SCORE, str(score))
+            ligand.add_conformer(conformer)
+        self._log_docking_progress(number_done=len(self.ligands), number_total=len(self.ligands))
+
+        # add the tags to the conformers
+        # -> <ligand_number>:<enumeration>:<conformer_number>
+        for ligand in self.ligands:
+            ligand.add_tags_to_conformers()
+
+        # log any docking fails
+        self._docking_fail_check()
+
+        # generate docking results as dataframe
+        result_parser = StubResultParser(ligands=self.ligands)
+        self._df_results = result_parser.as_dataframe()
+
+        # set docking flag
+        self._docking_performed = True
+
+    def write_docked_ligands(self, path, mode="all"):
+        """This method overrides the parent class, docker.py write_docked_ligands method. This method writes the
+        "docked" ligands to a file.
+
+        :param path: Contains information on results output path
+        :type path: string
+        :param mode: Determines whether the output contains the best predicted binding pose per ligand, the best
+            predicted binding pose per enumeration, or all the predicted binding poses
+        :type mode: string, optional, default value is "all". Other possible values are "best_per_ligand" and
+            "best_per_enumeration"
+        :raises DockingRunFailed Error: This error is raised if the docking run has not been performed
+        """
+        self._write_docked_ligands(path, mode, mol_type=_LP.TYPE_RDKIT)
@@ -5,13 +5,18 @@ import multiprocessing
 from enum import Enum
 from typing import List, Optional, Union
 
+import numpy as np
 import pandas as pd
 from pydantic import BaseModel, PrivateAttr
 
+from dockstream.containers.docking_container import DockingContainer
+from dockstream.core.ligand.ligand_store import LigandStore
 from dockstream.loggers.docking_logger import DockingLogger
 from dockstream.loggers.blank_logger import BlankLogger
 from dockstream.utils.dockstream_exceptions import DockingRunFailed
-from dockstream.utils.files_paths import generate_folder_structure
+from dockstream.utils.files_paths import generate_folder_structure, attach_root_path
+from dockstream.utils.entry_point_functions.header import initialize_logging, set_environment
+from dockstream.utils.entry_point_functions.embedding import embed_ligands
 
 from dockstream.utils.parallelization.general_utils import split_into_sublists, get_progress_bar_string
 from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
@@ -259,27 +264,26 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
             raise ValueError
 
     def _select_conformers(self, mode, mol_type):
-        ligands = [deepcopy(lig) for lig in self.ligands]
         selected_conformers = []
 
         # extract all conformers for all ligands
-        for ligand in ligands:
+        for ligand in self.ligands:
             for conformer in ligand.get_conformers():
                 selected_conformers.append(conformer)
-        if mode == _DE.OUTPUT_MODE_ALL:
-            return selected_conformers
 
         # filter down to "best_per_enumeration"
-        selected_conformers = [conf for conf in selected_conformers if self._is_best_per_enumeration(conformer=conf,
-                                                                                                     mol_type=mol_type)]
-        if mode == _DE.OUTPUT_MODE_BESTPERENUMERATION:
-            return selected_conformers
+        if mode != _DE.OUTPUT_MODE_ALL:
+            selected_conformers = [conf for conf in selected_conformers
+                                   if self._is_best_per_enumeration(conformer=conf, mol_type=mol_type)]
 
         # filter down to "best_per_ligand"
-        selected_conformers = self._get_best_conformer_per_ligand(conformers=selected_conformers,
-                                                                  mol_type=mol_type,
-                                                                  ligand_ids=list(set([ligand.get_ligand_number() for ligand in ligands])))
-        return selected_conformers
+        if mode not in [_DE.OUTPUT_MODE_ALL, _DE.OUTPUT_MODE_BESTPERENUMERATION]:
+            selected_conformers = self._get_best_conformer_per_ligand(conformers=selected_conformers,
+                                                                      mol_type=mol_type,
+                                                                      ligand_ids=list(set([ligand.get_ligand_number() for ligand in self.ligands])))
+
+        # only copy the selected conformers (rather than all ligands), so that writing them out cannot alter the poses
+        return [deepcopy(conformer) for conformer in selected_conformers]
 
     def _write_docked_ligands(self, path, mode, mol_type):
         if not self._docking_performed:
@@ -314,29 +318,13 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
            Relevant messages are logged"""
         self._logger.log(f"Attempted to dock {len(self.ligands)} molecules.", _LE.DEBUG)
         # check if there are cases where a ligand completely fails to dock (i.e. all its enumerations fail)
-        ligand_num_tracker = []
-        total_ligand_fails = 0
+        failed_ligand_numbers = LigandStore(self.ligands).get_failed_ligand_numbers()
+        failed_smiles = {ligand.get_ligand_number(): ligand.get_original_smile() for ligand in self.ligands}
+        for ligand_number in failed_ligand_numbers:
+            # this block only runs if the ligand and all its enumerations failed to dock
+            self._logger.log(f"Ligand {ligand_number} with SMILES: {failed_smiles[ligand_number]} and all its enumerations failed to dock.", _LE.DEBUG)
 
-        for ligand in self.ligands:
-            current_num = ligand.get_ligand_number()
-            if current_num not in ligand_num_tracker:
-                ligand_num_tracker.append(current_num)
-                fail_bool = False
-                for docked_ligand in self.ligands:
-                    if docked_ligand.get_ligand_number() == current_num:
-                        if len(docked_ligand.get_conformers()) == 0:
-                            smiles = docked_ligand.get_original_smile()
-                            fail_bool = True
-                        else:
-                            fail_bool = False
-                            break
-
-                if fail_bool:
-                    # this block only runs if the ligand and all its enumerations failed to dock
-                    total_ligand_fails += 1
-                    self._logger.log(f"Ligand {ligand.get_ligand_number()} with SMILES: {smiles} and all its enumerations failed to dock.", _LE.DEBUG)
-
-        self._logger.log(f"{total_ligand_fails} ligand(s) completely failed to dock", _LE.DEBUG)
+        self._logger.log(f"{len(failed_ligand_numbers)} ligand(s) completely failed to dock", _LE.DEBUG)
 
         # keep track of the number of enumerated ligands which failed to dock
         not_docked = len([conf for conf in self.ligands if len(conf.get_conformers()) == 0])
@@ -416,37 +404,14 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
         if not self._docking_performed:
             raise DockingRunFailed("Do the docking first.")
 
-        # combine scores of all enumerations (Ligand objects) into lists
-        ligand_numbers = list(set([ligand.get_ligand_number() for ligand in self.ligands]))
-        buffer_list = []
-        for ligand_number in ligand_numbers:
-            cur_ligand_list = []
-            for ligand in self.ligands:
-                if ligand_number != ligand.get_ligand_number():
-                    continue
-                for conformer in ligand.get_conformers():
-                    cur_ligand_list.append(self._get_score_from_conformer(conformer))
-            buffer_list.append(cur_ligand_list)
-
-        # empty list -> no valid docking, return "NA"
-        # otherwise store either the best score per list or all values
-        result_list = []
-        for ligand_scores_list in buffer_list:
-            if len(ligand_scores_list) == 0:
-                result_list.append(_RK.FIXED_VALUE_NA)
-            else:
-                if best_only:
-                    if best == "min":
-                        result_list.append(min(ligand_scores_list))
-                    elif best == "max":
-                        result_list.append(max(ligand_scores_list))
-                    else:
-                        self._logger.log(f"Parameter best must be either \"min\" or \"max\" (value {best} unknown).",
-                                         _LE.EXCEPTION)
-                        raise ValueError
-                else:
-                    result_list = result_list + ligand_scores_list
-        return result_list
+        if best not in ["min", "max"]:
+            self._logger.log(f"Parameter best must be either \"min\" or \"max\" (value {best} unknown).",
+                             _LE.EXCEPTION)
+            raise ValueError
+
+        # combine scores of all enumerations (Ligand objects) per ligand number; no valid docking results in "NA"
+        ligand_store = LigandStore(self.ligands, func_get_score=self._get_score_from_conformer)
+        return ligand_store.get_scores(best_only=best_only, best=best)
 
     def _get_score_from_conformer(self, conformer):
         raise NotImplementedError
@@ -513,3 +478,140 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
 
     def _delay4file_system(self, path) -> bool:
         return self._wait_until_file_generation(path=path, interval_sec=1, maximum_sec=10)
+
+
+def initialize_docker(docking_run: dict) -> Docker:
+    """This function initializes the docker for a docking run, depending on its backend. The backends are imported
+    here, as they all depend on this module.
+
+    :param docking_run: The configuration of the docking run (one element of "docking_runs")
+    :type docking_run: dict
+    :raises Exception: This error is raised if the backend is unknown
+    :return: Docker, the initialized (but not yet docked) docker
+    """
+    backend = docking_run[_DE.BACKEND]
+    if backend == _DE.BACKEND_RDOCK:
+        from dockstream.core.rDock.rDock_docker import rDock
+        return rDock(**docking_run)
+    elif backend == _DE.BACKEND_OPENEYE:
+        from dockstream.core.OpenEye.OpenEye_docker import OpenEye
+        return OpenEye(**docking_run)
+    elif backend == _DE.BACKEND_OPENEYEHYBRID:
+        from dockstream.core.OpenEyeHybrid.OpenEyeHybrid_docker import OpenEyeHybrid
+        return OpenEyeHybrid(**docking_run)
+    elif backend == _DE.BACKEND_GLIDE:
+        from dockstream.core.Schrodinger.Glide_docker import Glide
+        return Glide(**docking_run)
+    elif backend == _DE.BACKEND_GOLD:
+        from dockstream.core.Gold.Gold_docker import Gold
+        return Gold(**docking_run)
+    elif backend == _DE.BACKEND_AUTODOCKVINA:
+        from dockstream.core.AutodockVina.AutodockVina_docker import AutodockVina
+        return AutodockVina(**docking_run)
+    elif backend == _DE.BACKEND_STUB:
+        from dockstream.core.Stub.Stub_docker import Stub
+        return Stub(**docking_run)
+    else:
+        raise Exception("Backend is unknown.")
+
+
+class DockingSession:
+    """Long-lived Python API for repeatedly docking and scoring lists of SMILES, e.g. as the reward of a
+    reinforcement learning loop. In contrast to calling the "docker.py" entry point for every batch, the
+    configuration is parsed and the logging and environment are set up only once, and the docker (with its
+    prepared target and initialized backend executors) is kept alive between calls to "score()".
+
+    The configuration is the same as for "docker.py"; the input and output specifications of the embedding
+    pools are ignored, as the SMILES are handed over to "score()" directly. Docking runs are not written out
+    either, their scores are returned instead.
+
+    :param conf: A docking configuration (as dictionary, JSON string or path to a JSON file)
+    :param validation: If set to False, the JSON Schema validation is skipped
+    :param run_id: The "run_id" of the docking run to use; by default, the first docking run is used
+    :param log_conf: Path to a logger configuration; by default, "config/logging/default.json" is used
+    """
+
+    def __init__(self, conf, validation=True, run_id: str = None, log_conf: str = None):
+        try:
+            self._config = DockingContainer(conf=conf, validation=validation)
+        except Exception as e:
+            raise DockingRunFailed() from e
+
+        # header: process the header once for the whole session
+        if log_conf is None:
+            log_conf = attach_root_path(_LE.PATH_CONFIG_DEFAULT)
+        self._logger = initialize_logging(config=self._config, task=_DE.DOCKING, _task_enum=_DE,
+                                          log_conf_path=log_conf)
+        set_environment(config=self._config, task=_DE.DOCKING, _task_enum=_DE, logger=self._logger)
+
+        # select the docking run and the embedding pools it uses
+        docking_runs = self._config[_DE.DOCKING][_DE.DOCKING_RUNS]
+        if not isinstance(docking_runs, list):
+            docking_runs = [docking_runs]
+        if run_id is None:
+            self._docking_run = docking_runs[0]
+        else:
+            matching_runs = [run for run in docking_runs if run.get(_DE.RUN_ID) == run_id]
+            if len(matching_runs) == 0:
+                raise DockingRunFailed(f"Could not find docking run with run_id {run_id}.")
+            self._docking_run = matching_runs[0]
+
+        input_pools = self._docking_run[_DE.INPUT_POOLS]
+        if isinstance(input_pools, str):
+            input_pools = [input_pools]
+        pools = self._config[_DE.DOCKING][_LPE.LIGAND_PREPARATION][_LPE.EMBEDDING_POOLS]
+        if not isinstance(pools, list):
+            pools = [pools]
+        self._pools = []
+        for pool_id in input_pools:
+            matching_pools = [pool for pool in pools if pool[_LPE.POOLID] == pool_id]
+            if len(matching_pools) == 0:
+                raise DockingRunFailed(f"Could not find pool id {pool_id} for docking run.")
+
+            # the SMILES are handed over directly and the embedded ligands are not written out
+            pool = deepcopy(matching_pools[0])
+            pool[_LPE.INPUT] = {**pool.get(_LPE.INPUT, {}), _LPE.INPUT_TYPE: _LPE.INPUT_TYPE_LIST}
+            pool.pop(_LPE.OUTPUT, None)
+            self._pools.append((pools.index(matching_pools[0]), pool))
+
+        # the docker is initialized once and reused for every call
+        self._docker = initialize_docker(self._docking_run)
+        self._logger.log(f"Initialized docking session for run {self._docking_run.get(_DE.RUN_ID)}.", _LE.DEBUG)
+
+    def get_docker(self) -> Docker:
+        """Returns the docker of this session (holding the ligands of the last call to "score()")."""
+        return self._docker
+
+    def score(self, smiles_list: list):
+        """Prepares and docks the molecules in "smiles_list" and returns their best docking scores.
+
+        :param smiles_list: The SMILES to dock
+        :type smiles_list: list
+        :return: np.ndarray, the best score (over all enumerations and poses) of every molecule, in the same
+            order as "smiles_list"; molecules which failed to be prepared or docked get NaN
+        """
+        scores = np.full(len(smiles_list), np.nan)
+        if len(smiles_list) == 0:
+            return scores
+
+        # ligand preparation, numbering the ligands by their position in "smiles_list"
+        ligands = []
+        for pool_number, pool in self._pools:
+            prep = embed_ligands(smiles=list(smiles_list),
+                                 pool_number=pool_number,
+                                 pool=pool,
+                                 logger=self._logger,
+                                 ligand_number_start=0)
+            ligands += [lig.get_clone() for lig in prep.get_ligands()]
+
+        # docking, reusing the docker of the previous calls
+        self._docker.ligands = []
+        self._docker.add_molecules(molecules=ligands)
+        self._docker.dock()
+
+        # "get_scores()" returns the best score per ligand number (in ascending order) or "NA"
+        ligand_numbers = sorted(set([ligand.get_ligand_number() for ligand in self._docker.ligands]))
+        for ligand_number, score in zip(ligand_numbers, self._docker.get_scores(best_only=True)):
+            if score != _RK.FIXED_VALUE_NA:
+                scores[ligand_number] = float(score)
+        return scores
@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+
+from dockstream.core.ligand.ligand import Ligand
+from dockstream.utils.enums.docking_enum import ResultKeywordsEnum
+
+_RK = ResultKeywordsEnum()
+
+
+class LigandStore:
+    """This class indexes a list of ligands by (ligand_number, enumeration) and holds the conformers of all ligands
+    (and their scores) in flat arrays, where the conformers of every ligand are stored contiguously and are addressed
+    by offsets. Conformers can be attached to ligands and ligands can be looked up in constant time, while scores and
+    result tables are computed with vectorized operations over the flat arrays (rather than by searching the ligand
+    list for every ligand number).
+
+    The ligands are not copied: attaching a conformer adds it to the ligand itself. The flat arrays are built
+    (lazily) from the conformers of the ligands; if these are changed directly on the ligands (e.g. sorted), call
+    "refresh()" afterwards."""
+
+    def __init__(self, ligands: list = None, func_get_score=None):
+        """
+        :param ligands: The ligands to be indexed (in this order)
+        :type ligands: list
+        :param func_get_score: Function returning the score of a conformer; only needed for scores and result tables
+        :type func_get_score: function, optional
+        """
+        self._func_get_score = func_get_score
+
+        self._ligands = []
+        self._index = {}
+
+        # flat arrays over all conformers, built by "_build_arrays()"; "_offsets[i]:_offsets[i + 1]" addresses the
+        # conformers of the i-th ligand
+        self._conformers = None
+        self._conformer_scores = None
+        self._offsets = None
+
+        if ligands is not None:
+            for ligand in ligands:
+                self.add_ligand(ligand)
+
+    def __len__(self):
+        return len(self._ligands)
+
+    def add_ligand(self, ligand: Ligand):
+        # if several ligands share an identifier (e.g. when merging pools), look-ups return the first one
+        key = (ligand.get_ligand_number(), ligand.get_enumeration())
+        self._index.setdefault(key, len(self._ligands))
+        self._ligands.append(ligand)
+        self.refresh()
+
+    def get_ligands(self) -> list:
+        return self._ligands
+
+    def get_ligand(self, ligand_number: int, enumeration: int = 0):
+        position = self._index.get((ligand_number, enumeration))
+        return None if position is None else self._ligands[position]
+
+    def get_ligand_by_identifier(self, identifier: str):
+        """Return the ligand with identifier "<ligand_number>:<enumeration>" (or None, if it is unknown)."""
+        parts = identifier.split(':')
+        if len(parts) != 2 or not all(part.isdigit() for part in parts):
+            return None
+        return self.get_ligand(int(parts[0]), int(parts[1]))
+
+    def attach_conformer(self, identifier: str, conformer) -> bool:
+        """Add a conformer to the ligand with identifier "<ligand_number>:<enumeration>" and return True, or False if
+        there is no such ligand."""
+        ligand = self.get_ligand_by_identifier(identifier)
+        if ligand is None:
+            return False
+        ligand.add_conformer(conformer)
+        self.refresh()
+        return True
+
+    def refresh(self):
+        """Mark the flat arrays as outdated, so that they are rebuilt from the ligands on their next use."""
+        self._conformers = None
+
+    def _build_arrays(self):
+        if self._conformers is not None:
+            return
+        conformers = []
+        offsets = np.zeros(len(self._ligands) + 1, dtype=np.int64)
+        for position, ligand in enumerate(self._ligands):
+            conformers.extend(ligand.get_conformers())
+            offsets[position + 1] = len(conformers)
+        self._conformers = conformers
+        self._offsets = offsets
+        if self._func_get_score is not None:
+            self._conformer_scores = np.array([self._func_get_score(conformer) for conformer in conformers],
+                                              dtype=np.float64)
+        else:
+            self._conformer_scores = None
+
+    def _get_conformer_scores(self) -> np.ndarray:
+        self._build_arrays()
+        if self._conformer_scores is None:
+            raise ValueError("A function to get the score of a conformer is needed to compute scores.")
+        return self._conformer_scores
+
+    def get_conformers(self, ligand_number: int, enumeration: int = 0) -> list:
+        position = self._index[(ligand_number, enumeration)]
+        self._build_arrays()
+        return self._conformers[self._offsets[position]:self._offsets[position + 1]]
+
+    def _get_ligand_columns(self):
+        # per ligand: its number and its number of conformers
+        self._build_arrays()
+        ligand_numbers = np.array([ligand.get_ligand_number() for ligand in self._ligands], dtype=np.int64)
+        return ligand_numbers, np.diff(self._offsets)
+
+    def get_scores(self, best_only: bool, best="min") -> list:
+        """Return the scores grouped by ligand number (in ascending order), combining all enumerations of a ligand:
+        either the best score per ligand number or all scores (in the order of the ligands and their conformers).
+        Ligand numbers without any conformer get the value "NA".
+
+        :param best_only: Determines whether only the best score per ligand number is returned
+        :type best_only: boolean
+        :param best: Whether the minimum ("min") or the maximum ("max") score is best
+        :type best: string
+        :raises ValueError: This error is raised if best is neither "min" nor "max"
+        :return: list of scores
+        """
+        if best not in ["min", "max"]:
+            raise ValueError(f"Parameter best must be either \"min\" or \"max\" (value {best} unknown).")
+        scores = self._get_conformer_scores()
+        ligand_numbers, number_conformers = self._get_ligand_columns()
+        unique_numbers = np.unique(ligand_numbers)
+        if len(unique_numbers) == 0:
+            return []
+
+        # sort the conformers by the number of their ligand (stable, so that the order of the ligands and their
+        # conformers is kept within every group) and find the start of every group
+        conformer_numbers = np.repeat(ligand_numbers, number_conformers)
+        order = np.argsort(conformer_numbers, kind="stable")
+        sorted_scores = scores[order]
+        sorted_numbers = conformer_numbers[order]
+        group_numbers, group_starts = np.unique(sorted_numbers, return_index=True)
+        has_conformers = np.isin(unique_numbers, group_numbers)
+
+        if best_only:
+            reduce = np.minimum if best == "min" else np.maximum
+            best_scores = reduce.reduceat(sorted_scores, group_starts) if len(sorted_scores) > 0 else np.array([])
+            result = np.full(len(unique_numbers), _RK.FIXED_VALUE_NA, dtype=object)
+            result[has_conformers] = best_scores.tolist()
+            return result.tolist()
+
+        # all scores, with "NA" for ligand numbers without any conformer
+        group_ends = np.append(group_starts[1:], len(sorted_scores))
+        sorted_scores = sorted_scores.tolist()
+        result = []
+        group = 0
+        for docked in has_conformers:
+            if docked:
+                result += sorted_scores[group_starts[group]:group_ends[group]]
+                group += 1
+            else:
+                result.append(_RK.FIXED_VALUE_NA)
+        return result
+
+    def get_failed_ligand_numbers(self) -> list:
+        """Return the (sorted) ligand numbers, for which none of the enumerations has a conformer."""
+        ligand_numbers, number_conformers = self._get_ligand_columns()
+        docked_numbers = np.unique(ligand_numbers[number_conformers > 0])
+        return np.setdiff1d(np.unique(ligand_numbers), docked_numbers).tolist()
+
+    def as_dataframe(self) -> pd.DataFrame:
+        """Return one row per conformer (in the order of the ligands and their conformers), with the ligand number,
+        enumeration, conformer number, name, score and SMILES of the ligand, and whether it is the first (lowest)
+        conformer of its ligand."""
+        scores = self._get_conformer_scores()
+        ligand_numbers, number_conformers = self._get_ligand_columns()
+        ligand_positions = np.repeat(np.arange(len(self._ligands)), number_conformers)
+        conformer_numbers = np.arange(len(scores)) - self._offsets[ligand_positions]
+
+        enumerations = np.array([ligand.get_enumeration() for ligand in self._ligands], dtype=np.int64)
+        smiles = np.array([ligand.get_smile() for ligand in self._ligands], dtype=object)
+        names = [self._ligands[position].get_name() for position in ligand_positions]
+        names = [self._ligands[position].get_identifier() + ':' + str(conformer_number) if name is None else name
+                 for name, position, conformer_number in zip(names, ligand_positions, conformer_numbers)]
+
+        return pd.DataFrame({_RK.DF_LIGAND_NUMBER: ligand_numbers[ligand_positions],
+                             _RK.DF_LIGAND_ENUMERATION: enumerations[ligand_positions],
+                             _RK.DF_CONFORMER: conformer_numbers,
+                             _RK.DF_LIGAND_NAME: names,
+                             _RK.DF_SCORE: scores,
+                             _RK.DF_SMILES: smiles[ligand_positions],
+                             _RK.DF_LOWEST_CONFORMER: conformer_numbers == 0},
+                            columns=[_RK.DF_LIGAND_NUMBER,
+                                     _RK.DF_LIGAND_ENUMERATION,
+                                     _RK.DF_CONFORMER,
+                                     _RK.DF_LIGAND_NAME,
+                                     _RK.DF_SCORE,
+                                     _RK.DF_SMILES,
+                                     _RK.DF_LOWEST_CONFORMER])
+
+    def to_csv(self, path: str):
+        self.as_dataframe().to_csv(path_or_buf=path, sep=',', na_rep='', header=True, index=False)
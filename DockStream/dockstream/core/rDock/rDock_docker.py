@@ -11,6 +11,7 @@ from typing_extensions import Literal
 
 from dockstream.core.Schrodinger.Glide_docker import Parallelization
 from dockstream.core.docker import Docker
+from dockstream.core.ligand.ligand_store import LigandStore
 from dockstream.core.rDock.rDock_result_parser import rDockResultParser
 from dockstream.utils.enums.logging_enums import LoggingConfigEnum
 from dockstream.utils.execute_external.rDock import rDockExecutor
@@ -61,10 +62,10 @@ class rDock(Docker):
                 prefix_execution=self.parameters.prefix_execution,
                 binary_location=self.parameters.binary_location
             )
-        if not self._rDock_executor.is_available():
-            raise DockingRunFailed("Cannot initialize rDock docker, as rDock backend is not available - abort.")
+            if not self._rDock_executor.is_available():
+                raise DockingRunFailed("Cannot initialize rDock docker, as rDock backend is not available - abort.")
+            self._logger.log(f"Checked rDock backend availability (prefix_execution={self.parameters.prefix_execution}).", _LE.DEBUG)
         self._rDock_executor.set_env_vars()
-        self._logger.log(f"Checked rDock backend availability (prefix_execution={self.parameters.prefix_execution}).", _LE.DEBUG)
 
     def _get_score_from_conformer(self, conformer):
         return float(conformer.GetProp(_ROE.SCORE))
@@ -120,6 +121,9 @@ class rDock(Docker):
         number_sublists = len(sublists)
         self._logger.log(f"Split ligands into {number_sublists} sublists for docking.", _LE.DEBUG)
 
+        # index the ligands by their identifier, so that the docked poses can be attached directly
+        ligand_store = LigandStore(self.ligands)
+
         sublists_submitted = 0
         slices_per_iteration = min(number_cores, number_sublists)
         while sublists_submitted < len(sublists):
@@ -160,10 +164,7 @@ class rDock(Docker):
                     cur_conformer_name = str(molecule.GetProp(_ROE.NAME))
 
                     # add molecule to the appropriate ligand
-                    for ligand in self.ligands:
-                        if ligand.get_identifier() == cur_conformer_name:
-                            ligand.add_conformer(molecule)
-                            break
+                    ligand_store.attach_conformer(cur_conformer_name, molecule)
 
             # clean-up
             for path in tmp_output_dirs:
@@ -181,7 +182,7 @@ class rDock(Docker):
         self._docking_fail_check()
 
         # parse the result of the docking step
-        result_parser = rDockResultParser([ligand.get_clone() for ligand in self.ligands])
+        result_parser = rDockResultParser(self.ligands)
         self._df_results = result_parser.as_dataframe()
 
         # docking flag
@@ -3,6 +3,7 @@ import pandas as pd
 import warnings
 from copy import deepcopy
 from dockstream.core.ligand.ligand import Ligand
+from dockstream.core.ligand.ligand_store import LigandStore
 
 from dockstream.utils.dockstream_exceptions import ResultParsingFailed
 
@@ -39,24 +40,4 @@ class ResultParser(metaclass=abc.ABCMeta):
             return ligand.get_name()
 
     def _construct_dataframe_with_funcobject(self, func_get_score) -> pd.DataFrame:
-        data_buffer = []
-        for ligand in self._ligands:
-            best = True
-            for conformer_index, conformer in enumerate(ligand.get_conformers()):
-                name = self._get_name(ligand, conformer_index)
-                row = [ligand.get_ligand_number(),
-                       ligand.get_enumeration(),
-                       conformer_index,
-                       name,
-                       func_get_score(conformer),
-                       ligand.get_smile(),
-                       best]
-                best = False
-                data_buffer.append(row)
-        return pd.DataFrame(data_buffer, columns=[self._RK.DF_LIGAND_NUMBER,
-                                                  self._RK.DF_LIGAND_ENUMERATION,
-                                                  self._RK.DF_CONFORMER,
-                                                  self._RK.DF_LIGAND_NAME,
-                                                  self._RK.DF_SCORE,
-                                                  self._RK.DF_SMILES,
-                                                  self._RK.DF_LOWEST_CONFORMER])
+        return LigandStore(self._ligands, func_get_score=func_get_score).as_dataframe()
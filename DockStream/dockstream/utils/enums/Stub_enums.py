@@ -0,0 +1,17 @@
+from dockstream.utils.enums.docking_enum import ResultKeywordsEnum
+
+
+class StubResultKeywordsEnum(ResultKeywordsEnum):
+    """This "Enum" serves to store all keywords for "Stub" result strings."""
+
+    SDF_TAG_SCORE = "SCORE"
+
+    # try to find the internal value and return
+    def __getattr__(self, name):
+        if name in self:
+            return name
+        raise AttributeError
+
+    # prohibit any attempt to set any values
+    def __setattr__(self, key, value):
+        raise ValueError("No changes allowed.")
@@ -10,7 +10,7 @@ class AutodockVinaExecutor(ExecutorBase):
     def __init__(self, prefix_execution=None, binary_location=None):
         super().__init__(prefix_execution=prefix_execution, binary_location=binary_location)
 
-    def execute(self, command: str, arguments: list, check=True, location=None):
+    def execute(self, command: str, arguments: list, check=True, location=None, timeout=None):
         # check, whether a proper executable is provided
         if command not in [EE.VINA]:
             raise ValueError("Parameter command must be an dictionary of the internal AutoDock Vina executable list.")
@@ -18,7 +18,8 @@ class AutodockVinaExecutor(ExecutorBase):
         return super().execute(command=command,
                                arguments=arguments,
                                check=check,
-                               location=None)
+                               location=None,
+                               timeout=timeout)
 
     def is_available(self):
         try:
@@ -1,5 +1,6 @@
 import os
 import abc
+import signal
 import subprocess
 from shlex import quote
 
@@ -13,7 +14,7 @@ class ExecutorBase(metaclass=abc.ABCMeta):
         self._binary_location = binary_location
 
     @abc.abstractmethod
-    def execute(self, command: str, arguments: list, check=True, location=None):
+    def execute(self, command: str, arguments: list, check=True, location=None, timeout=None):
         # to avoid security issues, escape the arguments
         arguments = [quote(str(arg)) for arg in arguments]
 
@@ -31,14 +32,28 @@ class ExecutorBase(metaclass=abc.ABCMeta):
         old_cwd = os.getcwd()
         if location is not None:
             os.chdir(location)
-        result = subprocess.run(complete_command,
-                                check=check, # force python to raise exception if anything goes wrong
-                                universal_newlines=True,    # convert output to string (instead of byte array)
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE,
-                                shell=True)
-        os.chdir(old_cwd)
-        return result
+        process = subprocess.Popen(complete_command,
+                                   universal_newlines=True,    # convert output to string (instead of byte array)
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   shell=True,
+                                   # with a timeout, run in a new session so that the shell and the program
+                                   # started by it can be killed together
+                                   start_new_session=timeout is not None)
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            # if "timeout" (seconds) is set and exceeded, kill the whole process group and raise "TimeoutExpired"
+            os.killpg(process.pid, signal.SIGKILL)
+            process.communicate()
+            raise
+        finally:
+            os.chdir(old_cwd)
+
+        # force python to raise exception if anything goes wrong
+        if check and process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, complete_command, output=stdout, stderr=stderr)
+        return subprocess.CompletedProcess(complete_command, process.returncode, stdout=stdout, stderr=stderr)
 
     @abc.abstractmethod
     def is_available(self):
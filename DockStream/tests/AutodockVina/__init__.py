@@ -1,2 +1,3 @@
 from tests.AutodockVina.test_AutoDockVina_target_preparation import *
 from tests.AutodockVina.test_AutoDockVina_backend import *
+from tests.AutodockVina.test_AutoDockVina_worker_pool import *
@@ -0,0 +1,151 @@
+import unittest
+import os
+import sys
+import stat
+import time
+import rdkit.Chem as Chem
+from rdkit.Chem import AllChem
+
+from dockstream.core.AutodockVina.AutodockVina_docker import AutodockVina, AutodockVinaParameters, SearchSpace
+from dockstream.core.Schrodinger.Glide_docker import Parallelization
+
+from dockstream.utils.enums.RDkit_enums import RDkitLigandPreparationEnum
+
+from tests.tests_paths import PATH_AUTODOCKVINA_EXAMPLES
+from dockstream.utils.files_paths import attach_root_path
+from dockstream.core.ligand.ligand import Ligand
+
+
+# runtimes of the fake "vina" executable, which takes longer for ligands with at least "SLOW_HEAVY_ATOMS" heavy atoms
+FAST_DELAY_SEC = 0.5
+SLOW_DELAY_SEC = 3.0
+SLOW_HEAVY_ATOMS = 10
+
+# a fake "AutoDock Vina" executable: it "docks" the input ligand as is and scores it with minus its number of heavy
+# atoms, writing the result in the same PDBQT format as the real program
+FAKE_VINA = """#!{python}
+import sys
+import time
+
+arguments = sys.argv[1:]
+if "--version" in arguments:
+    print("AutoDock Vina 1.1.2 (fake)")
+    sys.exit(0)
+
+with open(arguments[arguments.index("--ligand") + 1], "r") as f:
+    lines = f.readlines()
+number_heavy_atoms = len([line for line in lines if line.startswith(("ATOM", "HETATM"))
+                          and not line.split()[-1].startswith("H")])
+time.sleep({slow} if number_heavy_atoms >= {slow_heavy_atoms} else {fast})
+
+with open(arguments[arguments.index("--out") + 1], "w") as f:
+    f.write("MODEL 1\\n")
+    f.write("REMARK VINA RESULT:    {{:.1f}}      0.000      0.000\\n".format(-number_heavy_atoms))
+    f.writelines(lines)
+    f.write("ENDMDL\\n")
+"""
+
+
+class Test_AutoDockVina_worker_pool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._LP = RDkitLigandPreparationEnum()
+
+        cls.receptor_path = attach_root_path(PATH_AUTODOCKVINA_EXAMPLES.RECEPTOR)
+
+        # write the fake "vina" executable to its own folder, which is then used as "binary_location"
+        cls._folder_dir = attach_root_path(PATH_AUTODOCKVINA_EXAMPLES.FAKE_VINA_FOLDER)
+        if not os.path.isdir(cls._folder_dir):
+            os.makedirs(cls._folder_dir)
+        fake_vina_path = os.path.join(cls._folder_dir, "vina")
+        with open(fake_vina_path, "w") as f:
+            f.write(FAKE_VINA.format(python=sys.executable, slow=SLOW_DELAY_SEC, fast=FAST_DELAY_SEC,
+                                     slow_heavy_atoms=SLOW_HEAVY_ATOMS))
+        os.chmod(fake_vina_path, os.stat(fake_vina_path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    def _get_ligands(self, smiles):
+        ligands = []
+        for lig_number, smile in enumerate(smiles):
+            mol = Chem.AddHs(Chem.MolFromSmiles(smile))
+            AllChem.EmbedMolecule(mol, randomSeed=42)
+            ligands.append(Ligand(smile=smile,
+                                  original_smile=smile,
+                                  ligand_number=lig_number,
+                                  enumeration=0,
+                                  molecule=mol,
+                                  mol_type=self._LP.TYPE_RDKIT))
+        return ligands
+
+    def _get_docker(self, number_cores, time_limit_per_compound=None):
+        return AutodockVina(
+            input_pools=["RDkit"],
+            parameters=AutodockVinaParameters(
+                binary_location=self._folder_dir,
+                parallelization=Parallelization(number_cores=number_cores),
+                receptor_pdbqt_path=[self.receptor_path],
+                time_limit_per_compound=time_limit_per_compound,
+                search_space=SearchSpace(
+                    center_x=3.3,
+                    center_y=11.5,
+                    center_z=24.8,
+                    size_x=15,
+                    size_y=10,
+                    size_z=10
+                )
+            )
+        )
+
+    def test_AutoDockVina_worker_pool_makespan(self):
+        # one slow ligand followed by many fast ones
+        number_cores = 2
+        smiles = ["c1ccc2ccccc2c1CCCC"] + ["CCO", "CCN", "CCC", "CCCl", "CC=O", "NCO"] * 2
+        ligands = self._get_ligands(smiles)
+        delays = [SLOW_DELAY_SEC if lig.get_molecule().GetNumHeavyAtoms() >= SLOW_HEAVY_ATOMS else FAST_DELAY_SEC
+                  for lig in ligands]
+
+        docker = self._get_docker(number_cores=number_cores)
+        docker.add_molecules(molecules=ligands)
+        start = time.time()
+        docker.dock()
+        makespan = time.time() - start
+        docker.close()
+
+        # every ligand gets its own score
+        self.assertListEqual(docker.get_scores(best_only=True),
+                             [-float(lig.get_molecule().GetNumHeavyAtoms()) for lig in ligands])
+
+        # docking in waves of "number_cores" ligands takes at least as long as the sum of the slowest ligand of
+        # every wave; with the pool, the fast ligands are docked on the other core while the slow one runs
+        wave_makespan = sum(max(delays[start:start + number_cores]) for start in range(0, len(delays), number_cores))
+        self.assertGreaterEqual(makespan, sum(delays) / number_cores)
+        self.assertLess(makespan, wave_makespan)
+
+    def test_AutoDockVina_worker_pool_time_limit(self):
+        ligands = self._get_ligands(["CCO", "c1ccc2ccccc2c1CCCC", "CCN"])
+        docker = self._get_docker(number_cores=2, time_limit_per_compound=1)
+        docker.add_molecules(molecules=ligands)
+        docker.dock()
+        docker.close()
+
+        # the slow ligand exceeds the time limit and fails, the others are docked
+        self.assertListEqual(docker.get_scores(best_only=True), [-3.0, 'NA', -3.0])
+
+    def test_AutoDockVina_worker_pool_reuse(self):
+        docker = self._get_docker(number_cores=2)
+        docker.add_molecules(molecules=self._get_ligands(["CCO", "CCN"]))
+        docker.dock()
+        pool = docker._worker_pool.executor
+        scratch_dir = docker._worker_pool.scratch_dir
+
+        # the pool (and its scratch directories) are kept between runs
+        docker.ligands = []
+        docker.add_molecules(molecules=self._get_ligands(["CCCl"]))
+        docker.dock()
+        self.assertIs(docker._worker_pool.executor, pool)
+        self.assertListEqual(docker.get_scores(best_only=True), [-3.0])
+        self.assertEqual(len(os.listdir(scratch_dir)), 2)
+
+        docker.close()
+        self.assertIsNone(docker._worker_pool.executor)
+        self.assertFalse(os.path.isdir(scratch_dir))
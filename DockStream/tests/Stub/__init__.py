@@ -0,0 +1,2 @@
+from tests.Stub.test_Stub_backend import *
+from tests.Stub.test_docking_session import *
@@ -0,0 +1,49 @@
+import unittest
+import rdkit.Chem as Chem
+
+from dockstream.core.Stub.Stub_docker import Stub, StubParameters
+
+from dockstream.utils.enums.RDkit_enums import RDkitLigandPreparationEnum
+
+from tests.tests_paths import PATHS_1UYD
+from dockstream.utils.files_paths import attach_root_path
+from dockstream.core.ligand.ligand import Ligand
+from dockstream.utils.smiles import to_smiles
+
+
+class Test_Stub_backend(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._LP = RDkitLigandPreparationEnum()
+
+        # specify absolute paths to the various input files
+        cls.ligands_sdf = attach_root_path(PATHS_1UYD.LIGANDS_SDF_WITH_HYDROGENS)
+
+    def setUp(self):
+        list_ligands = []
+        for lig_number, mol in enumerate(Chem.SDMolSupplier(self.ligands_sdf, removeHs=False)):
+            list_ligands.append(Ligand(smile=to_smiles(mol),
+                                       original_smile=to_smiles(mol),
+                                       ligand_number=lig_number,
+                                       enumeration=0,
+                                       molecule=mol,
+                                       mol_type=self._LP.TYPE_RDKIT))
+        self.ligands = list_ligands
+
+    def test_Stub_docking(self):
+        docker = Stub(input_pools=["RDkit"],
+                      parameters=StubParameters(score_per_heavy_atom=-0.5))
+        docker.add_molecules(molecules=self.ligands)
+        docker.dock()
+
+        scores = docker.get_scores(best_only=True)
+        self.assertEqual(len(scores), 15)
+        self.assertListEqual(scores, [-0.5 * lig.get_molecule().GetNumHeavyAtoms() for lig in self.ligands])
+        self.assertEqual(docker.get_result().shape[0], 15)
+
+        # docking again with new ligands only returns the scores of those
+        docker.ligands = []
+        docker.add_molecules(molecules=self.ligands[:3])
+        docker.dock()
+        self.assertEqual(len(docker.get_scores(best_only=True)), 3)
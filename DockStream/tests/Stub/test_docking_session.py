@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+
+from dockstream.core.docker import DockingSession
+from dockstream.core.Stub.Stub_docker import Stub
+
+from dockstream.utils.enums.docking_enum import DockingConfigurationEnum
+from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
+
+
+class Test_docking_session(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._DE = DockingConfigurationEnum()
+        cls._LP = LigandPreparationEnum()
+
+        cls.conf = {
+            cls._DE.DOCKING: {
+                cls._LP.LIGAND_PREPARATION: {
+                    cls._LP.EMBEDDING_POOLS: [
+                        {
+                            cls._LP.POOLID: "RDkit",
+                            cls._LP.TYPE: "RDkit",
+                            "parameters": {},
+                            cls._LP.INPUT: {cls._LP.INPUT_TYPE: cls._LP.INPUT_TYPE_SMI,
+                                            cls._LP.INPUT_PATH: "ignored.smi"}
+                        }
+                    ]
+                },
+                cls._DE.DOCKING_RUNS: [
+                    {
+                        cls._DE.BACKEND: cls._DE.BACKEND_STUB,
+                        cls._DE.RUN_ID: "Stub",
+                        cls._DE.INPUT_POOLS: ["RDkit"],
+                        cls._DE.PARAMS: {"score_per_heavy_atom": -1.0}
+                    }
+                ]
+            }
+        }
+
+    def test_score(self):
+        session = DockingSession(conf=self.conf)
+        self.assertIsInstance(session.get_docker(), Stub)
+
+        scores = session.score(["CCO", "c1ccccc1", "CC(=O)O"])
+        self.assertIsInstance(scores, np.ndarray)
+        self.assertListEqual(scores.tolist(), [-3.0, -6.0, -4.0])
+
+        # the docker is kept between calls and only holds the ligands of the last call
+        docker = session.get_docker()
+        scores = session.score(["CCCC"])
+        self.assertIs(session.get_docker(), docker)
+        self.assertListEqual(scores.tolist(), [-4.0])
+
+    def test_score_failed_molecule(self):
+        session = DockingSession(conf=self.conf)
+        scores = session.score(["CCO", "not_a_smiles", "CCN"])
+        self.assertEqual(scores[0], -3.0)
+        self.assertTrue(np.isnan(scores[1]))
+        self.assertEqual(scores[2], -3.0)
+
+    def test_unknown_run_id(self):
+        with self.assertRaises(Exception):
+            DockingSession(conf=self.conf, run_id="unknown")
@@ -1,3 +1,4 @@
 from tests.test_PDBPreparation import *
 from tests.test_ligand_preparation import *
+from tests.test_execute import *
 from tests.tests_translation import Test_molecule_container_translation
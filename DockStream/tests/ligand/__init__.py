@@ -0,0 +1 @@
+from tests.ligand.test_ligand_store import *
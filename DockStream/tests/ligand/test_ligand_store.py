@@ -0,0 +1,81 @@
+import os
+import unittest
+import rdkit.Chem as Chem
+
+from dockstream.core.ligand.ligand import Ligand
+from dockstream.core.ligand.ligand_store import LigandStore
+from dockstream.utils.enums.docking_enum import ResultKeywordsEnum
+from dockstream.utils.enums.RDkit_enums import RDkitLigandPreparationEnum
+
+from dockstream.utils.files_paths import attach_root_path, lines_in_file
+
+_RK = ResultKeywordsEnum()
+_LP = RDkitLigandPreparationEnum()
+SCORE_TAG = "SCORE"
+
+
+def get_score(conformer):
+    return float(conformer.GetProp(SCORE_TAG))
+
+
+class Test_ligand_store(unittest.TestCase):
+
+    def setUp(self):
+        # ligand 0 has two enumerations, ligand 1 failed to dock and ligand 2 has a single conformer
+        self.ligands = [Ligand(smile="CCO", ligand_number=0, enumeration=0, mol_type=_LP.TYPE_RDKIT),
+                        Ligand(smile="CCO", ligand_number=0, enumeration=1, mol_type=_LP.TYPE_RDKIT),
+                        Ligand(smile="CCN", ligand_number=1, enumeration=0, mol_type=_LP.TYPE_RDKIT),
+                        Ligand(smile="CCC", ligand_number=2, enumeration=0, mol_type=_LP.TYPE_RDKIT)]
+        self.poses = {"0:0": [-5.0, -4.0], "0:1": [-6.0], "2:0": [-3.0]}
+
+    def _attach_poses(self, store):
+        for identifier, scores in self.poses.items():
+            for score in scores:
+                conformer = Chem.MolFromSmiles("C")
+                conformer.SetProp(SCORE_TAG, str(score))
+                self.assertTrue(store.attach_conformer(identifier, conformer))
+
+    def test_lookup_and_attach(self):
+        store = LigandStore(self.ligands, func_get_score=get_score)
+        self.assertEqual(len(store), 4)
+        self.assertIs(store.get_ligand(0, 1), self.ligands[1])
+        self.assertIs(store.get_ligand_by_identifier("2:0"), self.ligands[3])
+        self.assertIsNone(store.get_ligand(3, 0))
+        self.assertIsNone(store.get_ligand_by_identifier("0:0:1"))
+
+        self._attach_poses(store)
+        self.assertFalse(store.attach_conformer("5:0", Chem.MolFromSmiles("C")))
+
+        # conformers are attached to the ligands themselves and can be looked up in the store
+        self.assertEqual(len(self.ligands[0].get_conformers()), 2)
+        self.assertListEqual([get_score(conf) for conf in store.get_conformers(0, 0)], [-5.0, -4.0])
+        self.assertListEqual(store.get_conformers(1, 0), [])
+
+    def test_get_scores(self):
+        store = LigandStore(self.ligands, func_get_score=get_score)
+        self._attach_poses(store)
+
+        self.assertListEqual(store.get_scores(best_only=True, best="min"), [-6.0, _RK.FIXED_VALUE_NA, -3.0])
+        self.assertListEqual(store.get_scores(best_only=True, best="max"), [-4.0, _RK.FIXED_VALUE_NA, -3.0])
+        self.assertListEqual(store.get_scores(best_only=False), [-5.0, -4.0, -6.0, _RK.FIXED_VALUE_NA, -3.0])
+        self.assertListEqual(store.get_failed_ligand_numbers(), [1])
+        with self.assertRaises(ValueError):
+            store.get_scores(best_only=True, best="mean")
+
+    def test_as_dataframe(self):
+        store = LigandStore(self.ligands, func_get_score=get_score)
+        self._attach_poses(store)
+
+        df = store.as_dataframe()
+        self.assertEqual(df.shape, (4, 7))
+        self.assertListEqual(df[_RK.DF_LIGAND_NUMBER].tolist(), [0, 0, 0, 2])
+        self.assertListEqual(df[_RK.DF_LIGAND_ENUMERATION].tolist(), [0, 0, 1, 0])
+        self.assertListEqual(df[_RK.DF_CONFORMER].tolist(), [0, 1, 0, 0])
+        self.assertListEqual(df[_RK.DF_LIGAND_NAME].tolist(), ["0:0:0", "0:0:1", "0:1:0", "2:0:0"])
+        self.assertListEqual(df[_RK.DF_SCORE].tolist(), [-5.0, -4.0, -6.0, -3.0])
+        self.assertListEqual(df[_RK.DF_LOWEST_CONFORMER].tolist(), [True, False, True, True])
+
+        path = attach_root_path("tests/junk/ligand_store.csv")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        store.to_csv(path)
+        self.assertEqual(lines_in_file(path), 5)
@@ -0,0 +1,61 @@
+import os
+import stat
+import time
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+from dockstream.utils.execute_external.execute import ExecutorBase
+
+
+# a script, which starts a background job that writes "marker" after "delay" seconds (unless it is killed before) and
+# then waits for it; killing only the shell would leave the background job running
+BACKGROUND_JOB = """#!/bin/sh
+(sleep "$2"; touch "$1") &
+wait
+"""
+
+
+class _TimeoutExecutor(ExecutorBase):
+    """Executor passing "timeout" on to "ExecutorBase.execute()"."""
+
+    def execute(self, command: str, arguments: list, check=True, location=None, timeout=None):
+        return super().execute(command=command, arguments=arguments, check=check, location=location,
+                               timeout=timeout)
+
+    def is_available(self):
+        return True
+
+
+class Test_execute(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp_dir = tempfile.mkdtemp()
+        self._marker = os.path.join(self._tmp_dir, "marker")
+        self._script = os.path.join(self._tmp_dir, "background_job.sh")
+        with open(self._script, "w") as f:
+            f.write(BACKGROUND_JOB)
+        os.chmod(self._script, os.stat(self._script).st_mode | stat.S_IXUSR)
+        self._executor = _TimeoutExecutor()
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+    def test_execute_without_timeout(self):
+        result = self._executor.execute(command=self._script, arguments=[self._marker, 0], timeout=None)
+        self.assertEqual(result.returncode, 0)
+        self.assertTrue(os.path.exists(self._marker))
+
+    def test_execute_timeout_kills_process_group(self):
+        start = time.time()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self._executor.execute(command=self._script, arguments=[self._marker, 2], timeout=0.5)
+
+        # the call returns right after the timeout, i.e. it does not wait for the background job, which holds the
+        # output pipes open as well ...
+        self.assertLess(time.time() - start, 1.5)
+
+        # ... as the background job has been killed together with the shell, it never writes the marker
+        time.sleep(2.5)
+        self.assertFalse(os.path.exists(self._marker))
@@ -117,6 +117,7 @@ class PATH_AUTODOCKVINA_EXAMPLES:
     RECEPTOR = "tests/tests_data/AutoDockVina/1UYD_fixed.pdbqt"
     BACKEND_TESTS_FOLDER = "tests/junk/AutoDockVina_backend"
     TARGET_PREP_FOLDER = "tests/junk/AutoDockVina_target_prep"
+    FAKE_VINA_FOLDER = "tests/junk/AutoDockVina_fake_vina"
 
     # try to find the internal value and return
     def __getattr__(self, name):
@@ -12,6 +12,7 @@ from tests.Schrodinger import *
 from tests.OpenEye_Hybrid import *
 from tests.Corina import *
 from tests.TautEnum import *
+from tests.Stub import *
 
 if __name__ == '__main__':
     unittest.main()
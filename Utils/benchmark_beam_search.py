@@ -0,0 +1,82 @@
+# load general packages and functions
+import sys
+import time
+import torch
+from rdkit import Chem
+
+# load program-specific functions
+sys.path.insert(1, "./pre-training/")
+import generate
+import models
+
+"""
+Compares sampling (`generate.build_graphs()`) with beam search and diverse beam
+search (`generate.beam_search()`) by the number of unique valid molecules (as
+canonical SMILES) generated per CPU-second (as measured by
+`time.process_time()`). Uses the model in `model_path` if specified, and an
+untrained model otherwise.
+
+To use script, run from the repository root (the job directory is only used
+to load the job parameters, as in `main.py`):
+python Utils/benchmark_beam_search.py --job-dir path/to/job/
+"""
+
+# set variables
+model_path = None  # e.g. "path/to/job/model_restart_30.pth"
+n_sampled_graphs = 100
+seed = 42
+beam_settings = {
+    "beam, width 10": {"beam_width": 10},
+    "beam, width 50": {"beam_width": 50},
+    "diverse beam, 5x10": {"beam_width": 10, "n_groups": 5, "diversity_penalty": 0.5},
+}
+
+
+def get_unique_valid_smiles(graphs):
+    """ Returns the set of canonical SMILES of the valid molecules in `graphs`.
+    """
+    unique_smiles = set()
+    for graph in graphs:
+        mol = graph.get_molecule()
+        if mol is None:
+            continue
+        try:
+            Chem.SanitizeMol(mol)
+        except (ValueError, RuntimeError):
+            continue
+        unique_smiles.add(Chem.MolToSmiles(mol))
+    return unique_smiles
+
+
+def main():
+    """ Prints the number of molecules, unique valid molecules, and unique valid
+    molecules per CPU-second for sampling and for each beam search setting.
+    """
+    if model_path is None:
+        torch.manual_seed(seed)
+        model = models.initialize_model()
+    else:
+        model = torch.load(model_path, map_location=generate.C.device)
+    model.eval()
+
+    strategies = {"sampling": lambda: generate.build_graphs(model=model,
+                                                            n_graphs_to_generate=n_sampled_graphs,
+                                                            batch_size=n_sampled_graphs)}
+    for name, settings in beam_settings.items():
+        strategies[name] = lambda settings=settings: generate.beam_search(model=model, **settings)
+
+    print(f"{'strategy':<20} {'molecules':>9} {'unique valid':>12} {'unique valid/CPU-s':>18}", flush=True)
+    for name, generate_graphs in strategies.items():
+        torch.manual_seed(seed)
+        start = time.process_time()
+        with torch.no_grad():
+            graphs = generate_graphs()[0]
+        unique_smiles = get_unique_valid_smiles(graphs)
+        cpu_time = time.process_time() - start
+        print(f"{name:<20} {len(graphs):9d} {len(unique_smiles):12d} "
+              f"{len(unique_smiles) / cpu_time:18.2f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
@@ -0,0 +1,104 @@
+# load general packages and functions
+import sys
+import time
+import torch
+
+# load program-specific functions
+sys.path.insert(1, "./pre-training/")
+from parameters.constants import constants as C
+import generate
+
+"""
+Benchmarks the post-processing at the end of `generate.build_graphs()`, which
+converts the finished node/edge feature tensors into `GenerationGraph`s. The
+old post-processing copied the *entire* finished tensors to the host for every
+graph (O(n^2) copy work), whereas `generate.GeneratedGraphs` copies them once
+and builds the molecules of all graphs at once with `generate.graphs_to_mols()`
+when the first graph is accessed. Random tree-shaped graphs (carbon atoms
+joined by single bonds) stand in for the generated graphs, so no trained model
+is needed.
+All graphs are accessed, so the reported molecules/s include building the
+`rdkit.Mol` objects.
+
+To use script, run from the repository root (the job directory is only used
+to load the job parameters, as in `main.py`):
+python Utils/benchmark_build_graphs_postprocessing.py --job-dir path/to/job/
+"""
+
+# set variables
+n_graphs_list = [100, 1000, 10000]
+max_old_n_graphs = 1000   # the old post-processing is too slow beyond this
+max_graph_nodes = 10
+seed = 42
+
+
+def get_generated_graphs(n_graphs, generator):
+    """ Creates `n_graphs` random finished graphs on `C.device`, as returned by
+    the generation loop.
+    """
+    nodes = torch.zeros((n_graphs, *C.dim_nodes))
+    edges = torch.zeros((n_graphs, *C.dim_edges))
+    n_nodes = torch.randint(2, min(max_graph_nodes, C.max_n_nodes) + 1, (n_graphs,),
+                            generator=generator, dtype=torch.int8)
+    carbon_idx = C.atom_types.index("C")
+    neutral_idx = C.n_atom_types + C.formal_charge.index(0)
+    for i in range(n_graphs):
+        for v in range(int(n_nodes[i])):
+            nodes[i, v, carbon_idx] = nodes[i, v, neutral_idx] = 1
+            if v > 0:  # single bond to a random earlier node
+                u = int(torch.randint(0, v, (1,), generator=generator))
+                edges[i, u, v, 0] = edges[i, v, u, 0] = 1
+    return nodes.to(C.device), edges.to(C.device), n_nodes.to(C.device)
+
+
+def postprocess_old(nodes, edges, n_nodes):
+    """ Reproduces the old post-processing, which copied the full tensors to the
+    host for every graph.
+    """
+    graphs = []
+    host_nodes, host_edges, host_n_nodes = [], [], []
+    for graph_idx in range(len(n_nodes)):
+        g_n_n = n_nodes.cpu().numpy()
+        g_n = nodes.cpu().numpy()
+        g_e = edges.cpu().numpy()
+        mol = generate.graph_to_mol(g_n[graph_idx], g_e[graph_idx], g_n_n[graph_idx])
+        graphs.append(generate.graph_to_graph(graph_idx, mol, nodes, edges))
+        host_n_nodes.append(g_n_n.tolist())
+        host_nodes.append(g_n.tolist())
+        host_edges.append(g_e.tolist())
+    return graphs
+
+
+def postprocess_new(nodes, edges, n_nodes):
+    """ Single host copy, lazily built graphs (all of which are accessed).
+    """
+    graphs = generate.GeneratedGraphs(nodes, edges, n_nodes)
+    return [graph for graph in graphs]
+
+
+def main():
+    """ Prints molecules/s for each number of generated graphs.
+    """
+    generator = torch.Generator().manual_seed(seed)
+    print(f"{'n_graphs':>9} {'old (mol/s)':>12} {'new (mol/s)':>12}")
+    for n_graphs in n_graphs_list:
+        nodes, edges, n_nodes = get_generated_graphs(n_graphs, generator)
+
+        start = time.perf_counter()
+        new_graphs = postprocess_new(nodes, edges, n_nodes)
+        new_rate = n_graphs / (time.perf_counter() - start)
+
+        if n_graphs <= max_old_n_graphs:
+            start = time.perf_counter()
+            old_graphs = postprocess_old(nodes, edges, n_nodes)
+            old_rate = f"{n_graphs / (time.perf_counter() - start):12.1f}"
+            assert [g.n_nodes for g in old_graphs] == [g.n_nodes for g in new_graphs]
+        else:
+            old_rate = f"{'skipped':>12}"
+
+        print(f"{n_graphs:>9} {old_rate} {new_rate:12.1f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
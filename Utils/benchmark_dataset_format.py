@@ -0,0 +1,119 @@
+# load general packages and functions
+import os
+import shutil
+import sys
+import tempfile
+import time
+import h5py
+import numpy as np
+import torch
+
+# load program-specific functions
+sys.path.insert(1, "./pre-training/")
+from parameters.constants import constants as C
+import preprocessing as prep
+from BlockDatasetLoader import BlockDataLoader, get_HDF_dataset
+
+"""
+Compares the two formats of the preprocessed HDF files ('dataset_format'): the
+'dense' format, which stores every subgraph as padded int8 arrays, and the
+'sparse' format (see `preprocessing.sparsify_HDF_file()`), which stores only the
+non-zero node, edge and APD elements with CSR offsets and densifies them when
+loading batches. Writes a dense HDF file of synthetic subgraphs (or copies the
+preprocessed file in `hdf_path`, if specified), converts a copy of it to the
+sparse format, then prints the size on disk of both files and the throughput
+(subgraphs/s) of one epoch of loading with `BlockDataLoader`, and checks that
+both formats yield the same batches.
+
+To use script, run from the repository root (the job directory is only used
+to load the job parameters, as in `main.py`):
+python Utils/benchmark_dataset_format.py --job-dir path/to/job/
+"""
+
+# set variables
+hdf_path = None          # e.g. "data/pre-training/chembl/train.h5"
+n_subgraphs = 100000     # number of synthetic subgraphs (if `hdf_path` is None)
+max_subgraph_nodes = 10  # max number of (unpadded) nodes per synthetic subgraph
+batch_size = 1000
+block_size = 100000
+seed = 42
+
+
+def write_synthetic_HDF_file(path, rng):
+    """ Writes `n_subgraphs` random subgraphs, padded to `max_n_nodes`, to a
+    dense HDF file: chains of atoms with one-hot atom types and formal charges,
+    single bonds, and a single non-zero APD element.
+    """
+    apd_length = np.prod(C.dim_f_add) + np.prod(C.dim_f_conn) + 1
+    nodes = np.zeros((n_subgraphs, *C.dim_nodes), dtype=np.int8)
+    edges = np.zeros((n_subgraphs, *C.dim_edges), dtype=np.int8)
+    apds = np.zeros((n_subgraphs, apd_length), dtype=np.int8)
+
+    for idx in range(n_subgraphs):
+        n_nodes = rng.integers(1, max_subgraph_nodes + 1)
+        for v in range(n_nodes):
+            nodes[idx, v, rng.integers(0, C.n_atom_types)] = 1
+            nodes[idx, v, C.n_atom_types + rng.integers(0, C.n_formal_charge)] = 1
+            if v > 0:
+                edges[idx, v - 1, v, 0] = 1
+                edges[idx, v, v - 1, 0] = 1
+        apds[idx, rng.integers(0, apd_length)] = 1
+
+    with h5py.File(path, "w") as hdf_file:
+        for name, data in zip(["nodes", "edges", "APDs"], [nodes, edges, apds]):
+            hdf_file.create_dataset(name, chunks=None, data=data, dtype=np.dtype("int8"))
+
+
+def time_epoch(path):
+    """ Loads all subgraphs in the HDF file in `path` once, without shuffling,
+    and returns the subgraphs/s and the summed batches (used as a checksum).
+    """
+    dataset = get_HDF_dataset(path)
+    loader = BlockDataLoader(dataset=dataset,
+                             batch_size=batch_size,
+                             block_size=block_size,
+                             shuffle=False,
+                             n_workers=0,
+                             pin_memory=False)
+    checksum = None
+    start = time.perf_counter()
+    for batch in loader:
+        batch_sums = [b.sum(dim=0) for b in batch]
+        checksum = batch_sums if checksum is None else [c + s for c, s in zip(checksum, batch_sums)]
+    return len(dataset) / (time.perf_counter() - start), checksum
+
+
+def main():
+    """ Prints the size on disk and the loading throughput of both formats.
+    """
+    rng = np.random.default_rng(seed=seed)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        dense_path = os.path.join(temp_dir, "dense.h5")
+        sparse_path = os.path.join(temp_dir, "sparse.h5")
+        if hdf_path is None:
+            print(f"* Writing {n_subgraphs} synthetic subgraphs.", flush=True)
+            write_synthetic_HDF_file(dense_path, rng)
+        else:
+            shutil.copyfile(hdf_path, dense_path)
+        shutil.copyfile(dense_path, sparse_path)
+        prep.sparsify_HDF_file(path=sparse_path)
+
+        results = {}
+        for name, path in [("dense", dense_path), ("sparse", sparse_path)]:
+            throughput, checksum = time_epoch(path)
+            results[name] = (os.path.getsize(path) / 1e6, throughput, checksum)
+
+        print(f"{'format':>8} {'size (MB)':>10} {'subgraphs/s':>12}")
+        for name, (size, throughput, _) in results.items():
+            print(f"{name:>8} {size:10.2f} {throughput:12.0f}", flush=True)
+
+        assert all(torch.equal(d, s) for d, s in zip(results["dense"][2], results["sparse"][2])), \
+            "Batches differ between the formats."
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
@@ -0,0 +1,110 @@
+# load general packages and functions
+import sys
+import time
+import numpy as np
+from rdkit import Chem
+
+# load program-specific functions
+sys.path.insert(1, "./pre-training/")
+from parameters.constants import constants as C
+import apd
+import preprocessing as prep
+
+"""
+Benchmarks the expansion of a molecule's decoding route, comparing the
+per-index path (`apd.get_decoding_route_state()` for every subgraph index) with
+the incremental generator (`apd.get_decoding_route()`), with both dense APDs
+and sparse action indices. Before timing, checks that all three paths produce
+identical subgraphs and APDs for every molecule. Molecules are read from the
+bundled ground-truth SMILES and grouped by number of heavy atoms.
+
+To use script, run from the repository root (the job directory is only used
+to load the job parameters, as in `main.py`):
+python Utils/benchmark_decoding_route.py --job-dir path/to/job/
+"""
+
+# set variables
+smi_path = "data/pre-training/chembl/valid_groundtruth.smi"
+size_bins = [(1, 10), (11, 20), (21, 30), (31, 40), (41, 50)]  # n atoms (inclusive)
+n_molecules_per_bin = 20
+
+
+def load_graphs_by_size():
+    """ Returns a `dict` mapping each bin in `size_bins` to `PreprocessingGraph`s
+    of molecules in that bin, skipping molecules which cannot be encoded with
+    the current job parameters.
+    """
+    graphs = {size_bin: [] for size_bin in size_bins}
+    with open(smi_path) as smi_file:
+        for line in smi_file:
+            mol = Chem.MolFromSmiles(line.split()[0])
+            if mol is None or mol.GetNumAtoms() > C.max_n_nodes:
+                continue
+            if any(atom.GetSymbol() not in C.atom_types for atom in mol.GetAtoms()):
+                continue
+            for (low, high) in size_bins:
+                if low <= mol.GetNumAtoms() <= high and len(graphs[(low, high)]) < n_molecules_per_bin:
+                    graphs[(low, high)].append(prep.get_graph(mol))
+            if all(len(g) == n_molecules_per_bin for g in graphs.values()):
+                break
+    return graphs
+
+
+def route_per_index(graph):
+    n_SGs = apd.get_decoding_route_length(molecular_graph=graph)
+    return [apd.get_decoding_route_state(molecular_graph=graph, subgraph_idx=idx)
+            for idx in range(n_SGs)]
+
+
+def route_incremental(graph):
+    return list(apd.get_decoding_route(molecular_graph=graph))
+
+
+def route_incremental_sparse(graph):
+    return list(apd.get_decoding_route(molecular_graph=graph, sparse_APDs=True))
+
+
+def check_equivalence(graph):
+    """ Asserts that all three paths return the same decoding route.
+    """
+    reference = route_per_index(graph)
+    dense = route_incremental(graph)
+    sparse = route_incremental_sparse(graph)
+    assert len(reference) == len(dense) == len(sparse)
+    for (SG_ref, APD_ref), (SG, APD), (SG_sp, action_idx) in zip(reference, dense, sparse):
+        for X_ref, X, X_sp in zip(SG_ref, SG, SG_sp):
+            assert np.array_equal(X_ref, X) and np.array_equal(X_ref, X_sp)
+        assert np.array_equal(APD_ref, APD)
+        assert np.array_equal(APD_ref, apd.get_dense_APD(action_idx))
+
+
+def time_route(route_function, graphs):
+    """ Returns the mean time (in ms) to expand the route of one molecule.
+    """
+    start = time.perf_counter()
+    for graph in graphs:
+        route_function(graph)
+    return 1000 * (time.perf_counter() - start) / len(graphs)
+
+
+def main():
+    graphs_by_size = load_graphs_by_size()
+
+    print("* Checking equivalence of decoding routes.", flush=True)
+    for graphs in graphs_by_size.values():
+        for graph in graphs:
+            check_equivalence(graph)
+
+    print(f"{'n_atoms':>8} {'n_mols':>7} {'per-index (ms)':>15} {'generator (ms)':>15} {'sparse (ms)':>12}")
+    for (low, high), graphs in graphs_by_size.items():
+        if not graphs:
+            continue
+        t_ref = time_route(route_per_index, graphs)
+        t_gen = time_route(route_incremental, graphs)
+        t_sparse = time_route(route_incremental_sparse, graphs)
+        print(f"{f'{low}-{high}':>8} {len(graphs):>7} {t_ref:15.3f} {t_gen:15.3f} {t_sparse:12.3f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
@@ -0,0 +1,138 @@
+# load general packages and functions
+import sys
+import os
+import csv
+import json
+import time
+import tempfile
+import subprocess
+import numpy as np
+
+# load program-specific functions
+sys.path.insert(1, "./DockStream/")
+from dockstream.core.docker import DockingSession
+
+"""
+Benchmarks the per-call overhead of the 'docking_score' score used in
+fine-tuning. The old scorer wrote the SMILES to a file and ran the DockStream
+entry point ("DockStream/docker.py") in a subprocess for every batch, which
+re-imported DockStream, re-parsed the configuration and re-initialized the
+docker each time; `DockingSession` does all of this once and keeps the docker
+alive between calls. Uses the "Stub" backend, which needs no docking software,
+so that the timings measure the overhead only. First checks that both paths
+give the same scores, then prints the seconds per call of each.
+
+To use script, run from the repository root:
+python Utils/benchmark_docking_session.py
+"""
+
+# set variables
+smi_path = "data/pre-training/chembl/valid_groundtruth.smi"
+batch_size = 64
+n_calls = 10
+python_bin_path = sys.executable
+
+
+def load_smiles():
+    """ Returns the first `batch_size` SMILES in `smi_path`.
+    """
+    with open(smi_path) as smi_file:
+        return [next(smi_file).split()[0] for _ in range(batch_size)]
+
+
+def write_config(temp_dir):
+    """ Writes a DockStream configuration for the "Stub" backend to `temp_dir`,
+    and returns its path along with the paths of its input SMILES file and its
+    output scores file.
+    """
+    input_path = os.path.join(temp_dir, "ligands.smi")
+    scores_path = os.path.join(temp_dir, "scores.csv")
+    config = {
+        "docking": {
+            "ligand_preparation": {
+                "embedding_pools": [
+                    {
+                        "pool_id": "RDkit",
+                        "type": "RDkit",
+                        "parameters": {},
+                        "input": {"type": "SMI", "input_path": input_path},
+                    }
+                ]
+            },
+            "docking_runs": [
+                {
+                    "backend": "Stub",
+                    "run_id": "Stub",
+                    "input_pools": ["RDkit"],
+                    "parameters": {"score_per_heavy_atom": -0.5},
+                    "output": {"scores": {"scores_path": scores_path}},
+                }
+            ],
+        }
+    }
+    config_path = os.path.join(temp_dir, "docking_config.json")
+    with open(config_path, "w") as config_file:
+        json.dump(config, config_file, indent=2)
+    return config_path, input_path, scores_path
+
+
+def score_subprocess(smiles, config_path, input_path, scores_path):
+    """ Reproduces the old 'docking_score' scorer, which runs the DockStream
+    entry point in a subprocess; molecules which failed to dock score 0.
+    """
+    with open(input_path, "w") as smi_file:
+        smi_file.write("\n".join(smiles) + "\n")
+
+    subprocess.run([python_bin_path, "DockStream/docker.py", "-conf", config_path, "-silent", "True"],
+                   check=True, stdout=subprocess.DEVNULL)
+
+    best_scores = {}
+    with open(scores_path) as scores_file:
+        for row in csv.DictReader(scores_file):
+            ligand_number = int(row["ligand_number"])
+            score = float(row["score"])
+            best_scores[ligand_number] = min(score, best_scores.get(ligand_number, score))
+    return [best_scores.get(idx, 0.0) for idx in range(len(smiles))]
+
+
+def score_session(smiles, session):
+    """ Scores `smiles` in-process, as the new 'docking_score' scorer does.
+    """
+    return np.nan_to_num(session.score(smiles), nan=0.0).tolist()
+
+
+def main():
+    smiles = load_smiles()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path, input_path, scores_path = write_config(temp_dir)
+
+        start = time.perf_counter()
+        session = DockingSession(conf=config_path)
+        setup_time = time.perf_counter() - start
+
+        # check that both paths give the same scores
+        old_scores = score_subprocess(smiles, config_path, input_path, scores_path)
+        new_scores = score_session(smiles, session)
+        assert np.allclose(old_scores, new_scores), "Scores differ from the old scorer."
+
+        start = time.perf_counter()
+        for _ in range(n_calls):
+            score_subprocess(smiles, config_path, input_path, scores_path)
+        old_time = (time.perf_counter() - start) / n_calls
+
+        start = time.perf_counter()
+        for _ in range(n_calls):
+            score_session(smiles, session)
+        new_time = (time.perf_counter() - start) / n_calls
+
+    print(f"-- Batch size: {batch_size}, calls: {n_calls}", flush=True)
+    print(f"-- DockingSession setup (once): {setup_time:.3f} s", flush=True)
+    print(f"-- Subprocess per call: {old_time:.3f} s", flush=True)
+    print(f"-- DockingSession per call: {new_time:.3f} s", flush=True)
+    print(f"-- Speedup: {old_time / new_time:.1f}x", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
@@ -0,0 +1,116 @@
+# load general packages and functions
+import sys
+import time
+import torch
+
+# load program-specific functions
+sys.path.insert(1, "./pre-training/")
+from BlockDatasetLoader import BlockDataLoader, BlockDataFragmentLoader, PairedBlockDataLoader, ShuffleBlockWrapper
+
+"""
+Benchmarks one "epoch" of data loading as done in `Workflow.train_epoch()`,
+comparing the old access pattern (materializing both loaders with
+`list(enumerate(loader))[batch_idx]` on every step) with the lockstep
+`PairedBlockDataLoader`. Synthetic in-memory datasets are used, so no
+preprocessed HDF files are needed. The time per batch should stay flat for the
+paired loader (i.e. epoch time scales linearly with the dataset size), whereas
+it grows linearly for the old access pattern (i.e. quadratic epoch time).
+
+To use script, run:
+python Utils/benchmark_epoch_loading.py
+"""
+
+# set variables
+dataset_sizes = [1000, 2000, 4000, 8000, 16000]  # number of subgraphs
+max_old_size = 4000     # the old access pattern is too slow beyond this
+batch_size = 100
+block_size = 1000
+max_n_nodes = 13
+n_node_features = 8
+n_edge_features = 3
+apd_length = 1000
+
+
+class SyntheticDataset(torch.utils.data.Dataset):
+    """ In-memory stand-in for `HDFDataset`/`HDFFragmentDataset`.
+    """
+    def __init__(self, n_subgraphs, with_apds=True):
+        self.nodes = torch.randint(0, 2, (n_subgraphs, max_n_nodes, n_node_features), dtype=torch.int8)
+        self.edges = torch.randint(0, 2, (n_subgraphs, max_n_nodes, max_n_nodes, n_edge_features), dtype=torch.int8)
+        self.apds = torch.randint(0, 2, (n_subgraphs, apd_length), dtype=torch.int8) if with_apds else None
+
+    def __getitem__(self, idx):
+        nodes_i = self.nodes[idx].type(torch.float32)
+        edges_i = self.edges[idx].type(torch.float32)
+        if self.apds is None:
+            return (nodes_i, edges_i)
+        return (nodes_i, edges_i, self.apds[idx].type(torch.float32))
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def wrap_block(self, block):
+        return ShuffleBlockWrapper(block)
+
+    collate_fn = None
+
+
+def get_loaders(n_subgraphs):
+    """ Returns a linker and a fragment loader, each over `n_subgraphs` rows.
+    """
+    graph_loader = BlockDataLoader(dataset=SyntheticDataset(n_subgraphs),
+                                   batch_size=batch_size,
+                                   block_size=block_size,
+                                   shuffle=True,
+                                   n_workers=0,
+                                   pin_memory=False)
+    fragment_loader = BlockDataFragmentLoader(dataset=SyntheticDataset(n_subgraphs, with_apds=False),
+                                              batch_size=batch_size,
+                                              block_size=block_size,
+                                              shuffle=True,
+                                              n_workers=0,
+                                              pin_memory=False)
+    return graph_loader, fragment_loader
+
+
+def time_old_epoch(graph_loader, fragment_loader):
+    """ Times one epoch using the old, materializing access pattern.
+    """
+    start = time.perf_counter()
+    for batch_idx in range(len(graph_loader)):
+        _, batch_linker = list(enumerate(graph_loader))[batch_idx]
+        _, batch_fragment = list(enumerate(fragment_loader))[1]
+    return time.perf_counter() - start
+
+
+def time_paired_epoch(graph_loader, fragment_loader):
+    """ Times one epoch using the `PairedBlockDataLoader`.
+    """
+    paired_loader = PairedBlockDataLoader(graph_loader, fragment_loader, seed=0)
+    start = time.perf_counter()
+    for batch_linker, batch_fragment in paired_loader:
+        pass
+    return time.perf_counter() - start
+
+
+def main():
+    """ Prints the epoch time, and the time per batch, for each dataset size.
+    """
+    print(f"{'n_subgraphs':>12} {'n_batches':>10} {'old (s)':>10} {'paired (s)':>11} {'paired/batch (ms)':>18}")
+    for n_subgraphs in dataset_sizes:
+        graph_loader, fragment_loader = get_loaders(n_subgraphs)
+        n_batches = len(graph_loader)
+
+        if n_subgraphs <= max_old_size:
+            t_old = f"{time_old_epoch(graph_loader, fragment_loader):10.3f}"
+        else:
+            t_old = f"{'skipped':>10}"
+        t_paired = time_paired_epoch(graph_loader, fragment_loader)
+
+        print(f"{n_subgraphs:>12} {n_batches:>10} {t_old} {t_paired:11.3f} "
+              f"{1000 * t_paired / n_batches:18.3f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
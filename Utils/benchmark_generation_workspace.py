@@ -0,0 +1,67 @@
+# load general packages and functions
+import sys
+import time
+import torch
+
+# load program-specific functions
+sys.path.insert(1, "./pre-training/")
+import generate
+import models
+
+"""
+Benchmarks the generation loop of `generate.build_graphs()` with an untrained
+model (so no trained model is needed), printing the generation throughput and
+the number of tensor allocations (calls to `aten::empty`/`aten::empty_strided`,
+as recorded by `torch.profiler`) and MB allocated per generated graph. To
+compare the preallocated `generate.GenerationWorkspace` with the previous loop,
+which reallocated the state of the batch every round, run the script on both
+commits.
+
+To use script, run from the repository root (the job directory is only used
+to load the job parameters, as in `main.py`):
+python Utils/benchmark_generation_workspace.py --job-dir path/to/job/
+"""
+
+# set variables
+batch_sizes = [10, 100, 1000]
+n_repeats = 3
+seed = 42
+
+
+def count_allocations(model, batch_size):
+    """ Returns the number of allocations and the MB allocated while generating
+    one batch of `batch_size` graphs.
+    """
+    with torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU],
+                                profile_memory=True) as profiler:
+        generate.build_graphs(model=model, n_graphs_to_generate=batch_size, batch_size=batch_size)
+    events = profiler.key_averages()
+    n_allocations = sum(event.count for event in events if event.key in ("aten::empty", "aten::empty_strided"))
+    allocated_mb = sum(max(event.self_cpu_memory_usage, 0) for event in events) / 1e6
+    return n_allocations, allocated_mb
+
+
+def main():
+    """ Prints molecules/s, allocations and MB allocated per generated graph
+    for each batch size.
+    """
+    torch.manual_seed(seed)
+    model = models.initialize_model().eval()
+    print(f"{'batch_size':>10} {'mol/s':>10} {'allocs/mol':>11} {'MB/mol':>8}", flush=True)
+    with torch.no_grad():
+        for batch_size in batch_sizes:
+            torch.manual_seed(seed)
+            start = time.perf_counter()
+            for _ in range(n_repeats):
+                generate.build_graphs(model=model, n_graphs_to_generate=batch_size, batch_size=batch_size)
+            rate = n_repeats * batch_size / (time.perf_counter() - start)
+
+            torch.manual_seed(seed)
+            n_allocations, allocated_mb = count_allocations(model, batch_size)
+            print(f"{batch_size:>10} {rate:10.1f} {n_allocations / batch_size:11.2f} "
+                  f"{allocated_mb / batch_size:8.3f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
@@ -0,0 +1,84 @@
+# load general packages and functions
+import sys
+import time
+import torch
+from rdkit import Chem
+
+# load program-specific functions
+sys.path.insert(1, "./pre-training/")
+from parameters.constants import constants as C
+import generate
+
+"""
+Benchmarks the conversion of generated graphs into `rdkit.Mol` objects on CPU,
+comparing the per-molecule path (`generate.graph_to_mol()` for every graph, on
+a single host copy of the batch) with the batched `generate.graphs_to_mols()`,
+both in-process and with a process pool. Checks that all paths give the same
+SMILES, then prints the time taken and the speedup over the per-molecule path.
+Random tree-shaped graphs (carbon atoms joined by single bonds) stand in for
+generated graphs, so no trained model is needed.
+
+To use script, run from the repository root (the job directory is only used
+to load the job parameters, as in `main.py`):
+python Utils/benchmark_graphs_to_mols.py --job-dir path/to/job/
+"""
+
+# set variables
+n_graphs = 10000
+n_workers = 4
+max_graph_nodes = 20
+seed = 42
+
+
+def get_generated_graphs(generator):
+    """ Creates `n_graphs` random graphs on the CPU.
+    """
+    nodes = torch.zeros((n_graphs, *C.dim_nodes))
+    edges = torch.zeros((n_graphs, *C.dim_edges))
+    n_nodes = torch.randint(2, min(max_graph_nodes, C.max_n_nodes) + 1, (n_graphs,),
+                            generator=generator, dtype=torch.int8)
+    carbon_idx = C.atom_types.index("C")
+    neutral_idx = C.n_atom_types + C.formal_charge.index(0)
+    for i in range(n_graphs):
+        for v in range(int(n_nodes[i])):
+            nodes[i, v, carbon_idx] = nodes[i, v, neutral_idx] = 1
+            if v > 0:  # single bond to a random earlier node
+                u = int(torch.randint(0, v, (1,), generator=generator))
+                edges[i, u, v, 0] = edges[i, v, u, 0] = 1
+    return nodes, edges, n_nodes
+
+
+def per_molecule(nodes, edges, n_nodes):
+    host_nodes, host_edges, host_n_nodes = nodes.numpy(), edges.numpy(), n_nodes.numpy()
+    return [generate.graph_to_mol(host_nodes[idx], host_edges[idx], host_n_nodes[idx])
+            for idx in range(len(host_n_nodes))]
+
+
+def main():
+    nodes, edges, n_nodes = get_generated_graphs(torch.Generator().manual_seed(seed))
+
+    timings = {}
+    smiles = {}
+    for name, convert in [
+        ("per-molecule", lambda: per_molecule(nodes, edges, n_nodes)),
+        ("batched", lambda: generate.graphs_to_mols(nodes, edges, n_nodes)),
+        (f"batched ({n_workers} workers)",
+         lambda: generate.graphs_to_mols(nodes, edges, n_nodes, n_workers=n_workers)),
+    ]:
+        start = time.perf_counter()
+        molecules = convert()
+        timings[name] = time.perf_counter() - start
+        smiles[name] = [Chem.MolToSmiles(mol) for mol in molecules]
+
+    reference = smiles["per-molecule"]
+    assert all(smi == reference for smi in smiles.values()), "SMILES differ between paths"
+
+    print(f"{n_graphs} molecules:")
+    print(f"{'path':>22} {'time (s)':>9} {'speedup':>8}")
+    for name, t in timings.items():
+        print(f"{name:>22} {t:9.3f} {timings['per-molecule'] / t:8.2f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
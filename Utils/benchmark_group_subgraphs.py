@@ -0,0 +1,98 @@
+# load general packages and functions
+import sys
+import time
+import numpy as np
+
+# load program-specific functions
+sys.path.insert(1, "./pre-training/")
+from parameters.constants import constants as C
+import preprocessing as prep
+
+"""
+Benchmarks the subgraph deduplication done in `preprocessing.group_subgraphs()`,
+comparing the original linear search over all previously collected subgraphs
+with the hash index (`preprocessing.get_subgraph_key()`). Random synthetic
+subgraphs, padded to `max_n_nodes`, are drawn from a pool of unique subgraphs
+so that the stream contains duplicates, as the decoding routes of real
+molecules do.
+
+To use script, run from the repository root (the job directory is only used
+to load the job parameters, as in `main.py`):
+python Utils/benchmark_group_subgraphs.py --job-dir path/to/job/
+"""
+
+# set variables
+stream_sizes = [1000, 10000, 100000, 1000000]  # number of subgraphs processed
+max_linear_size = 10000   # the linear search is too slow beyond this
+max_pool_size = 10000     # max number of unique subgraphs in the stream
+max_subgraph_nodes = 10   # max number of (unpadded) nodes per subgraph
+seed = 42
+
+
+def get_subgraph_pool(pool_size, rng):
+    """ Creates `pool_size` random padded subgraphs (as int8 arrays).
+    """
+    pool = []
+    for _ in range(pool_size):
+        n_nodes = rng.integers(0, max_subgraph_nodes + 1)
+        nodes = np.zeros(C.dim_nodes, dtype=np.int8)
+        edges = np.zeros(C.dim_edges, dtype=np.int8)
+        for v in range(n_nodes):
+            nodes[v, rng.integers(0, C.n_atom_types)] = 1
+            nodes[v, C.n_atom_types + rng.integers(0, C.n_formal_charge)] = 1
+            if v > 0:  # bond to a random earlier node
+                u = rng.integers(0, v)
+                b = rng.integers(0, C.n_edge_features)
+                edges[u, v, b] = edges[v, u, b] = 1
+        pool.append([nodes, edges])
+    return pool
+
+
+def collect_linear(stream):
+    """ Deduplicates `stream` using the original linear search.
+    """
+    data_subgraphs = []
+    for SG in stream:
+        for existing_subgraph in data_subgraphs:
+            if (SG[0] == existing_subgraph[0]).all() and (SG[1] == existing_subgraph[1]).all():
+                break
+        else:
+            data_subgraphs.append(SG)
+    return len(data_subgraphs)
+
+
+def collect_hashed(stream):
+    """ Deduplicates `stream` using the hash index.
+    """
+    subgraph_index = {}
+    for SG in stream:
+        subgraph_index.setdefault(prep.get_subgraph_key(subgraph=SG), len(subgraph_index))
+    return len(subgraph_index)
+
+
+def main():
+    """ Prints the time taken to deduplicate each stream size.
+    """
+    rng = np.random.default_rng(seed)
+    print(f"{'n_subgraphs':>12} {'n_unique':>9} {'linear (s)':>11} {'hashed (s)':>11}")
+    for stream_size in stream_sizes:
+        pool = get_subgraph_pool(min(max(stream_size // 10, 1), max_pool_size), rng)
+        stream = [pool[i] for i in rng.integers(0, len(pool), stream_size)]
+
+        start = time.perf_counter()
+        n_unique = collect_hashed(stream)
+        t_hashed = time.perf_counter() - start
+
+        if stream_size <= max_linear_size:
+            start = time.perf_counter()
+            assert collect_linear(stream) == n_unique
+            t_linear = f"{time.perf_counter() - start:11.3f}"
+        else:
+            t_linear = f"{'skipped':>11}"
+
+        print(f"{stream_size:>12} {n_unique:>9} {t_linear} {t_hashed:11.3f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
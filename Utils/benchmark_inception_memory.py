@@ -0,0 +1,99 @@
+# load general packages and functions
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# load program-specific functions
+sys.path.insert(1, "./CL/")
+from running_modes.reinforcement_learning.inception_memory import InceptionMemory
+
+"""
+Benchmarks the Inception replay memory used in reinforcement learning (CL). The
+old memory was a pandas DataFrame which, on every step, was concatenated with
+the new batch, de-duplicated, re-sorted and cut to the memory size, and was
+sampled with `DataFrame.sample`; `InceptionMemory` keeps preallocated arrays, a
+SMILES -> slot map and a min-heap of the scores. Fills memories of growing size
+with synthetic SMILES, then prints the mean time per step of adding a batch and
+of drawing a sample, for the old and the new memory, and checks that both keep
+the same SMILES.
+
+To use script, run from the repository root:
+python Utils/benchmark_inception_memory.py
+"""
+
+# set variables
+memory_sizes = [100, 1000, 10000, 100000]
+batch_size = 128
+sample_size = 64
+n_steps = 50
+random_seed = 42
+
+
+def get_batch(rng, n_unique):
+    """ Returns a batch of synthetic SMILES (with repeats, like the agent
+    samples them) with random scores and likelihoods.
+    """
+    smiles = [f"C{idx}" for idx in rng.randint(0, n_unique, size=batch_size)]
+    return smiles, rng.uniform(size=batch_size), rng.uniform(0, 50, size=batch_size)
+
+
+class OldMemory:
+    """ Reproduces the old DataFrame-based memory. """
+    def __init__(self, memory_size):
+        self.memory_size = memory_size
+        self.memory = pd.DataFrame(columns=["smiles", "score", "likelihood"])
+
+    def add(self, smiles, score, likelihood):
+        df = pd.DataFrame({"smiles": smiles, "score": score, "likelihood": likelihood})
+        memory = pd.concat([self.memory, df])
+        memory = memory.drop_duplicates(subset=["smiles"])
+        self.memory = memory.sort_values("score", ascending=False).head(self.memory_size)
+
+    def sample(self, sample_size):
+        sampled = self.memory.sample(min(len(self.memory), sample_size))
+        return sampled["smiles"].values, sampled["score"].values, sampled["likelihood"].values
+
+
+def time_memory(memory, batches):
+    """ Fills the memory with all but the last `n_steps` batches, then returns
+    the mean time (in ms) of adding a batch and of sampling over `n_steps`
+    steps.
+    """
+    for batch in batches[:-n_steps]:
+        memory.add(*batch)
+    add_time, sample_time = 0.0, 0.0
+    for batch in batches[-n_steps:]:
+        start = time.perf_counter()
+        memory.sample(sample_size)
+        sample_time += time.perf_counter() - start
+        start = time.perf_counter()
+        memory.add(*batch)
+        add_time += time.perf_counter() - start
+    return 1000 * add_time / n_steps, 1000 * sample_time / n_steps
+
+
+def main():
+    rng = np.random.RandomState(random_seed)
+
+    print(f"{'size':>7} {'old add':>9} {'new add':>9} {'old sample':>11} {'new sample':>11} (ms/step)",
+          flush=True)
+    for memory_size in memory_sizes:
+        # enough batches to fill the memory, drawn from twice as many SMILES as it holds
+        n_batches = 2 * memory_size // batch_size + n_steps
+        batches = [get_batch(rng, 2 * memory_size) for _ in range(n_batches)]
+
+        old_memory = OldMemory(memory_size)
+        old_add, old_sample = time_memory(old_memory, batches)
+        new_memory = InceptionMemory(memory_size)
+        new_add, new_sample = time_memory(new_memory, batches)
+
+        assert set(old_memory.memory["smiles"]) == set(new_memory.as_dataframe()["smiles"]) or \
+            np.allclose(np.sort(old_memory.memory["score"].values.astype(float)),
+                        np.sort(new_memory.as_dataframe()["score"].values)), "Memories differ."
+        print(f"{memory_size:>7} {old_add:9.3f} {new_add:9.3f} {old_sample:11.3f} {new_sample:11.3f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
@@ -0,0 +1,107 @@
+# load general packages and functions
+import sys
+import time
+import random
+
+# load program-specific functions
+sys.path.insert(1, "./DockStream/")
+from dockstream.core.ligand.ligand import Ligand
+from dockstream.core.ligand.ligand_store import LigandStore
+
+"""
+Benchmarks the docking result handling of DockStream with and without the
+`LigandStore`. The old code attached every docked pose to its ligand, and
+collected the scores per ligand number, by searching the whole ligand list,
+which takes O(n^2) time in the number of ligands n; `LigandStore` looks ligands
+up by (ligand_number, enumeration) and selects the best score per ligand with a
+vectorized groupby. Uses synthetic ligands with `n_conformers` poses each,
+where a pose is represented by its score. The old code is only timed for the
+smaller sizes, as it becomes too slow for the largest one.
+
+To use script, run from the repository root:
+python Utils/benchmark_ligand_store.py
+"""
+
+# set variables
+n_ligands_list = [1000, 2000, 5000, 100000]
+n_ligands_old_max = 5000
+n_conformers = 10
+random_seed = 42
+
+
+def get_poses(n_ligands):
+    """ Returns `n_ligands` synthetic ligands (without poses) and their poses,
+    as (identifier, score) tuples in random order, like they are returned by
+    the docking subjobs.
+    """
+    ligands = [Ligand(smile="C", ligand_number=idx, enumeration=0) for idx in range(n_ligands)]
+    poses = [(ligand.get_identifier(), random.uniform(-12, 0))
+             for ligand in ligands for _ in range(n_conformers)]
+    random.shuffle(poses)
+    return ligands, poses
+
+
+def run_old(ligands, poses):
+    """ Reproduces the old result handling (attach the poses and get the best
+    score per ligand).
+    """
+    for identifier, score in poses:
+        for ligand in ligands:
+            if ligand.get_identifier() == identifier:
+                ligand.add_conformer(score)
+                break
+
+    ligand_numbers = sorted(set([ligand.get_ligand_number() for ligand in ligands]))
+    best_scores = []
+    for ligand_number in ligand_numbers:
+        scores = []
+        for ligand in ligands:
+            if ligand_number != ligand.get_ligand_number():
+                continue
+            scores += ligand.get_conformers()
+        best_scores.append(min(scores) if len(scores) > 0 else "NA")
+    return best_scores
+
+
+def run_store(ligands, poses):
+    """ Attaches the poses and gets the best score per ligand with a
+    `LigandStore`.
+    """
+    store = LigandStore(ligands, func_get_score=float)
+    for identifier, score in poses:
+        store.attach_conformer(identifier, score)
+    return store.get_scores(best_only=True, best="min")
+
+
+def main():
+    random.seed(random_seed)
+
+    print(f"{'n_ligands':>9} {'old (s)':>9} {'store (s)':>9} {'speedup':>8}", flush=True)
+    for n_ligands in n_ligands_list:
+        ligands, poses = get_poses(n_ligands)
+
+        start = time.perf_counter()
+        store_scores = run_store(ligands, poses)
+        store_time = time.perf_counter() - start
+
+        if n_ligands <= n_ligands_old_max:
+            for ligand in ligands:
+                ligand.clear_conformers()
+            start = time.perf_counter()
+            old_scores = run_old(ligands, poses)
+            old_time = time.perf_counter() - start
+            assert old_scores == store_scores, "Scores differ from the old result handling."
+            print(f"{n_ligands:>9} {old_time:9.3f} {store_time:9.3f} {old_time / store_time:8.1f}", flush=True)
+        else:
+            print(f"{n_ligands:>9} {'-':>9} {store_time:9.3f} {'-':>8}", flush=True)
+
+    # columnar export of all poses of the largest set
+    store = LigandStore(ligands, func_get_score=float)
+    start = time.perf_counter()
+    df = store.as_dataframe()
+    print(f"-- Exported {df.shape[0]} poses to a dataframe in {time.perf_counter() - start:.3f} s", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
@@ -0,0 +1,138 @@
+# load general packages and functions
+import collections
+import random
+import sys
+import time
+from rdkit import Chem, RDLogger
+from rdkit.Chem import AllChem
+
+# load program-specific functions
+sys.path.insert(1, "./fine-tuning/")
+from linker_stitcher import LinkerStitcher
+
+"""
+Benchmarks the joining of generated linkers to their fragments, comparing the
+old per-molecule code (bonds added at shifted atom indices after deleting the
+dummy atoms, with a fallback of random '(*)' insertions into the linker SMILES
+and 1000 random SMILES per molecule) with the `LinkerStitcher`, in the main
+process and in pools of workers. Fragment pairs are read from the bundled
+fragment file, and each is joined to a linker drawn from a fixed list of
+common linkers, with a random pair of linker atoms standing in for the atoms
+predicted by the model. Prints the stitches/s and success rate of each method,
+and the failure reasons reported by the `LinkerStitcher`.
+
+To use script, run from the repository root:
+python Utils/benchmark_linker_stitcher.py
+"""
+
+# set variables
+fragments_path = "data/pre-training/chembl/test_fragment.smi"
+n_molecules = 2000
+n_old_max = 200   # the old code is only timed on the first molecules
+n_workers_list = [0, 2, 4]
+max_attempts = 10
+linkers = ["CC", "CCC", "CCOCC", "CNC(=O)C", "c1ccccc1", "c1ccncc1", "C1CCNCC1",
+           "CC(=O)NCC", "c1ccc(cc1)C(=O)N", "OCCO", "C#C", "CN(C)C", "C1CC1"]
+random_seed = 42
+
+
+def load_fragments():
+    """ Reads the first `n_molecules` fragment pairs.
+    """
+    with open(fragments_path, "r") as smi_file:
+        return [next(smi_file).split()[0] for _ in range(n_molecules)]
+
+
+def get_linkers(rng):
+    """ Draws a linker and a random pair of its atoms for each molecule.
+    """
+    linker_smi_list, linker_atoms_list = [], []
+    for _ in range(n_molecules):
+        linker_smi = rng.choice(linkers)
+        n_atoms = Chem.MolFromSmiles(linker_smi).GetNumAtoms()
+        linker_smi_list.append(linker_smi)
+        linker_atoms_list.append(rng.sample(range(n_atoms), 2))
+    return linker_smi_list, linker_atoms_list
+
+
+def stitch_old(fragments_smi, linker_smi_1, atom_idx):
+    """ Reproduces the old joining code; returns the SMILES, or `None` if it
+    failed.
+    """
+    try:
+        fragments = Chem.MolFromSmiles(fragments_smi)
+        linker = Chem.MolFromSmiles(linker_smi_1)
+        combo = Chem.CombineMols(fragments, linker)
+        idx_list = [atom.GetIdx() for atom in fragments.GetAtoms() if atom.GetSymbol() == '*']
+
+        du = Chem.MolFromSmiles('*')
+        combo = AllChem.DeleteSubstructs(combo, du)
+        edcombo = Chem.EditableMol(combo)
+        try:
+            edcombo.AddBond(idx_list[0], atom_idx[0] + idx_list[1] - 2, order=Chem.rdchem.BondType.SINGLE)
+            edcombo.AddBond(idx_list[1] - 2, atom_idx[1] + idx_list[1] - 2, order=Chem.rdchem.BondType.SINGLE)
+            final_connect_mol = edcombo.GetMol()
+        except:
+            fragment_smi_0 = fragments_smi.split('.')[0]
+            fragment_smi_1 = fragments_smi.split('.')[1]
+
+            match = '****sfs'
+            for _ in range(1000):
+                if not Chem.MolFromSmiles(match):
+                    s = linker_smi_1
+                    for i in range(2):
+                        index = random.randint(0, len(s))
+                        s = "".join([s[:index], "(*)", s[index:]])
+                    match = s
+                else:
+                    break
+            smi_linker = []
+            for _ in range(1000):
+                smi_link = Chem.MolToSmiles(Chem.MolFromSmiles(s), doRandom=True)
+                if smi_link[0] == "*" and smi_link[-1] == '*':
+                    smi_linker.append(smi_link)
+
+            final_smi = (fragment_smi_1 + smi_linker[0] + fragment_smi_0).replace("*", "")
+            final_connect_mol = Chem.MolFromSmiles(final_smi)
+
+        return Chem.MolToSmiles(final_connect_mol)
+    except:
+        return None
+
+
+def main():
+    RDLogger.DisableLog("rdApp.*")
+    rng = random.Random(random_seed)
+    random.seed(random_seed)
+    fragments_list = load_fragments()
+    linker_smi_list, linker_atoms_list = get_linkers(rng)
+
+    print(f"{'method':>16} {'n_molecules':>12} {'stitches/s':>11} {'success (%)':>12}", flush=True)
+
+    start = time.perf_counter()
+    old_results = [stitch_old(*job) for job in zip(fragments_list[:n_old_max], linker_smi_list, linker_atoms_list)]
+    old_time = time.perf_counter() - start
+    old_success = 100 * sum(result is not None for result in old_results) / n_old_max
+    print(f"{'old':>16} {n_old_max:>12} {n_old_max / old_time:11.1f} {old_success:12.1f}", flush=True)
+
+    for n_workers in n_workers_list:
+        stitcher = LinkerStitcher(max_attempts=max_attempts, n_workers=n_workers)
+        stitcher.stitch_batch(fragments_list[:10], linker_smi_list, linker_atoms_list)  # start the pool
+
+        start = time.perf_counter()
+        results = stitcher.stitch_batch(fragments_list, linker_smi_list, linker_atoms_list)
+        stitch_time = time.perf_counter() - start
+        stitcher.close()
+
+        success = 100 * sum(result.smiles is not None for result in results) / n_molecules
+        print(f"{'stitcher (' + str(n_workers) + ')':>16} {n_molecules:>12} {n_molecules / stitch_time:11.1f} "
+              f"{success:12.1f}", flush=True)
+
+    failures = collections.Counter(result.failure for result in results if result.failure is not None)
+    for reason, count in failures.most_common():
+        print(f"-- {count} failed: {reason}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
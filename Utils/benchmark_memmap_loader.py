@@ -0,0 +1,137 @@
+# load general packages and functions
+import os
+import shutil
+import sys
+import tempfile
+import time
+import h5py
+import numpy as np
+
+# load program-specific functions
+sys.path.insert(1, "./pre-training/")
+from BlockDatasetLoader import BlockDataLoader, HDFDataset, MemmapDataset, MemmapBlockDataLoader
+
+"""
+Compares the two dataset backends used to read preprocessed data during
+training ('dataset_backend'): 'hdf' (`HDFDataset` with `BlockDataLoader`, which
+converts every graph to float32 on its own and creates new workers for every
+block) and 'memmap' (`MemmapDataset` with `MemmapBlockDataLoader`, which reads
+whole batches from read-only memory-maps using persistent workers). Writes a
+dense HDF file of random synthetic graphs, then prints the samples/s over two
+epochs and the summed resident memory (RSS) of the worker processes, measured
+halfway through the second epoch, for each backend and number of workers.
+Worker RSS is read from `/proc`, so it is only reported on Linux.
+
+To use script, run from the repository root:
+python Utils/benchmark_memmap_loader.py
+"""
+
+# set variables
+n_subgraphs = 200000
+max_n_nodes = 13
+n_node_features = 8
+n_edge_features = 3
+apd_length = 1000
+batch_size = 1000
+block_size = 50000
+n_workers_list = [0, 2, 4]
+n_epochs = 2
+seed = 42
+
+
+def write_synthetic_HDF_file(path, rng):
+    """ Writes `n_subgraphs` random (int8) graphs to a dense HDF file.
+    """
+    with h5py.File(path, "w") as hdf_file:
+        for name, shape in [("nodes", (max_n_nodes, n_node_features)),
+                            ("edges", (max_n_nodes, max_n_nodes, n_edge_features)),
+                            ("APDs", (apd_length,))]:
+            data = hdf_file.create_dataset(name, (n_subgraphs, *shape), chunks=None, dtype=np.dtype("int8"))
+            for start in range(0, n_subgraphs, block_size):
+                n_rows = min(block_size, n_subgraphs - start)
+                data[start:start + n_rows] = rng.integers(0, 2, size=(n_rows, *shape), dtype=np.int8)
+
+
+def get_worker_rss_mb():
+    """ Returns the summed RSS (in MB) of the child processes of this process,
+    or `None` if `/proc` is not available.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    rss_kb = 0
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/status") as status_file:
+                status = dict(line.split(":", 1) for line in status_file if ":" in line)
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue
+        if int(status["PPid"]) == os.getpid() and "VmRSS" in status:
+            rss_kb += int(status["VmRSS"].split()[0])
+    return rss_kb / 1000
+
+
+def get_loader(backend, hdf_path, memmap_dataset, n_workers):
+    """ Returns the data loader of the specified backend.
+    """
+    if backend == "hdf":
+        return BlockDataLoader(dataset=HDFDataset(hdf_path),
+                               batch_size=batch_size,
+                               block_size=block_size,
+                               shuffle=True,
+                               n_workers=n_workers,
+                               pin_memory=False)
+    return MemmapBlockDataLoader(dataset=memmap_dataset,
+                                 batch_size=batch_size,
+                                 block_size=block_size,
+                                 shuffle=True,
+                                 n_workers=n_workers,
+                                 pin_memory=False)
+
+
+def time_loader(loader):
+    """ Iterates over `loader` for `n_epochs` epochs; returns the samples/s and
+    the worker RSS (in MB) measured halfway through the last epoch.
+    """
+    n_samples = 0
+    worker_rss = None
+    start = time.perf_counter()
+    for epoch in range(n_epochs):
+        for batch_idx, batch in enumerate(loader):
+            n_samples += len(batch[0])
+            if epoch == n_epochs - 1 and batch_idx == len(loader) // 2:
+                worker_rss = get_worker_rss_mb()
+    return n_samples / (time.perf_counter() - start), worker_rss
+
+
+def main():
+    """ Prints the samples/s and worker RSS for each backend and number of
+    workers.
+    """
+    rng = np.random.default_rng(seed=seed)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        hdf_path = os.path.join(temp_dir, "train.h5")
+        print(f"* Writing {n_subgraphs} synthetic graphs.", flush=True)
+        write_synthetic_HDF_file(hdf_path, rng)
+
+        start = time.perf_counter()
+        memmap_dataset = MemmapDataset(hdf_path, dataset_names=["nodes", "edges", "APDs"])
+        print(f"* Exported to .npy in {time.perf_counter() - start:.1f} s (done once).", flush=True)
+
+        print(f"{'backend':>8} {'n_workers':>10} {'samples/s':>10} {'worker RSS (MB)':>16}")
+        for n_workers in n_workers_list:
+            for backend in ["hdf", "memmap"]:
+                # loaders are created one at a time, so that only the workers
+                # of the loader being timed are alive
+                loader = get_loader(backend, hdf_path, memmap_dataset, n_workers)
+                samples_per_s, worker_rss = time_loader(loader)
+                worker_rss = "-" if not worker_rss else f"{worker_rss:.0f}"
+                print(f"{backend:>8} {n_workers:>10} {samples_per_s:10.0f} {worker_rss:>16}", flush=True)
+                del loader
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
@@ -0,0 +1,180 @@
+# load general packages and functions
+import sys
+import argparse
+import copy
+import resource
+import subprocess
+import time
+import torch
+
+# load program-specific functions
+sys.path.insert(1, "./pre-training/")
+from gnn.summation_mpnn import SummationMPNN, SummationlinkerMPNN
+
+"""
+Benchmarks the message aggregation backends of `SummationMPNN` and
+`SummationlinkerMPNN` on CPU: the "dense" backend (matmul with a {nodes in
+batch, edges in batch} summation matrix) and the "scatter" backend
+(`index_add` over edge indices). First checks that both backends give the same
+outputs and gradients, then prints the forward and backward time and the peak
+RSS for growing batch sizes. Each measurement is run in a fresh subprocess, so
+that the peak RSS of one measurement does not carry over to the next.
+
+Small GGNN-like models and synthetic random molecular graphs are used, so no
+job directory or preprocessed data are needed.
+
+To use script, run from the repository root:
+python Utils/benchmark_mpnn_aggregation.py
+"""
+
+# set variables
+batch_sizes = [100, 500, 1000, 2000, 5000]
+max_dense_batch_size = 2000  # the dense summation matrix gets too large beyond this
+max_n_nodes = 13
+node_features = 8
+edge_features = 3
+hidden_node_features = 100
+message_size = 100
+message_passes = 3
+seed = 42
+
+
+class ToyMPNN(SummationMPNN):
+    """ Minimal GGNN-like `SummationMPNN` (one message MLP, GRU update, and sum
+    readout).
+    """
+    def __init__(self, aggregation):
+        super(ToyMPNN, self).__init__(node_features, hidden_node_features, edge_features,
+                                      message_size, message_passes, aggregation)
+        self.msg_nn = torch.nn.Linear(hidden_node_features + edge_features, message_size)
+        self.gru = torch.nn.GRUCell(input_size=message_size, hidden_size=hidden_node_features)
+
+    def message_terms(self, nodes, node_neighbours, edges):
+        return self.msg_nn(torch.cat((node_neighbours, edges), dim=1))
+
+    def update(self, nodes, messages):
+        return self.gru(messages, nodes)
+
+    def readout(self, hidden_nodes, input_nodes, node_mask):
+        return (hidden_nodes * node_mask.unsqueeze(-1)).sum(dim=1)
+
+
+class ToyLinkerMPNN(SummationlinkerMPNN):
+    """ Minimal GGNN-like `SummationlinkerMPNN`.
+    """
+    def __init__(self, aggregation):
+        super(ToyLinkerMPNN, self).__init__(node_features, hidden_node_features, edge_features,
+                                            message_size, message_passes, aggregation)
+        self.msg_nn = torch.nn.Linear(hidden_node_features + edge_features, message_size)
+        self.gru = torch.nn.GRUCell(input_size=message_size, hidden_size=hidden_node_features)
+
+    def message_terms(self, nodes, node_neighbours, edges):
+        return self.msg_nn(torch.cat((node_neighbours, edges), dim=1))
+
+    def update(self, nodes, messages):
+        return self.gru(messages, nodes)
+
+    def readout(self, hidden_nodes, input_nodes, node_mask):
+        return (hidden_nodes * node_mask.unsqueeze(-1)).sum(dim=1)
+
+    def globalreadout(self, hidden_nodes, graph_embeddings):
+        return graph_embeddings
+
+
+def get_batch(batch_size, generator):
+    """ Creates a batch of random tree-shaped molecular graphs, padded to
+    `max_n_nodes`, as one-hot node and (symmetric) edge feature tensors.
+    """
+    nodes = torch.zeros(batch_size, max_n_nodes, node_features)
+    edges = torch.zeros(batch_size, max_n_nodes, max_n_nodes, edge_features)
+    for i in range(batch_size):
+        n_nodes = int(torch.randint(2, max_n_nodes + 1, (1,), generator=generator))
+        atom_types = torch.randint(0, node_features, (n_nodes,), generator=generator)
+        nodes[i, torch.arange(n_nodes), atom_types] = 1
+        for v in range(1, n_nodes):  # bond to a random earlier node
+            u = int(torch.randint(0, v, (1,), generator=generator))
+            b = int(torch.randint(0, edge_features, (1,), generator=generator))
+            edges[i, u, v, b] = edges[i, v, u, b] = 1
+    return nodes, edges
+
+
+def run_model(model, nodes, edges):
+    """ Runs the forward pass of either model class.
+    """
+    if isinstance(model, SummationMPNN):
+        return model(nodes, edges, None, None)
+    return model(nodes, edges)
+
+
+def check_equivalence():
+    """ Asserts that both backends give the same outputs and gradients.
+    """
+    generator = torch.Generator().manual_seed(seed)
+    nodes, edges = get_batch(200, generator)
+    for model_class in [ToyMPNN, ToyLinkerMPNN]:
+        torch.manual_seed(seed)
+        scatter_model = model_class(aggregation="scatter")
+        dense_model = copy.deepcopy(scatter_model)
+        dense_model.aggregation = "dense"
+
+        outputs = []
+        for model in [scatter_model, dense_model]:
+            output = run_model(model, nodes, edges)
+            output.sum().backward()
+            outputs.append(output)
+
+        assert torch.allclose(outputs[0], outputs[1], rtol=1e-4, atol=1e-5)
+        for p_scatter, p_dense in zip(scatter_model.parameters(), dense_model.parameters()):
+            assert torch.allclose(p_scatter.grad, p_dense.grad, rtol=1e-4, atol=1e-4)
+
+        print(f"-- {model_class.__name__}: scatter and dense backends agree.", flush=True)
+
+
+def measure(aggregation, batch_size):
+    """ Prints the forward time (s), backward time (s), and peak RSS (MB) of one
+    training step with the given backend and batch size.
+    """
+    generator = torch.Generator().manual_seed(seed)
+    nodes, edges = get_batch(batch_size, generator)
+    torch.manual_seed(seed)
+    model = ToyMPNN(aggregation=aggregation)
+
+    start = time.perf_counter()
+    output = run_model(model, nodes, edges)
+    t_forward = time.perf_counter() - start
+
+    start = time.perf_counter()
+    output.sum().backward()
+    t_backward = time.perf_counter() - start
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kB --> MB
+    print(t_forward, t_backward, peak_rss)
+
+
+def main():
+    check_equivalence()
+
+    print(f"{'batch_size':>10} {'backend':>8} {'forward (s)':>12} {'backward (s)':>13} {'peak RSS (MB)':>14}")
+    for batch_size in batch_sizes:
+        for aggregation in ["dense", "scatter"]:
+            if aggregation == "dense" and batch_size > max_dense_batch_size:
+                print(f"{batch_size:>10} {aggregation:>8} {'skipped':>12}", flush=True)
+                continue
+            result = subprocess.run(
+                [sys.executable, __file__, "--measure", aggregation, str(batch_size)],
+                stdout=subprocess.PIPE, universal_newlines=True, check=True,
+            )
+            t_forward, t_backward, peak_rss = map(float, result.stdout.split())
+            print(f"{batch_size:>10} {aggregation:>8} {t_forward:12.3f} {t_backward:13.3f} "
+                  f"{peak_rss:14.1f}", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--measure", nargs=2, metavar=("AGGREGATION", "BATCH_SIZE"))
+    args = parser.parse_args()
+    if args.measure:
+        measure(aggregation=args.measure[0], batch_size=int(args.measure[1]))
+    else:
+        main()
+        print("Done.", flush=True)
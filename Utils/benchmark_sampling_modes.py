@@ -0,0 +1,72 @@
+# load general packages and functions
+import sys
+import time
+import torch
+
+# load program-specific functions
+sys.path.insert(1, "./pre-training/")
+import analyze as anal
+import generate
+import models
+
+"""
+Compares the modes of sampling the APDs in `generate.build_graphs()`: the full
+APD (invalid actions terminate the graph), the APD with the invalid actions
+masked out, and masked sampling with a temperature, top-k and top-p (nucleus)
+filter. For each mode, prints the generation throughput, the fraction of graphs
+terminated by an invalid action, and the fraction of valid molecules. Uses the
+model in `model_path` if specified, and an untrained model otherwise.
+
+To use script, run from the repository root (the job directory is only used
+to load the job parameters, as in `main.py`):
+python Utils/benchmark_sampling_modes.py --job-dir path/to/job/
+"""
+
+# set variables
+model_path = None  # e.g. "path/to/job/model_restart_30.pth"
+n_graphs = 1000
+seed = 42
+sampling_modes = {
+    "unmasked": {"mask_invalid_actions": False},
+    "masked": {"mask_invalid_actions": True},
+    "masked, T=0.8": {"mask_invalid_actions": True, "sampling_temperature": 0.8},
+    "masked, top-k=5": {"mask_invalid_actions": True, "sampling_top_k": 5},
+    "masked, top-p=0.9": {"mask_invalid_actions": True, "sampling_top_p": 0.9},
+}
+
+
+def main():
+    """ Prints molecules/s, fraction of graphs terminated by an invalid action
+    and fraction of valid molecules for each sampling mode.
+    """
+    if model_path is None:
+        torch.manual_seed(seed)
+        model = models.initialize_model()
+    else:
+        model = torch.load(model_path, map_location=generate.C.device)
+    model.eval()
+
+    default_constants = generate.C
+    print(f"{'sampling mode':<20} {'mol/s':>9} {'invalid-terminated':>19} {'valid':>7}", flush=True)
+    for mode, settings in sampling_modes.items():
+        generate.C = default_constants._replace(**{"sampling_temperature": 1.0,
+                                                   "sampling_top_k": None,
+                                                   "sampling_top_p": None,
+                                                   **settings})
+        torch.manual_seed(seed)
+        start = time.perf_counter()
+        with torch.no_grad():
+            graphs, _, _, termination, _, _, _, _ = generate.build_graphs(model=model,
+                                                                          n_graphs_to_generate=n_graphs,
+                                                                          batch_size=n_graphs)
+        rate = n_graphs / (time.perf_counter() - start)
+
+        fraction_valid, _, fraction_properly_terminated = anal.get_fraction_valid(graphs, termination)
+        print(f"{mode:<20} {rate:9.1f} {1 - float(fraction_properly_terminated):19.3f} "
+              f"{fraction_valid:7.3f}", flush=True)
+    generate.C = default_constants
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
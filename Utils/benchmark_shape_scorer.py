@@ -0,0 +1,88 @@
+# load general packages and functions
+import sys
+import time
+from rdkit import Chem
+from rdkit.Chem import AllChem, rdMolAlign
+
+# load program-specific functions
+sys.path.insert(1, "./fine-tuning/")
+from score_util import calc_SC_RDKit_score
+from shape_scorer import ShapeScorer
+
+"""
+Benchmarks the 3D shape-similarity score ('3D_SMI') used in fine-tuning. The
+old scorer embedded the reference structure on every call and scored molecules
+in a serial loop; `ShapeScorer` embeds the reference once and can score in a
+pool of subprocesses. First checks that `ShapeScorer` (with one conformer)
+gives the same scores as the old scorer, then prints the molecules/s of the
+old scorer and of `ShapeScorer` for a growing number of workers. Molecules are
+read from the bundled ground-truth SMILES, so no job directory is needed.
+
+To use script, run from the repository root:
+python Utils/benchmark_shape_scorer.py
+"""
+
+# set variables
+smi_path = "data/pre-training/chembl/valid_groundtruth.smi"
+n_molecules = 200
+n_workers_list = [0, 1, 2, 4, 8]
+ref_smiles = "CN1CCCC1CCCCn1ncnn1"
+random_seed = 10
+
+
+def load_smiles():
+    """ Returns the first `n_molecules` SMILES in `smi_path`.
+    """
+    with open(smi_path) as smi_file:
+        return [next(smi_file).split()[0] for _ in range(n_molecules)]
+
+
+def score_old(smiles):
+    """ Reproduces the old '3D_SMI' scorer.
+    """
+    ref_mol = Chem.MolFromSmiles(ref_smiles)
+    ref_mol = Chem.AddHs(ref_mol)
+    AllChem.EmbedMolecule(ref_mol, randomSeed=random_seed)
+    AllChem.UFFOptimizeMolecule(ref_mol)
+
+    score_list = []
+    for smile in smiles:
+        gen_mol = Chem.MolFromSmiles(smile)
+        try:
+            gen_mol = Chem.AddHs(gen_mol)
+            AllChem.EmbedMolecule(gen_mol, randomSeed=random_seed)
+            AllChem.UFFOptimizeMolecule(gen_mol)
+            rdMolAlign.GetO3A(gen_mol, ref_mol).Align()
+            score_list.append(calc_SC_RDKit_score(gen_mol, ref_mol))
+        except Exception:
+            score_list.append(0)
+    return score_list
+
+
+def main():
+    smiles = load_smiles()
+
+    start = time.perf_counter()
+    old_scores = score_old(smiles)
+    old_rate = n_molecules / (time.perf_counter() - start)
+
+    print(f"{'n_workers':>9} {'mol/s':>8} {'speedup':>8}")
+    print(f"{'old':>9} {old_rate:8.1f} {1:8.2f}", flush=True)
+    for n_workers in n_workers_list:
+        scorer = ShapeScorer(ref_smiles, random_seed=random_seed, n_workers=n_workers)
+        if n_workers > 0:
+            scorer.score(smiles[:n_workers])  # start up the pool before timing
+
+        start = time.perf_counter()
+        scores = scorer.score(smiles)
+        rate = n_molecules / (time.perf_counter() - start)
+        scorer.close()
+
+        assert all(abs(new - old) < 1e-6 for new, old in zip(scores, old_scores)), \
+            "Scores differ from the old scorer."
+        print(f"{n_workers:>9} {rate:8.1f} {rate / old_rate:8.2f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
@@ -0,0 +1,69 @@
+# load general packages and functions
+import sys
+import tempfile
+import time
+
+# load program-specific functions
+sys.path.insert(1, "./pre-training/")
+from step_profiler import StepProfiler
+
+"""
+Measures the overhead of the `StepProfiler` spans used to time the phases of
+the training/learning steps. Runs a synthetic step (a busy loop of about
+`step_time_ms`, split into `n_phases` phases, each in its own span) with the
+profiler disabled, enabled, and without any spans, and prints the mean time
+per step and the overhead relative to the step without spans.
+
+To use script, run from the repository root:
+python Utils/benchmark_step_profiler.py
+"""
+
+# set variables
+n_steps = 200
+n_phases = 8
+step_time_ms = 10.0
+
+
+def busy_wait(duration):
+    """ Spins for `duration` seconds (rather than sleeping, so that the CPU time
+    is also spent).
+    """
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        pass
+
+
+def run_steps(profiler):
+    """ Returns the mean time (in ms) of a step, with each of its phases in a
+    span of `profiler` (or without spans, if `profiler` is `None`).
+    """
+    phase_time = step_time_ms / n_phases / 1000
+    start = time.perf_counter()
+    for step_idx in range(n_steps):
+        if profiler is None:
+            for _ in range(n_phases):
+                busy_wait(phase_time)
+        else:
+            with profiler.step(step_idx):
+                for phase_idx in range(n_phases):
+                    with profiler.span(f"phase_{phase_idx}"):
+                        busy_wait(phase_time)
+    return 1000 * (time.perf_counter() - start) / n_steps
+
+
+def main():
+    with tempfile.TemporaryDirectory() as output_dir:
+        baseline = run_steps(None)
+        print(f"{'profiler':>9} {'ms/step':>8} {'overhead (%)':>13}", flush=True)
+        print(f"{'none':>9} {baseline:8.3f} {0.0:13.3f}", flush=True)
+        for enabled in [False, True]:
+            profiler = StepProfiler(enabled=enabled, output_dir=output_dir + "/")
+            step_time = run_steps(profiler)
+            profiler.close()
+            overhead = 100 * (step_time - baseline) / baseline
+            print(f"{'enabled' if enabled else 'disabled':>9} {step_time:8.3f} {overhead:13.3f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
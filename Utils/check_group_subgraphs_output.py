@@ -0,0 +1,131 @@
+# load general packages and functions
+import sys
+import os
+import tempfile
+import h5py
+import numpy as np
+
+# load program-specific functions
+sys.path.insert(1, "./pre-training/")
+from parameters.constants import constants as C
+import apd
+import preprocessing as prep
+
+"""
+Checks that the HDF files written with the hash index of
+`preprocessing.group_subgraphs()` are bit-identical to those written with the
+original linear search over all previously collected subgraphs. A subset of the
+bundled ground-truth SMILES is preprocessed (as a validation set, so that the
+datasets are not shuffled) once with each version of `group_subgraphs()`, into
+separate temporary directories, and the "nodes", "edges" and "APDs" datasets of
+the two HDF files are compared.
+
+To use script, run from the repository root (the job directory is only used
+to load the job parameters, as in `main.py`):
+python Utils/check_group_subgraphs_output.py --job-dir path/to/job/
+"""
+
+# set variables
+smi_path = "data/pre-training/chembl/valid_groundtruth.smi"
+n_molecules = 500
+dataset_names = ["nodes", "edges", "APDs"]
+
+
+def group_subgraphs_linear(init_idx, molecule_set, dataset_dict, is_training_set, ts_properties_old=None):
+    """ Original version of `preprocessing.group_subgraphs()`, which looks up
+    each subgraph with a linear search over all previously collected subgraphs.
+    """
+    data_subgraphs = []
+    data_APDs = []
+    molecular_graph_list = []
+
+    molecules_processed = 0
+    for graph in map(prep.get_graph, molecule_set):
+
+        molecules_processed += 1
+        molecular_graph_list.append(graph)
+
+        for new_SG_idx in range(apd.get_decoding_route_length(molecular_graph=graph)):
+            SG, APD = apd.get_decoding_route_state(molecular_graph=graph, subgraph_idx=new_SG_idx)
+
+            count = 0
+            for idx, existing_subgraph in enumerate(data_subgraphs):
+                count += 1
+                if (SG[0] == existing_subgraph[0]).all() and (SG[1] == existing_subgraph[1]).all():
+                    data_APDs[idx] += APD
+                    break
+
+            if count == len(data_subgraphs) or count == 0:
+                data_subgraphs.append(SG)
+                data_APDs.append(APD)
+
+            len_data_subgraphs = len(data_subgraphs)
+            if len_data_subgraphs == C.group_size:
+                dataset_dict = prep.save_group(dataset_dict=dataset_dict,
+                                               group_size=C.group_size,
+                                               data_subgraphs=data_subgraphs,
+                                               data_APDs=data_APDs,
+                                               init_idx=init_idx)
+                ts_properties = prep.get_ts_properties(is_training_set=is_training_set,
+                                                       molecular_graphs=molecular_graph_list,
+                                                       group_size=C.group_size,
+                                                       ts_properties_old=ts_properties_old)
+                return molecules_processed, dataset_dict, C.group_size, ts_properties
+
+    dataset_dict = prep.save_group(dataset_dict=dataset_dict,
+                                   group_size=len_data_subgraphs,
+                                   data_subgraphs=data_subgraphs,
+                                   data_APDs=data_APDs,
+                                   init_idx=init_idx)
+    ts_properties = prep.get_ts_properties(is_training_set=is_training_set,
+                                           molecular_graphs=molecular_graph_list,
+                                           group_size=len_data_subgraphs,
+                                           ts_properties_old=ts_properties_old)
+    return molecules_processed, dataset_dict, len_data_subgraphs, ts_properties
+
+
+def preprocess(tmp_dir, name, group_subgraphs):
+    """ Preprocesses the first `n_molecules` SMILES in a subdirectory `name` of
+    `tmp_dir` using the given `group_subgraphs()`, and returns the path to the
+    HDF file.
+    """
+    job_dir = os.path.join(tmp_dir, name)
+    os.makedirs(job_dir)
+    path = os.path.join(job_dir, "valid.smi")
+
+    with open(smi_path) as smi_file, open(path, "w") as subset_file:
+        subset_file.write("SMILES\n")
+        for _ in range(n_molecules):
+            subset_file.write(smi_file.readline())
+
+    # preprocess in a single process, keeping the restart file in the
+    # temporary directory instead of next to the job's dataset
+    default_group_subgraphs = prep.group_subgraphs
+    prep.group_subgraphs = group_subgraphs
+    prep.C = C._replace(n_preprocessing_workers=None, restart=False, dataset_dir=job_dir + "/")
+    try:
+        prep.create_HDF_file(path=path, is_training_set=False)
+    finally:
+        prep.group_subgraphs = default_group_subgraphs
+        prep.C = C
+    return f"{path[:-3]}h5"
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_path = preprocess(tmp_dir, "linear", group_subgraphs_linear)
+        new_path = preprocess(tmp_dir, "hashed", prep.group_subgraphs)
+
+        with h5py.File(old_path, "r") as old_file, h5py.File(new_path, "r") as new_file:
+            for name in dataset_names:
+                old_data, new_data = old_file[name][:], new_file[name][:]
+                assert old_data.dtype == new_data.dtype and old_data.shape == new_data.shape, \
+                    f"'{name}' differs in dtype or shape: {old_data.dtype}{old_data.shape} " \
+                    f"vs. {new_data.dtype}{new_data.shape}"
+                assert old_data.tobytes() == new_data.tobytes(), f"'{name}' differs"
+                print(f"-- '{name}' {new_data.shape}: bit-identical.", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
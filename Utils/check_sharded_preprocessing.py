@@ -0,0 +1,145 @@
+# load general packages and functions
+import sys
+import os
+import filecmp
+import tempfile
+import h5py
+import numpy as np
+
+# load program-specific functions
+sys.path.insert(1, "./pre-training/")
+from parameters.constants import constants as C
+import preprocessing as prep
+import util
+
+"""
+Checks that sharded preprocessing (`preprocessing.create_sharded_HDF_file()`)
+produces the same merged HDF file and training set properties regardless of the
+number of worker processes, and the same subgraphs as the legacy
+single-process preprocessing (`preprocessing.create_HDF_file()`). A subset of
+the bundled ground-truth SMILES is preprocessed as a training set with each
+worker count, into separate temporary directories, and the outputs are
+compared with those of a single worker.
+
+The legacy output is not byte-identical to the sharded one: subgraphs are
+deduplicated within groups, which restart at every shard, and the two shuffles
+differ. So both are compared as multisets of subgraphs: for each unique
+subgraph, the APDs of all its rows are summed, and the resulting mappings
+(subgraph -> summed APD) must be equal. This only checks parity with the legacy
+output as a multiset, not row by row, and the script output says so. Moreover,
+a group ends as soon as it holds `group_size` unique subgraphs, dropping the
+rest of the decoding route of the molecule being processed, so the subgraphs
+kept depend on where the groups end; the legacy comparison thus uses a smaller
+subset, preprocessed (in several shards) with groups large enough to never
+fill up.
+
+To use script, run from the repository root (the job directory is only used
+to load the job parameters, as in `main.py`):
+python Utils/check_sharded_preprocessing.py --job-dir path/to/job/
+"""
+
+# set variables
+smi_path = "data/pre-training/chembl/valid_groundtruth.smi"
+n_molecules = 500
+shard_size = 60       # small, so that every worker gets several shards
+worker_counts = [1, 2, 4]
+n_legacy_molecules = 50
+legacy_shard_size = 20
+legacy_group_size = 10000  # more than the subgraphs of `n_legacy_molecules`
+
+
+def write_subset(tmp_dir, name, n_molecules=n_molecules):
+    """ Writes the first `n_molecules` SMILES to a subdirectory `name` of
+    `tmp_dir`, and returns the path to the SMILES.
+    """
+    job_dir = os.path.join(tmp_dir, name)
+    os.makedirs(job_dir)
+    path = os.path.join(job_dir, "train.smi")
+
+    with open(smi_path) as smi_file, open(path, "w") as subset_file:
+        subset_file.write("SMILES\n")
+        for _ in range(n_molecules):
+            subset_file.write(smi_file.readline())
+    return path
+
+
+def preprocess(tmp_dir, n_workers):
+    """ Preprocesses the SMILES subset using `n_workers` processes, and returns
+    the path to the SMILES.
+    """
+    path = write_subset(tmp_dir, f"workers{n_workers}")
+    prep.create_sharded_HDF_file(path=path,
+                                 is_training_set=True,
+                                 n_workers=n_workers,
+                                 shard_size=shard_size)
+    return path
+
+
+def preprocess_legacy(tmp_dir):
+    """ Preprocesses the (smaller) legacy SMILES subset both in a single
+    process, as without `n_preprocessing_workers`, and in shards, with groups
+    of `legacy_group_size` subgraphs; returns the paths to the SMILES.
+    """
+    legacy_path = write_subset(tmp_dir, "legacy", n_legacy_molecules)
+    sharded_path = write_subset(tmp_dir, "legacy_sharded", n_legacy_molecules)
+
+    # keep the restart file and training set properties in the temporary
+    # directory, instead of next to the job's dataset
+    legacy_constants = C._replace(n_preprocessing_workers=None,
+                                  restart=False,
+                                  group_size=legacy_group_size,
+                                  dataset_dir=os.path.dirname(legacy_path) + "/",
+                                  training_set=legacy_path)
+    prep.C, util.C = legacy_constants, legacy_constants
+    try:
+        prep.create_HDF_file(path=legacy_path, is_training_set=True)
+        prep.create_sharded_HDF_file(path=sharded_path,
+                                     is_training_set=True,
+                                     n_workers=1,
+                                     shard_size=legacy_shard_size)
+    finally:
+        prep.C, util.C = C, C
+    return legacy_path, sharded_path
+
+
+def get_subgraph_multiset(hdf_path):
+    """ Returns a `dict` mapping each unique subgraph in `hdf_path` (see
+    `preprocessing.get_subgraph_key()`) to the sum of the APDs of its rows.
+    """
+    summed_APDs = {}
+    with h5py.File(hdf_path, "r") as hdf_file:
+        for nodes, edges, APD in zip(hdf_file["nodes"], hdf_file["edges"], hdf_file["APDs"]):
+            key = prep.get_subgraph_key(subgraph=[nodes, edges])
+            summed_APDs[key] = summed_APDs.get(key, 0) + APD.astype(np.int64)
+    return summed_APDs
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = {n_workers: preprocess(tmp_dir, n_workers) for n_workers in worker_counts}
+        reference = paths[worker_counts[0]]
+
+        with h5py.File(f"{reference[:-3]}h5", "r") as reference_file:
+            for n_workers, path in paths.items():
+                with h5py.File(f"{path[:-3]}h5", "r") as hdf_file:
+                    for name in reference_file.keys():
+                        assert np.array_equal(reference_file[name][:], hdf_file[name][:]), \
+                            f"'{name}' differs with {n_workers} worker(s)"
+                assert filecmp.cmp(f"{reference[:-4]}.csv", f"{path[:-4]}.csv", shallow=False), \
+                    f"Training set properties differ with {n_workers} worker(s)"
+                print(f"-- {n_workers} worker(s): identical to {worker_counts[0]} worker(s).", flush=True)
+
+        legacy, sharded = preprocess_legacy(tmp_dir)
+        legacy_subgraphs = get_subgraph_multiset(f"{legacy[:-3]}h5")
+        sharded_subgraphs = get_subgraph_multiset(f"{sharded[:-3]}h5")
+        assert legacy_subgraphs.keys() == sharded_subgraphs.keys(), "Unique subgraphs differ from legacy output"
+        for key, summed_APD in legacy_subgraphs.items():
+            assert np.array_equal(summed_APD, sharded_subgraphs[key]), "Summed APDs differ from legacy output"
+        print(f"-- Legacy single process: same {len(legacy_subgraphs)} unique subgraphs and summed APDs "
+              f"(multiset parity only; the files are not byte-identical, as rows are deduplicated per shard "
+              f"and shuffled differently).", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
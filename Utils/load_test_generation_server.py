@@ -0,0 +1,86 @@
+# load general packages and functions
+import json
+import threading
+import time
+import urllib.request
+import numpy as np
+
+"""
+Load-tests a running generation server (a 'serve' job, see
+`pre-training/generation_server.py`): sends requests for linkers at each of
+several request rates (with exponentially distributed intervals, i.e. Poisson
+arrivals) for a fixed duration, and prints the p50/p99 latency of the requests
+(until the last molecule is received) and the throughput in requests/s and
+molecules/s.
+
+To use script, first start the server, then run from the repository root:
+python Utils/load_test_generation_server.py
+"""
+
+# set variables
+url = "http://127.0.0.1:8000/generate"
+fragments_smi = None  # e.g. "*c1ccccc1.*C1CCNCC1" (`None` uses the server's `generate_fragments`)
+n_samples_per_request = 10
+request_rates = [1, 5, 10, 50, 100]  # requests/s
+duration = 20  # s per request rate
+seed = 42
+
+
+def send_request(latencies, n_molecules, errors):
+    """ Sends one request, reading the streamed molecules, and records its
+    latency and number of molecules (or the error).
+    """
+    body = {"n_samples": n_samples_per_request}
+    if fragments_smi is not None:
+        body["fragments"] = fragments_smi
+    request = urllib.request.Request(url,
+                                     data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            n_received = sum(1 for line in response if line.strip())
+    except OSError as error:
+        errors.append(str(error))
+        return
+    latencies.append(time.perf_counter() - start)
+    n_molecules.append(n_received)
+
+
+def run_load(rate, rng):
+    """ Sends requests at `rate` requests/s for `duration` s, and returns the
+    latencies (s), numbers of molecules received, errors, and the elapsed time.
+    """
+    latencies, n_molecules, errors, threads = [], [], [], []
+    start = time.perf_counter()
+    next_request = start
+    while next_request < start + duration:
+        time.sleep(max(next_request - time.perf_counter(), 0))
+        thread = threading.Thread(target=send_request, args=(latencies, n_molecules, errors))
+        thread.start()
+        threads.append(thread)
+        next_request += rng.exponential(1 / rate)
+    for thread in threads:
+        thread.join()
+    return latencies, n_molecules, errors, time.perf_counter() - start
+
+
+def main():
+    """ Prints the latency percentiles and throughput for each request rate.
+    """
+    rng = np.random.default_rng(seed)
+    print(f"{'rate (req/s)':>12} {'requests':>9} {'errors':>7} {'p50 (s)':>8} {'p99 (s)':>8} "
+          f"{'req/s':>7} {'mol/s':>8}", flush=True)
+    for rate in request_rates:
+        latencies, n_molecules, errors, elapsed = run_load(rate, rng)
+        if latencies:
+            p50, p99 = np.percentile(latencies, [50, 99])
+        else:
+            p50 = p99 = float("nan")
+        print(f"{rate:12} {len(latencies) + len(errors):9d} {len(errors):7d} {p50:8.3f} {p99:8.3f} "
+              f"{len(latencies) / elapsed:7.2f} {sum(n_molecules) / elapsed:8.1f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
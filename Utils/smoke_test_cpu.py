@@ -0,0 +1,102 @@
+# load general packages and functions
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+
+# load program-specific functions
+# (None)
+
+"""
+CPU end-to-end smoke test for the pre-training code: preprocesses a tiny
+dataset (the first few molecules of the bundled ChEMBL validation set), trains
+a small model for one epoch, and generates molecules with it, all with
+`device` set to 'cpu'. Each step is run as a separate job, as done by
+`submitPT.py`, and the script stops at the first job which fails.
+
+To use script, run from the repository root:
+python Utils/smoke_test_cpu.py
+"""
+
+# set variables
+source_dir = "data/pre-training/chembl/"
+n_molecules = {"train": 100, "valid": 20, "test": 20}
+params = {
+    "atom_types": ["C", "N", "O", "Cl", "F", "S", "Br", "*"],
+    "formal_charge": [-1, 0, +1],
+    "max_n_nodes": 50,
+    "device": "cpu",
+    "n_cpu_threads": 2,
+    "model": "GGNN",
+    "epochs": 1,
+    "sample_every": 1,
+    "batch_size": 10,
+    "block_size": 100,
+    "group_size": 100,
+    "n_samples": 10,
+    "generation_epoch": 1,
+    "n_workers": 0,
+    "hidden_node_features": 20,
+    "message_size": 20,
+    "enn_hidden_dim": 20,
+    "mlp1_hidden_dim": 20,
+    "mlp2_hidden_dim": 20,
+    "gather_att_hidden_dim": 20,
+    "gather_emb_hidden_dim": 20,
+    "gather_width": 20,
+    "generate_fragments": "*CNC(=O)c1ccccc1.*c1cc(C(=O)O)nn1-c1ccc(Cl)c(Cl)c1",
+}
+
+
+def write_dataset(dataset_dir):
+    """ Writes the tiny dataset (molecules, their fragments, and the ground-truth
+    molecules used for the training loss) to `dataset_dir`.
+    """
+    for split, n in n_molecules.items():
+        for source, target in [("valid_groundtruth.smi", f"{split}.smi"),
+                               ("valid_fragment.smi", f"{split}_fragment.smi"),
+                               ("valid_groundtruth.smi", f"{split}_groundtruth.smi")]:
+            with open(source_dir + source) as source_file, \
+                 open(dataset_dir + target, "w") as target_file:
+                for _ in range(n):
+                    target_file.write(source_file.readline())
+
+
+def run_job(job_dir, job_type):
+    """ Writes the `input.csv` for `job_type` to `job_dir` and runs the job.
+    """
+    with open(job_dir + "input.csv", "w") as csv_file:
+        writer = csv.writer(csv_file, delimiter=";")
+        for key, value in {**params, "job_type": job_type}.items():
+            writer.writerow([key, value])
+
+    print(f"* Running '{job_type}' job.", flush=True)
+    result = subprocess.run([sys.executable, "pre-training/main.py", "--job-dir", job_dir])
+    if result.returncode != 0:
+        sys.exit(f"!!! '{job_type}' job failed (exit code {result.returncode}).")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        params["dataset_dir"] = os.path.join(tmp_dir, "dataset/")
+        params["tensorboard_dir"] = os.path.join(tmp_dir, "tensorboard/")
+        job_dir = os.path.join(tmp_dir, "job/")
+        for directory in [params["dataset_dir"], params["tensorboard_dir"], job_dir]:
+            os.makedirs(directory)
+
+        write_dataset(params["dataset_dir"])
+
+        run_job(job_dir, "preprocess")
+        assert os.path.exists(params["dataset_dir"] + "train.h5")
+
+        run_job(job_dir, "train")
+        assert os.path.exists(job_dir + "model_restart_1.pth")
+
+        run_job(job_dir, "generate")
+        assert os.listdir(job_dir + "generation/")
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
@@ -0,0 +1,109 @@
+# load general packages and functions
+import os
+import shutil
+from harness import benchmark, scaled
+
+# benchmarks of one epoch of loading the preprocessed training data, for each
+# dataset format and backend ('dataset_format' and 'dataset_backend'), from a
+# synthetic dense HDF file (chains of atoms with one-hot features, and a single
+# non-zero APD element), written to the job directory; the data is loaded in
+# the main process (no workers)
+
+
+SUBTREE = "./pre-training/"
+JOB_PARAMS = {}
+
+batch_size = 1000
+block_size = 10000
+max_subgraph_nodes = 10
+
+
+def get_HDF_file(n_subgraphs, dataset_format):
+    """ Returns the path of a synthetic HDF file with `n_subgraphs` subgraphs,
+    in the format `dataset_format`, writing it on first use.
+    """
+    import h5py
+    import numpy as np
+    import preprocessing as prep
+    from parameters.constants import constants as C
+
+    path = os.path.join(C.job_dir, f"{dataset_format}_{n_subgraphs}.h5")
+    if os.path.exists(path):
+        return path
+
+    dense_path = os.path.join(C.job_dir, f"dense_{n_subgraphs}.h5")
+    if not os.path.exists(dense_path):
+        rng = np.random.default_rng(seed=42)
+        apd_length = np.prod(C.dim_f_add) + np.prod(C.dim_f_conn) + 1
+        nodes = np.zeros((n_subgraphs, *C.dim_nodes), dtype=np.int8)
+        edges = np.zeros((n_subgraphs, *C.dim_edges), dtype=np.int8)
+        apds = np.zeros((n_subgraphs, apd_length), dtype=np.int8)
+        for idx in range(n_subgraphs):
+            n_nodes = rng.integers(1, min(max_subgraph_nodes, C.max_n_nodes) + 1)
+            for v in range(n_nodes):
+                nodes[idx, v, rng.integers(0, C.n_atom_types)] = 1
+                nodes[idx, v, C.n_atom_types + rng.integers(0, C.n_formal_charge)] = 1
+                if v > 0:
+                    edges[idx, v - 1, v, 0] = edges[idx, v, v - 1, 0] = 1
+            apds[idx, rng.integers(0, apd_length)] = 1
+        with h5py.File(dense_path, "w") as hdf_file:
+            for name, data in zip(["nodes", "edges", "APDs"], [nodes, edges, apds]):
+                hdf_file.create_dataset(name, chunks=None, data=data, dtype=np.dtype("int8"))
+
+    if dataset_format == "sparse":
+        shutil.copyfile(dense_path, path)
+        prep.sparsify_HDF_file(path=path)
+    return path
+
+
+def bench_loader(loader, n_subgraphs):
+    """ Returns the function which iterates once over the data loader.
+    """
+    def run():
+        for _ in loader:
+            pass
+
+    return run, n_subgraphs
+
+
+@benchmark("hdf_dense")
+def bench_hdf_dense(scale):
+    from BlockDatasetLoader import BlockDataLoader, get_HDF_dataset
+
+    n_subgraphs = scaled(50000, scale, minimum=batch_size)
+    loader = BlockDataLoader(dataset=get_HDF_dataset(get_HDF_file(n_subgraphs, "dense")),
+                             batch_size=batch_size,
+                             block_size=block_size,
+                             shuffle=True,
+                             n_workers=0,
+                             pin_memory=False)
+    return bench_loader(loader, n_subgraphs)
+
+
+@benchmark("hdf_sparse")
+def bench_hdf_sparse(scale):
+    from BlockDatasetLoader import BlockDataLoader, get_HDF_dataset
+
+    n_subgraphs = scaled(50000, scale, minimum=batch_size)
+    loader = BlockDataLoader(dataset=get_HDF_dataset(get_HDF_file(n_subgraphs, "sparse")),
+                             batch_size=batch_size,
+                             block_size=block_size,
+                             shuffle=True,
+                             n_workers=0,
+                             pin_memory=False)
+    return bench_loader(loader, n_subgraphs)
+
+
+@benchmark("memmap")
+def bench_memmap(scale):
+    from BlockDatasetLoader import MemmapBlockDataLoader, MemmapDataset
+
+    n_subgraphs = scaled(50000, scale, minimum=batch_size)
+    dataset = MemmapDataset(get_HDF_file(n_subgraphs, "dense"), dataset_names=["nodes", "edges", "APDs"])
+    loader = MemmapBlockDataLoader(dataset=dataset,
+                                   batch_size=batch_size,
+                                   block_size=block_size,
+                                   shuffle=True,
+                                   n_workers=0,
+                                   pin_memory=False)
+    return bench_loader(loader, n_subgraphs)
@@ -0,0 +1,69 @@
+# load general packages and functions
+from harness import benchmark, scaled
+
+# benchmarks of docking with DockStream, using the "Stub" backend (which needs
+# no docking software), so that the timings measure DockStream itself: the
+# ligand preparation and docking of a batch with `DockingSession.score()`, and
+# `Docker.dock()` alone on prepared ligands; molecules are read from the
+# bundled ChEMBL validation set
+
+
+SUBTREE = "./DockStream/"
+JOB_PARAMS = None  # DockStream does not read job parameters
+
+smi_path = "data/pre-training/chembl/valid_groundtruth.smi"
+config = {
+    "docking": {
+        "ligand_preparation": {
+            "embedding_pools": [
+                {
+                    "pool_id": "RDkit",
+                    "type": "RDkit",
+                    "parameters": {},
+                    "input": {"type": "SMI", "input_path": "unused.smi"},
+                }
+            ]
+        },
+        "docking_runs": [
+            {
+                "backend": "Stub",
+                "run_id": "Stub",
+                "input_pools": ["RDkit"],
+                "parameters": {"score_per_heavy_atom": -0.5},
+                "output": {"scores": {"scores_path": "unused.csv"}},
+            }
+        ],
+    }
+}
+
+
+def get_session(n_smiles):
+    """ Returns a `DockingSession` and the first `n_smiles` SMILES in `smi_path`.
+    """
+    from dockstream.core.docker import DockingSession
+
+    with open(smi_path) as smi_file:
+        smiles = [next(smi_file).split()[0] for _ in range(n_smiles)]
+    return DockingSession(conf=config), smiles
+
+
+@benchmark("session_score")
+def bench_session_score(scale):
+    session, smiles = get_session(scaled(200, scale))
+
+    def run():
+        session.score(smiles)
+
+    return run, len(smiles)
+
+
+@benchmark("dock")
+def bench_dock(scale):
+    session, smiles = get_session(scaled(200, scale))
+    session.score(smiles)  # prepares the ligands, which are kept by the docker
+    docker = session.get_docker()
+
+    def run():
+        docker.dock()
+
+    return run, len(smiles)
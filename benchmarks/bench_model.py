@@ -0,0 +1,98 @@
+# load general packages and functions
+from harness import benchmark, scaled
+
+# benchmarks of the pre-training model (a small, untrained GGNN): the forward
+# pass of its `SummationMPNN` on batches of synthetic subgraphs (chains of
+# atoms with one-hot features), with and without the backward pass, and the
+# generation of graphs with `generate.build_graphs()`
+
+
+SUBTREE = "./pre-training/"
+JOB_PARAMS = {
+    "model": "GGNN",
+    "hidden_node_features": 50,
+    "message_size": 50,
+    "message_passes": 3,
+    "enn_hidden_dim": 50,
+    "mlp1_hidden_dim": 50,
+    "mlp2_hidden_dim": 50,
+    "gather_att_hidden_dim": 50,
+    "gather_emb_hidden_dim": 50,
+    "gather_width": 50,
+}
+
+random_seed = 42
+
+
+def get_model():
+    """ Returns the untrained model, with fixed initial weights.
+    """
+    import torch
+    import models
+
+    torch.manual_seed(random_seed)
+    return models.initialize_model()
+
+
+def get_subgraph_batch(batch_size):
+    """ Returns a batch of `batch_size` synthetic subgraphs as float tensors.
+    """
+    import torch
+    from parameters.constants import constants as C
+
+    generator = torch.Generator().manual_seed(random_seed)
+    nodes = torch.zeros((batch_size, *C.dim_nodes))
+    edges = torch.zeros((batch_size, *C.dim_edges))
+    n_nodes = torch.randint(1, C.max_n_nodes + 1, (batch_size,), generator=generator)
+    for idx in range(batch_size):
+        for v in range(int(n_nodes[idx])):
+            nodes[idx, v, torch.randint(0, C.n_atom_types, (1,), generator=generator)] = 1
+            nodes[idx, v, C.n_atom_types + torch.randint(0, C.n_formal_charge, (1,), generator=generator)] = 1
+            if v > 0:
+                edges[idx, v - 1, v, 0] = edges[idx, v, v - 1, 0] = 1
+    return nodes, edges
+
+
+@benchmark("mpnn_forward")
+def bench_mpnn_forward(scale):
+    import torch
+
+    mpnn = get_model().generative_model.eval()
+    batch_size = scaled(1000, scale)
+    nodes, edges = get_subgraph_batch(batch_size)
+
+    def run():
+        with torch.no_grad():
+            mpnn(nodes, edges, nodes, edges)
+
+    return run, batch_size
+
+
+@benchmark("mpnn_forward_backward")
+def bench_mpnn_forward_backward(scale):
+    mpnn = get_model().generative_model.train()
+    batch_size = scaled(1000, scale)
+    nodes, edges = get_subgraph_batch(batch_size)
+
+    def run():
+        mpnn.zero_grad()
+        apd_output, _, _ = mpnn(nodes, edges, nodes, edges)
+        apd_output.sum().backward()
+
+    return run, batch_size
+
+
+@benchmark("build_graphs")
+def bench_build_graphs(scale):
+    import torch
+    import generate
+
+    model = get_model().eval()
+    n_graphs = scaled(500, scale)
+
+    def run():
+        torch.manual_seed(random_seed)  # the same graphs are generated every time
+        with torch.no_grad():
+            generate.build_graphs(model=model, n_graphs_to_generate=n_graphs, batch_size=min(n_graphs, 100))
+
+    return run, n_graphs
@@ -0,0 +1,90 @@
+# load general packages and functions
+from harness import benchmark, scaled
+
+# benchmarks of the preprocessing of the pre-training data: the expansion of the
+# decoding routes, and the grouping of their subgraphs (written to an in-memory
+# HDF file); molecules are read from the bundled ChEMBL validation set
+
+
+SUBTREE = "./pre-training/"
+JOB_PARAMS = {
+    "atom_types": ["C", "N", "O", "Cl", "F", "S", "Br", "*"],
+    "formal_charge": [-1, 0, +1],
+    "max_n_nodes": 50,
+    "group_size": 1000000,  # all subgraphs in a single group
+}
+
+smi_path = "data/pre-training/chembl/valid_groundtruth.smi"
+
+
+def load_molecules(n_molecules):
+    """ Returns the first `n_molecules` molecules in `smi_path` which can be
+    encoded with the job parameters.
+    """
+    from rdkit import Chem
+    from parameters.constants import constants as C
+
+    molecules = []
+    with open(smi_path) as smi_file:
+        for line in smi_file:
+            mol = Chem.MolFromSmiles(line.split()[0])
+            if mol is None or mol.GetNumAtoms() > C.max_n_nodes:
+                continue
+            if any(atom.GetSymbol() not in C.atom_types for atom in mol.GetAtoms()):
+                continue
+            molecules.append(mol)
+            if len(molecules) == n_molecules:
+                break
+    return molecules
+
+
+@benchmark("get_decoding_route_state")
+def bench_get_decoding_route_state(scale):
+    import apd
+    import preprocessing as prep
+
+    graphs = [prep.get_graph(mol) for mol in load_molecules(scaled(100, scale))]
+
+    def run():
+        for graph in graphs:
+            for idx in range(apd.get_decoding_route_length(molecular_graph=graph)):
+                apd.get_decoding_route_state(molecular_graph=graph, subgraph_idx=idx)
+
+    return run, len(graphs)
+
+
+@benchmark("get_decoding_route")
+def bench_get_decoding_route(scale):
+    import apd
+    import preprocessing as prep
+
+    graphs = [prep.get_graph(mol) for mol in load_molecules(scaled(300, scale))]
+
+    def run():
+        for graph in graphs:
+            for _ in apd.get_decoding_route(molecular_graph=graph):
+                pass
+
+    return run, len(graphs)
+
+
+@benchmark("group_subgraphs")
+def bench_group_subgraphs(scale):
+    import h5py
+    import preprocessing as prep
+
+    molecules = load_molecules(scaled(300, scale))
+    n_subgraphs = prep.get_n_subgraphs(molecule_set=molecules)
+
+    def run():
+        with h5py.File("group_subgraphs.h5", "w", driver="core", backing_store=False) as hdf_file:
+            dataset_dict = prep.create_datasets(hdf_file=hdf_file,
+                                                max_length=n_subgraphs,
+                                                dataset_name_list=["nodes", "edges", "APDs"],
+                                                dims=prep.get_dataset_dims())
+            prep.group_subgraphs(init_idx=0,
+                                 molecule_set=molecules,
+                                 dataset_dict=dataset_dict,
+                                 is_training_set=False)
+
+    return run, len(molecules)
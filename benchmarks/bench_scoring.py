@@ -0,0 +1,128 @@
+# load general packages and functions
+from harness import benchmark, scaled
+
+# benchmarks of the fine-tuning scores which run offline: `score.compute_score()`
+# for the graph-based 'reduce' score, and `score.compute_smiles_scores()` (the
+# part of `compute_score()` behind the score cache, so that repeated runs do not
+# just hit the cache) for the SMILES-based scores, and the Tanimoto rewards of
+# `Model.forward()`; molecules are read from the bundled ChEMBL validation set
+
+
+SUBTREE = "./fine-tuning/"
+JOB_PARAMS = {"score_type": "reduce"}
+
+smi_path = "data/pre-training/chembl/valid_groundtruth.smi"
+
+
+def load_smiles(n_smiles):
+    """ Returns the first `n_smiles` SMILES in `smi_path`.
+    """
+    with open(smi_path) as smi_file:
+        return [next(smi_file).split()[0] for _ in range(n_smiles)]
+
+
+@benchmark("compute_score[reduce]")
+def bench_compute_score_reduce(scale):
+    import torch
+    import score
+
+    n_graphs = scaled(10000, scale)
+    n_nodes = torch.randint(1, score.C.max_n_nodes + 1, (n_graphs,), generator=torch.Generator().manual_seed(42))
+    ones = torch.ones(n_graphs)
+
+    def run():
+        score.compute_score(graphs=(None, None, n_nodes),
+                            termination_tensor=ones,
+                            validity_tensor=ones,
+                            uniqueness_tensor=ones,
+                            smiles=None,
+                            jak3_model=None)
+
+    return run, n_graphs
+
+
+def bench_smiles_score(score_type, n_smiles):
+    """ Returns the function which computes the `score_type` scores of the
+    first `n_smiles` molecules.
+    """
+    import score
+
+    # the score type is a job parameter, so swap it in the constants seen by
+    # `score` (all score types are benchmarked in the same process)
+    score.C = score.C._replace(score_type=score_type)
+    smiles = load_smiles(n_smiles)
+
+    def run():
+        score.compute_smiles_scores(smiles, jak3_model=None)
+
+    return run, n_smiles
+
+
+@benchmark("compute_smiles_scores[qed]")
+def bench_qed(scale):
+    return bench_smiles_score("qed", scaled(1000, scale))
+
+
+@benchmark("compute_smiles_scores[SA]")
+def bench_SA(scale):
+    return bench_smiles_score("SA", scaled(1000, scale))
+
+
+@benchmark("compute_smiles_scores[logp]")
+def bench_logp(scale):
+    return bench_smiles_score("logp", scaled(1000, scale))
+
+
+@benchmark("compute_smiles_scores[tanimoto]")
+def bench_tanimoto(scale):
+    return bench_smiles_score("tanimoto", scaled(1000, scale))
+
+
+@benchmark("compute_smiles_scores[3D_SMI]")
+def bench_3D_SMI(scale):
+    return bench_smiles_score("3D_SMI", scaled(50, scale))
+
+
+def bench_tanimoto_reward(backend, n_pairs):
+    """ Returns the function which computes the Tanimoto similarities of `n_pairs`
+    molecules to their ground truths, as for the rewards in `Model.forward()`,
+    one pair at a time as before the `FingerprintEngine` (`backend` 'loop') or
+    with the engine; the reference fingerprints are cached by the engine after
+    the first run, as for ground truths seen in previous epochs.
+    """
+    from rdkit import Chem, DataStructs
+    from rdkit.Chem import AllChem
+    from fingerprints import FingerprintEngine
+
+    ref_smiles = load_smiles(n_pairs + 1)
+    mols = [Chem.MolFromSmiles(smi) for smi in ref_smiles[1:]]
+    ref_smiles = ref_smiles[:-1]
+
+    if backend == "loop":
+        def run():
+            for mol, ref in zip(mols, ref_smiles):
+                ref_fp = AllChem.GetMorganFingerprint(Chem.MolFromSmiles(ref), 2, useCounts=True, useFeatures=True)
+                fp = AllChem.GetMorganFingerprint(mol, 2, useCounts=True, useFeatures=True)
+                DataStructs.TanimotoSimilarity(ref_fp, fp)
+    else:
+        engine = FingerprintEngine(backend=backend)
+
+        def run():
+            engine.paired_similarity(mols, ref_smiles)
+
+    return run, n_pairs
+
+
+@benchmark("tanimoto_reward[loop]")
+def bench_tanimoto_reward_loop(scale):
+    return bench_tanimoto_reward("loop", scaled(2000, scale))
+
+
+@benchmark("tanimoto_reward[rdkit]")
+def bench_tanimoto_reward_rdkit(scale):
+    return bench_tanimoto_reward("rdkit", scaled(2000, scale))
+
+
+@benchmark("tanimoto_reward[numpy]")
+def bench_tanimoto_reward_numpy(scale):
+    return bench_tanimoto_reward("numpy", scaled(2000, scale))
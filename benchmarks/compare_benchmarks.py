@@ -0,0 +1,88 @@
+# load general packages and functions
+import argparse
+import json
+import sys
+
+# load program-specific functions
+# (None)
+
+"""
+Compares two results files written by `run_benchmarks.py` (a baseline and a
+new run), printing the ratio of the new to the baseline time of every benchmark
+in both, and flags the benchmarks which got slower by more than the threshold
+(10% by default) as regressions. Exits with code 1 if there are any
+regressions, so that it can be used in CI. Warns if the two runs were made with
+a different profile, number of threads, CPU or package versions, in which case
+the timings may not be comparable.
+
+To use script, run from the repository root:
+python benchmarks/compare_benchmarks.py baseline.json new.json [--threshold 0.1] [--statistic median]
+"""
+
+# set variables
+comparable_metadata = ["profile", "n_threads", "cpu_model", "python", "packages"]
+
+
+def load_results(path):
+    """ Loads a results file written by `run_benchmarks.py`.
+    """
+    with open(path) as json_file:
+        return json.load(json_file)
+
+
+def compare(baseline, new, threshold, statistic):
+    """ Prints the comparison of the benchmarks in `baseline` and `new`, and
+    returns the names of the regressed benchmarks (`list`).
+    """
+    regressions = []
+    print(f"{'benchmark':<45} {'baseline (s)':>13} {'new (s)':>10} {'ratio':>7}", flush=True)
+    for name in sorted(set(baseline["benchmarks"]) | set(new["benchmarks"])):
+        old_result = baseline["benchmarks"].get(name)
+        new_result = new["benchmarks"].get(name)
+        if old_result is None or new_result is None:
+            print(f"{name:<45} {'only in ' + ('new' if old_result is None else 'baseline'):>33}", flush=True)
+            continue
+        if "error" in old_result or "error" in new_result:
+            print(f"{name:<45} {'error: ' + (new_result.get('error') or old_result['error'])}", flush=True)
+            continue
+
+        ratio = new_result[statistic] / old_result[statistic]
+        if ratio > 1 + threshold:
+            flag = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "improvement"
+        else:
+            flag = ""
+        print(f"{name:<45} {old_result[statistic]:13.4f} {new_result[statistic]:10.4f} {ratio:7.2f} {flag}",
+              flush=True)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares two GRELinker benchmark results files.")
+    parser.add_argument("baseline", help="Results JSON of the baseline run.")
+    parser.add_argument("new", help="Results JSON of the new run.")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown above which a benchmark is flagged (0.1 = 10%%).")
+    parser.add_argument("--statistic", default="median", choices=["median", "min", "mean"])
+    args = parser.parse_args()
+
+    baseline = load_results(args.baseline)
+    new = load_results(args.new)
+
+    for key in comparable_metadata:
+        if baseline["metadata"].get(key) != new["metadata"].get(key):
+            print(f"!!! `{key}` differs between the runs; timings may not be comparable.", flush=True)
+
+    regressions = compare(baseline, new, args.threshold, args.statistic)
+    if regressions:
+        print(f"-- {len(regressions)} regression(s) above {100 * args.threshold:.0f}%: "
+              f"{', '.join(regressions)}", flush=True)
+        sys.exit(1)
+    print(f"-- No regressions above {100 * args.threshold:.0f}%.", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
@@ -0,0 +1,135 @@
+# load general packages and functions
+import argparse
+import csv
+import gc
+import importlib
+import json
+import statistics
+import sys
+import tempfile
+import time
+import traceback
+
+# defines the harness shared by the benchmark modules (`bench_*.py`): the
+# registry of benchmarks, the profiles, the timing loop, and the entry point
+# which runs all benchmarks of one module in the current process and writes
+# their timings to JSON; `run_benchmarks.py` calls this entry point once per
+# module, in a fresh subprocess, since the subtrees (e.g. "pre-training/" and
+# "fine-tuning/") have modules of the same names, and parse the job directory
+# from the command line when their `parameters.constants` is imported
+
+
+# every profile runs on CPU only; `scale` multiplies the size of the inputs of
+# every benchmark, and each benchmark is run `warmup` times before being timed
+# `repeat` times
+PROFILES = {
+    "cpu": {"scale": 1.0, "warmup": 1, "repeat": 5},
+    "smoke": {"scale": 0.1, "warmup": 0, "repeat": 1},  # checks that all benchmarks run
+}
+
+# benchmarks of the module being run: name --> setup function
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """ Registers the decorated setup function as the benchmark `name`. The
+    setup function takes the `scale` (`float`) of the profile, and returns the
+    function to time (without arguments) and the number of items (e.g.
+    molecules or subgraphs) which it processes per call. Anything done in the
+    setup function itself is not timed.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def scaled(n, scale, minimum=1):
+    """ Returns the input size `n` (`int`) multiplied by `scale`.
+    """
+    return max(minimum, int(n * scale))
+
+
+def time_benchmark(setup, scale, warmup, repeat):
+    """ Runs the setup function of a benchmark, then times the returned
+    function, and returns the timings (in seconds) and their statistics.
+    """
+    run, n_items = setup(scale)
+    for _ in range(warmup):
+        run()
+
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    median = statistics.median(times)
+    return {
+        "n_items": n_items,
+        "times": times,
+        "min": min(times),
+        "median": median,
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "items_per_s": n_items / median if median > 0 else None,
+    }
+
+
+def write_input_csv(job_dir, params):
+    """ Writes the job parameters in `params` (`dict`) to the `input.csv` in
+    `job_dir`, as read by `parameters.constants`.
+    """
+    with open(job_dir + "input.csv", "w") as csv_file:
+        writer = csv.writer(csv_file, delimiter=";")
+        for key, value in params.items():
+            writer.writerow([key, value])
+
+
+def main():
+    """ Runs the benchmarks of one module and writes their results to JSON.
+    """
+    parser = argparse.ArgumentParser(description="Runs the benchmarks of one module (use `run_benchmarks.py`).")
+    parser.add_argument("module", help="Name of the benchmark module, e.g. 'bench_preprocessing'.")
+    parser.add_argument("--output", required=True, help="Path of the JSON file to write the results to.")
+    parser.add_argument("--profile", default="cpu", choices=list(PROFILES))
+    parser.add_argument("--n-threads", type=int, default=2)
+    parser.add_argument("--filter", default=None, help="Only run benchmarks whose name contains this string.")
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    module = importlib.import_module(args.module)
+    # when run as a script, this file is `__main__`, while the benchmark
+    # modules register their benchmarks in the imported `harness` module
+    registry = importlib.import_module("harness").BENCHMARKS
+    group = args.module[len("bench_"):]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as job_dir:
+        job_dir += "/"
+        if module.JOB_PARAMS is not None:
+            write_input_csv(job_dir, {**module.JOB_PARAMS, "device": "cpu", "n_cpu_threads": args.n_threads})
+
+        # the benchmarks import the modules of their subtree when set up, at
+        # which point `parameters.constants` reads `input.csv` from `job_dir`
+        sys.argv = [sys.argv[0], "--job-dir", job_dir]
+        sys.path.insert(1, module.SUBTREE)
+
+        for name, setup in registry.items():
+            full_name = f"{group}.{name}"
+            if args.filter is not None and args.filter not in full_name:
+                continue
+            print(f"* Running {full_name}.", flush=True)
+            try:
+                results[full_name] = time_benchmark(setup, profile["scale"], profile["warmup"], profile["repeat"])
+            except Exception:
+                traceback.print_exc()
+                results[full_name] = {"error": traceback.format_exc(limit=-1).strip().splitlines()[-1]}
+
+    with open(args.output, "w") as json_file:
+        json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# load general packages and functions
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import pkg_resources
+
+# load program-specific functions
+from harness import PROFILES
+
+"""
+Runs the benchmark suite of the hot paths of GRELinker (preprocessing, data
+loading, model, generation, scoring and docking) and writes the timings,
+together with metadata about the environment (commit, Python, platform, CPU,
+threads and package versions), to a JSON file which can be compared with
+another run using `compare_benchmarks.py`.
+
+Each benchmark module (`bench_*.py`) is run in a fresh subprocess, on CPU only
+(`CUDA_VISIBLE_DEVICES` is empty, and the job parameters set `device` to 'cpu')
+and with a fixed number of threads. The benchmarks only use synthetic data and
+the small datasets bundled in `data/`, so no network access is needed. Use the
+"smoke" profile to quickly check that all benchmarks run; its timings are not
+meant to be compared.
+
+To use script, run from the repository root:
+python benchmarks/run_benchmarks.py --output results.json [--profile cpu] [--filter group_subgraphs]
+"""
+
+# set variables
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(benchmarks_dir)
+packages = ["numpy", "torch", "rdkit", "h5py", "pandas", "scikit-learn", "pydantic"]
+
+
+def get_git_commit():
+    """ Returns the current commit of the repository, and whether the working
+    tree has uncommitted changes, or `(None, None)` if git is not available.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo_dir, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, universal_newlines=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=repo_dir,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status)
+
+
+def get_cpu_model():
+    """ Returns the name of the CPU model (read from `/proc/cpuinfo` on Linux).
+    """
+    try:
+        with open("/proc/cpuinfo") as cpuinfo_file:
+            for line in cpuinfo_file:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or None
+
+
+def get_package_version(package):
+    """ Returns the installed version of `package`, or `None`.
+    """
+    try:
+        return pkg_resources.get_distribution(package).version
+    except pkg_resources.DistributionNotFound:
+        return None
+
+
+def get_environment_metadata(profile, n_threads):
+    """ Returns a `dict` describing the environment of the benchmark run.
+    """
+    git_commit, git_dirty = get_git_commit()
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit,
+        "git_dirty": git_dirty,
+        "profile": profile,
+        "profile_settings": PROFILES[profile],
+        "n_threads": n_threads,
+        "python": platform.python_version(),
+        "python_executable": sys.executable,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_model": get_cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "packages": {package: get_package_version(package) for package in packages},
+    }
+
+
+def run_module(module, args, temp_dir):
+    """ Runs the benchmarks of `module` in a subprocess, and returns their
+    results (`dict`), or an error for the whole module if the subprocess failed.
+    """
+    thread_env = {name: str(args.n_threads)
+                  for name in ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]}
+    env = {**os.environ, **thread_env, "CUDA_VISIBLE_DEVICES": "", "PYTHONHASHSEED": "0"}
+    output_path = os.path.join(temp_dir, f"{module}.json")
+    command = [sys.executable, os.path.join(benchmarks_dir, "harness.py"), module,
+               "--output", output_path,
+               "--profile", args.profile,
+               "--n-threads", str(args.n_threads)]
+    if args.filter is not None:
+        command += ["--filter", args.filter]
+
+    try:
+        result = subprocess.run(command, cwd=repo_dir, env=env, timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        return {module: {"error": f"timed out after {args.timeout} s"}}
+    if result.returncode != 0 or not os.path.exists(output_path):
+        return {module: {"error": f"exited with code {result.returncode}"}}
+
+    with open(output_path) as json_file:
+        return json.load(json_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the GRELinker benchmark suite.")
+    parser.add_argument("--output", default="benchmark_results.json", help="Path of the results JSON.")
+    parser.add_argument("--profile", default="cpu", choices=list(PROFILES))
+    parser.add_argument("--n-threads", type=int, default=2, help="Number of CPU threads per benchmark.")
+    parser.add_argument("--filter", default=None, help="Only run benchmarks whose name contains this string.")
+    parser.add_argument("--modules", nargs="+", default=None, help="Benchmark modules to run, e.g. bench_model.")
+    parser.add_argument("--timeout", type=int, default=1800, help="Timeout (in s) per benchmark module.")
+    args = parser.parse_args()
+
+    modules = args.modules or sorted(os.path.basename(path)[:-3]
+                                     for path in glob.glob(os.path.join(benchmarks_dir, "bench_*.py")))
+    results = {"metadata": get_environment_metadata(args.profile, args.n_threads), "benchmarks": {}}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for module in modules:
+            print(f"* Running {module}.", flush=True)
+            results["benchmarks"].update(run_module(module, args, temp_dir))
+
+    with open(args.output, "w") as json_file:
+        json.dump(results, json_file, indent=2)
+
+    print(f"{'benchmark':<45} {'median (s)':>11} {'items/s':>10}", flush=True)
+    for name, result in results["benchmarks"].items():
+        if "error" in result:
+            print(f"{name:<45} {'error: ' + result['error']}", flush=True)
+        else:
+            print(f"{name:<45} {result['median']:11.4f} {result['items_per_s'] or 0:10.1f}", flush=True)
+    print(f"-- Results written to {args.output}.", flush=True)
+
+
+if __name__ == "__main__":
+    main()
+    print("Done.", flush=True)
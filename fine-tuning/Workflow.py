@@ -18,7 +18,7 @@ import analyze as anal
 import generate
 import util
 from loss import compute_loss
-from score import compute_score
+from score import compute_score, get_score_cache
 
 # defines `Workflow` class
 
@@ -80,9 +80,9 @@ class Workflow:
         if self.C.restart:
             print("-- Loading model from previous saved state.", flush=True)
             self.restart_epoch = util.get_restart_epoch()
-            self.agent_model = torch.load(f"{job_dir}model_restart_{self.restart_epoch}.pth")
-            self.prior_model = torch.load(f"{model_dir}model_restart_30.pth")
-            self.prev_model = torch.load(f"{model_dir}model_restart_30.pth")
+            self.agent_model = torch.load(f"{job_dir}model_restart_{self.restart_epoch}.pth", map_location=self.C.device)
+            self.prior_model = torch.load(f"{model_dir}model_restart_30.pth", map_location=self.C.device)
+            self.prev_model = torch.load(f"{model_dir}model_restart_30.pth", map_location=self.C.device)
             # Load sklearn activity model
             with open(self.C.data_path + "qsar_model.pickle", 'rb') as file:
                 model_dict = pickle.load(file)                                      
@@ -101,9 +101,9 @@ class Workflow:
 
         else:
             print("-- Initializing model from scratch.", flush=True)
-            self.agent_model = torch.load(f"{model_dir}model_restart_30.pth")
-            self.prior_model = torch.load(f"{model_dir}model_restart_30.pth")
-            self.prev_model = torch.load(f"{model_dir}model_restart_30.pth")
+            self.agent_model = torch.load(f"{model_dir}model_restart_30.pth", map_location=self.C.device)
+            self.prior_model = torch.load(f"{model_dir}model_restart_30.pth", map_location=self.C.device)
+            self.prev_model = torch.load(f"{model_dir}model_restart_30.pth", map_location=self.C.device)
             with open(self.C.data_path + "qsar_model.pickle", 'rb') as file:
                 model_dict = pickle.load(file)                                      
                 self.drd2_model = model_dict["classifier_sv"]
@@ -149,10 +149,12 @@ class Workflow:
         for epoch in range(start_epoch, end_epoch):
 
             self.current_epoch = epoch
-            self.learning_step()
+            with util.get_step_profiler().step(epoch):
+                self.learning_step()
 
             
 
+        util.get_step_profiler().close()
         self.print_time_elapsed()
 
     def generation_phase(self):
@@ -161,12 +163,12 @@ class Workflow:
         self.get_ts_properties()
 
         model_dir = self.C.dataset_dir
-        self.prior_model = torch.load(f"{model_dir}model_restart_30.pth")
+        self.prior_model = torch.load(f"{model_dir}model_restart_30.pth", map_location=self.C.device)
 
         self.restart_epoch = self.C.generation_epoch
         print(f"* Loading model from previous saved state (Epoch {self.restart_epoch}).", flush=True)
         model_path = self.C.job_dir + f"model_restart_{self.restart_epoch}.pth"
-        self.agent_model = torch.load(model_path)
+        self.agent_model = torch.load(model_path, map_location=self.C.device)
 
         with open(self.C.data_path + "qsar_model.pickle", 'rb') as file:
             model_dict = pickle.load(file)                                      
@@ -238,7 +240,7 @@ class Workflow:
             n_generation_batches += 1
 
         # generate graphs in batches
-        score = torch.tensor([], device="cuda")
+        score = torch.tensor([], device=self.C.device)
         for idx in range(0, n_generation_batches):
             print("Batch", idx +1, "of", n_generation_batches)
 
@@ -256,7 +258,7 @@ class Workflow:
             from rdkit import Chem
             from rdkit.Chem import AllChem
             import random
-            validity_tensor = torch.zeros(len(g[0]), device="cuda")
+            validity_tensor = torch.zeros(len(g[0]), device=self.C.device)
 
             for idxm, molecular_graph in enumerate(g[0]):
 
@@ -270,65 +272,19 @@ class Workflow:
                     
                 except (ValueError, RuntimeError, AttributeError):
                     pass
+            # join the linkers to the fragments; molecules which could not be
+            # stitched get the fragments joined without a linker, and stay invalid
+            fragments_smi = self.C.generate_fragments
+            stitch_results = util.stitch_linkers(fragments_smi, smi_list, two_idx_agent.tolist())
             connect_smi_list = []
-            for id,atom_idx in enumerate(two_idx):
-                try:
-                    fragments_smi = self.C.generate_fragments
-                    fragments = Chem.MolFromSmiles(fragments_smi)
-                    linker_smi_1 = smi_list[id]
-                    
-                    linker = Chem.MolFromSmiles(linker_smi_1)
-                    #connect
-                    combo = Chem.CombineMols(fragments,linker)
-                    idx_list = []
-                    for atom in fragments.GetAtoms():
-                        if atom.GetSymbol() == '*':
-                            f2 = atom.GetIdx()
-                            idx_list.append(f2)
-
-                    du = Chem.MolFromSmiles('*')
-                    combo = AllChem.DeleteSubstructs(combo,du)
-                    edcombo = Chem.EditableMol(combo)
-                    try:
-                        edcombo.AddBond(idx_list[0],atom_idx[0]+idx_list[1]-2,order=Chem.rdchem.BondType.SINGLE)
-                        edcombo.AddBond(idx_list[1]-2,atom_idx[1]+idx_list[1]-2,order=Chem.rdchem.BondType.SINGLE)
-                        final_connect_mol = edcombo.GetMol()
-                    except:
-                
-                        fragment_smi_0 = fragments_smi.split('.')[0]
-                        fragment_smi_1 = fragments_smi.split('.')[1]
-                        
-                        match = '****sfs'
-                        for _ in range(1000):
-                            if not Chem.MolFromSmiles(match):
-                                s = linker_smi_1
-                                inStr = "(*)"
-                                for i in range(2):
-                                    index = random.randint(0, len(s))
-                                    s = "".join([s[:index], inStr, s[index:]])
-                                match = s
-                            else:
-                                break
-                        smi_linker = []
-                        for _ in range(1000):
-                            smi_link = Chem.MolToSmiles(Chem.MolFromSmiles(s), doRandom=True)
-                            if smi_link[0] == "*" and smi_link[-1] == '*':
-                                smi_linker.append(smi_link)
-                        
-                            
-                        final_smi = (fragment_smi_1 + smi_linker[0] + fragment_smi_0).replace("*", "")
-
-                        final_connect_mol = Chem.MolFromSmiles(final_smi)
-                        
-                    final_connect_smi = Chem.MolToSmiles(final_connect_mol)
-                    validity_tensor[idx] = 1
-
-                except:
+            for id, result in enumerate(stitch_results):
+                if result.smiles is None:
                     fragment_smi_0 = fragments_smi.split('.')[0]
                     fragment_smi_1 = fragments_smi.split('.')[1]
-                        
-                    final_connect_smi = (fragment_smi_1 + fragment_smi_0).replace("*", "")
-                connect_smi_list.append(final_connect_smi)
+                    connect_smi_list.append((fragment_smi_1 + fragment_smi_0).replace("*", ""))
+                else:
+                    connect_smi_list.append(result.smiles)
+                    validity_tensor[id] = 1
 
 
             # analyze properties of new graphs and save results
@@ -357,6 +313,7 @@ class Workflow:
         """ Performs one training epoch.
         """
         print(f"* Learning step {self.current_epoch}.", flush=True)
+        profiler = util.get_step_profiler()
         self.agent_model.train()  # ensure model is in train mode
 
         # clear the gradients of all optimized `(torch.Tensor)`s
@@ -369,16 +326,17 @@ class Workflow:
         # a : agent LLs (torch.Tensor)
         # p : prior LLs (torch.Tensor)
         # t : termination status (torch.Tensor)
-        g, a, p, t,two_idx_agent,two_idx_prior = generate.build_graphs(agent_model=self.agent_model,
-                                               prior_model=self.prior_model,
-                                               n_graphs_to_generate=self.C.batch_size,
-                                               batch_size=self.C.batch_size,
-                                               write_mols=True)
+        with profiler.span("generation"):
+            g, a, p, t,two_idx_agent,two_idx_prior = generate.build_graphs(agent_model=self.agent_model,
+                                                   prior_model=self.prior_model,
+                                                   n_graphs_to_generate=self.C.batch_size,
+                                                   batch_size=self.C.batch_size,
+                                                   write_mols=True)
         smi_list = []
         from rdkit import Chem
         from rdkit.Chem import AllChem
         import random
-        validity_tensor = torch.zeros(len(g[0]), device="cuda")
+        validity_tensor = torch.zeros(len(g[0]), device=self.C.device)
 
         for idxm, molecular_graph in enumerate(g[0]):
             try:
@@ -389,79 +347,37 @@ class Workflow:
                 Chem.SanitizeMol(mol)
             except (ValueError, RuntimeError, AttributeError):
                 smi_list.append('C')
+        # join the linkers to the fragments; molecules which could not be
+        # stitched get the fragments joined without a linker, and stay invalid
+        fragments_smi = self.C.generate_fragments
+        with profiler.span("stitching"):
+            stitch_results = util.stitch_linkers(fragments_smi, smi_list, two_idx_agent.tolist())
         connect_smi_list = []
-        for id,atom_idx in enumerate(two_idx):
-            try:
-                fragments_smi = self.C.generate_fragments
-                fragments = Chem.MolFromSmiles(fragments_smi)
-                linker_smi_1 = smi_list[id]
-                
-                linker = Chem.MolFromSmiles(linker_smi_1)
-                #connect
-                combo = Chem.CombineMols(fragments,linker)
-                idx_list = []
-                for atom in fragments.GetAtoms():
-                    if atom.GetSymbol() == '*':
-                        f2 = atom.GetIdx()
-                        idx_list.append(f2)
-
-                du = Chem.MolFromSmiles('*')
-                combo = AllChem.DeleteSubstructs(combo,du)
-                edcombo = Chem.EditableMol(combo)
-                try:
-                    edcombo.AddBond(idx_list[0],atom_idx[0]+idx_list[1]-2,order=Chem.rdchem.BondType.SINGLE)
-                    edcombo.AddBond(idx_list[1]-2,atom_idx[1]+idx_list[1]-2,order=Chem.rdchem.BondType.SINGLE)
-                    final_connect_mol = edcombo.GetMol()
-                except:
-            
-                    fragment_smi_0 = fragments_smi.split('.')[0]
-                    fragment_smi_1 = fragments_smi.split('.')[1]
-                    
-                    match = '****sfs'
-                    for _ in range(1000):
-                        if not Chem.MolFromSmiles(match):
-                            s = linker_smi_1
-                            inStr = "(*)"
-                            for i in range(2):
-                                index = random.randint(0, len(s))
-                                s = "".join([s[:index], inStr, s[index:]])
-                            match = s
-                        else:
-                            break
-                    smi_linker = []
-                    for _ in range(1000):
-                        smi_link = Chem.MolToSmiles(Chem.MolFromSmiles(s), doRandom=True)
-                        if smi_link[0] == "*" and smi_link[-1] == '*':
-                            smi_linker.append(smi_link)
-                    
-                        
-                    final_smi = (fragment_smi_1 + smi_linker[0] + fragment_smi_0).replace("*", "")
-
-                    final_connect_mol = Chem.MolFromSmiles(final_smi)
-                    
-                final_connect_smi = Chem.MolToSmiles(final_connect_mol)
-                validity_tensor[idx] = 1
-
-            except:
+        for id, result in enumerate(stitch_results):
+            if result.smiles is None:
                 fragment_smi_0 = fragments_smi.split('.')[0]
                 fragment_smi_1 = fragments_smi.split('.')[1]
-                    
-                final_connect_smi = (fragment_smi_1 + fragment_smi_0).replace("*", "")
-            connect_smi_list.append(final_connect_smi)
+                connect_smi_list.append((fragment_smi_1 + fragment_smi_0).replace("*", ""))
+            else:
+                connect_smi_list.append(result.smiles)
+                validity_tensor[id] = 1
             
 
         # analyze properties of new graphs and save results
-        validity_linker_tensor, linker_smiles = anal.evaluate_generated_graphs(generated_graphs=g[0],
-                                                                termination=t,
-                                                                agent_lls=a,
-                                                                prior_lls=p,
-                                                                start_time=self.start_time,
-                                                                ts_properties=self.ts_properties,
-                                                                generation_batch_idx=idx)
+        with profiler.span("evaluation"):
+            validity_linker_tensor, linker_smiles = anal.evaluate_generated_graphs(generated_graphs=g[0],
+                                                                    termination=t,
+                                                                    agent_lls=a,
+                                                                    prior_lls=p,
+                                                                    start_time=self.start_time,
+                                                                    ts_properties=self.ts_properties,
+                                                                    generation_batch_idx=idx)
 
         uniqueness_tensor = util.get_unique_tensor(connect_smi_list)
-        score = compute_score(g[1], t, validity_tensor, uniqueness_tensor, connect_smi_list, self.drd2_model)
-        loss = (1-self.C.alpha) * torch.mean(compute_loss(score, a, p, uniqueness_tensor))  
+        with profiler.span("scoring"):
+            score = compute_score(g[1], t, validity_tensor, uniqueness_tensor, connect_smi_list, self.drd2_model)
+        with profiler.span("loss"):
+            loss = (1-self.C.alpha) * torch.mean(compute_loss(score, a, p, uniqueness_tensor))  
 
         score_write = torch.mean(torch.clone(score)).item()
         loss_write = torch.clone(loss)
@@ -470,20 +386,21 @@ class Workflow:
 
         ## Generate graphs with prior model
 
-        g, p, a, t,two_idx_prev,two_idx_agent = generate.build_graphs(agent_model=self.prev_model,
-                                           prior_model=self.agent_model,
-                                           n_graphs_to_generate=self.C.batch_size,
-                                           batch_size=self.C.batch_size,
-                                           mols_too=True,
-                                           change_ap=True
-                                          )
+        with profiler.span("generation"):
+            g, p, a, t,two_idx_prev,two_idx_agent = generate.build_graphs(agent_model=self.prev_model,
+                                               prior_model=self.agent_model,
+                                               n_graphs_to_generate=self.C.batch_size,
+                                               batch_size=self.C.batch_size,
+                                               mols_too=True,
+                                               change_ap=True
+                                              )
     
 
         smi_list = []
         from rdkit import Chem
         from rdkit.Chem import AllChem
         import random
-        validity_tensor = torch.zeros(len(g[0]), device="cuda")
+        validity_tensor = torch.zeros(len(g[0]), device=self.C.device)
 
         for idxm, molecular_graph in enumerate(g[0]):
 
@@ -497,86 +414,46 @@ class Workflow:
                 
             except (ValueError, RuntimeError, AttributeError):
                 pass
+        # join the linkers to the fragments; molecules which could not be
+        # stitched get the fragments joined without a linker, and stay invalid
+        fragments_smi = self.C.generate_fragments
+        with profiler.span("stitching"):
+            stitch_results = util.stitch_linkers(fragments_smi, smi_list, two_idx_prev.tolist())
         connect_smi_list = []
-        for id,atom_idx in enumerate(two_idx):
-            try:
-                fragments_smi = self.C.generate_fragments
-                fragments = Chem.MolFromSmiles(fragments_smi)
-                linker_smi_1 = smi_list[id]
-                
-                linker = Chem.MolFromSmiles(linker_smi_1)
-                #connect
-                combo = Chem.CombineMols(fragments,linker)
-                idx_list = []
-                for atom in fragments.GetAtoms():
-                    if atom.GetSymbol() == '*':
-                        f2 = atom.GetIdx()
-                        idx_list.append(f2)
-
-                du = Chem.MolFromSmiles('*')
-                combo = AllChem.DeleteSubstructs(combo,du)
-                edcombo = Chem.EditableMol(combo)
-                try:
-                    edcombo.AddBond(idx_list[0],atom_idx[0]+idx_list[1]-2,order=Chem.rdchem.BondType.SINGLE)
-                    edcombo.AddBond(idx_list[1]-2,atom_idx[1]+idx_list[1]-2,order=Chem.rdchem.BondType.SINGLE)
-                    final_connect_mol = edcombo.GetMol()
-                except:
-            
-                    fragment_smi_0 = fragments_smi.split('.')[0]
-                    fragment_smi_1 = fragments_smi.split('.')[1]
-                    
-                    match = '****sfs'
-                    for _ in range(1000):
-                        if not Chem.MolFromSmiles(match):
-                            s = linker_smi_1
-                            inStr = "(*)"
-                            for i in range(2):
-                                index = random.randint(0, len(s))
-                                s = "".join([s[:index], inStr, s[index:]])
-                            match = s
-                        else:
-                            break
-                    smi_linker = []
-                    for _ in range(1000):
-                        smi_link = Chem.MolToSmiles(Chem.MolFromSmiles(s), doRandom=True)
-                        if smi_link[0] == "*" and smi_link[-1] == '*':
-                            smi_linker.append(smi_link)
-                    
-                        
-                    final_smi = (fragment_smi_1 + smi_linker[0] + fragment_smi_0).replace("*", "")
-
-                    final_connect_mol = Chem.MolFromSmiles(final_smi)
-                    
-                final_connect_smi = Chem.MolToSmiles(final_connect_mol)
-                validity_tensor[idx] = 1
-
-            except:
+        for id, result in enumerate(stitch_results):
+            if result.smiles is None:
                 fragment_smi_0 = fragments_smi.split('.')[0]
                 fragment_smi_1 = fragments_smi.split('.')[1]
-                    
-                final_connect_smi = (fragment_smi_1 + fragment_smi_0).replace("*", "")
-            connect_smi_list.append(final_connect_smi)
+                connect_smi_list.append((fragment_smi_1 + fragment_smi_0).replace("*", ""))
+            else:
+                connect_smi_list.append(result.smiles)
+                validity_tensor[id] = 1
             
         # analyze properties of new graphs and save results
-        validity_linker_tensor, linker_smiles = anal.evaluate_generated_graphs(generated_graphs=g[0],
-                                                                termination=t,
-                                                                agent_lls=a,
-                                                                prior_lls=p,
-                                                                start_time=self.start_time,
-                                                                ts_properties=self.ts_properties,
-                                                                generation_batch_idx=idx)
+        with profiler.span("evaluation"):
+            validity_linker_tensor, linker_smiles = anal.evaluate_generated_graphs(generated_graphs=g[0],
+                                                                    termination=t,
+                                                                    agent_lls=a,
+                                                                    prior_lls=p,
+                                                                    start_time=self.start_time,
+                                                                    ts_properties=self.ts_properties,
+                                                                    generation_batch_idx=idx)
 
         uniqueness_tensor = util.get_unique_tensor(connect_smi_list)
-        score = compute_score(g[1], t, validity_tensor, uniqueness_tensor, connect_smi_list, self.drd2_model)
-        uniqueness_tensor = torch.where(score > self.best_avg_score, uniqueness_tensor, torch.zeros(len(score), device="cuda"))
-        loss += self.C.alpha * torch.mean(compute_loss(score, a, p, uniqueness_tensor))  
+        with profiler.span("scoring"):
+            score = compute_score(g[1], t, validity_tensor, uniqueness_tensor, connect_smi_list, self.drd2_model)
+        with profiler.span("loss"):
+            uniqueness_tensor = torch.where(score > self.best_avg_score, uniqueness_tensor, torch.zeros(len(score), device=self.C.device))
+            loss += self.C.alpha * torch.mean(compute_loss(score, a, p, uniqueness_tensor))  
 
         # backpropagate
-        loss.backward()
-        self.optimizer.step()
+        with profiler.span("backward"):
+            loss.backward()
+        with profiler.span("optimizer"):
+            self.optimizer.step()
 
-        # update the learning rate
-        self.scheduler.step()
+            # update the learning rate
+            self.scheduler.step()
 
 
         util.write_model_status(
@@ -589,4 +466,11 @@ class Workflow:
             epoch=self.current_epoch,
             agent_nlls=-a_write,
             prior_nlls=-p_write
-        )
\ No newline at end of file
+        )
+        # only log the score cache if the scores used it
+        score_cache = get_score_cache(create=False)
+        if score_cache is not None:
+            util.tbwrite_score_cache(
+                epoch=self.current_epoch,
+                score_cache=score_cache
+            )
\ No newline at end of file
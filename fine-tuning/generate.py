@@ -42,14 +42,14 @@ def allocate_graph_tensors(n_total, batch_size):
     n_allocate = n_total + batch_size
 
     # create the placeholder tensors
-    generated_nodes = torch.zeros((n_allocate, *node_shape[1:]), dtype=torch.float32, device="cuda")
-    generated_edges = torch.zeros((n_allocate, *edge_shape[1:]), dtype=torch.float32, device="cuda")
-    generated_n_nodes = torch.zeros(n_allocate, dtype=torch.int8, device="cuda")
-    generated_agent_ll = torch.zeros(n_allocate, device="cuda")
-    generated_prior_ll = torch.zeros(n_allocate, device="cuda")
-    properly_terminated = torch.zeros(n_allocate, device="cuda")
-    agent_loglike = torch.zeros(batch_size + 1, device="cuda")
-    prior_loglike = torch.zeros(batch_size + 1, device="cuda")
+    generated_nodes = torch.zeros((n_allocate, *node_shape[1:]), dtype=torch.float32, device=C.device)
+    generated_edges = torch.zeros((n_allocate, *edge_shape[1:]), dtype=torch.float32, device=C.device)
+    generated_n_nodes = torch.zeros(n_allocate, dtype=torch.int8, device=C.device)
+    generated_agent_ll = torch.zeros(n_allocate, device=C.device)
+    generated_prior_ll = torch.zeros(n_allocate, device=C.device)
+    properly_terminated = torch.zeros(n_allocate, device=C.device)
+    agent_loglike = torch.zeros(batch_size + 1, device=C.device)
+    prior_loglike = torch.zeros(batch_size + 1, device=C.device)
 
     return (
       generated_nodes, generated_edges, generated_n_nodes,
@@ -230,13 +230,13 @@ def initialize_graph_batch(batch_size):
     edge_shape = ([batch_size + 1] + C.dim_edges)
 
     # initialize tensors
-    nodes = torch.zeros(node_shape, dtype=torch.float32, device="cuda")
-    edges = torch.zeros(edge_shape, dtype=torch.float32, device="cuda")
-    n_nodes = torch.zeros(batch_size + 1, dtype=torch.int64, device="cuda")
+    nodes = torch.zeros(node_shape, dtype=torch.float32, device=C.device)
+    edges = torch.zeros(edge_shape, dtype=torch.float32, device=C.device)
+    n_nodes = torch.zeros(batch_size + 1, dtype=torch.int64, device=C.device)
 
     # add a dummy non-empty graph at top, since models cannot receive as input
     # purely empty graphs
-    nodes[0] = torch.ones(([1] + C.dim_nodes), device="cuda")
+    nodes[0] = torch.ones(([1] + C.dim_nodes), device=C.device)
     edges[0, 0, 0, 0] = 1
     n_nodes[0] = 1
 
@@ -274,28 +274,28 @@ def reset_graphs(n_samples, idx, nodes, edges, n_nodes, agent_loglike, prior_log
     
 
     # initialize placeholders
-    nodes_reset = torch.zeros(node_shape, dtype=torch.float32, device="cuda")
-    edges_reset = torch.zeros(edge_shape, dtype=torch.float32, device="cuda")
-    n_nodes_reset = torch.zeros(batch_size + 1, dtype=torch.int64, device="cuda")
-    agent_loglike_reset = torch.zeros(batch_size + 1, dtype=torch.float32, device="cuda")
-    prior_loglike_reset = torch.zeros(batch_size + 1, dtype=torch.float32, device="cuda")
+    nodes_reset = torch.zeros(node_shape, dtype=torch.float32, device=C.device)
+    edges_reset = torch.zeros(edge_shape, dtype=torch.float32, device=C.device)
+    n_nodes_reset = torch.zeros(batch_size + 1, dtype=torch.int64, device=C.device)
+    agent_loglike_reset = torch.zeros(batch_size + 1, dtype=torch.float32, device=C.device)
+    prior_loglike_reset = torch.zeros(batch_size + 1, dtype=torch.float32, device=C.device)
 
     # reset the "bad" graphs with zero tensors
     if len(idx) > 0:
         nodes[idx] = torch.zeros(
-            (len(idx), *node_shape[1:]), dtype=torch.float32, device="cuda"
+            (len(idx), *node_shape[1:]), dtype=torch.float32, device=C.device
         )
         edges[idx] = torch.zeros(
-            (len(idx), *edge_shape[1:]), dtype=torch.float32, device="cuda"
+            (len(idx), *edge_shape[1:]), dtype=torch.float32, device=C.device
         )
         n_nodes[idx] = torch.zeros(
-            len(idx), dtype=torch.int64, device="cuda"
+            len(idx), dtype=torch.int64, device=C.device
         )
         agent_loglike[idx] = torch.zeros(
-            len(idx), dtype=torch.float32, device="cuda"
+            len(idx), dtype=torch.float32, device=C.device
         )
         prior_loglike[idx] = torch.zeros(
-            len(idx), dtype=torch.float32, device="cuda"
+            len(idx), dtype=torch.float32, device=C.device
         )
 
     # fill in the placeholder tensors with the respective tensors
@@ -306,7 +306,7 @@ def reset_graphs(n_samples, idx, nodes, edges, n_nodes, agent_loglike, prior_log
     prior_loglike_reset[1:] = prior_loglike
 
     # add a dummy non-empty graph
-    nodes_reset[0] = torch.ones(([1] + C.dim_nodes), device="cuda")
+    nodes_reset[0] = torch.ones(([1] + C.dim_nodes), device=C.device)
     edges_reset[0, 0, 0, 0] = 1
     n_nodes_reset[0] = 1
 
@@ -543,7 +543,7 @@ def graph_to_mol(node_features, edge_features, n_nodes):
     # (which leads to an error), mask half of the edge features beyond diagonal
     n_max_nodes = C.dim_nodes[0]
     edge_mask = torch.triu(
-        torch.ones((n_max_nodes, n_max_nodes), device="cuda"), diagonal=1
+        torch.ones((n_max_nodes, n_max_nodes), device=C.device), diagonal=1
     )
     edge_mask = edge_mask.view(n_max_nodes, n_max_nodes, 1)
     edges_idc = torch.nonzero(edge_features * edge_mask)
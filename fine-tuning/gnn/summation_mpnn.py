@@ -87,7 +87,7 @@ class SummationMPNN(torch.nn.Module):
         edge_batch_edges = edges[edge_batch_batch_idc, edge_batch_node_idc, edge_batch_nghb_idc, :]
 
         # pad up the hidden nodes
-        hidden_nodes = torch.zeros(nodes.shape[0], nodes.shape[1], self.hidden_node_features, device="cuda")
+        hidden_nodes = torch.zeros(nodes.shape[0], nodes.shape[1], self.hidden_node_features, device=nodes.device)
         hidden_nodes[:nodes.shape[0], :nodes.shape[1], :nodes.shape[2]] = nodes.clone()
         node_batch_nodes = hidden_nodes[node_batch_batch_idc, node_batch_node_idc, :]
 
@@ -214,7 +214,7 @@ class SummationlinkerMPNN(torch.nn.Module):
 
         # pad up the hidden nodes
         
-        hidden_nodes = torch.zeros(nodes.shape[0], nodes.shape[1], self.hidden_node_features, device="cuda")
+        hidden_nodes = torch.zeros(nodes.shape[0], nodes.shape[1], self.hidden_node_features, device=nodes.device)
         
 
         hidden_nodes[:nodes.shape[0], :nodes.shape[1], :nodes.shape[2]] = nodes.clone()
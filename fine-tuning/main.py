@@ -1,5 +1,6 @@
 # load general packages and functions
 import datetime
+import torch
 
 # load program-specific functions
 import util
@@ -19,6 +20,12 @@ def main():
     # fix date/time
     _ = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+    # limit the number of CPU threads used by PyTorch, if specified
+    if C.n_cpu_threads is not None:
+        torch.set_num_threads(C.n_cpu_threads)
+    if C.n_interop_threads is not None:
+        torch.set_interop_threads(C.n_interop_threads)
+
     workflow = Workflow(constants=C)
 
     job_type = C.job_type
@@ -29,6 +29,21 @@ General settings for the generative model:
     Note: if `n_samples` > 100000 molecules, these will be generated in batches
     of 100000.
   n_workers (int) : Number of subprocesses to use during data loading.
+  max_stitching_attempts (int) : Maximum number of pairs of linker atoms tried
+    when joining a generated linker to its fragments.
+  n_stitching_workers (int) : Number of subprocesses used to join generated
+    linkers to their fragments (0 joins them in the main process).
+  fingerprint_backend (str) : How the Tanimoto similarities of the rewards/scores
+    are computed ('numpy', or 'rdkit'); 'numpy' computes those of a whole batch
+    at once, 'rdkit' one molecule at a time (the similarities are the same).
+  fingerprint_cache_size (int) : Maximum number of reference (e.g. ground truth)
+    fingerprints kept in memory.
+  device (str) : Device on which to run the job ('auto', 'cpu', or 'cuda:N');
+    'auto' uses the first GPU if one is available, and the CPU otherwise.
+  n_cpu_threads (int or None) : If specified, number of threads used by PyTorch
+    for intra-op parallelism on the CPU.
+  n_interop_threads (int or None) : If specified, number of threads used by
+    PyTorch for inter-op parallelism on the CPU.
   restart (bool) : If specified, will restart training from previous saved state.
     Can only be used for preprocessing or training jobs.
   max_n_nodes (int) : Maximum number of allowed nodes in graph. Must be greater
@@ -47,6 +62,28 @@ General settings for the generative model:
     added to graphs after generation is terminated.
   use_tensorboard (bool) : If specified, enables the use of tensorboard during training.
   tensorboard_dir (str) : Path to directory in which to write tensorboard things.
+  profiling (bool) : If specified, times each phase of the training/learning
+    steps (wall-clock time, CPU time and RSS), writing the timings to
+    "profile.csv", tensorboard, and the Chrome trace "profile_trace.json" in
+    the job directory.
+  torch_profiler_steps (list or None) : If specified, first and last step
+    (inclusive) to capture with `torch.profiler`, exported as the Chrome trace
+    "torch_trace.json" in the job directory.
+  score_cache_size (int) : Maximum number of molecule scores kept in the in-memory
+    score cache (0 disables the in-memory cache).
+  score_cache_path (str or None) : If specified, path to the SQLite database in
+    which molecule scores are cached across runs.
+  shape_n_conformers (int) : Number of conformers embedded for the reference and
+    for each generated molecule by the 3D shape-similarity scores ('3D_SMI' and
+    '3DSMI_tanimoto'); each molecule gets its best score over all conformer pairs.
+  shape_n_workers (int) : Number of subprocesses used by the 3D shape-similarity
+    scores (0 scores in the main process).
+  shape_timeout (float) : Seconds allowed per molecule and subprocess for the
+    3D shape-similarity scores; a batch of n molecules must be scored within
+    `shape_timeout * ceil(n / shape_n_workers)` seconds of its submission, and
+    the molecules not scored by then are scored 0.
+  docking_config (str or None) : Path to the DockStream docking configuration (JSON)
+    used by the 'docking_score' score type.
 """
 # general job parameters
 params_dict = {
@@ -58,6 +95,13 @@ params_dict = {
     "generation_epoch": 115,
     "n_samples": 2000,  #5000,
     "n_workers": 2,
+    "max_stitching_attempts": 10,
+    "n_stitching_workers": 0,
+    "fingerprint_backend": "numpy",
+    "fingerprint_cache_size": 100000,
+    "device": "auto",
+    "n_cpu_threads": None,
+    "n_interop_threads": None,
     "restart": False,
     "max_n_nodes": 50,
     "job_type": "train",
@@ -69,6 +113,14 @@ params_dict = {
     "use_explicit_H": False,
     "ignore_H": True,
     "tensorboard_dir": "tensorboard/",
+    "profiling": False,
+    "torch_profiler_steps": None,
+    "score_cache_size": 100000,
+    "score_cache_path": None,
+    "shape_n_conformers": 1,
+    "shape_n_workers": 0,
+    "shape_timeout": 60,
+    "docking_config": None,
 }
 """ MPNN hyperparameters (common ones):
   batch_size (int) : Number of graphs in a mini-batch.
@@ -4,13 +4,111 @@ from rdkit.Chem import MolFromSmiles, QED, Crippen, Descriptors, rdMolDescriptor
 import numpy as np
 from rdkit import DataStructs
 from rdkit import Chem
-import subprocess
-import csv
+import sys
+import os
+import hashlib
+import json
 # load program-specific functions
 from parameters.constants import constants as C
-from score_util import calc_SC_RDKit_score
-from rdkit.Chem import rdMolAlign
+from score_cache import ScoreCache
+from shape_scorer import ShapeScorer
 import sascorer
+import util
+
+# settings of the SMILES-based scorers; these are hashed into the score cache
+# keys, so that changing any of them invalidates the previously cached scores
+scoring_config = {
+    "qed": {},
+    "activity": {"qed_threshold": 0.5, "activity_threshold": 0.5},
+    "3D_SMI": {"ref": "CN1CCCC1CCCCn1ncnn1", "random_seed": 10},
+    "SA": {},
+    "logp": {"goal_ClogP": 2.5},
+    "3DSMI_tanimoto": {"ref": "CN1CCCC1CCCCn1ncnn1", "random_seed": 10},
+    "tanimoto": {"ref": "Cc1ccc(cc1)c2cc(nn2c3ccc(cc3)S(=O)(=O)N)C(F)(F)F", "k": 0.8},
+    "M_SIM_QED": {"ref": "CN1CCCC1CCCCn1ncnn1", "w": 0.0},
+    "docking_score": {},
+}
+
+
+def get_scoring_config_hash(score_type):
+    """ Returns a hash (`str`) of the configuration of the scorer for `score_type`.
+    """
+    config = {"score_type": score_type, **scoring_config.get(score_type, {})}
+    if score_type == "activity":  # the activity model is loaded from `data_path`
+        config["qsar_model"] = C.data_path + "qsar_model.pickle"
+    elif score_type in ["3D_SMI", "3DSMI_tanimoto"]:
+        config["n_conformers"] = C.shape_n_conformers
+    elif score_type == "docking_score":  # hash the DockStream configuration itself
+        check_docking_config()
+        with open(C.docking_config, "r") as docking_config_file:
+            config["docking_config"] = docking_config_file.read()
+    config_json = json.dumps(config, sort_keys=True)
+    return hashlib.sha256(config_json.encode()).hexdigest()
+
+
+# the cache of molecule scores, shared by all calls to `compute_score()`
+score_cache = None
+
+
+def get_score_cache(create=True):
+    """ Returns the score cache, creating it on first use (or `None` if it has
+    not been used yet and `create` is not specified).
+    """
+    global score_cache
+    if score_cache is None and create:
+        score_cache = ScoreCache(score_type=C.score_type,
+                                 config_hash=get_scoring_config_hash(C.score_type),
+                                 max_size=C.score_cache_size,
+                                 db_path=C.score_cache_path)
+    return score_cache
+
+
+# the 3D shape-similarity scorer, shared by all calls to `compute_score()`
+shape_scorer = None
+
+
+def get_shape_scorer():
+    """ Returns the 3D shape-similarity scorer, creating it (and embedding the
+    reference structure) on first use.
+    """
+    global shape_scorer
+    if shape_scorer is None:
+        config = scoring_config[C.score_type]
+        shape_scorer = ShapeScorer(ref_smiles=config["ref"],
+                                   n_conformers=C.shape_n_conformers,
+                                   random_seed=config["random_seed"],
+                                   use_tanimoto=bool(C.score_type == "3DSMI_tanimoto"),
+                                   fingerprint_engine=util.get_fingerprint_engine(),
+                                   n_workers=C.shape_n_workers,
+                                   timeout=C.shape_timeout)
+    return shape_scorer
+
+
+# the DockStream docking session, shared by all calls to `compute_score()`
+docking_session = None
+
+
+def get_docking_session():
+    """ Returns the DockStream docking session, creating it (and parsing the
+    docking configuration) on first use.
+    """
+    global docking_session
+    if docking_session is None:
+        check_docking_config()
+        # search the "DockStream/" directory of the repository, wherever the
+        # job is started from
+        sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DockStream"))
+        from dockstream.core.docker import DockingSession
+        docking_session = DockingSession(conf=C.docking_config)
+    return docking_session
+
+
+def check_docking_config():
+    """ Checks that a DockStream configuration was specified for docking.
+    """
+    if C.docking_config is None:
+        raise ValueError("`docking_config` must be specified for the 'docking_score' score type.")
+
 
 def compute_score(graphs, termination_tensor, validity_tensor, uniqueness_tensor, smiles, jak3_model):
 
@@ -19,20 +117,51 @@ def compute_score(graphs, termination_tensor, validity_tensor, uniqueness_tensor
         n_nodes = graphs[2]
         n_graphs = len(n_nodes)
         max_nodes = C.max_n_nodes
-        score = torch.ones(n_graphs, device="cuda") - torch.abs(n_nodes - 10.) / (max_nodes - 10 + 1)
+        score = torch.ones(n_graphs, device=C.device) - torch.abs(n_nodes - 10.) / (max_nodes - 10 + 1)
     
     elif C.score_type == "augment":
         # Augment size
         n_nodes = graphs[2].float()
         n_graphs = len(n_nodes)
         max_nodes = C.max_n_nodes
-        score = torch.ones(n_graphs, device="cuda") - torch.abs(n_nodes - 40.) / (max_nodes - 40)
+        score = torch.ones(n_graphs, device=C.device) - torch.abs(n_nodes - 40.) / (max_nodes - 40)
+
+    else:
+        # the remaining scores only depend on the SMILES, so only score those
+        # molecules which are not in the cache yet
+        score = get_score_cache().get_scores(
+            smiles, lambda uncached_smiles: compute_smiles_scores(uncached_smiles, jak3_model)
+        )
+        score = torch.tensor(score, device=C.device)
+
+    # remove non unique molecules from the score
+    score = score * uniqueness_tensor
+
+    # remove invalid molecules
+    score = score * validity_tensor
+
+    # remove non properly terminated molecules
+    score = score * termination_tensor
+
+    return score
        
     
-    elif C.score_type == "qed":
+def compute_smiles_scores(smiles, jak3_model):
+    """ Computes the score of type `C.score_type` for each molecule in `smiles`.
+
+    Args:
+      smiles (list) : Contains SMILES (`str`) of the molecules to score.
+      jak3_model (sklearn model) : Activity model (only used for 'activity').
+
+    Returns:
+      score_list (list) : Contains one score (`float`) per molecule, in the
+        same order as `smiles`.
+    """
+    config = scoring_config.get(C.score_type, {})
+
+    if C.score_type == "qed":
         # QED
-        score = [QED.qed(MolFromSmiles(smi)) for smi in smiles]
-        score = torch.tensor(score, device="cuda")
+        score_list = [QED.qed(MolFromSmiles(smi)) for smi in smiles]
 
 
     elif C.score_type == "activity":
@@ -42,43 +171,18 @@ def compute_score(graphs, termination_tensor, validity_tensor, uniqueness_tensor
 
         # QED
         qed = [QED.qed(mol) for mol in mols]
-        qed = torch.tensor(qed, device="cuda")
-        qedMask = torch.where(qed > 0.5, torch.ones(n_mols, device="cuda", dtype=torch.uint8), torch.zeros(n_mols, device="cuda", dtype=torch.uint8))
+        qed = torch.tensor(qed, device=C.device)
+        qedMask = torch.where(qed > config["qed_threshold"], torch.ones(n_mols, device=C.device, dtype=torch.uint8), torch.zeros(n_mols, device=C.device, dtype=torch.uint8))
         
         activity = compute_activity(mols, jak3_model)
-        activityMask = torch.where(activity > 0.5, torch.ones(n_mols, device="cuda", dtype=torch.uint8), torch.zeros(n_mols, device="cuda", dtype=torch.uint8))
+        activityMask = torch.where(activity > config["activity_threshold"], torch.ones(n_mols, device=C.device, dtype=torch.uint8), torch.zeros(n_mols, device=C.device, dtype=torch.uint8))
 
 
-        score = qedMask*activityMask
+        score_list = (qedMask*activityMask).tolist()
     
-    elif C.score_type == '3D_SMI':
-        ref = 'CN1CCCC1CCCCn1ncnn1'
-        n_mols = len(smiles)
-
-        ref_mol = Chem.MolFromSmiles(ref)
-        ref_mol = Chem.AddHs(ref_mol)
-        Chem.AllChem.EmbedMolecule(ref_mol, randomSeed=10)
-        Chem.AllChem.UFFOptimizeMolecule(ref_mol)
-
-        # gtruth_structure is the godden structure, smile is generated by agent
-        score_list = []
-        for smile in smiles:
-            gen_mol = Chem.MolFromSmiles(smile)           
-            try:
-                gen_mol = Chem.AddHs(gen_mol)
-                
-                Chem.AllChem.EmbedMolecule(gen_mol, randomSeed=10)
-                Chem.AllChem.UFFOptimizeMolecule(gen_mol)
-                
-                pyO3A = rdMolAlign.GetO3A(gen_mol, ref_mol).Align()
-                
-                score_l = calc_SC_RDKit_score(gen_mol, ref_mol)
-                score_list.append(score_l)
-                
-            except Exception:
-                score_l =0
-                score_list.append(score_l)
-        score = torch.tensor(score_list, device="cuda")
+    elif C.score_type in ['3D_SMI', '3DSMI_tanimoto']:
+        # 3D similarity (optionally with 2D tanimoto) to the reference structure
+        score_list = get_shape_scorer().score(smiles)
 
     elif C.score_type == 'SA':
         
@@ -94,13 +198,11 @@ def compute_score(graphs, termination_tensor, validity_tensor, uniqueness_tensor
                     score_list.append(0)
             except:
                 score_list.append(0)
-        score = torch.tensor(score_list, device="cuda")
     
     elif C.score_type == 'logp':
 
         
-        w = 2.5
-        goal_ClogP = w
+        goal_ClogP = config["goal_ClogP"]
 
         score_list =[]
         for smile in smiles:
@@ -112,142 +214,50 @@ def compute_score(graphs, termination_tensor, validity_tensor, uniqueness_tensor
                 score_list.append(Rclogp)
             else:
                 score_list.append(0)
-            score_list.append(0)
-        score = torch.tensor(score_list, device="cuda")
-    
-    elif C.score_type == '3DSMI_tanimoto':
-        """3d similary with 2d tanimoto"""
-
-            
-        ref = 'CN1CCCC1CCCCn1ncnn1'
-        ref_mol = Chem.MolFromSmiles(ref)
-        query_fp = AllChem.GetMorganFingerprint(ref_mol, 2, useCounts=True, useFeatures=True)
-        ref_mol = Chem.AddHs(ref_mol)
-        Chem.AllChem.EmbedMolecule(ref_mol, randomSeed=10)
-        Chem.AllChem.UFFOptimizeMolecule(ref_mol)
-        score_list = []
-
-        for smile in smiles:
-
-        # gtruth_structure is the godden structure, smile is generated by agent
-            gen_mol = Chem.MolFromSmiles(smile)
-            if gen_mol is None:
-                score_list.append(0)
-        
-        
-            try:
-                fp = AllChem.GetMorganFingerprint(gen_mol, 2, useCounts=True, useFeatures=True)
-                score_tanimoto = DataStructs.TanimotoSimilarity(query_fp, fp)
-                gen_mol = Chem.AddHs(gen_mol)
-                Chem.AllChem.EmbedMolecule(gen_mol, randomSeed=10)
-                Chem.AllChem.UFFOptimizeMolecule(gen_mol)
-                pyO3A = rdMolAlign.GetO3A(gen_mol, ref_mol).Align()
-                score_l = calc_SC_RDKit_score(gen_mol, ref_mol)/(0.1+score_tanimoto)
-                score_list.append(score_l)
-            except Exception:
-                score_list.append(score_l)
-        score = torch.tensor(score_list, device='cuda')
     
     elif C.score_type == 'tanimoto':
         """2d similarity"""
-        score_list = []
-        k = 0.8
-        query_structure = "Cc1ccc(cc1)c2cc(nn2c3ccc(cc3)S(=O)(=O)N)C(F)(F)F"
-        
-        
-        query_mol = Chem.MolFromSmiles(query_structure)
-        query_fp = AllChem.GetMorganFingerprint(query_mol, 2, useCounts=True, useFeatures=True)            
-        for smile in smiles:
-            mol = Chem.MolFromSmiles(smile)
-            if mol is None:
-                score_list.append(0)
-            
-            
-            fp = AllChem.GetMorganFingerprint(mol, 2, useCounts=True, useFeatures=True)
-            score = DataStructs.TanimotoSimilarity(query_fp, fp)
-            score_l = min(score, k) / k
-            score_list.append(float(score_l))
-        score = torch.tensor(score_list,device='cuda')
+        k = config["k"]
+        mols = [Chem.MolFromSmiles(smile) for smile in smiles]
+        tanimoto_scores = util.get_fingerprint_engine().bulk_similarity(mols, config["ref"])
+        # invalid molecules get a score of 0
+        score_list = np.nan_to_num(np.minimum(tanimoto_scores, k) / k, nan=0.0).tolist()
     
     elif C.score_type == 'M_SIM_QED':
 
         score_list = []
-        ref = 'CN1CCCC1CCCCn1ncnn1'
-        w = 0.0
+        w = config["w"]
         
-        query_mol = Chem.MolFromSmiles(ref)
-        query_fp = AllChem.GetMorganFingerprint(query_mol, 2, useCounts=True, useFeatures=True)
         # gtruth_structure is the godden structure, smile is generated by agent
-        for smile in smiles:
-            mol = Chem.MolFromSmiles(smile)
+        mols = [Chem.MolFromSmiles(smile) for smile in smiles]
+        tanimoto_scores = util.get_fingerprint_engine().bulk_similarity(mols, config["ref"])
+        for mol, tanimoto_score in zip(mols, tanimoto_scores):
             if mol is None:
                 score_list.append(0)
-                
-
-            
             else:
                 qed_score = QED.qed(mol)
-                fp = AllChem.GetMorganFingerprint(mol, 2, useCounts=True, useFeatures=True)
-                tanimoto_score = DataStructs.TanimotoSimilarity(query_fp, fp)
                 score = w*tanimoto_score + (1-w)*qed_score
                 score_list.append(float(score))
-        score = torch.tensor(score_list,device='cuda')
 
 
     elif C.score_type == 'docking_score':
-
-    #based on dock stream and Schrodinger, you must define your config file 
-        smi_filename = 'test_smi.smi'
-        f = open(smi_filename,'w')
-        for i in smiles:
-            f.write(i+'\n')
-        f.close()
-
-        command = 'python <your path>/docker.py -conf <your path>Glide_docking_grelinker.json -print_scores'
-        subprocess.run(command,
-                        check=True,  # force python to raise exception if anything goes wrong
-                        universal_newlines=True,  # convert output to string (instead of byte array)
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        shell=True)
-        score_csv_path = '<your path>/Glide_scores.csv'
-        with open(score_csv_path, 'r') as csvfile:
-            reader = csv.DictReader(csvfile)
-            reader2 = csv.DictReader(csvfile)
-            docking_score = [float(row['score']) for row in reader]
-            ligand_id = [row2['ligand_number'] for row2 in reader2]
-            print('ligand_id',ligand_id)
-            a = dict(zip(ligand_id, docking_score))
-            print('dict_a',a)
-        docking_score.sort(reverse = False)
-        score = torch.tensor(docking_score[:len(smiles)],device='cuda')
-        print('docking_socre',score)
-        print('len_scores',len(docking_score))
-
-        # print(smi)
-        print('len_smi',len(smiles))
+        # dock with DockStream, whose configuration is parsed (and docker
+        # initialized) only once; molecules which failed to dock get a score of 0
+        docking_scores = get_docking_session().score(smiles)
+        score_list = np.nan_to_num(docking_scores, nan=0.0).tolist()
 
 
     else:
         raise NotImplementedError("The score type chosen is not defined. Please choose among 'reduce', 'augment', 'qed' and 'activity'.")
     
-    # remove non unique molecules from the score
-    score = score * uniqueness_tensor
-
-    # remove invalid molecules
-    score = score * validity_tensor
-
-    # remove non properly terminated molecules
-    score = score * termination_tensor
-
-    return score
+    return score_list
 
 
 def compute_activity(mols, jak3_model):
 
     n_mols = len(mols)
 
-    activity = torch.zeros(n_mols, device="cuda")
+    activity = torch.zeros(n_mols, device=C.device)
 
     for idx, mol in enumerate(mols):
         fp = AllChem.GetMorganFingerprintAsBitVect(mol, 2, nBits=2048)   
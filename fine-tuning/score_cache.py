@@ -0,0 +1,155 @@
+# load general packages and functions
+from collections import OrderedDict
+import sqlite3
+from rdkit import Chem
+
+# defines the cache used to avoid re-scoring molecules which the agent has
+# already generated; scores are keyed by (canonical SMILES, score type, hash of
+# the scoring configuration), and are kept in an in-memory LRU tier, backed by
+# an optional on-disk SQLite tier which persists across runs
+
+
+
+class ScoreCache:
+    """ Two-tier (in-memory LRU + optional SQLite) cache of molecule scores.
+
+    Args:
+      score_type (str) : Score type which the cached scores belong to.
+      config_hash (str) : Hash of the scoring configuration; scores computed
+        with a different configuration are never returned.
+      max_size (int) : Maximum number of scores in the in-memory tier (0
+        disables it).
+      db_path (str or None) : If specified, path to the SQLite database used as
+        the on-disk tier.
+    """
+    def __init__(self, score_type, config_hash, max_size=100000, db_path=None):
+
+        self.score_type = score_type    # `str`
+        self.config_hash = config_hash  # `str`
+        self.max_size = max_size        # `int`
+        self.memory = OrderedDict()     # canonical SMILES (`str`) --> score (`float`)
+        self.db = None
+
+        # hit/miss counters, accumulated over the lifetime of the cache
+        self.n_memory_hits = 0
+        self.n_disk_hits = 0
+        self.n_misses = 0
+
+        if db_path is not None:
+            self.db = sqlite3.connect(db_path, timeout=60)
+            self.db.execute("PRAGMA journal_mode=WAL")  # allow concurrent jobs
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                "smiles TEXT, score_type TEXT, config_hash TEXT, score REAL, "
+                "PRIMARY KEY (smiles, score_type, config_hash))"
+            )
+            self.db.commit()
+
+    def get_scores(self, smiles, compute_scores):
+        """ Returns the scores of `smiles`, in the same order. Only molecules
+        which are in neither tier are scored, each of them only once per call,
+        by `compute_scores`.
+
+        Args:
+          smiles (list) : Contains SMILES (`str`) of the molecules to score.
+          compute_scores (function) : Takes a `list` of SMILES and returns a
+            `list` containing their scores (`float`), in the same order.
+
+        Returns:
+          scores (list) : Contains the scores (`float`) of `smiles`.
+        """
+        keys = [canonicalize(smi) for smi in smiles]
+        scores = {}  # canonical SMILES (`str`) --> score (`float`)
+
+        # first look in the in-memory tier...
+        for key in keys:
+            if key in scores:
+                continue
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                scores[key] = self.memory[key]
+                self.n_memory_hits += 1
+
+        # ... then in the on-disk tier...
+        missing_keys = list(OrderedDict.fromkeys(key for key in keys if key not in scores))
+        disk_scores = self.load_from_db(missing_keys)
+        self.n_disk_hits += len(disk_scores)
+        scores.update(disk_scores)
+        self.add_to_memory(disk_scores)
+
+        # ... and compute the rest (passing the SMILES as generated)
+        uncached = OrderedDict()  # canonical SMILES (`str`) --> SMILES (`str`)
+        for key, smi in zip(keys, smiles):
+            if key not in scores and key not in uncached:
+                uncached[key] = smi
+        if uncached:
+            new_scores = compute_scores(list(uncached.values()))
+            assert len(new_scores) == len(uncached), \
+                "Scorer must return exactly one score per molecule."
+            new_scores = dict(zip(uncached.keys(), map(float, new_scores)))
+            self.n_misses += len(new_scores)
+            scores.update(new_scores)
+            self.add_to_memory(new_scores)
+            self.save_to_db(new_scores)
+
+        # reassemble the scores in the original order
+        return [scores[key] for key in keys]
+
+    def add_to_memory(self, scores):
+        """ Adds `scores` (`dict`) to the in-memory tier, evicting the least
+        recently used scores if it is full.
+        """
+        if self.max_size == 0:
+            return
+        for key, score in scores.items():
+            self.memory[key] = score
+            self.memory.move_to_end(key)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+
+    def load_from_db(self, keys):
+        """ Returns the scores (`dict`) of those `keys` which are in the on-disk
+        tier.
+        """
+        if self.db is None or not keys:
+            return {}
+
+        scores = {}
+        chunk_size = 500  # keep below SQLite's limit on query variables
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            rows = self.db.execute(
+                f"SELECT smiles, score FROM scores WHERE score_type = ? AND config_hash = ? "
+                f"AND smiles IN ({', '.join('?' * len(chunk))})",
+                [self.score_type, self.config_hash, *chunk],
+            )
+            scores.update(rows)
+
+        return scores
+
+    def save_to_db(self, scores):
+        """ Writes `scores` (`dict`) to the on-disk tier.
+        """
+        if self.db is None:
+            return
+        self.db.executemany(
+            "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?)",
+            [(key, self.score_type, self.config_hash, score) for key, score in scores.items()],
+        )
+        self.db.commit()
+
+    def get_hit_rate(self):
+        """ Returns the fraction of lookups which were served from either tier.
+        """
+        n_lookups = self.n_memory_hits + self.n_disk_hits + self.n_misses
+        return (self.n_memory_hits + self.n_disk_hits) / max(n_lookups, 1)
+
+
+def canonicalize(smiles):
+    """ Returns the canonical RDKit SMILES of `smiles` (`str`), or `smiles`
+    itself if it cannot be parsed.
+    """
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        return smiles
+    return Chem.MolToSmiles(mol)
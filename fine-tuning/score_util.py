@@ -34,12 +34,19 @@ keep = ('Donor', 'Acceptor', 'NegIonizable', 'PosIonizable',
         'ZnBinder', 'Aromatic', 'Hydrophobe', 'LumpedHydrophobe')
 
 
-def get_FeatureMapScore(query_mol, ref_mol):
-    featLists = []
-    for m in [query_mol, ref_mol]:
-        rawFeats = fdef.GetFeaturesForMol(m)
-        # filter that list down to only include the ones we're intereted in
-        featLists.append([f for f in rawFeats if f.GetFamily() in keep])
+def get_features(mol, conf_id=-1):
+    """ Returns the FeatureMap features (of the families in `keep`) of the
+    conformer `conf_id` of `mol`.
+    """
+    rawFeats = fdef.GetFeaturesForMol(mol, confId=conf_id)
+    # filter that list down to only include the ones we're intereted in
+    return [f for f in rawFeats if f.GetFamily() in keep]
+
+
+def get_FeatureMapScore(query_mol, ref_mol, query_conf_id=-1, ref_conf_id=-1, ref_feats=None):
+    if ref_feats is None:
+        ref_feats = get_features(ref_mol, ref_conf_id)
+    featLists = [get_features(query_mol, query_conf_id), ref_feats]
     fms = [FeatMaps.FeatMap(feats=x, weights=[1] * len(x), params=fmParams) for x in featLists]
     fms[0].scoreMode = FeatMaps.FeatMapScoreMode.Best
     fm_score = fms[0].ScoreFeats(featLists[1]) / min(fms[0].GetNumFeatures(), len(featLists[1]))
@@ -47,11 +54,18 @@ def get_FeatureMapScore(query_mol, ref_mol):
     return fm_score
 
 
-def calc_SC_RDKit_score(query_mol, ref_mol):
-    fm_score = get_FeatureMapScore(query_mol, ref_mol)
+def calc_SC_RDKit_score(query_mol, ref_mol, query_conf_id=-1, ref_conf_id=-1, ref_feats=None):
+    """ Returns the SC_RDKit score (FeatureMap and shape similarity) of the
+    conformer `query_conf_id` of `query_mol`, aligned to the conformer
+    `ref_conf_id` of `ref_mol`. The reference features can be passed in
+    `ref_feats` if they have been precomputed.
+    """
+    fm_score = get_FeatureMapScore(query_mol, ref_mol, query_conf_id, ref_conf_id, ref_feats)
 
     protrude_dist = rdShapeHelpers.ShapeProtrudeDist(query_mol, ref_mol,
+                                                     confId1=query_conf_id,
+                                                     confId2=ref_conf_id,
                                                      allowReordering=False)
     SC_RDKit_score = 0.5 * fm_score + 0.5 * (1 - protrude_dist)
 
-    return SC_RDKit_score
\ No newline at end of file
+    return SC_RDKit_score
@@ -0,0 +1,182 @@
+# load general packages and functions
+import concurrent.futures
+import multiprocessing
+import numpy as np
+from rdkit import Chem
+from rdkit.Chem import AllChem, rdMolAlign
+
+# load program-specific functions
+from score_util import calc_SC_RDKit_score, get_features
+
+# defines the scorer used for the 3D shape-similarity scores ('3D_SMI' and
+# '3DSMI_tanimoto'); the reference conformers and their FeatureMap features are
+# computed once, and generated molecules can be scored in a pool of processes
+
+
+
+class ShapeScorer:
+    """ Scores molecules by their 3D shape and FeatureMap similarity (SC_RDKit
+    score) to a reference molecule, after O3A alignment. Each molecule gets the
+    best score over all pairs of its conformers and the reference conformers.
+
+    Args:
+      ref_smiles (str) : SMILES of the reference molecule.
+      n_conformers (int) : Number of conformers to embed for the reference and
+        for each scored molecule.
+      random_seed (int) : Random seed used when embedding conformers.
+      use_tanimoto (bool) : If specified, divides the score by (0.1 + the 2D
+        Tanimoto similarity to the reference), as for '3DSMI_tanimoto'.
+      fingerprint_engine (FingerprintEngine or None) : Engine computing the 2D
+        Tanimoto similarities of each batch (required if `use_tanimoto`).
+      n_workers (int) : Number of subprocesses used for scoring (0 scores in
+        the current process).
+      timeout (float) : When scoring in subprocesses, seconds allowed per
+        molecule and worker; a batch of n molecules must be scored within
+        `timeout * ceil(n / n_workers)` seconds of its submission, and the
+        molecules not scored by then get a score of 0.
+    """
+    def __init__(self, ref_smiles, n_conformers=1, random_seed=10, use_tanimoto=False,
+                 fingerprint_engine=None, n_workers=0, timeout=60):
+
+        self.n_conformers = n_conformers  # `int`
+        self.random_seed = random_seed    # `int`
+        self.use_tanimoto = use_tanimoto  # `bool`
+        self.fingerprint_engine = fingerprint_engine  # `FingerprintEngine` or `None`
+        self.ref_smiles = ref_smiles      # `str`
+        self.n_workers = n_workers        # `int`
+        self.timeout = timeout            # `float`
+        self.pool = None
+
+        # embed the reference once...
+        ref_mol = Chem.MolFromSmiles(ref_smiles)
+        self.ref_mol = embed_conformers(ref_mol, n_conformers, random_seed)
+        assert self.ref_mol.GetNumConformers() > 0, "Could not embed the reference molecule."
+
+        # ... and precompute the features of each of its conformers
+        self.ref_conf_ids = [conf.GetId() for conf in self.ref_mol.GetConformers()]
+        self.ref_feats = [get_features(self.ref_mol, conf_id) for conf_id in self.ref_conf_ids]
+
+    def __getstate__(self):
+        # the pool and the RDKit features cannot be pickled; features are
+        # recomputed from the (pickled) reference conformers when unpickling
+        # (the 2D similarities are computed in the main process, so the
+        # fingerprint engine is not needed in the subprocesses)
+        state = self.__dict__.copy()
+        state["pool"] = None
+        state["fingerprint_engine"] = None
+        del state["ref_feats"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.ref_feats = [get_features(self.ref_mol, conf_id) for conf_id in self.ref_conf_ids]
+
+    def score(self, smiles):
+        """ Returns the scores (`list` of `float`s) of the molecules in `smiles`
+        (`list` of `str`s), in the same order.
+        """
+        scores = self.score_shapes(smiles)
+        if self.use_tanimoto:
+            # the 2D similarities of the whole batch are computed at once
+            mols = [Chem.MolFromSmiles(smi) for smi in smiles]
+            similarities = self.fingerprint_engine.bulk_similarity(mols, self.ref_smiles)
+            scores = [score / (0.1 + similarity)
+                      for score, similarity in zip(scores, np.nan_to_num(similarities, nan=0.0))]
+        return scores
+
+    def score_shapes(self, smiles):
+        """ Returns the 3D similarity scores (`list` of `float`s) of the
+        molecules in `smiles` (`list` of `str`s), in the same order.
+        """
+        if self.n_workers == 0:
+            return [self.score_molecule(smi) for smi in smiles]
+
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.n_workers,
+                                             initializer=init_worker,
+                                             initargs=(self,))
+
+        # the timeout is measured from the submission of the batch (one
+        # deadline for all molecules), not from when each result is awaited
+        futures = []
+        for smi in smiles:
+            future = concurrent.futures.Future()
+            self.pool.apply_async(score_in_worker, (smi,),
+                                  callback=future.set_result,
+                                  error_callback=future.set_exception)
+            futures.append(future)
+        n_rounds = -(-len(smiles) // self.n_workers)
+        done, not_done = concurrent.futures.wait(futures, timeout=self.timeout * n_rounds)
+
+        scores = [future.result() if future in done and future.exception() is None else 0
+                  for future in futures]
+
+        if not_done:
+            # the workers may still be busy with timed out molecules, so
+            # replace the pool before the next batch
+            self.close()
+
+        return scores
+
+    def score_molecule(self, smiles):
+        """ Returns the 3D similarity score (`float`) of a single molecule, or 0
+        if it cannot be parsed, embedded, or aligned.
+        """
+        gen_mol = Chem.MolFromSmiles(smiles)
+        if gen_mol is None:
+            return 0
+
+        try:
+            gen_mol = embed_conformers(gen_mol, self.n_conformers, self.random_seed)
+            if gen_mol.GetNumConformers() == 0:
+                return 0
+
+            best_score = None
+            for gen_conf_id in [conf.GetId() for conf in gen_mol.GetConformers()]:
+                for ref_conf_id, ref_feats in zip(self.ref_conf_ids, self.ref_feats):
+                    rdMolAlign.GetO3A(gen_mol, self.ref_mol, prbCid=gen_conf_id,
+                                      refCid=ref_conf_id).Align()
+                    score = calc_SC_RDKit_score(gen_mol, self.ref_mol, gen_conf_id,
+                                                ref_conf_id, ref_feats)
+                    if best_score is None or score > best_score:
+                        best_score = score
+
+            return best_score
+
+        except Exception:
+            return 0
+
+    def close(self):
+        """ Terminates the pool of subprocesses, if there is one.
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+
+def embed_conformers(mol, n_conformers, random_seed):
+    """ Returns `mol` with explicit H's and `n_conformers` UFF-optimized
+    conformers (fewer if some cannot be embedded).
+    """
+    mol = Chem.AddHs(mol)
+    AllChem.EmbedMultipleConfs(mol, numConfs=n_conformers, randomSeed=random_seed)
+    AllChem.UFFOptimizeMoleculeConfs(mol)
+    return mol
+
+
+# the `ShapeScorer` used in each subprocess of a pool, set by `init_worker()`
+worker_scorer = None
+
+
+def init_worker(scorer):
+    """ Initializes a subprocess of the pool with a copy of `scorer`.
+    """
+    global worker_scorer
+    worker_scorer = scorer
+
+
+def score_in_worker(smiles):
+    """ Scores a single molecule in a subprocess of the pool.
+    """
+    return worker_scorer.score_molecule(smiles)
@@ -1,4 +1,8 @@
 # load general packages and functions
+import inspect
+import itertools
+import os
+import numpy as np
 import torch
 import h5py
 
@@ -6,6 +10,36 @@ import h5py
 # from HDF files in this work 
 
 
+# `DataLoader` only accepts `persistent_workers` and `prefetch_factor` from
+# PyTorch 1.7
+KEEPS_WORKERS = "persistent_workers" in inspect.signature(torch.utils.data.DataLoader.__init__).parameters
+
+
+class PermutationSampler(torch.utils.data.Sampler):
+    """ Samples the indices `0, ..., n - 1` in the random order drawn from the
+    numpy `Generator` `rng` (`torch.utils.data.RandomSampler` only accepts a
+    seeded generator from PyTorch 1.6).
+    """
+    def __init__(self, n, rng):
+        self.n = n      # `int`
+        self.rng = rng  # `numpy.random.Generator`
+
+    def __iter__(self):
+        return iter(self.rng.permutation(self.n).tolist())
+
+    def __len__(self):
+        return self.n
+
+
+def get_shuffle_kwargs(n, shuffle, rng):
+    """ Returns the `DataLoader` arguments which shuffle `n` elements (if
+    `shuffle`) in the order drawn from `rng` (`numpy.random.Generator`), or
+    from the global PyTorch random number generator if `rng` is `None`.
+    """
+    if shuffle and rng is not None:
+        return {"sampler": PermutationSampler(n, rng)}
+    return {"shuffle": shuffle}
+
 
 class BlockDataLoader(torch.utils.data.DataLoader):
     """ Main `DataLoader` class which has been modified so as to read training
@@ -13,7 +47,7 @@ class BlockDataLoader(torch.utils.data.DataLoader):
     in the original `DataLoader` class).
     """
     def __init__(self, dataset, batch_size=100, block_size=10000,
-                shuffle=True, n_workers=0, pin_memory=True):
+                shuffle=True, n_workers=0, pin_memory=True, rng=None):
 
         # define variables to be used throughout dataloading
         self.dataset = dataset        # `HDFDataset` object
@@ -22,6 +56,7 @@ class BlockDataLoader(torch.utils.data.DataLoader):
         self.shuffle = shuffle        # `bool`
         self.n_workers = n_workers    # `int`
         self.pin_memory = pin_memory  # `bool`
+        self.rng = rng                # `numpy.random.Generator` or `None`
         self.block_dataset = BlockDataset(self.dataset, 
                                           batch_size=self.batch_size, 
                                           block_size=self.block_size)
@@ -30,8 +65,10 @@ class BlockDataLoader(torch.utils.data.DataLoader):
 
         # define a regular `DataLoader` using the `BlockDataset`
         block_loader = torch.utils.data.DataLoader(self.block_dataset,
-                                                   shuffle=self.shuffle,
-                                                   num_workers=self.n_workers)
+                                                   num_workers=self.n_workers,
+                                                   **get_shuffle_kwargs(len(self.block_dataset),
+                                                                        self.shuffle,
+                                                                        self.rng))
 
         # define a condition for determining whether to drop the last block
         # this is done if the remainder block is very small (less than a tenth
@@ -43,16 +80,21 @@ class BlockDataLoader(torch.utils.data.DataLoader):
 
         # loop through and load BLOCKS of data every iteration
         for block in block_loader:
-            block = [torch.squeeze(b) for b in block]
+            block = [torch.squeeze(b, dim=0) for b in block]
 
             # wrap each block in a `ShuffleBlock` dataset so that data can be
-            # shuffled *within* blocks too
-            batch_loader = torch.utils.data.DataLoader(dataset=ShuffleBlockWrapper(block),
-                                                       shuffle=self.shuffle,       
+            # shuffled *within* blocks too (sparse datasets are densified by
+            # their `collate_fn` once the batches have been drawn)
+            block_dataset = self.dataset.wrap_block(block)
+            batch_loader = torch.utils.data.DataLoader(dataset=block_dataset,
                                                        batch_size=self.batch_size,
                                                        num_workers=self.n_workers,
                                                        pin_memory=self.pin_memory,
-                                                       drop_last=condition)
+                                                       drop_last=condition,
+                                                       collate_fn=self.dataset.collate_fn,
+                                                       **get_shuffle_kwargs(len(block_dataset),
+                                                                            self.shuffle,
+                                                                            self.rng))
             for batch in batch_loader:
                 yield batch
 
@@ -74,7 +116,7 @@ class BlockDataFragmentLoader(torch.utils.data.DataLoader):
     in the original `DataLoader` class).
     """
     def __init__(self, dataset, batch_size=100, block_size=10000,
-                shuffle=True, n_workers=0, pin_memory=True):
+                shuffle=True, n_workers=0, pin_memory=True, rng=None):
 
         # define variables to be used throughout dataloading
         self.dataset = dataset        # `HDFDataset` object
@@ -83,6 +125,7 @@ class BlockDataFragmentLoader(torch.utils.data.DataLoader):
         self.shuffle = shuffle        # `bool`
         self.n_workers = n_workers    # `int`
         self.pin_memory = pin_memory  # `bool`
+        self.rng = rng                # `numpy.random.Generator` or `None`
         self.block_dataset = BlockFragmentDataset(self.dataset, 
                                           batch_size=self.batch_size, 
                                           block_size=self.block_size)
@@ -91,8 +134,10 @@ class BlockDataFragmentLoader(torch.utils.data.DataLoader):
 
         # define a regular `DataLoader` using the `BlockDataset`
         block_loader = torch.utils.data.DataLoader(self.block_dataset,
-                                                   shuffle=self.shuffle,
-                                                   num_workers=self.n_workers)
+                                                   num_workers=self.n_workers,
+                                                   **get_shuffle_kwargs(len(self.block_dataset),
+                                                                        self.shuffle,
+                                                                        self.rng))
 
         # define a condition for determining whether to drop the last block
         # this is done if the remainder block is very small (less than a tenth
@@ -104,16 +149,21 @@ class BlockDataFragmentLoader(torch.utils.data.DataLoader):
 
         # loop through and load BLOCKS of data every iteration
         for block in block_loader:
-            block = [torch.squeeze(b) for b in block]
+            block = [torch.squeeze(b, dim=0) for b in block]
 
             # wrap each block in a `ShuffleBlock` dataset so that data can be
-            # shuffled *within* blocks too
-            batch_loader = torch.utils.data.DataLoader(dataset=ShuffleBlockWrapper(block),
-                                                       shuffle=self.shuffle,       
+            # shuffled *within* blocks too (sparse datasets are densified by
+            # their `collate_fn` once the batches have been drawn)
+            block_dataset = self.dataset.wrap_block(block)
+            batch_loader = torch.utils.data.DataLoader(dataset=block_dataset,
                                                        batch_size=self.batch_size,
                                                        num_workers=self.n_workers,
                                                        pin_memory=self.pin_memory,
-                                                       drop_last=condition)
+                                                       drop_last=condition,
+                                                       collate_fn=self.dataset.collate_fn,
+                                                       **get_shuffle_kwargs(len(block_dataset),
+                                                                            self.shuffle,
+                                                                            self.rng))
             for batch in batch_loader:
                 yield batch
 
@@ -129,6 +179,57 @@ class BlockDataFragmentLoader(torch.utils.data.DataLoader):
         return (x + y - 1) // y
 
 
+class PairedBlockDataLoader:
+    """ Walks a `BlockDataLoader` (linker graphs) and a `BlockDataFragmentLoader`
+    (fragment graphs) in lockstep, yielding one `(batch_linker, batch_fragment)`
+    pair at a time. Batches are streamed from both loaders, never materialized.
+
+    Batch `i` of the linker loader is paired with batch `i` of the fragment
+    loader (previously, every linker batch was paired with fragment batch 1).
+    Both loaders shuffle using numpy generators seeded with the same value at
+    the start of every epoch, so each epoch is reproducible from `seed`; however,
+    the linker dataset holds deduplicated subgraphs and the fragment dataset
+    one entry per molecule, so the two datasets generally differ in length,
+    and the pairs are not aligned by molecule. If the fragment loader runs out
+    of batches before the linker loader, it is restarted.
+    """
+    def __init__(self, graph_loader, fragment_loader, max_batches=None, seed=None):
+
+        self.graph_loader = graph_loader        # `BlockDataLoader`
+        self.fragment_loader = fragment_loader  # `BlockDataFragmentLoader`
+        self.max_batches = max_batches          # `int` or `None`
+
+        # generator used to draw the shared seed for each epoch (seeded from
+        # fresh entropy if `seed` is `None`)
+        self.seed_rng = np.random.default_rng(seed)
+
+    def __iter__(self):
+
+        # seed both loaders for this epoch, so that the epoch is reproducible
+        epoch_seed = int(self.seed_rng.integers(2**31))
+        self.graph_loader.rng = np.random.default_rng(epoch_seed)
+        self.fragment_loader.rng = np.random.default_rng(epoch_seed)
+
+        fragment_iterator = iter(self.fragment_loader)
+
+        # `islice` stops before a block beyond `max_batches` is ever loaded
+        for batch_linker in itertools.islice(self.graph_loader, len(self)):
+            try:
+                batch_fragment = next(fragment_iterator)
+            except StopIteration:  # restart the (shorter) fragment loader
+                fragment_iterator = iter(self.fragment_loader)
+                batch_fragment = next(fragment_iterator)
+
+            yield batch_linker, batch_fragment
+
+    def __len__(self):
+        # returns the number of batch pairs per epoch
+        n_batches = len(self.graph_loader)
+        if self.max_batches:
+            n_batches = min(n_batches, self.max_batches)
+        return n_batches
+
+
 
 class BlockDataset(torch.utils.data.Dataset):
     """ Modified `Dataset` class which returns BLOCKS of data when 
@@ -196,7 +297,7 @@ class HDFDataset(torch.utils.data.Dataset):
 
         self.path = path
 
-        hdf_file = h5py.File(self.path, "r+", swmr=True)
+        hdf_file = h5py.File(self.path, "r", swmr=True)
 
         # load each HDF dataset
         self.nodes = hdf_file.get("nodes")
@@ -218,6 +319,13 @@ class HDFDataset(torch.utils.data.Dataset):
         # returns the number of graphs in the dataset
         return self.n_subgraphs
 
+    def wrap_block(self, block):
+        # returns the block as a `Dataset` of single graphs
+        return ShuffleBlockWrapper(block)
+
+    # batches of dense graphs are collated by stacking
+    collate_fn = None
+
 class HDFFragmentDataset(torch.utils.data.Dataset):
     """ Reads and collects data from an HDF file with three HDF "datasets":
     "nodes", "edges", and "APDs".
@@ -226,7 +334,7 @@ class HDFFragmentDataset(torch.utils.data.Dataset):
 
         self.path = path
 
-        hdf_file = h5py.File(self.path, "r+", swmr=True)
+        hdf_file = h5py.File(self.path, "r", swmr=True)
 
         # load each HDF dataset
         self.nodes = hdf_file.get("nodes")
@@ -248,3 +356,313 @@ class HDFFragmentDataset(torch.utils.data.Dataset):
         # returns the number of graphs in the dataset
         return self.n_subgraphs
 
+    def wrap_block(self, block):
+        # returns the block as a `Dataset` of single graphs
+        return ShuffleBlockWrapper(block)
+
+    # batches of dense graphs are collated by stacking
+    collate_fn = None
+
+
+def get_HDF_dataset(path, fragment=False):
+    """ Returns the `Dataset` reading the HDF file in `path`: a `SparseHDFDataset`
+    if the file was written in the "sparse" dataset format, and otherwise an
+    `HDFDataset` (or an `HDFFragmentDataset`, if `fragment`).
+
+    Args:
+      path (str) : Path to HDF data to be read.
+      fragment (bool) : Indicates if the file contains fragments (no APDs).
+    """
+    with h5py.File(path, "r", swmr=True) as hdf_file:
+        is_sparse = hdf_file.attrs.get("dataset_format") == "sparse"
+
+    if is_sparse:
+        dataset_names = ["nodes", "edges"] if fragment else ["nodes", "edges", "APDs"]
+        return SparseHDFDataset(path, dataset_names=dataset_names)
+    if fragment:
+        return HDFFragmentDataset(path)
+    return HDFDataset(path)
+
+
+class SparseHDFDataset(torch.utils.data.Dataset):
+    """ Reads and collects data from an HDF file in the "sparse" dataset format,
+    where each HDF group (e.g. "nodes") holds the coordinates ("indices") and,
+    unless they are all 1, the "values" of the non-zero elements of every graph,
+    and the CSR "offsets" of each graph (see `preprocessing.sparsify_HDF_file()`).
+
+    Blocks of graphs are returned in this compact form (`__getitem__()`), and
+    graphs are only densified, a batch at a time, by `collate_fn()`.
+    """
+    def __init__(self, path, dataset_names):
+
+        self.path = path
+        self.dataset_names = dataset_names  # `list` of `str`
+
+        hdf_file = h5py.File(self.path, "r", swmr=True)
+
+        # load each HDF group; the (small) offsets are kept in memory
+        self.groups = [hdf_file.get(name) for name in self.dataset_names]
+        self.shapes = [tuple(group.attrs["shape"]) for group in self.groups]
+        self.offsets = [group.get("offsets")[:] for group in self.groups]
+
+        # get the number of elements in the dataset
+        self.n_subgraphs = len(self.offsets[0]) - 1
+
+    def __getitem__(self, idx):
+        # returns a slice of graphs as (offsets, indices, values) for each HDF
+        # group, where the offsets start at 0; `values` is empty if all values
+        # are 1
+        if isinstance(idx, int):
+            idx = slice(idx, idx + 1)
+        start, stop, _ = idx.indices(self.n_subgraphs)
+
+        block = []
+        for group, offsets in zip(self.groups, self.offsets):
+            first, last = offsets[start], offsets[stop]
+            offsets_i = torch.from_numpy(offsets[start:stop + 1] - first)
+            indices_i = torch.from_numpy(group.get("indices")[first:last].astype("int64"))
+            if group.attrs["is_binary"]:
+                values_i = torch.zeros(0, dtype=torch.float32)
+            else:
+                values_i = torch.from_numpy(group.get("values")[first:last]).type(torch.float32)
+            block += [offsets_i, indices_i, values_i]
+
+        return tuple(block)
+
+    def __len__(self):
+        # returns the number of graphs in the dataset
+        return self.n_subgraphs
+
+    def wrap_block(self, block):
+        # returns the block as a `Dataset` of single (sparse) graphs
+        return SparseBlockWrapper(block)
+
+    def collate_fn(self, graphs):
+        """ Densifies a list of sparse graphs (from a `SparseBlockWrapper`) into
+        a batch of dense `torch.Tensor`s, one per HDF group.
+        """
+        batch = []
+        for position, shape in enumerate(self.shapes):
+            indices = [graph[2 * position] for graph in graphs]
+            counts = torch.tensor([len(indices_i) for indices_i in indices])
+            indices = torch.cat(indices)
+            if self.groups[position].attrs["is_binary"]:
+                values = torch.ones(len(indices), dtype=torch.float32)
+            else:
+                values = torch.cat([graph[2 * position + 1] for graph in graphs])
+
+            dense = torch.zeros((len(graphs), *shape), dtype=torch.float32)
+            graph_idc = torch.repeat_interleave(torch.arange(len(graphs)), counts)
+            dense[(graph_idc, *indices.unbind(dim=1))] = values
+            batch.append(dense)
+
+        return batch
+
+
+class SparseBlockWrapper:
+    """ Extra class used to wrap a block of sparse graphs (as returned by
+    `SparseHDFDataset`), enabling data to get shuffled *within* a block.
+    """
+    def __init__(self, data):
+        self.data = data
+
+    def __getitem__(self, idx):
+        # returns the (indices, values) of each HDF group for a single graph
+        graph = []
+        for position in range(0, len(self.data), 3):
+            offsets, indices, values = self.data[position:position + 3]
+            start, stop = offsets[idx], offsets[idx + 1]
+            graph += [indices[start:stop], values[start:stop] if len(values) > 0 else values]
+        return graph
+
+    def __len__(self):
+        return len(self.data[0]) - 1
+
+
+def get_memmap_dir(path):
+    """ Returns the directory holding the `.npy` files exported from the HDF
+    file in `path` (see `export_HDF_to_memmap()`).
+    """
+    return f"{path[:-3]}memmap/"
+
+
+def export_HDF_to_memmap(path, block_size=10000):
+    """ Exports each HDF dataset in the (dense) HDF file in `path` to its own
+    uncompressed `.npy` file, unless this has already been done (e.g. by an
+    earlier job). The files are written to a temporary directory which is only
+    renamed once complete.
+
+    Args:
+      path (str) : Path to HDF data to be exported.
+      block_size (int) : Number of subgraphs copied at once.
+    """
+    memmap_dir = get_memmap_dir(path)
+    if os.path.isdir(memmap_dir):
+        return memmap_dir
+
+    print(f"-- Exporting {path} to {memmap_dir}.", flush=True)
+    temp_dir = f"{memmap_dir[:-1]}.incomplete/"
+    os.makedirs(temp_dir, exist_ok=True)
+    with h5py.File(path, "r", swmr=True) as hdf_file:
+        if hdf_file.attrs.get("dataset_format") == "sparse":
+            raise ValueError(
+                f"Cannot memory-map {path}, which is in the 'sparse' dataset "
+                f"format. Please use the 'dense' format with the 'memmap' "
+                f"dataset backend."
+            )
+        for name in hdf_file.keys():
+            data = hdf_file.get(name)
+            array = np.lib.format.open_memmap(f"{temp_dir}{name}.npy", mode="w+",
+                                              dtype=data.dtype, shape=data.shape)
+            for start in range(0, data.shape[0], block_size):
+                array[start:start + block_size] = data[start:start + block_size]
+            array.flush()
+            del array
+
+    os.rename(temp_dir, memmap_dir)
+    return memmap_dir
+
+
+class MemmapDataset(torch.utils.data.Dataset):
+    """ Reads graphs from the `.npy` files exported from an HDF file (see
+    `export_HDF_to_memmap()`). The files are memory-mapped read-only, so the
+    data loading workers share the operating system's page cache instead of
+    each holding their own copy of the data. Indexing with an array of indices
+    reads the whole batch with numpy fancy indexing, and converts it to
+    `torch.float32` at once (rather than graph by graph).
+    """
+    def __init__(self, path, dataset_names):
+
+        self.path = path
+        self.dataset_names = dataset_names  # `list` of `str`
+
+        memmap_dir = export_HDF_to_memmap(self.path)
+        self.npy_paths = [f"{memmap_dir}{name}.npy" for name in self.dataset_names]
+
+        # memory-maps are opened lazily (see `get_arrays()`), so that every
+        # worker process opens its own
+        self.arrays = None
+
+        # get the number of elements in the dataset
+        self.n_subgraphs = np.load(self.npy_paths[0], mmap_mode="r").shape[0]
+
+    def get_arrays(self):
+        # opens the memory-maps on first use
+        if self.arrays is None:
+            self.arrays = [np.load(npy_path, mmap_mode="r") for npy_path in self.npy_paths]
+        return self.arrays
+
+    def __getstate__(self):
+        # the memory-maps are not sent to worker processes
+        state = self.__dict__.copy()
+        state["arrays"] = None
+        return state
+
+    def __getitem__(self, idx):
+        # returns a graph, or a batch of graphs if `idx` is an array/slice
+        if isinstance(idx, torch.Tensor):
+            idx = idx.numpy()
+        return tuple(torch.from_numpy(array[idx].astype(np.float32)) for array in self.get_arrays())
+
+    def __len__(self):
+        # returns the number of graphs in the dataset
+        return self.n_subgraphs
+
+
+class BlockBatchSampler(torch.utils.data.Sampler):
+    """ Yields batches of indices (as `numpy.ndarray`s), visiting the dataset
+    in blocks of `block_size` graphs like `BlockDataLoader` does: if `shuffle`,
+    the blocks are visited in random order, and the graphs are shuffled within
+    each block before it is split into batches. The indices of each batch are
+    sorted, so that reads from a memory-map move forward through the file.
+    The random order is drawn from `rng` or, if it is `None`, from the global
+    PyTorch random number generator.
+    """
+    def __init__(self, n_subgraphs, batch_size=100, block_size=10000, shuffle=True, rng=None):
+        assert block_size >= batch_size
+
+        self.n_subgraphs = n_subgraphs  # `int`
+        self.batch_size = batch_size    # `int`
+        self.block_size = block_size    # `int`
+        self.shuffle = shuffle          # `bool`
+        self.rng = rng                  # `numpy.random.Generator` or `None`
+
+    def permutation(self, n):
+        # returns a random permutation of `0, ..., n - 1` (`numpy.ndarray`)
+        if self.rng is not None:
+            return self.rng.permutation(n)
+        return torch.randperm(n).numpy()
+
+    def __iter__(self):
+        n_blocks = (self.n_subgraphs + self.block_size - 1) // self.block_size
+        if self.shuffle:
+            block_order = self.permutation(n_blocks).tolist()
+        else:
+            block_order = range(n_blocks)
+
+        for block_idx in block_order:
+            start = block_idx * self.block_size
+            end = min(start + self.block_size, self.n_subgraphs)
+            if self.shuffle:
+                block = start + self.permutation(end - start)
+            else:
+                block = np.arange(start, end)
+            for batch_start in range(0, len(block), self.batch_size):
+                yield np.sort(block[batch_start:batch_start + self.batch_size])
+
+    def __len__(self):
+        # returns the number of batches
+        n_blocks = self.n_subgraphs // self.block_size
+        n_rem = self.n_subgraphs % self.block_size
+        n_batch_per_block = (self.block_size + self.batch_size - 1) // self.batch_size
+        n_last = (n_rem + self.batch_size - 1) // self.batch_size
+        return n_batch_per_block * n_blocks + n_last
+
+
+class MemmapBlockDataLoader:
+    """ Alternative to `BlockDataLoader` (and `BlockDataFragmentLoader`) for a
+    `MemmapDataset`. Instead of a new inner `DataLoader` per block, a single
+    `DataLoader` fetches whole batches (drawn by a `BlockBatchSampler`), so the
+    workers keep prefetching batches across block boundaries, and (from PyTorch
+    1.7) are kept alive between epochs.
+    """
+    def __init__(self, dataset, batch_size=100, block_size=10000,
+                 shuffle=True, n_workers=0, pin_memory=True, rng=None, prefetch_factor=2):
+
+        # define variables to be used throughout dataloading
+        self.dataset = dataset        # `MemmapDataset` object
+        self.batch_size = batch_size  # `int`
+        self.block_size = block_size  # `int`
+        self.sampler = BlockBatchSampler(len(self.dataset),
+                                         batch_size=batch_size,
+                                         block_size=block_size,
+                                         shuffle=shuffle,
+                                         rng=rng)
+
+        # `batch_size=None`, since the sampler already yields whole batches
+        worker_kwargs = {}
+        if n_workers > 0 and KEEPS_WORKERS:
+            worker_kwargs = {"persistent_workers": True, "prefetch_factor": prefetch_factor}
+        self.loader = torch.utils.data.DataLoader(self.dataset,
+                                                  batch_size=None,
+                                                  sampler=self.sampler,
+                                                  num_workers=n_workers,
+                                                  pin_memory=pin_memory,
+                                                  **worker_kwargs)
+
+    @property
+    def rng(self):
+        return self.sampler.rng
+
+    @rng.setter
+    def rng(self, rng):
+        # the sampler draws the indices in the main process, so a new generator
+        # (e.g. set by `PairedBlockDataLoader`) takes effect from the next epoch
+        self.sampler.rng = rng
+
+    def __iter__(self):
+        return iter(self.loader)
+
+    def __len__(self):
+        # returns the number of batches in the DataLoader
+        return len(self.sampler)
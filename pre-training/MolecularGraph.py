@@ -417,17 +417,25 @@ class PreprocessingGraph(MolecularGraph):
           is the set of implicit Hs, C is the set of chiral states, and B is
           the set of bond types.
         """
-        # **note: "idx" = "idx", "idc" == "indices"
+        # the decoding APD is the one-hot encoding of the decoding action
+        apd = np.zeros(int(np.prod(self.C.dim_f_add)) + int(np.prod(self.C.dim_f_conn)) + 1, dtype=int)
+        apd[self.get_decoding_action()] = 1
+        return apd
+
+    def get_decoding_action(self):
+        """ Sparse counterpart of `get_decoding_APD()`. Since the decoding APD
+        contains a single nonzero element, it can be represented compactly by
+        the index of that element in the flattened APD (the "action index").
+
+        Returns:
+          action_idx (int) : Index of the nonzero element in the decoding APD
+            returned by `get_decoding_APD()`.
+        """
         last_node_idx = self.n_nodes - 1  # zero-indexing
 
         # determine the indices of the atom descriptors # (i.e. atom type)
         fv_nonzero_idc = self.get_nonzero_feature_indices(node_idx=last_node_idx)
 
-        # initialize action probability distribution (APD)
-        f_add = np.zeros(self.C.dim_f_add, dtype=np.int32)
-
-        f_conn = np.zeros(self.C.dim_f_conn, dtype=np.int32)
-
         # determine which nodes are bonded
         bonded_nodes = []
         for bond_type in range(self.n_edge_features):
@@ -444,21 +452,33 @@ class PreprocessingGraph(MolecularGraph):
 
             if degree > 1:
                 # if multiple bonds to one node first add bonds one by one
-                # (modify `f_conn`)
-                f_conn[v_idx, bond_type_forming] = 1
-
+                # ("connect" action; `f_conn` comes after `f_add` in the APD)
+                action_idx = int(np.prod(self.C.dim_f_add)) + int(
+                    np.ravel_multi_index((v_idx, bond_type_forming), self.C.dim_f_conn)
+                )
             else:
                 # if only bound to one other node, bond and node addition
-                # occurs in one move (modify `f_add`)
-                f_add[tuple([v_idx] + fv_nonzero_idc + [bond_type_forming])] = 1
+                # occurs in one move ("add" action, bonding to node `v_idx`)
+                action_idx = int(np.ravel_multi_index(
+                    tuple([v_idx] + fv_nonzero_idc + [bond_type_forming]), self.C.dim_f_add
+                ))
         else:
             # if it is the last node in the graph, node addition occurs in one
-            # move (modify `f_add`); uses a dummy edge to "connect" to node 0
-            f_add[tuple([0] + fv_nonzero_idc + [0])] = 1
+            # move ("add" action); uses a dummy edge to "connect" to node 0
+            action_idx = int(np.ravel_multi_index(
+                tuple([0] + fv_nonzero_idc + [0]), self.C.dim_f_add
+            ))
 
-        # concatenate `f_add`, `f_conn`, and `f_term` (`f_term`==0)
-        apd = np.concatenate((f_add.ravel(), f_conn.ravel(), np.array([0])))
-        return apd
+        return action_idx
+
+    def get_final_decoding_action(self):
+        """ Sparse counterpart of `get_final_decoding_APD()`.
+
+        Returns:
+          action_idx (int) : Index of the "terminate" element (the last
+            element) in the flattened APD.
+        """
+        return int(np.prod(self.C.dim_f_add)) + int(np.prod(self.C.dim_f_conn))
 
     def get_final_decoding_APD(self):
         """ For a given subgraph along a decoding route for a `PreprocessingGraph`,
@@ -474,13 +494,9 @@ class PreprocessingGraph(MolecularGraph):
           f_term (int) : Terminate APD. Scalar (1, since terminating) indicating
             the probability of terminating the graph generation.
         """
-        # initialize action probability distribution (APD)
-        f_add = np.zeros(self.C.dim_f_add, dtype=np.int32)
-
-        f_conn = np.zeros(self.C.dim_f_conn, dtype=np.int32)
-
-        # concatenate `f_add`, `f_conn`, and `f_term` (`f_term`==0)
-        apd = np.concatenate((f_add.ravel(), f_conn.ravel(), np.array([1])))
+        # the final decoding APD is the one-hot encoding of the "terminate" action
+        apd = np.zeros(int(np.prod(self.C.dim_f_add)) + int(np.prod(self.C.dim_f_conn)) + 1, dtype=int)
+        apd[self.get_final_decoding_action()] = 1
         return apd
 
     def get_graph_state(self):
@@ -789,16 +805,16 @@ class TrainingGraph(MolecularGraph):
         self.node_features = atom_feature_vector.unsqueeze(dim=0)
 
         self.edge_features = torch.Tensor([[[0] * self.n_edge_features]],
-                                          device="cuda")
+                                          device=self.C.device)
 
         # initialize the padded graph representation arrays
         node_features_padded = torch.zeros((self.C.max_n_nodes,
                                             self.C.n_node_features),
-                                           device="cuda")
+                                           device=self.C.device)
         edge_features_padded = torch.zeros((self.C.max_n_nodes,
                                             self.C.max_n_nodes,
                                             self.C.n_edge_features),
-                                           device="cuda")
+                                           device=self.C.device)
 
         # pad up to size of largest graph
         node_features_padded[:self.n_nodes, :] = self.node_features
@@ -13,8 +13,10 @@ from rdkit import Chem
 # load program-specific functions
 import analyze as anal
 import preprocessing as prep
-from BlockDatasetLoader import BlockDataLoader, HDFDataset,BlockDataFragmentLoader,HDFFragmentDataset
+from BlockDatasetLoader import BlockDataLoader, BlockDataFragmentLoader, PairedBlockDataLoader, get_HDF_dataset, \
+    MemmapDataset, MemmapBlockDataLoader
 import generate
+import generation_server
 import loss
 import models
 import util
@@ -60,6 +62,8 @@ class Workflow:
         self.test_dataloader = None
         self.train_dataloader = None
         self.valid_dataloader = None
+        self.train_paired_dataloader = None
+        self.valid_paired_dataloader = None
 
         self.ts_properties = None
         self.current_epoch = None
@@ -122,32 +126,53 @@ class Workflow:
         if data_description is None:
             data_description = "data"
         print(f"* Loading preprocessed {data_description}.", flush=True)
-        if fragment:
-            dataset = HDFFragmentDataset(hdf_path)
+        if self.C.dataset_backend == "memmap":
+            dataset_names = ["nodes", "edges"] if fragment else ["nodes", "edges", "APDs"]
+            dataset = MemmapDataset(hdf_path, dataset_names=dataset_names)
         else:
-
-            dataset = HDFDataset(hdf_path)
-        fragment_dataset = HDFFragmentDataset(hdf_path)
+            dataset = get_HDF_dataset(hdf_path, fragment=fragment)
         if data_description == "training set":
             self.n_subgraphs = len(dataset)
-        if fragment:
+        if self.C.dataset_backend == "memmap":
+            dataloader = MemmapBlockDataLoader(dataset=dataset,
+                                               batch_size=self.C.batch_size,
+                                               block_size=self.C.block_size,
+                                               shuffle=True,
+                                               n_workers=self.C.n_workers,
+                                               pin_memory=self.C.device != "cpu",
+                                               prefetch_factor=self.C.prefetch_factor)
+        elif fragment:
             dataloader = BlockDataFragmentLoader(dataset=dataset,
                                      batch_size=self.C.batch_size,
                                      block_size=self.C.block_size,
                                      shuffle=True,
                                      n_workers=self.C.n_workers,
-                                     pin_memory=True)
+                                     pin_memory=self.C.device != "cpu")
         else:
             dataloader = BlockDataLoader(dataset=dataset,
                                      batch_size=self.C.batch_size,
                                      block_size=self.C.block_size,
                                      shuffle=True,
                                      n_workers=self.C.n_workers,
-                                     pin_memory=True)
+                                     pin_memory=self.C.device != "cpu")
         self.print_time_elapsed()
 
         return dataloader
 
+    def get_paired_dataloader(self, dataloader, fragment_dataloader, max_batches=None):
+        """ Pairs a graph dataloader with a fragment dataloader, so that the two
+        can be iterated over in lockstep (see `PairedBlockDataLoader`).
+
+        Args:
+          dataloader (BlockDataLoader) : Loads the linker graphs.
+          fragment_dataloader (BlockDataFragmentLoader) : Loads the fragments.
+          max_batches (int or None) : If specified, caps the number of batches
+            per epoch.
+        """
+        return PairedBlockDataLoader(graph_loader=dataloader,
+                                     fragment_loader=fragment_dataloader,
+                                     max_batches=max_batches)
+
     def get_ts_properties(self):
         """ Loads the training sets properties from CSV as a dictionary, properties
         are used later for model evaluation.
@@ -164,7 +189,7 @@ class Workflow:
         if self.C.restart:
             print("-- Loading model from previous saved state.", flush=True)
             self.restart_epoch = util.get_restart_epoch()
-            self.model = torch.load(f"{job_dir}model_restart_{self.restart_epoch}.pth")
+            self.model = torch.load(f"{job_dir}model_restart_{self.restart_epoch}.pth", map_location=self.C.device)
 
             print(
                 f"-- Backing up as "
@@ -200,7 +225,7 @@ class Workflow:
             div_factor= 1. / self.C.max_rel_lr,
             final_div_factor = 1. / self.C.min_rel_lr,
             pct_start = 0.05,
-            total_steps=self.C.epochs * (self.n_subgraphs // self.C.batch_size + 1),
+            total_steps=self.C.epochs * len(self.train_paired_dataloader),
             epochs=self.C.epochs
         )
 
@@ -229,7 +254,13 @@ class Workflow:
             self.preprocess_train_data()
         else:  # restart existing preprocessing job
             # as some datasets may have already been preprocessed, check for this
-            if os.path.exists(self.train_h5_path + ".chunked") or os.path.exists(self.test_h5_path):
+            if self.C.n_preprocessing_workers is not None:
+                # sharded preprocessing skips finished datasets and shards
+                print(f"-- Restarting sharded preprocessing job.", flush=True)
+                self.preprocess_valid_data()
+                self.preprocess_test_data()
+                self.preprocess_train_data()
+            elif os.path.exists(self.train_h5_path + ".chunked") or os.path.exists(self.test_h5_path):
                 print(
                     f"-- Restarting preprocessing job from 'train.h5' "
                     f"(skipping over 'test.h5' and 'valid.h5' as they seem "
@@ -279,8 +310,15 @@ class Workflow:
             data_description = 'valid fragment set',
             fragment = True
         )
-
-
+        self.train_paired_dataloader = self.get_paired_dataloader(
+            dataloader=self.train_dataloader,
+            fragment_dataloader=self.train_fragment_dataloader,
+            max_batches=self.C.max_batches_per_epoch
+        )
+        self.valid_paired_dataloader = self.get_paired_dataloader(
+            dataloader=self.valid_dataloader,
+            fragment_dataloader=self.valid_fragment_dataloader
+        )
 
         self.get_ts_properties()
 
@@ -302,6 +340,7 @@ class Workflow:
             else:
                 util.write_model_status(score="NA")  # score not computed
 
+        util.get_step_profiler().close()
         self.print_time_elapsed()
 
     def generation_phase(self):
@@ -312,7 +351,7 @@ class Workflow:
         self.restart_epoch = self.C.generation_epoch
         print(f"* Loading model from previous saved state (Epoch {self.restart_epoch}).", flush=True)
         model_path = self.C.job_dir + f"model_restart_{self.restart_epoch}.pth"
-        self.model = torch.load(model_path)
+        self.model = torch.load(model_path, map_location=self.C.device)
 
         self.model.eval()
         with torch.no_grad():
@@ -320,6 +359,24 @@ class Workflow:
 
         self.print_time_elapsed()
 
+    def serving_phase(self):
+        """ Serves molecules generated by a pre-trained model over HTTP, keeping
+        the model loaded between requests (see `generation_server.serve()`).
+        """
+        self.restart_epoch = self.C.generation_epoch
+        print(f"* Loading model from previous saved state (Epoch {self.restart_epoch}).", flush=True)
+        model_path = self.C.job_dir + f"model_restart_{self.restart_epoch}.pth"
+        self.model = torch.load(model_path, map_location=self.C.device)
+        self.model.eval()
+
+        generation_server.serve(model=self.model,
+                                host=self.C.server_host,
+                                port=self.C.server_port,
+                                max_batch_size=self.C.server_max_batch_size,
+                                max_latency=self.C.server_max_latency)
+
+        self.print_time_elapsed()
+
 
     def generate_linker_fragments_graphs(self, n_samples, evaluation=False, epoch_key=None):
         """ Generates `n_graphs` molecular graphs and evaluates them. Generates
@@ -334,6 +391,11 @@ class Workflow:
         if n_samples % self.C.batch_size != 0:
             n_generation_batches += 1
 
+        # beam search generates the `beam_width` most likely molecules of each
+        # beam group at once (`n_samples` is not used)
+        if self.C.generation_strategy == "beam":
+            n_generation_batches = 1
+
         # generate graphs in batches
         for idx in range(0, n_generation_batches):
             print("Batch", idx+1, "of", n_generation_batches)
@@ -343,95 +405,30 @@ class Workflow:
             # a : action NLLs (torch.Tensor)
             # f : final NLLs (torch.Tensor)
             # t : termination status (torch.Tensor)
-            g, a, f, t,_,_,_,two_idx = generate.build_graphs(model=self.model,
-                                               n_graphs_to_generate=generation_batch_size,
-                                               batch_size=generation_batch_size)
-
-            # analyze properties of new graphs and save results
-            smi_list = []
-            from rdkit import Chem
-            from rdkit.Chem import AllChem
-            import random
-
-            for idxm, molecular_graph in enumerate(g):
-
+            if self.C.generation_strategy == "beam":
+                g, a, f, t,_,_,_,two_idx = generate.beam_search(model=self.model,
+                                                   beam_width=self.C.beam_width,
+                                                   n_groups=self.C.beam_groups,
+                                                   diversity_penalty=self.C.beam_diversity_penalty)
+            else:
+                g, a, f, t,_,_,_,two_idx = generate.build_graphs(model=self.model,
+                                                   n_graphs_to_generate=generation_batch_size,
+                                                   batch_size=generation_batch_size)
+
+            # join the generated linkers to the fragments, and save the joined
+            # molecules (those which could not be joined are reported by
+            # `util.stitch_linkers()`)
+            linker_smi_list = []
+            for molecular_graph in g:
                 mol = molecular_graph.get_molecule()
-                smi = Chem.MolToSmiles(mol)
-                smi_list.append(smi)
-                try:
-                    mol.UpdatePropertyCache(strict=False)
-                    Chem.SanitizeMol(mol)
-                    
-                    
-                except (ValueError, RuntimeError, AttributeError):
-                    pass
-            for id,atom_idx in enumerate(two_idx):
-                try:
-                    fragments_smi = self.C.generate_fragments
-                    fragments = Chem.MolFromSmiles(fragments_smi)
-                    linker_smi_1 = smi_list[id]
-                    
-                    linker = Chem.MolFromSmiles(linker_smi_1)
-                    #connect
-                    combo = Chem.CombineMols(fragments,linker)
-                    idx_list = []
-                    for atom in fragments.GetAtoms():
-                        if atom.GetSymbol() == '*':
-                            f2 = atom.GetIdx()
-                            idx_list.append(f2)
-
-                    du = Chem.MolFromSmiles('*')
-                    combo = AllChem.DeleteSubstructs(combo,du)
-                    edcombo = Chem.EditableMol(combo)
-                    try:
-                        edcombo.AddBond(idx_list[0],atom_idx[0]+idx_list[1]-2,order=Chem.rdchem.BondType.SINGLE)
-                        edcombo.AddBond(idx_list[1]-2,atom_idx[1]+idx_list[1]-2,order=Chem.rdchem.BondType.SINGLE)
-                        final_connect_mol = edcombo.GetMol()
-                    except:
-                
-                        fragment_smi_0 = fragments_smi.split('.')[0]
-                        fragment_smi_1 = fragments_smi.split('.')[1]
-                        
-                        match = '****sfs'
-                        for _ in range(1000):
-                            if not Chem.MolFromSmiles(match):
-                                s = linker_smi_1
-                                inStr = "(*)"
-                                for i in range(2):
-                                    index = random.randint(0, len(s))
-                                    s = "".join([s[:index], inStr, s[index:]])
-                                match = s
-                            else:
-                                break
-                        smi_linker = []
-                        for _ in range(1000):
-                            smi_link = Chem.MolToSmiles(Chem.MolFromSmiles(s), doRandom=True)
-                            if smi_link[0] == "*" and smi_link[-1] == '*':
-                                smi_linker.append(smi_link)
-                        
-                            
-                        final_smi = (fragment_smi_1 + smi_linker[0] + fragment_smi_0).replace("*", "")
-
-                        final_connect_mol = Chem.MolFromSmiles(final_smi)
-                        
-                    final_connect_smi = Chem.MolToSmiles(final_connect_mol)
-
-                except:
-                    fragment_smi_0 = fragments_smi.split('.')[0]
-                    fragment_smi_1 = fragments_smi.split('.')[1]
-                        
-                    final_connect_smi = (fragment_smi_1 + fragment_smi_0).replace("*", "")
-
-                    
-                smi_filename = self.C.job_dir + f"generation/generation_epoch{fragments_smi}.smi"
-                f9 = open(smi_filename,'a')
-                try:
-                    f9.write(final_connect_smi+'\n')
-                    f9.close()
-                except:
-                    f9.write('C'+'\n')
-                    f9.close()
+                linker_smi_list.append(Chem.MolToSmiles(mol) if mol is not None else "")
+            stitch_results = util.stitch_linkers(self.C.generate_fragments, linker_smi_list, two_idx.tolist())
 
+            smi_filename = self.C.job_dir + f"generation/generation_epoch{self.C.generate_fragments}.smi"
+            with open(smi_filename, "a") as smi_file:
+                for result in stitch_results:
+                    if result.smiles is not None:
+                        smi_file.write(result.smiles + "\n")
 
             # keep track of NLLs per action if `evaluation`==True
             # note that only NLLs for the first batch are kept, as only a few
@@ -447,7 +444,8 @@ class Workflow:
         self.restart_epoch = util.get_restart_epoch()
         print(f"* Loading model from previous saved state (Epoch {self.restart_epoch}).", flush=True)
         self.model = torch.load(
-            self.C.job_dir + f"model_restart_{self.restart_epoch}.pth"
+            self.C.job_dir + f"model_restart_{self.restart_epoch}.pth",
+            map_location=self.C.device,
         )
 
         self.model.eval()
@@ -478,7 +476,7 @@ class Workflow:
         for epoch in self.C.generation_epoch:
             self.restart_epoch = epoch
             print(f"* Loading model from previous saved state (Epoch {self.restart_epoch}).", flush=True)
-            self.model = torch.load(self.C.job_dir + f"model_restart_{self.restart_epoch}.pth")
+            self.model = torch.load(self.C.job_dir + f"model_restart_{self.restart_epoch}.pth", map_location=self.C.device)
 
             self.model.eval()
             with torch.no_grad():
@@ -519,20 +517,15 @@ class Workflow:
 
     def compute_valid_loss_epoch(self):
         
-        loss_tensor = torch.zeros(len(self.valid_dataloader), device="cuda")
+        loss_tensor = torch.zeros(len(self.valid_paired_dataloader), device=self.C.device)
 
         # each batch consists of `batch_size` molecules
         # **note: "idx" == "index"
-        for batch_idx in tqdm(range(len(self.valid_dataloader))):
-            
-            
-            _,batch_linker = list(enumerate(self.valid_dataloader))[batch_idx]
-            _,batch_fragment = list(enumerate(self.valid_fragment_dataloader))[1]
-            
-
-       
-            batch_linker = [b.cuda(non_blocking=True) for b in batch_linker]
-            batch_fragment = [b.cuda(non_blocking=True) for b in batch_fragment]
+        for batch_idx, (batch_linker, batch_fragment) in tqdm(
+            enumerate(self.valid_paired_dataloader), total=len(self.valid_paired_dataloader)
+        ):
+            batch_linker = [b.to(self.C.device, non_blocking=True) for b in batch_linker]
+            batch_fragment = [b.to(self.C.device, non_blocking=True) for b in batch_fragment]
             nodes_linker, edges_linker, target_output = batch_linker
             nodes_fragment, edges_fragment = batch_fragment
                 
@@ -560,6 +553,15 @@ class Workflow:
             hdf_path=self.valid_h5_path,
             data_description="validation set"
         )
+        self.valid_fragment_dataloader = self.get_dataloader(
+            hdf_path=self.valid_fragment_h5_path,
+            data_description = 'valid fragment set',
+            fragment = True
+        )
+        self.valid_paired_dataloader = self.get_paired_dataloader(
+            dataloader=self.valid_dataloader,
+            fragment_dataloader=self.valid_fragment_dataloader
+        )
 
         with open(self.C.job_dir + "valid-loss.csv", "a") as output_file:
             output_file.write(f"Epoch \t Valid loss\n")
@@ -568,30 +570,21 @@ class Workflow:
         for epoch in self.C.generation_epoch:
             self.restart_epoch = epoch
             print(f"* Loading model from previous saved state (Epoch {self.restart_epoch}).", flush=True)
-            self.model = torch.load(self.C.job_dir + f"model_restart_{self.restart_epoch}.pth")
+            self.model = torch.load(self.C.job_dir + f"model_restart_{self.restart_epoch}.pth", map_location=self.C.device)
             
 
             self.model.eval()
             with torch.no_grad():
-                loss_tensor = torch.zeros(len(self.valid_dataloader), device="cuda")
+                loss_tensor = torch.zeros(len(self.valid_paired_dataloader), device=self.C.device)
         
 
                 # each batch consists of `batch_size` molecules
                 # **note: "idx" == "index"
-
-                for batch_idx in tqdm(range(len(self.valid_dataloader))):
-            
-            
-                    _,batch_linker = list(enumerate(self.valid_dataloader))[batch_idx]
-                    _,batch_fragment = list(enumerate(self.valid_fragment_dataloader))[1]
-                    
-
-                # for batch_idx, batch in tqdm(
-                #     enumerate(self.train_dataloader), total=len(self.train_dataloader)
-                # ):
-                    
-                    batch_linker = [b.cuda(non_blocking=True) for b in batch_linker]
-                    batch_fragment = [b.cuda(non_blocking=True) for b in batch_fragment]
+                for batch_idx, (batch_linker, batch_fragment) in tqdm(
+                    enumerate(self.valid_paired_dataloader), total=len(self.valid_paired_dataloader)
+                ):
+                    batch_linker = [b.to(self.C.device, non_blocking=True) for b in batch_linker]
+                    batch_fragment = [b.to(self.C.device, non_blocking=True) for b in batch_fragment]
                     nodes_linker, edges_linker, target_output = batch_linker
                     nodes_fragment, edges_fragment = batch_fragment
                 
@@ -715,17 +708,14 @@ class Workflow:
         """ Performs one training epoch.
         """
         print(f"* Training epoch {self.current_epoch}.", flush=True)
-        loss_tensor = torch.zeros(len(self.train_dataloader), device="cuda")
+        loss_tensor = torch.zeros(len(self.train_paired_dataloader), device=self.C.device)
         
 
         self.model.train()  # ensure model is in train mode
-        train_fragment_filename = '/train_fragment.smi'
-        train_groundtruth_filename = '/train_groundtruth.smi'
-
-        f1 = open(train_fragment_filename)
-        trainfragment_datalist = [smi.rstrip() for smi in f1]
-        f2 = open(train_groundtruth_filename)
-        traingroundtruth_datalist = [smi.rstrip() for smi in f2]
+        with open(self.C.training_fragment_set) as f1:
+            trainfragment_datalist = [smi.rstrip() for smi in f1]
+        with open(self.C.training_groundtruth_set) as f2:
+            traingroundtruth_datalist = [smi.rstrip() for smi in f2]
 
        
 
@@ -735,55 +725,49 @@ class Workflow:
 
         
         
-        for batch_idx in tqdm(range(len(self.train_dataloader))):
-            
-            
-            _,batch_linker = list(enumerate(self.train_dataloader))[batch_idx]
-            _,batch_fragment = list(enumerate(self.train_fragment_dataloader))[1]
-            
-
-        # for batch_idx, batch in tqdm(
-        #     enumerate(self.train_dataloader), total=len(self.train_dataloader)
-        # ):
+        profiler = util.get_step_profiler()
+        for batch_idx, (batch_linker, batch_fragment) in tqdm(
+            enumerate(self.train_paired_dataloader), total=len(self.train_paired_dataloader)
+        ):
             n_processed_batches += 1
-            batch_linker = [b.cuda(non_blocking=True) for b in batch_linker]
-            batch_fragment = [b.cuda(non_blocking=True) for b in batch_fragment]
-            nodes_linker, edges_linker, target_output = batch_linker
-            nodes_fragment, edges_fragment = batch_fragment
-            
-            
-            fragment_smi_list = trainfragment_datalist[batch_idx*self.C.batch_size : (batch_idx+1)*self.C.batch_size]
-            grountruth_smi_list = traingroundtruth_datalist[batch_idx*self.C.batch_size : (batch_idx+1)*self.C.batch_size]
-
-
-
-            # return the output
-            output,linker_loss ,_= self.model(nodes_linker,edges_linker, nodes_fragment, edges_fragment,is_train=True,fragment_smi_list=fragment_smi_list,grountruth_smi_list=grountruth_smi_list,epoch=self.current_epoch)
-
-           
-            
-            
-            # clear the gradients of all optimized `(torch.Tensor)`s
-            self.model.zero_grad()
-            self.optimizer.zero_grad()
-            # compute the loss
-            
-           
-            batch_loss = loss.graph_generation_loss(
-                output=output,
-                target_output=target_output,
-            )
-            linker_loss = torch.mean(linker_loss.float())
-            batch_loss = batch_loss+linker_loss
+            with profiler.step(n_processed_batches):
+                with profiler.span("transfer"):
+                    batch_linker = [b.to(self.C.device, non_blocking=True) for b in batch_linker]
+                    batch_fragment = [b.to(self.C.device, non_blocking=True) for b in batch_fragment]
+                nodes_linker, edges_linker, target_output = batch_linker
+                nodes_fragment, edges_fragment = batch_fragment
+
+                fragment_smi_list = trainfragment_datalist[batch_idx*self.C.batch_size : (batch_idx+1)*self.C.batch_size]
+                grountruth_smi_list = traingroundtruth_datalist[batch_idx*self.C.batch_size : (batch_idx+1)*self.C.batch_size]
+
+                # return the output (the model times its generation and
+                # stitching phases itself)
+                with profiler.span("forward"):
+                    output,linker_loss ,_= self.model(nodes_linker,edges_linker, nodes_fragment, edges_fragment,is_train=True,fragment_smi_list=fragment_smi_list,grountruth_smi_list=grountruth_smi_list,epoch=self.current_epoch)
+
+                # clear the gradients of all optimized `(torch.Tensor)`s
+                self.model.zero_grad()
+                self.optimizer.zero_grad()
+
+                # compute the loss
+                with profiler.span("loss"):
+                    batch_loss = loss.graph_generation_loss(
+                        output=output,
+                        target_output=target_output,
+                    )
+                    linker_loss = torch.mean(linker_loss.float())
+                    batch_loss = batch_loss+linker_loss
 
-            loss_tensor[batch_idx] = batch_loss
+                    loss_tensor[batch_idx] = batch_loss
 
-            # backpropagate
-            batch_loss.backward()
-            self.optimizer.step()
+                # backpropagate
+                with profiler.span("backward"):
+                    batch_loss.backward()
+                with profiler.span("optimizer"):
+                    self.optimizer.step()
 
-            # update the learning rate
-            self.scheduler.step()
+                    # update the learning rate
+                    self.scheduler.step()
 
 
         util.write_model_status(
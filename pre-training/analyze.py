@@ -158,7 +158,7 @@ def get_edge_feature_distribution(molecular_graphs):
     """
     # initialize histogram
     try:
-        edge_feature_hist = torch.zeros(C.n_edge_features, device="cuda")
+        edge_feature_hist = torch.zeros(C.n_edge_features, device=C.device)
     except:
         edge_feature_hist = torch.zeros(C.n_edge_features, device="cpu")
 
@@ -407,7 +407,7 @@ def get_n_edges_distribution(molecular_graphs, n_edges_to_bin=10):
     """
     # initialize and populate histogram (last bin is for # num edges > `n_edges_to_bin`)
     try:
-        n_edges_histogram = torch.zeros(n_edges_to_bin, device="cuda")
+        n_edges_histogram = torch.zeros(n_edges_to_bin, device=C.device)
     except:
         n_edges_histogram = torch.zeros(n_edges_to_bin, device="cpu")
 
@@ -451,7 +451,7 @@ def get_n_nodes_distribution(molecular_graphs):
     """
     # initialize and populate histogram
     try:
-        n_nodes_histogram = torch.zeros(C.max_n_nodes + 1, device="cuda")
+        n_nodes_histogram = torch.zeros(C.max_n_nodes + 1, device=C.device)
     except:
         n_nodes_histogram = torch.zeros(C.max_n_nodes + 1, device="cpu")
 
@@ -479,7 +479,7 @@ def get_node_feature_distribution(molecular_graphs):
     """
     # sum up all node feature vectors to get an un-normalized histogram
     if type(molecular_graphs[0].node_features) == torch.Tensor:
-        nodes_hist = torch.zeros(C.n_node_features, device="cuda")
+        nodes_hist = torch.zeros(C.n_node_features, device=C.device)
     else:
         nodes_hist = np.zeros(C.n_node_features)
 
@@ -528,8 +528,8 @@ def get_validation_nll(dataloader, model):
     """
     Softmax = torch.nn.Softmax(dim=1)
     n_samples = min(100000, C.n_samples)  #  number of dataloader structures to evaluate
-    nlls = torch.zeros(n_samples*(C.max_n_nodes+5), device="cuda")
-    n_structures = torch.zeros(1, device="cuda")
+    nlls = torch.zeros(n_samples*(C.max_n_nodes+5), device=C.device)
+    n_structures = torch.zeros(1, device=C.device)
 
     # `batch` contains C.n_samples subgraphs during validation
     for idx, batch in enumerate(dataloader):
@@ -541,7 +541,7 @@ def get_validation_nll(dataloader, model):
         if idx * C.batch_size > n_samples:
             break
 
-        batch = [b.cuda(non_blocking=True) for b in batch]
+        batch = [b.to(C.device, non_blocking=True) for b in batch]
         nodes, edges, target_output = batch
 
         # index [0] takes the first tensor output of torch.max (containing the
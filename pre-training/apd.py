@@ -1,4 +1,5 @@
 # load general packages and functions
+import numpy as np
 import torch
 import copy
 
@@ -67,6 +68,69 @@ def get_decoding_route_state(molecular_graph, subgraph_idx):
     return decoding_graph, decoding_APD
 
 
+def get_decoding_route(molecular_graph, sparse_APDs=False):
+    """ Generator over the full decoding route of the input `molecular_graph`.
+    Yields the same states, in the same order, as calling
+    `get_decoding_route_state()` for each `subgraph_idx` in
+    `range(get_decoding_route_length(molecular_graph))`, but copies the graph
+    only once and deletes one edge or node at a time in place, instead of
+    re-truncating a fresh copy of the graph for every index.
+
+    Args:
+      molecular_graph (PreprocessingGraph) : Molecule to be decoded.
+      sparse_APDs (bool) : If specified, yields the decoding APDs as action
+        indices (see `PreprocessingGraph.get_decoding_action()`) instead of
+        dense vectors. The dense APD can be recovered using `get_dense_APD()`.
+
+    Yields:
+      decoding_graph (list) : Graph representation, structured as [X, E].
+        These are copies, so they remain valid as the route is expanded.
+      decoding_APD (np.array or int) : Contains the decoding APD, structured
+        as a concatenation of flattened (f_add, f_conn, f_term), or the
+        corresponding action index if `sparse_APDs`==True.
+    """
+    n_decoding_graphs = get_decoding_route_length(molecular_graph=molecular_graph)
+    molecular_graph = copy.deepcopy(molecular_graph)
+
+    # the first subgraph is the full graph, whose APD is "terminate"
+    if sparse_APDs:
+        decoding_APD = molecular_graph.get_final_decoding_action()
+    else:
+        decoding_APD = molecular_graph.get_final_decoding_APD()
+
+    X, E = molecular_graph.get_graph_state()
+    yield [X.copy(), E.copy()], decoding_APD
+
+    for _ in range(1, n_decoding_graphs):
+        # get the APD before the truncation (since APD says how to get to the
+        # *next* graph)
+        if sparse_APDs:
+            decoding_APD = molecular_graph.get_decoding_action()
+        else:
+            decoding_APD = molecular_graph.get_decoding_APD()
+        molecular_graph.truncate_graph()
+
+        X, E = molecular_graph.get_graph_state()
+        yield [X.copy(), E.copy()], decoding_APD
+
+
+def get_dense_APD(action_idx):
+    """ Converts an action index (see `get_decoding_route()`) into the dense,
+    flattened decoding APD.
+
+    Args:
+      action_idx (int) : Index of the nonzero element in the APD.
+
+    Returns:
+      decoding_APD (np.array) : Contains the decoding APD, structured as a
+        concatenation of flattened (f_add, f_conn, f_term).
+    """
+    decoding_APD = np.zeros(int(C.dim_f_add_p0) + int(C.dim_f_conn_p0) + 1, dtype=int)
+    decoding_APD[action_idx] = 1
+
+    return decoding_APD
+
+
 def split_APD_vector(APD_output, as_vec):
     """ Reshapes and splits the flat APD tensor into separate `f_add`, `f_conn`,
     and `f_term` tensors.
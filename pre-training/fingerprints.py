@@ -0,0 +1,193 @@
+# load general packages and functions
+import collections
+import numpy as np
+from rdkit import Chem, DataStructs
+from rdkit.Chem import AllChem
+
+# defines the engine computing the Tanimoto similarities used as rewards/scores
+# (count-based Morgan fingerprints with feature invariants, i.e. FCFP4); the
+# fingerprints of a whole batch are packed into flat arrays of sorted keys and
+# counts, and the similarities of the batch are computed at once with numpy,
+# instead of one molecule at a time; the fingerprints of the (fixed) reference
+# molecules are cached
+
+
+class FingerprintBatch:
+    """ Count-based fingerprints of a batch of molecules, packed in CSR form: the
+    sorted (nonzero) keys of molecule `i` are `keys[offsets[i]:offsets[i + 1]]`,
+    and their counts are in the same slice of `counts`. Molecules which could not
+    be parsed have no keys, and are marked as invalid.
+
+    Args:
+      keys (numpy.ndarray) : Keys (`uint64`) of all molecules.
+      counts (numpy.ndarray) : Counts (`int64`) of all molecules.
+      offsets (numpy.ndarray) : Start of each molecule in `keys`, plus the total.
+      valid (numpy.ndarray) : Whether each molecule could be parsed.
+    """
+    def __init__(self, keys, counts, offsets, valid):
+
+        self.keys = keys        # `numpy.ndarray` of `uint64`
+        self.counts = counts    # `numpy.ndarray` of `int64`
+        self.offsets = offsets  # `numpy.ndarray` of `int64`
+        self.valid = valid      # `numpy.ndarray` of `bool`
+
+    def __len__(self):
+        return len(self.valid)
+
+    @classmethod
+    def from_arrays(cls, fingerprints):
+        """ Packs a `list` of `(keys, counts)` tuples (`None` for invalid
+        molecules) into a `FingerprintBatch`.
+        """
+        empty = (np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64))
+        lengths = [0 if fp is None else len(fp[0]) for fp in fingerprints]
+        offsets = np.zeros(len(fingerprints) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(keys=np.concatenate([empty[0]] + [fp[0] for fp in fingerprints if fp is not None]),
+                   counts=np.concatenate([empty[1]] + [fp[1] for fp in fingerprints if fp is not None]),
+                   offsets=offsets,
+                   valid=np.array([fp is not None for fp in fingerprints], dtype=bool))
+
+    def rows(self):
+        """ Returns the index of the molecule of each key (`numpy.ndarray`).
+        """
+        return np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.offsets))
+
+    def totals(self):
+        """ Returns the sum of the counts of each molecule (`numpy.ndarray`).
+        """
+        return np.bincount(self.rows(), weights=self.counts, minlength=len(self))
+
+
+class FingerprintEngine:
+    """ Computes the count-based Tanimoto similarities of batches of molecules,
+    either to one reference each (`paired_similarity()`, as for the rewards of
+    the generated molecules, each compared to its own ground truth) or to a
+    single reference (`bulk_similarity()`, as for the SMILES-based scores). The
+    similarities are the same as those of `DataStructs.TanimotoSimilarity()`
+    on `AllChem.GetMorganFingerprint(mol, radius, useCounts=True,
+    useFeatures=use_features)`; with the 'numpy' backend, they are computed on
+    the packed fingerprints of the whole batch, and with the 'rdkit' backend,
+    with `DataStructs.BulkTanimotoSimilarity()` (or one pair at a time).
+
+    Args:
+      radius (int) : Radius of the Morgan fingerprints.
+      use_features (bool) : If specified, uses feature invariants (FCFP).
+      max_cache_size (int) : Maximum number of reference fingerprints kept in the
+        (least recently used) cache.
+      backend (str) : 'numpy', or 'rdkit'.
+    """
+    def __init__(self, radius=2, use_features=True, max_cache_size=100000, backend="numpy"):
+
+        if backend not in ("numpy", "rdkit"):
+            raise ValueError(f"Unknown fingerprint backend: {backend}. Please use 'numpy' or 'rdkit'.")
+
+        self.radius = radius                  # `int`
+        self.use_features = use_features      # `bool`
+        self.max_cache_size = max_cache_size  # `int`
+        self.backend = backend                # `str`
+        self.cache = collections.OrderedDict()  # SMILES -> fingerprint of a reference
+
+    def fingerprint(self, mol):
+        """ Returns the fingerprint of `mol` (`rdkit.Chem.Mol`, or `None`): a
+        `(keys, counts)` tuple of arrays with the 'numpy' backend, or the RDKit
+        fingerprint with the 'rdkit' backend, or `None` if `mol` is `None`.
+        """
+        if mol is None:
+            return None
+        fp = AllChem.GetMorganFingerprint(mol, self.radius, useCounts=True, useFeatures=self.use_features)
+        if self.backend == "rdkit":
+            return fp
+        elements = fp.GetNonzeroElements()
+        keys = np.fromiter(elements.keys(), dtype=np.uint64, count=len(elements))
+        counts = np.fromiter(elements.values(), dtype=np.int64, count=len(elements))
+        order = np.argsort(keys)
+        return keys[order], counts[order]
+
+    def reference_fingerprint(self, smiles):
+        """ Returns the (cached) fingerprint of the reference molecule `smiles`
+        (`str`), or `None` if it cannot be parsed.
+        """
+        if smiles in self.cache:
+            self.cache.move_to_end(smiles)
+            return self.cache[smiles]
+        fp = self.fingerprint(Chem.MolFromSmiles(smiles))
+        self.cache[smiles] = fp
+        if len(self.cache) > self.max_cache_size:
+            self.cache.popitem(last=False)
+        return fp
+
+    def paired_similarity(self, mols, ref_smiles):
+        """ Returns the similarity of each molecule in `mols` (`list` of
+        `rdkit.Chem.Mol`s, `None` for invalid molecules) to the reference with the
+        same index in `ref_smiles` (`list` of `str`s), as a `numpy.ndarray`; the
+        similarity is NaN where either molecule is invalid.
+        """
+        fps = [self.fingerprint(mol) for mol in mols]
+        ref_fps = [self.reference_fingerprint(smi) for smi in ref_smiles]
+
+        if self.backend == "rdkit":
+            return np.array([np.nan if fp is None or ref_fp is None else DataStructs.TanimotoSimilarity(ref_fp, fp)
+                             for fp, ref_fp in zip(fps, ref_fps)], dtype=np.float64)
+
+        batch = FingerprintBatch.from_arrays(fps)
+        ref_batch = FingerprintBatch.from_arrays(ref_fps)
+
+        # prefix each key with the index of its molecule, so that the matching
+        # keys of all pairs are found with a single (sorted) intersection
+        composite_keys = (batch.rows().astype(np.uint64) << np.uint64(32)) | batch.keys
+        ref_composite_keys = (ref_batch.rows().astype(np.uint64) << np.uint64(32)) | ref_batch.keys
+        common_keys, idc, ref_idc = np.intersect1d(composite_keys, ref_composite_keys,
+                                                   assume_unique=True, return_indices=True)
+        intersection = np.bincount((common_keys >> np.uint64(32)).astype(np.int64),
+                                   weights=np.minimum(batch.counts[idc], ref_batch.counts[ref_idc]),
+                                   minlength=len(batch))
+
+        similarity = tanimoto(intersection, batch.totals(), ref_batch.totals())
+        similarity[~(batch.valid & ref_batch.valid)] = np.nan
+        return similarity
+
+    def bulk_similarity(self, mols, ref_smiles):
+        """ Returns the similarity of each molecule in `mols` (`list` of
+        `rdkit.Chem.Mol`s, `None` for invalid molecules) to the single reference
+        `ref_smiles` (`str`), as a `numpy.ndarray`; the similarity is NaN where
+        either molecule is invalid.
+        """
+        fps = [self.fingerprint(mol) for mol in mols]
+        ref_fp = self.reference_fingerprint(ref_smiles)
+        similarity = np.full(len(fps), np.nan)
+        if ref_fp is None:
+            return similarity
+
+        if self.backend == "rdkit":
+            valid_idc = [idx for idx, fp in enumerate(fps) if fp is not None]
+            if valid_idc:
+                similarity[valid_idc] = DataStructs.BulkTanimotoSimilarity(ref_fp, [fps[idx] for idx in valid_idc])
+            return similarity
+
+        batch = FingerprintBatch.from_arrays(fps)
+        ref_keys, ref_counts = ref_fp
+
+        # look up each key in the (sorted) keys of the reference
+        positions = np.minimum(np.searchsorted(ref_keys, batch.keys), max(len(ref_keys) - 1, 0))
+        if len(ref_keys) > 0:
+            matches = ref_keys[positions] == batch.keys
+            shared_counts = np.where(matches, np.minimum(batch.counts, ref_counts[positions]), 0)
+        else:
+            shared_counts = np.zeros(len(batch.keys), dtype=np.int64)
+        intersection = np.bincount(batch.rows(), weights=shared_counts, minlength=len(batch))
+
+        similarity = tanimoto(intersection, batch.totals(), np.full(len(batch), ref_counts.sum()))
+        similarity[~batch.valid] = np.nan
+        return similarity
+
+
+def tanimoto(intersection, totals, ref_totals):
+    """ Returns the Tanimoto similarities (`numpy.ndarray`) given the summed
+    minimum counts of the shared keys and the summed counts of each fingerprint;
+    as in RDKit, the similarity is 0 if both fingerprints are empty.
+    """
+    union = totals + ref_totals - intersection
+    similarity = np.zeros(len(intersection))
+    np.divide(intersection, union, out=similarity, where=union > 1e-6)
+    return similarity
@@ -1,4 +1,6 @@
 # load general packages and functions
+import collections.abc
+import multiprocessing
 import numpy as np
 import torch
 import rdkit
@@ -16,44 +18,171 @@ from MolecularGraph import GenerationGraph
 
 
 
-def allocate_graph_tensors(n_total, batch_size):
-    """ Allocates tensors for the node features, edge features, NLLs, and
-    termination status for all graphs to be generated (**not only one batch**).
-    These then get filled in during the graph generation process.
+class GenerationWorkspace:
+    """ Buffers holding the graphs under construction and the finished graphs,
+    which are allocated once per call to `build_graphs()` and then updated in
+    place.
 
-    Args:
-      n_total (int) : Total number of graphs to generate (**not only batch**).
-      batch_size (int) : Batch size.
-
-    Returns:
-      nodes (torch.Tensor) : Node features tensor for all graphs.
-      edges (torch.Tensor) : Edge features tensor for all graphs.
-      n_nodes (torch.Tensor) : Number of nodes per graph in all graphs.
-      nlls (torch.Tensor) : Sampled NLL per action for all graphs.
-      generated_nlls (torch.Tensor) : Sampled NLLs per action for all finished
-        graphs.
-      properly_terminated (torch.Tensor) : Indicates if graph was properly
-        terminated or not using a 0 or 1 at the corresponding index.
-    """
-    # define tensor shapes
-    node_shape = (batch_size, *C.dim_nodes)
-    edge_shape = (batch_size, *C.dim_edges)
-    nlls_shape = (C.max_n_nodes + 7)*int(n_total / batch_size)  # the + 7 is buffer
+    Each of the `n_slots` slots holds one graph under construction. When a
+    graph terminates, it is copied to the finished graphs, and its slot is
+    zeroed in place and starts a new graph if more graphs are needed than are
+    under construction; otherwise, the slot is retired. Retired slots keep being
+    sampled (their graphs are ignored) until the live graphs are compacted into
+    the first slots, once at least `compact_fraction` of the slots in use are
+    retired, so that the model mostly sees live graphs. Every live graph is thus
+    kept, and no graphs are generated only to be discarded.
 
-    n_allocate = n_total + batch_size
-
-    # create the placeholder tensors
-    nodes = torch.zeros((n_allocate, *node_shape[1:]), dtype=torch.float32, device="cuda")
-    edges = torch.zeros((n_allocate, *edge_shape[1:]), dtype=torch.float32, device="cuda")
-    n_nodes = torch.zeros(n_allocate, dtype=torch.int8, device="cuda")
-    nlls = torch.zeros((batch_size + 1, nlls_shape), device="cuda")
-    generated_nlls = torch.zeros((n_allocate, nlls_shape), device="cuda")
-    properly_terminated = torch.zeros(n_allocate, device="cuda")
-
-    return nodes, edges, n_nodes, nlls, generated_nlls, properly_terminated
+    Row 0 of the node and edge features holds a dummy non-empty graph, since
+    models cannot receive as input purely empty graphs; the slots are rows 1 to
+    `n_slots`.
 
+    Args:
+      n_total (int) : Total number of graphs to generate.
+      batch_size (int) : Maximum number of graphs generated at once.
+      compact_fraction (float) : Fraction of retired slots (out of those in use)
+        above which the live graphs are compacted.
+    """
+    def __init__(self, n_total, batch_size, compact_fraction=0.25):
+
+        self.n_total = n_total                    # `int`
+        self.n_slots = min(batch_size, n_total)   # `int`
+        self.compact_fraction = compact_fraction  # `float`
+
+        n_actions = get_max_n_actions()
+
+        # graphs under construction (one per slot, after the dummy graph)
+        self.nodes = torch.zeros((self.n_slots + 1, *C.dim_nodes), dtype=torch.float32, device=C.device)
+        self.edges = torch.zeros((self.n_slots + 1, *C.dim_edges), dtype=torch.float32, device=C.device)
+        self.n_nodes = torch.zeros(self.n_slots + 1, dtype=torch.int64, device=C.device)
+        self.nlls = torch.zeros((self.n_slots + 1, n_actions), dtype=torch.float32, device=C.device)
+        self.action_idc = torch.zeros(self.n_slots + 1, dtype=torch.int64, device=C.device)
+        self.active = torch.ones(self.n_slots, dtype=torch.bool, device=C.device)
+
+        self.nodes[0] = 1
+        self.edges[0, 0, 0, 0] = 1
+        self.n_nodes[0] = 1
+
+        # finished graphs; these get filled in gradually as graphs terminate
+        self.generated_nodes = torch.zeros((n_total, *C.dim_nodes), dtype=torch.float32, device=C.device)
+        self.generated_edges = torch.zeros((n_total, *C.dim_edges), dtype=torch.float32, device=C.device)
+        self.generated_n_nodes = torch.zeros(n_total, dtype=torch.int64, device=C.device)
+        self.generated_nlls = torch.zeros((n_total, n_actions), dtype=torch.float32, device=C.device)
+        self.properly_terminated = torch.zeros(n_total, device=C.device)
+        self.generated_connection_idc = None  # allocated once the model predicted them
+
+        self.n_generated = 0          # number of finished graphs
+        self.n_actions = 0            # number of actions sampled by live graphs
+        self.n_invalid_actions = 0    # number of those which were invalid
+        self.n_active = self.n_slots  # number of slots with live graphs
+        self.n_in_use = self.n_slots  # number of slots seen by the model (live or retired)
+
+    def done(self):
+        """ Returns `True` once all graphs have been generated.
+        """
+        return self.n_generated >= self.n_total
+
+    def model_inputs(self):
+        """ Returns the node and edge features (views) of the slots in use,
+        including the dummy graph.
+        """
+        return self.nodes[:self.n_in_use + 1], self.edges[:self.n_in_use + 1]
+
+    def graphs(self):
+        """ Returns the node features, edge features, number of nodes, NLLs per
+        action, and index of the current action (views) of the slots in use,
+        without the dummy graph.
+        """
+        slots = slice(1, self.n_in_use + 1)
+        return (self.nodes[slots], self.edges[slots], self.n_nodes[slots],
+                self.nlls[slots], self.action_idc[slots])
+
+    def copy_terminated_graphs(self, term_idc, invalid_idc, nlls_sampled, connection_idc=None):
+        """ Copies the live graphs which terminate this round (either because
+        "terminate" action sampled, or invalid action sampled) to the finished
+        graphs, retires the slots whose next graph is not needed, and returns the
+        number of graphs copied.
+
+        Args:
+          term_idc (torch.Tensor) : Indices of the slots which sampled the
+            "terminate" action.
+          invalid_idc (torch.Tensor) : Indices of the slots which sampled an
+            invalid action.
+          nlls_sampled (torch.Tensor) : NLLs for the newest sampled action for
+            each slot in use (not yet included in the NLLs per action).
+          connection_idc (torch.Tensor or None) : Indices of the two atoms
+            predicted (by a `models.Model`) to connect each graph in use to the
+            fragments, without the dummy graph; if specified, kept for the
+            finished graphs.
+        """
+        # ignore the graphs in retired slots
+        active = self.active[:self.n_in_use]
+        term_idc = term_idc[active[term_idc]]
+        terminate_idc = torch.cat((term_idc, invalid_idc[active[invalid_idc]]))
+        n = len(terminate_idc)
+        self.n_actions += self.n_active
+        self.n_invalid_actions += n - len(term_idc)
+        if n == 0:
+            return 0
+
+        nodes, edges, n_nodes, nlls, action_idc = self.graphs()
+        nlls[terminate_idc, action_idc[terminate_idc]] = nlls_sampled[terminate_idc]
+
+        # copy the graphs directly into the finished tensors; the NLLs are
+        # assigned instead, as they require grad when generating during training
+        # (which `out=` does not support)
+        finished = slice(self.n_generated, self.n_generated + n)
+        torch.index_select(nodes, 0, terminate_idc, out=self.generated_nodes[finished])
+        torch.index_select(edges, 0, terminate_idc, out=self.generated_edges[finished])
+        torch.index_select(n_nodes, 0, terminate_idc, out=self.generated_n_nodes[finished])
+        self.generated_nlls[finished] = nlls[terminate_idc]
+        if connection_idc is not None:
+            if self.generated_connection_idc is None:
+                self.generated_connection_idc = torch.zeros((self.n_total, *connection_idc.shape[1:]),
+                                                            dtype=connection_idc.dtype, device=C.device)
+            torch.index_select(connection_idc, 0, terminate_idc, out=self.generated_connection_idc[finished])
 
-def apply_actions(add, conn, nodes, edges, n_nodes, generation_round, nlls, nlls_sampled):
+        # indicate (with a 1) the structures which have been properly terminated
+        self.properly_terminated[self.n_generated : self.n_generated + len(term_idc)] = 1
+        self.n_generated += n
+
+        # only start as many new graphs as are still needed
+        n_restart = max(self.n_total - self.n_generated - (self.n_active - n), 0)
+        if n_restart < n:
+            self.active[terminate_idc[n_restart:]] = False
+            self.n_active -= n - n_restart
+
+        return n
+
+    def reset_graphs(self, terminate_idc):
+        """ Moves all slots on to their next action, and zeroes in place the
+        slots which terminated this round (`terminate_idc`, live or retired), so
+        that they start a new, empty graph. Then compacts the live graphs if
+        enough slots are retired.
+        """
+        nodes, edges, n_nodes, nlls, action_idc = self.graphs()
+        action_idc += 1
+        if len(terminate_idc) > 0:
+            for tensor in (nodes, edges, n_nodes, nlls, action_idc):
+                tensor.index_fill_(0, terminate_idc, 0)
+
+        n_retired = self.n_in_use - self.n_active
+        if self.n_active > 0 and n_retired >= max(1, self.compact_fraction * self.n_in_use):
+            self.compact()
+
+    def compact(self):
+        """ Moves the live graphs to the first slots, so that the model only sees
+        live graphs.
+        """
+        live_idc = torch.nonzero(self.active[:self.n_in_use]).view(-1) + 1
+        live = slice(1, self.n_active + 1)
+        for tensor in (self.nodes, self.edges, self.n_nodes, self.nlls, self.action_idc):
+            tensor[live] = tensor[live_idc]
+        self.active[:self.n_active] = True
+        self.active[self.n_active:] = False
+        self.n_in_use = self.n_active
+
+
+def apply_actions(add, conn, nodes, edges, n_nodes, action_idc, nlls, nlls_sampled):
     """ Applies the batch of sampled actions (specified by `add` and `conn`) to
     the batch of graphs under construction. Also adds the NLLs for the newly
     sampled actions (`nlls_sampled`) to the running list of NLLs (`nlls`).
@@ -67,8 +196,8 @@ def apply_actions(add, conn, nodes, edges, n_nodes, generation_round, nlls, nlls
       edges (torch.Tensor) : Edge features tensor (batch).
       n_nodes (torch.Tensor) : Number of nodes per graph in `nodes` and `edges`
         (batch.)
-      generation_round (int) : Indicates the current generation round (running
-        count).
+      action_idc (torch.Tensor) : Index of the current action of each graph in
+        `nodes` and `edges` (batch), i.e. the column of `nlls` to fill in.
       nlls (torch.Tensor) : Sampled NLL per action for graphs in `nodes` and
         `edges` (batch).
       nlls_sampled (torch.Tensor) : NLL per action sampled for the most recent
@@ -88,7 +217,7 @@ def apply_actions(add, conn, nodes, edges, n_nodes, generation_round, nlls, nlls
                                             nodes,
                                             edges,
                                             n_nodes,
-                                            generation_round,
+                                            action_idc,
                                             nlls,
                                             nlls_sampled)
     # then applies the "connect" action to all graphs in batch (note: does
@@ -96,14 +225,14 @@ def apply_actions(add, conn, nodes, edges, n_nodes, generation_round, nlls, nlls
     edges, nlls = conn_nodes(conn,
                              edges,
                              n_nodes,
-                             generation_round,
+                             action_idc,
                              nlls,
                              nlls_sampled)
 
     return nodes, edges, n_nodes, nlls
 
 
-def add_nodes(add, nodes, edges, n_nodes, generation_round, nlls, nlls_sampled):
+def add_nodes(add, nodes, edges, n_nodes, action_idc, nlls, nlls_sampled):
     """ Adds new nodes to graphs which sampled the "add" action.
     """
     # get the action indices
@@ -129,13 +258,13 @@ def add_nodes(add, nodes, edges, n_nodes, generation_round, nlls, nlls_sampled):
     # keep track of the newly added node
     n_nodes[batch] += 1
 
-    # include the NLLs for the add actions for this generation round
-    nlls[batch, generation_round] = nlls_sampled[batch]
+    # include the NLLs for the add actions
+    nlls[batch, action_idc[batch]] = nlls_sampled[batch]
 
     return nodes, edges, n_nodes, nlls
 
 
-def conn_nodes(conn, edges, n_nodes, generation_round, nlls, nlls_sampled):
+def conn_nodes(conn, edges, n_nodes, action_idc, nlls, nlls_sampled):
     """ Connects nodes in graphs which sampled the "connect" action.
     """
     # get the action indices
@@ -145,177 +274,21 @@ def conn_nodes(conn, edges, n_nodes, generation_round, nlls, nlls_sampled):
     edges[batch, fr, to, b] = 1
     edges[batch, to, fr, b] = 1
 
-    # include the NLLs for the connect actions for this generation round
-    nlls[batch, generation_round] = nlls_sampled[batch]
+    # include the NLLs for the connect actions
+    nlls[batch, action_idc[batch]] = nlls_sampled[batch]
 
     return edges, nlls
 
 
-def copy_terminated_graphs(terminate_idc, n_graphs_generated, nodes, edges, n_nodes,
-                           generated_nodes, generated_edges, generated_n_nodes,
-                           generation_round, nlls, nlls_sampled, generated_nlls):
-    """ Copies terminated graphs (either because "terminate" action sampled, or
-    invalid action sampled) to `generated_nodes` and `generated_edges` before
-    they are removed from the running batch of graphs being generated.
-
-    Args:
-      terminate_idc (torch.Tensor) : Indices corresponding to graphs that will
-        terminate this round.
-      n_graphs_generated (int) : Number of graphs generated thus far (not
-        including those about to be copied).
-      nodes (torch.Tensor) : Node features tensors for a batch of graphs.
-      edges (torch.Tensor) : Edge features tensors for a batch of graphs.
-      n_nodes (torch.Tensor) : Number of nodes in each graph for a batch of
-        graphs.
-      generated_nodes (torch.Tensor) : Node features tensors for completed
-        graphs thus far (not including those about to be copied).
-      generated_edges (torch.Tensor) : Edge features tensors for completed
-        graphs thus far (not including those about to be copied).
-      generated_n_nodes (torch.Tensor) : Number of nodes in each completed
-        graph thus far (not including those about to be copied).
-      generation_round (int) : Indicates the current generation round (running
-        count).
-      nlls (torch.Tensor) : NLLs per action for each graph in a batch of graphs.
-      nlls_sampled (torch.Tensor) : NLLs for the newest sampled action for each
-        graph in a batch of graphs (not yet included in `nlls`).
-      generated_nlls (torch.Tensor) : Sampled NLLs per action for completed
-        graphs thus far (not including those about to be copied).
-
-    Returns:
-      n_graphs_generated (int) : Number of graphs generated thus far.
-      generated_nodes (torch.Tensor) : Node features tensors for completed
-        graphs thus far.
-      generated_edges (torch.Tensor) : Edge features tensors for completed
-        graphs thus far.
-      generated_n_nodes (torch.Tensor) : Number of nodes in each completed
-        graph thus far.
-      generated_nlls (torch.Tensor) : Sampled NLLs per action for completed
-        graphs thus far.
-    """
-    # number of graphs to be terminated
-    nlls[terminate_idc, generation_round] = nlls_sampled[terminate_idc]
-
-    # number of graphs to be terminated
-    n = len(terminate_idc)
-
-    # copy the new graphs to the finished tensors
-    nodes_local = nodes[terminate_idc]
-    edges_local = edges[terminate_idc]
-    n_nodes_local = n_nodes[terminate_idc]
-    nlls_local = nlls[terminate_idc]
-
-    generated_nodes[n_graphs_generated : n_graphs_generated + n] = nodes_local
-    generated_edges[n_graphs_generated : n_graphs_generated + n] = edges_local
-    generated_n_nodes[n_graphs_generated : n_graphs_generated + n] = n_nodes_local
-    generated_nlls[n_graphs_generated : n_graphs_generated + n] = nlls_local
-
-    n_graphs_generated += n
-
-    return (
-        n_graphs_generated,
-        generated_nodes,
-        generated_edges,
-        generated_n_nodes,
-        generated_nlls
-    )
-
-
-def initialize_graph_batch(batch_size):
-    """ Initialize a batch of empty graphs to begin the generation process.
-
-    Args:
-      batch_size (int) : Batch size.
-
-    Returns:
-      nodes (torch.Tensor) : Empty node features tensor (batch).
-      edges (torch.Tensor) : Empty edge features tensor (batch).
-      n_nodes (torch.Tensor) : Number of nodes per graph in `nodes` and `edges`
-        (batch), currently all 0.
+def get_max_n_actions():
+    """ Returns the maximum number of actions taken to build a graph: each action
+    adds a node or a new edge, or terminates the graph, so a graph takes at most
+    n * (n - 1) / 2 + 2 actions.
     """
-    # define tensor shapes
-    node_shape = ([batch_size + 1] + C.dim_nodes)
-    edge_shape = ([batch_size + 1] + C.dim_edges)
+    return C.max_n_nodes * (C.max_n_nodes - 1) // 2 + 2
 
-    # initialize tensors
-    nodes = torch.zeros(node_shape, dtype=torch.float32, device="cuda")
-    edges = torch.zeros(edge_shape, dtype=torch.float32, device="cuda")
-    n_nodes = torch.zeros(batch_size + 1, dtype=torch.int64, device="cuda")
 
-    # add a dummy non-empty graph at top, since models cannot receive as input
-    # purely empty graphs
-    nodes[0] = torch.ones(([1] + C.dim_nodes), device="cuda")
-    edges[0, 0, 0, 0] = 1
-    n_nodes[0] = 1
-
-    return nodes, edges, n_nodes
-
-
-def reset_graphs(n_samples, idx, nodes, edges, n_nodes, nlls, batch_size):
-    """Resets the `nodes` and `edges` tensors by reseting graphs which sampled
-    invalid actions (indicated by `idx`).
-
-    Args:
-      n_samples (int) : Number of graphs to generate in one batch.
-      idx (int) : Indices corresponding to graphs to reset.
-      nodes (torch.Tensor) : Node features tensor (batch).
-      edges (torch.Tensor) : Edge features tensor (batch).
-      n_nodes (torch.Tensor) : Number of nodes per graph in `nodes` and `edges`
-        (batch).
-      nlls (torch.Tensor) : Sampled NLL per action for graphs in `nodes` and
-        `edges` (batch).
-      batch_size (int) : Batch size.
-
-    Returns:
-      nodes_reset (torch.Tensor) : Reset node features tensor (batch).
-      edges_reset (torch.Tensor) : Reset edge features tensor (batch).
-      n_nodes_reset (torch.Tensor) : Reset number of nodes per graph in `nodes`
-        and `edges` (batch).
-      nlls_reset (torch.Tensor) : Reset sampled NLL per action for graphs in
-        `nodes` and `edges` (batch).
-    """
-    # define constants
-    n_total = n_samples
-    n_batches = int(n_total / batch_size)
-    node_shape = ([batch_size + 1] + C.dim_nodes)
-    edge_shape = ([batch_size + 1] + C.dim_edges)
-    nlls_shape = ([batch_size + 1] + [(C.max_n_nodes + 7)*n_batches])  # the + 7 is buffer for connect actions
-
-    # initialize placeholders
-    nodes_reset = torch.zeros(node_shape, dtype=torch.float32, device="cuda")
-    edges_reset = torch.zeros(edge_shape, dtype=torch.float32, device="cuda")
-    n_nodes_reset = torch.zeros(batch_size + 1, dtype=torch.int64, device="cuda")
-    nlls_reset = torch.zeros(nlls_shape, dtype=torch.float32, device="cuda")
-
-    # reset the "bad" graphs with zero tensors
-    if len(idx) > 0:
-        nodes[idx] = torch.zeros(
-            (len(idx), *node_shape[1:]), dtype=torch.float32, device="cuda"
-        )
-        edges[idx] = torch.zeros(
-            (len(idx), *edge_shape[1:]), dtype=torch.float32, device="cuda"
-        )
-        n_nodes[idx] = torch.zeros(
-            len(idx), dtype=torch.int64, device="cuda"
-        )
-        nlls[idx] = torch.zeros(
-            (len(idx), *nlls_shape[1:]), dtype=torch.float32, device="cuda"
-        )
-
-    # fill in the placeholder tensors with the respective tensors
-    nodes_reset[1:] = nodes
-    edges_reset[1:] = edges
-    n_nodes_reset[1:] = n_nodes
-    nlls_reset[1:] = nlls
-
-    # add a dummy non-empty graph
-    nodes_reset[0] = torch.ones(([1] + C.dim_nodes), device="cuda")
-    edges_reset[0, 0, 0, 0] = 1
-    n_nodes_reset[0] = 1
-
-    return nodes_reset, edges_reset, n_nodes_reset, nlls_reset
-
-
-def get_actions(apds, edges, n_nodes, batch_size):
+def get_actions(apds, edges, n_nodes, batch_size, logits=None):
     """ Samples the input batch of APDs and separates the action indices.
 
     Args:
@@ -324,6 +297,8 @@ def get_actions(apds, edges, n_nodes, batch_size):
         n_nodes (torch.Tensor) : Number of nodes corresponding to graphs in
           `edges`.
         batch_size (int) : Batch size.
+        logits (torch.Tensor or None) : Logits of `apds`, from which the
+          actions are sampled (if `None`, the log of `apds`).
 
     Returns:
       f_add_idc (torch.Tensor) : Indices corresponding to "add" action.
@@ -334,8 +309,10 @@ def get_actions(apds, edges, n_nodes, batch_size):
         sampled an invalid action.
       nlls (torch.Tensor) : NLLs per action corresponding to graphs in batch.
     """
-    # sample the APD for all graphs in the batch for action indices
-    f_add_idc, f_conn_idc, f_term_idc, nlls = sample_apd(apds, batch_size)
+    # sample the APD for all graphs in the batch for action indices, optionally
+    # masking out the actions which are invalid for each graph
+    valid_mask = get_valid_action_mask(edges, n_nodes) if C.mask_invalid_actions else None
+    f_add_idc, f_conn_idc, f_term_idc, nlls = sample_apd(apds, batch_size, logits, valid_mask)
 
     # get indices for the "add" action
     f_add_from = n_nodes[f_add_idc[0]]
@@ -357,6 +334,39 @@ def get_actions(apds, edges, n_nodes, batch_size):
     return f_add_idc, f_conn_idc, f_term_idc, invalid_idc, nlls
 
 
+def get_valid_action_mask(edges, n_nodes):
+    """ Gets the mask of the actions (in the flattened APDs) which are valid for
+    each graph, i.e. those not flagged by `get_invalid_actions()`: adding a node
+    bonded to an existing node (or the first node, to an empty graph) unless the
+    graph has the maximum number of nodes, connecting the last node to another
+    node it is not yet bonded to, and terminating.
+
+    Args:
+      edges (torch.Tensor) : Edge features tensors for batch of graphs.
+      n_nodes (torch.Tensor) : Number of nodes for graphs in a batch.
+
+    Returns:
+      valid_mask (torch.Tensor) : Boolean mask with the shape of the APDs.
+    """
+    n_graphs = len(n_nodes)
+    n_max_nodes = C.dim_nodes[0]
+    to = torch.arange(C.dim_f_add[0], device=n_nodes.device).unsqueeze(0)
+    n_nodes = n_nodes.unsqueeze(1)
+
+    # "add" actions, for which "to" is the node the new node is bonded to
+    valid_add = torch.where(n_nodes == 0, to == 0, (to < n_nodes) & (n_nodes < n_max_nodes))
+
+    # "connect" actions, from the last node to node "to"
+    last_node = (n_nodes - 1).clamp(min=0)
+    bonded = torch.sum(edges, dim=-1)[torch.arange(n_graphs, device=n_nodes.device), last_node.view(-1)] > 0
+    valid_conn = (to < n_nodes - 1) & ~bonded
+
+    return torch.cat((valid_add.unsqueeze(2).expand(-1, -1, int(C.dim_f_add_p1)).reshape(n_graphs, -1),
+                      valid_conn.unsqueeze(2).expand(-1, -1, int(C.dim_f_conn_p1)).reshape(n_graphs, -1),
+                      torch.ones((n_graphs, 1), dtype=torch.bool, device=n_nodes.device)),
+                     dim=1)
+
+
 def get_invalid_actions(f_add_idc, f_conn_idc, edges, n_nodes):
     """ Gets the indices corresponding to any invalid sampled actions.
 
@@ -426,12 +436,41 @@ def get_invalid_actions(f_add_idc, f_conn_idc, edges, n_nodes):
     return invalid_action_idc, invalid_action_idc_needing_reset
 
 
-def sample_apd(apds, batch_size):
+def get_action_indices(action_idc, n_nodes, n_apd_actions):
+    """ Separates the given actions (indices in the flattened APDs) into the
+    indices of the "add" and "connect" actions, as used by `apply_actions()`.
+
+    Args:
+      action_idc (torch.Tensor) : Index of the action of each graph, with shape
+        (n_graphs, 1).
+      n_nodes (torch.Tensor) : Number of nodes of each graph.
+      n_apd_actions (int) : Length of the flattened APDs.
+
+    Returns:
+      f_add_idc (torch.Tensor) : Indices corresponding to "add" action.
+      f_conn_idc (torch.Tensor) : Indices corresponding to "connect" action.
+    """
+    apd_one_hot = torch.zeros((len(action_idc), n_apd_actions), device=C.device).scatter_(1, action_idc, 1)
+    f_add, f_conn, _ = reshape_apd(apd_one_hot, len(action_idc))
+    f_add_idc = torch.nonzero(f_add, as_tuple=True)
+    f_conn_idc = torch.nonzero(f_conn, as_tuple=True)
+
+    f_add_idc = (*f_add_idc, n_nodes[f_add_idc[0]])
+    f_conn_idc = (*f_conn_idc, n_nodes[f_conn_idc[0]] - 1)
+
+    return f_add_idc, f_conn_idc
+
+
+def sample_apd(apds, batch_size, logits=None, valid_mask=None):
     """ Samples the input APDs for all graphs in the batch.
 
     Args:
       apds (torch.Tensor) : APDs for a batch of graphs.
       batch_size (int) : Batch size.
+      logits (torch.Tensor or None) : Logits of `apds` (if `None`, the log of
+        `apds`).
+      valid_mask (torch.Tensor or None) : If specified, mask of the actions
+        which can be sampled.
 
     Returns:
       nonzero elements in f_add (torch.Tensor) :
@@ -439,10 +478,18 @@ def sample_apd(apds, batch_size):
       nonzero elements in f_term (torch.Tensor) :
       nlls (torch.Tensor) : Contains NLLs for samples actions.
     """
-    m = torch.distributions.Multinomial(1, probs=apds)
-    apd_one_hot = m.sample()
+    if logits is None:
+        logits = torch.log(apds)
+    action_idc = sample_actions(logits,
+                                valid_mask=valid_mask,
+                                temperature=C.sampling_temperature,
+                                top_k=C.sampling_top_k,
+                                top_p=C.sampling_top_p)
+    apd_one_hot = torch.zeros_like(apds).scatter_(1, action_idc, 1)
     f_add, f_conn, f_term = reshape_apd(apd_one_hot, batch_size)
-    nlls = apds[apd_one_hot == 1]
+
+    # the NLLs are those of the actions in the (unmodified) APDs
+    nlls = apds.gather(1, action_idc).view(-1)
 
     return (
         torch.nonzero(f_add, as_tuple=True),
@@ -452,6 +499,46 @@ def sample_apd(apds, batch_size):
     )
 
 
+def sample_actions(logits, valid_mask=None, temperature=1.0, top_k=None, top_p=None):
+    """ Samples one action per graph from the APD logits, after masking out the
+    invalid actions and applying the temperature, top-k and top-p (nucleus)
+    filters. With only a mask (or nothing) to apply, the masked softmax is
+    sampled directly with `torch.multinomial`.
+
+    Args:
+      logits (torch.Tensor) : APD logits for a batch of graphs.
+      valid_mask (torch.Tensor or None) : If specified, mask of the actions
+        which can be sampled.
+      temperature (float) : Temperature by which the logits are divided.
+      top_k (int or None) : If specified, number of most likely actions kept.
+      top_p (float or None) : If specified, minimum cumulative probability of
+        the most likely actions kept.
+
+    Returns:
+      action_idc (torch.Tensor) : Index of the sampled action (in the flattened
+        APD) of each graph, with shape (n_graphs, 1).
+    """
+    if temperature != 1.0:
+        logits = logits / temperature
+    if valid_mask is not None:
+        logits = logits.masked_fill(~valid_mask, -float("inf"))
+
+    if top_k is not None and top_k < logits.shape[1]:
+        kth_logits = torch.topk(logits, top_k, dim=1).values[:, -1:]
+        logits = logits.masked_fill(logits < kth_logits, -float("inf"))
+
+    if top_p is not None and top_p < 1.0:
+        sorted_logits, sorted_idc = torch.sort(logits, dim=1, descending=True)
+        sorted_probs = torch.softmax(sorted_logits, dim=1)
+        # drop the actions after the cumulative probability reached `top_p` (the
+        # most likely action is always kept)
+        sorted_dropped = torch.cumsum(sorted_probs, dim=1) - sorted_probs >= top_p
+        dropped = torch.zeros_like(sorted_dropped).scatter_(1, sorted_idc, sorted_dropped)
+        logits = logits.masked_fill(dropped, -float("inf"))
+
+    return torch.multinomial(torch.softmax(logits, dim=1), num_samples=1)
+
+
 def reshape_apd(apds, batch_size):
     """ Reshapes the input batch of APDs (inverse to flattening).
 
@@ -479,30 +566,63 @@ def reshape_apd(apds, batch_size):
     return f_add, f_conn, f_term
 
 
-def graph_to_graph(idx, generated_nodes, generated_edges, generated_n_nodes):
+class GeneratedGraphs(collections.abc.Sequence):
+    """ Sequence of generated molecular graphs, which are converted into
+    `GenerationGraph` objects only when first accessed (and then cached).
+
+    The finished node features, edge features, and numbers of nodes are each
+    copied to the host once, as `np.ndarray`s (`host_nodes`, `host_edges`, and
+    `host_n_nodes`). The `rdkit.Mol` objects of all graphs are built at once
+    with `graphs_to_mols()` when the first graph is accessed, while the
+    `GenerationGraph`s keep (views of) the original tensors.
+    """
+    def __init__(self, generated_nodes, generated_edges, generated_n_nodes):
+
+        self.generated_nodes = generated_nodes      # `torch.Tensor`
+        self.generated_edges = generated_edges      # `torch.Tensor`
+        self.generated_n_nodes = generated_n_nodes  # `torch.Tensor`
+
+        self.host_nodes = generated_nodes.cpu().numpy()        # `np.ndarray`
+        self.host_edges = generated_edges.cpu().numpy()        # `np.ndarray`
+        self.host_n_nodes = generated_n_nodes.cpu().numpy()    # `np.ndarray`
+
+        self.molecules = None  # `list` of `rdkit.Chem.Mol`s, once built
+        self.graphs = [None] * len(self.host_n_nodes)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if self.graphs[idx] is None:
+            if self.molecules is None:
+                self.molecules = graphs_to_mols(self.generated_nodes,
+                                                self.generated_edges,
+                                                self.generated_n_nodes)
+            self.graphs[idx] = graph_to_graph(idx,
+                                              self.molecules[idx],
+                                              self.generated_nodes,
+                                              self.generated_edges)
+        return self.graphs[idx]
+
+    def __len__(self):
+        return len(self.graphs)
+
+
+def graph_to_graph(idx, molecule, generated_nodes, generated_edges):
     """ Converts a molecular graph representation into `GenerationGraph` objects.
 
     Args:
       idx (int) : Index for the molecular graph to convert.
+      molecule (rdkit.Chem.Mol) : Molecule of the graph (see `graphs_to_mols()`).
       generated_nodes (torch.Tensor) : Node features tensors for all generated graphs.
       generated_edges (torch.Tensor) : Edge features tensors for all generated graphs.
-      generated_n_nodes (torch.Tensor) : Number of nodes for all generated graphs.
 
     Returns :
       graph (GenerationGraph) :
     """
-    try:
-        # first get the `rdkit.Mol` object corresponding to the selected graph
-        mol = graph_to_mol(generated_nodes[idx],
-                           generated_edges[idx],
-                           generated_n_nodes[idx])
-    except (IndexError, AttributeError):  # raised when graph is empty
-        mol = None
-
     # use the `rdkit.Mol` object, and node and edge features tensors, to get
     # the `GenerationGraph` object
     graph = GenerationGraph(constants=C,
-                            molecule=mol,
+                            molecule=molecule,
                             node_features=generated_nodes[idx],
                             edge_features=generated_edges[idx])
     return graph
@@ -513,8 +633,8 @@ def graph_to_mol(node_features, edge_features, n_nodes):
     `rdkit.Mol` object.
 
     Args:
-      node_features (torch.Tensor) : Node features tensor.
-      edge_features (torch.Tensor) : Edge features tensor.
+      node_features (np.ndarray) : Node features array.
+      edge_features (np.ndarray) : Edge features array.
       n_nodes (int) : Number of nodes in the graph representation.
 
     Returns:
@@ -531,19 +651,15 @@ def graph_to_mol(node_features, edge_features, n_nodes):
         node_to_idx[v] = molecule_idx
 
     # add bonds to atoms in editable mol object; to not add the same bond twice
-    # (which leads to an error), mask half of the edge features beyond diagonal
-    n_max_nodes = C.dim_nodes[0]
-    edge_mask = torch.triu(
-        torch.ones((n_max_nodes, n_max_nodes), device="cuda"), diagonal=1
-    )
-    edge_mask = edge_mask.view(n_max_nodes, n_max_nodes, 1)
-    edges_idc = torch.nonzero(edge_features * edge_mask)
+    # (which leads to an error), only keep edges above the diagonal
+    vi_idc, vj_idc, b_idc = np.nonzero(edge_features)
+    upper = vi_idc < vj_idc
 
-    for vi, vj, b in edges_idc:
+    for vi, vj, b in zip(vi_idc[upper].tolist(), vj_idc[upper].tolist(), b_idc[upper].tolist()):
         molecule.AddBond(
-            node_to_idx[vi.item()],
-            node_to_idx[vj.item()],
-            C.int_to_bondtype[b.item()],
+            node_to_idx[vi],
+            node_to_idx[vj],
+            C.int_to_bondtype[b],
         )
 
     # convert editable mol object to non-editable mol object
@@ -568,14 +684,14 @@ def features_to_atom(node_idx, node_features):
 
     Args:
       node_idx (int) : Index denoting the specific node on the graph to convert.
-      node_features (torch.Tensor) : Node features tensor for one graph.
+      node_features (np.ndarray) : Node features array for one graph.
 
     Returns:
       new_atom (rdkit.Atom) : Atom object corresponding to specified node
         features.
     """
     # get all the nonzero indices in the specified node feature vector
-    nonzero_idc = torch.nonzero(node_features[node_idx])
+    nonzero_idc = np.flatnonzero(node_features[node_idx])
 
     # determine atom symbol
     atom_idx = nonzero_idc[0]
@@ -615,6 +731,137 @@ def features_to_atom(node_idx, node_features):
     return new_atom
 
 
+def graphs_to_mols(node_features, edge_features, n_nodes, n_workers=0):
+    """ Converts a batch of graph representations (node and edge features) into
+    `rdkit.Mol` objects. The atom features (argmaxes of each one-hot segment of
+    the node features) and the bonds above the diagonal are computed for the
+    whole batch at once, on the device of the input tensors, and then copied to
+    the host once as compact integer arrays, from which the molecules are built.
+
+    Args:
+      node_features (torch.Tensor) : Node features tensor for all graphs.
+      edge_features (torch.Tensor) : Edge features tensor for all graphs.
+      n_nodes (torch.Tensor) : Number of nodes in each graph.
+      n_workers (int) : If > 0, the molecules are built in a pool of this many
+        processes (which pickle all molecule properties, so that the atom
+        properties, e.g. CIP codes, are kept).
+
+    Returns:
+      molecules (list) : Contains `rdkit.Chem.Mol` objects.
+    """
+    n_graphs, n_max_nodes = node_features.shape[:2]
+
+    # argmax of each segment of the node features, e.g. atom type, formal charge
+    segment_ends = np.cumsum(get_node_feature_segments())
+    segment_idc = [
+        node_features[:, :, start:end].argmax(dim=2)
+        for start, end in zip([0, *segment_ends[:-1]], segment_ends)
+    ]
+    atom_features = torch.stack(segment_idc, dim=2).cpu().numpy()
+
+    # bonds above the diagonal, sorted by graph (to not add the same bond twice)
+    edge_mask = torch.triu(
+        torch.ones((n_max_nodes, n_max_nodes), dtype=torch.bool, device=edge_features.device),
+        diagonal=1,
+    )
+    bonds = torch.nonzero(edge_features * edge_mask.view(1, n_max_nodes, n_max_nodes, 1)).cpu().numpy()
+    bond_offsets = np.searchsorted(bonds[:, 0], np.arange(n_graphs + 1))
+
+    n_nodes = n_nodes.cpu().numpy()
+    graph_arrays = [
+        (atom_features[idx, :n_nodes[idx]], bonds[bond_offsets[idx]:bond_offsets[idx + 1], 1:])
+        for idx in range(n_graphs)
+    ]
+
+    if n_workers > 0:
+        with multiprocessing.Pool(processes=n_workers, initializer=init_mol_worker) as pool:
+            molecules = pool.starmap(arrays_to_mol, graph_arrays,
+                                     chunksize=max(1, n_graphs // (4 * n_workers)))
+    else:
+        molecules = [arrays_to_mol(*arrays) for arrays in graph_arrays]
+
+    return molecules
+
+
+def init_mol_worker():
+    """ Makes the subprocesses of the `graphs_to_mols()` pool pickle all
+    properties of the molecules they return, as by default, `rdkit` drops the
+    atom properties (e.g. "_TotalNumHs", "_CIPCode") when pickling molecules.
+    """
+    rdkit.Chem.SetDefaultPickleProperties(rdkit.Chem.PropertyPickleOptions.AllProps)
+
+
+def get_node_feature_segments():
+    """ Returns the lengths of the one-hot segments of the node features (atom
+    type, formal charge, and, if used, number of implicit Hs and chirality).
+    """
+    segments = [C.n_atom_types, C.n_formal_charge]
+    if not C.use_explicit_H and not C.ignore_H:
+        segments.append(C.n_imp_H)
+    if C.use_chirality:
+        segments.append(C.n_chirality)
+    return segments
+
+
+def arrays_to_mol(atom_features, bonds):
+    """ Builds an `rdkit.Mol` object from compact integer arrays, as done in
+    `graph_to_mol()`.
+
+    Args:
+      atom_features (np.ndarray) : Indices of the atom type, formal charge, and
+        (if used) number of implicit Hs and chirality, for each atom.
+      bonds (np.ndarray) : Contains one row (atom 1, atom 2, bond type index)
+        per bond.
+
+    Returns:
+      molecule (rdkit.Chem.Mol) : Molecule object.
+    """
+    molecule = rdkit.Chem.RWMol()
+
+    for features in atom_features.tolist():
+        new_atom = rdkit.Chem.Atom(C.atom_types[features[0]])
+        new_atom.SetFormalCharge(C.formal_charge[features[1]])
+        if not C.use_explicit_H and not C.ignore_H:
+            new_atom.SetUnsignedProp("_TotalNumHs", C.imp_H[features[2]])
+        if C.use_chirality:
+            new_atom.SetProp("_CIPCode", C.chirality[features[-1]])
+        molecule.AddAtom(new_atom)
+
+    for vi, vj, b in bonds.tolist():
+        molecule.AddBond(vi, vj, C.int_to_bondtype[b])
+
+    # correct for ignored Hs
+    if C.ignore_H and molecule:
+        try:
+            rdkit.Chem.SanitizeMol(molecule)
+        except ValueError:
+            # throws 1st exception if "molecule" is too ugly to be corrected
+            pass
+
+    return molecule
+
+
+def get_sampling_mode():
+    """ Returns a description (`str`) of how the APDs are sampled.
+    """
+    mode = "masked" if C.mask_invalid_actions else "unmasked"
+    if C.sampling_temperature != 1.0:
+        mode += f", temperature {C.sampling_temperature}"
+    if C.sampling_top_k is not None:
+        mode += f", top-k {C.sampling_top_k}"
+    if C.sampling_top_p is not None:
+        mode += f", top-p {C.sampling_top_p}"
+    return mode
+
+
+def predicts_connections(model):
+    """ Returns whether `model` also predicts the two atoms of each graph which
+    connect to the fragments, i.e. whether it is a `models.Model` with a
+    connection readout (the bare MPNNs only return APDs).
+    """
+    return hasattr(model, "connect_model")
+
+
 def build_graphs(model, n_graphs_to_generate, batch_size):
     """ Generates molecular graphs in batches.
 
@@ -625,13 +872,20 @@ def build_graphs(model, n_graphs_to_generate, batch_size):
       batch_size (int) : Size of batches to use for graph generation.
 
     Returns:
-      graphs (`list` of `GenerationGraph`s) : Generated molecular graphs.
+      graphs (GeneratedGraphs) : Generated molecular graphs (a sequence of
+        `GenerationGraph`s).
       generated_nlls (torch.Tensor) : Sampled NLLs per action for the
         generated graphs.
       final_nlls (torch.Tensor) : Final total NLLs (sum) for the generated
         graphs.
       properly_terminated_graphs (torch.Tensor) : Indicates if graphs were
         properly terminated or not using a 0 or 1.
+      host_nodes (np.ndarray) : Node features of the generated graphs.
+      host_edges (np.ndarray) : Edge features of the generated graphs.
+      host_n_nodes (np.ndarray) : Number of nodes in the generated graphs.
+      two_idx (torch.Tensor or None) : Indices of the two highest-scoring atoms
+        of each generated graph (from the model's connection readout), or `None`
+        if the model has no connection readout.
     """
     # start the timer
     t = time.time()
@@ -639,136 +893,223 @@ def build_graphs(model, n_graphs_to_generate, batch_size):
     # define the softmax for use later
     softmax = torch.nn.Softmax(dim=1)
 
-    # initialize node and edge features tensors for batch of graphs, as well
-    # as a tensor to keep track of the number of nodes per graph
-    nodes, edges, n_nodes = initialize_graph_batch(batch_size=batch_size)
-    linker_nodes = nodes
-    fragment_nodes = nodes
-    linker_edges = edges
-    fragment_edges = edges
-
-    # allocate tensors for finished graphs; these will get filled in gradually
-    # as graphs terminate
-    (
-        generated_nodes, 
-        generated_edges,
-        generated_n_nodes, 
-        nlls, 
-        generated_nlls, 
-        properly_terminated_graphs
-    ) = allocate_graph_tensors(n_graphs_to_generate,
-                               batch_size)
+    # allocate the tensors for the graphs under construction and for the
+    # finished graphs once; these are then updated in place
+    workspace = GenerationWorkspace(n_total=n_graphs_to_generate, batch_size=batch_size)
 
     # keep track of a few things...
-    n_generated_so_far = 0
     t_bar = tqdm(total=n_graphs_to_generate)
-    generation_round = 0
+    keep_connections = predicts_connections(model)
 
     # generate graphs in a batch until the total number of graphs is reached
-    while n_generated_so_far < n_graphs_to_generate:
+    while not workspace.done():
+        nodes, edges = workspace.model_inputs()
         apd_pre,_,two_idx = model(nodes, edges,nodes,edges)
+        connection_idc = two_idx[1:] if keep_connections else None
 
         # skip dummy node after calling model (only need it for predicting APDs)
         apd = softmax(apd_pre)[1:]
-        nodes = nodes[1:]
-        edges = edges[1:]
-        n_nodes = n_nodes[1:]
-        nlls = nlls[1:]
+        nodes, edges, n_nodes, nlls, action_idc = workspace.graphs()
 
         # get the actions from the predicted APDs
         add, conn, term, invalid, nlls_just_sampled = get_actions(apd,
                                                                   edges,
                                                                   n_nodes,
-                                                                  batch_size)
-
-        # indicate (with a 1) the structures which have been properly terminated
-        properly_terminated_graphs[n_generated_so_far : n_generated_so_far + len(term)] = 1
+                                                                  len(n_nodes),
+                                                                  logits=apd_pre[1:])
         termination_idc = torch.cat((term, invalid))
 
-        # copy the graphs to be terminated (indicated by `terminated_idc`) to
-        # the tensors for finished graphs (e.g. `generated_nodes`, etc)
-        (
-            n_generated_so_far, 
-            generated_nodes,
-            generated_edges, 
-            generated_n_nodes,
-            generated_nlls
-        ) = copy_terminated_graphs(termination_idc,
-                                   n_generated_so_far,
-                                   nodes,
-                                   edges,
-                                   n_nodes,
-                                   generated_nodes,
-                                   generated_edges,
-                                   generated_n_nodes,
-                                   generation_round,
-                                   nlls,
-                                   nlls_just_sampled,
-                                   generated_nlls)
-       
+        # copy the graphs to be terminated (indicated by `termination_idc`) to
+        # the tensors for finished graphs
+        n_terminated = workspace.copy_terminated_graphs(term, invalid, nlls_just_sampled, connection_idc)
 
         # apply actions to all graphs (note: applies actions to terminated
         # graphs too to keep on GPU, as this makes generation faster and graphs
-        # will be removed anyway)
-        nodes, edges, n_nodes, nlls = apply_actions(add,
-                                                    conn,
-                                                    nodes,
-                                                    edges,
-                                                    n_nodes,
-                                                    generation_round,
-                                                    nlls,
-                                                    nlls_just_sampled)
-       
+        # will be reset anyway); the views are taken anew, as a view taken
+        # before the NLLs first required grad cannot be written to in place
+        nodes, edges, n_nodes, nlls, action_idc = workspace.graphs()
+        apply_actions(add,
+                      conn,
+                      nodes,
+                      edges,
+                      n_nodes,
+                      action_idc,
+                      nlls,
+                      nlls_just_sampled)
 
         # after actions are applied, reset graphs which were set to terminate
         # this round
-        nodes, edges, n_nodes, nlls = reset_graphs(n_graphs_to_generate,
-                                                   termination_idc,
-                                                   nodes,
-                                                   edges,
-                                                   n_nodes,
-                                                   nlls,
-                                                   batch_size)
+        workspace.reset_graphs(termination_idc)
 
         # update variables that are being kept track of
-        t_bar.update(len(termination_idc))
-        generation_round += 1
+        t_bar.update(n_terminated)
 
     # done generating
     t_bar.close()
 
     # get the time it took to generate graphs
     t = time.time() - t
-    print(f"Generated {n_generated_so_far} molecules in {t:.4} s")
+    n_generated_so_far = workspace.n_generated
+    print(f"Generated {n_generated_so_far} molecules in {t:.4} s ({get_sampling_mode()} sampling)")
     print(f"--{n_generated_so_far/t:4.5} molecules/s")
+    print(f"--{100 * workspace.n_invalid_actions / max(workspace.n_actions, 1):.3}% invalid actions")
 
     # convert the molecular graphs (currently separate node and edge features
-    # tensors) into `GenerationGraph` objects
-    graphs = []
-    generated_nodes_list = []
-    generated_edges_list = []
-    generated_n_nodes_list =[]
-    for graph_idx in range(n_graphs_to_generate):
-        graphs.append(
-            graph_to_graph(graph_idx, generated_nodes, generated_edges, generated_n_nodes)
-        )
-        g_n_n = generated_n_nodes.cpu().numpy().tolist()
-        g_n = generated_nodes.cpu().numpy().tolist()
-        g_e = generated_edges.cpu().numpy().tolist()
-        generated_n_nodes_list.append(g_n_n)
-        generated_nodes_list.append(g_n)
-        generated_edges_list.append(g_e)
-        # generated_nodes_list.append(generated_nodes)
-        # generated_edges_list.append(generated_edges)
+    # tensors) into `GenerationGraph` objects; the finished graphs are copied
+    # to the host once, and each `GenerationGraph` is only built when accessed
+    graphs = GeneratedGraphs(workspace.generated_nodes,
+                             workspace.generated_edges,
+                             workspace.generated_n_nodes)
 
 
-    # sum NLLs over all the actions to get the total NLLs for each structurei
-    # and remove extra zero padding
-    final_nlls = torch.sum(generated_nlls, dim=1)[:len(graphs)]
+    # sum NLLs over all the actions to get the total NLLs for each structure
+    generated_nlls = workspace.generated_nlls
+    final_nlls = torch.sum(generated_nlls, dim=1)
 
-    # remove extra zero padding from `generated_nlls` and `properly_terminated_graphs`
+    # remove extra zero padding from `generated_nlls`
     generated_nlls = generated_nlls[generated_nlls != 0]
-    properly_terminated_graphs = properly_terminated_graphs[:len(graphs)]
+    properly_terminated_graphs = workspace.properly_terminated
+    two_idx = workspace.generated_connection_idc
+
+
+    return graphs, generated_nlls, final_nlls, properly_terminated_graphs,graphs.host_nodes,graphs.host_edges,graphs.host_n_nodes,two_idx
+
+
+def beam_search(model, beam_width, n_groups=1, diversity_penalty=0.0):
+    """ Generates the most likely molecular graphs with (diverse) beam search.
+
+    The beams of all groups are expanded in a single forward pass of the model
+    per step. Every valid action of every beam is a candidate, scored by its
+    length-normalized NLL (the NLL of all actions of the graph so far, divided
+    by the number of actions). The groups then pick their candidates in turn,
+    and, as in diverse beam search, candidates taking an action already picked
+    by an earlier group at the same step are penalized by `diversity_penalty`
+    times the number of times it was picked (a Hamming diversity penalty on
+    the action indices). The best `beam_width` candidates of a group which
+    terminate the graph are kept as finished graphs, and the best `beam_width`
+    others continue as its beams, until the group has `beam_width` finished
+    graphs.
+
+    Args:
+      model (models.Model) : Neural net model.
+      beam_width (int) : Number of beams (and finished graphs) per group.
+      n_groups (int) : Number of beam groups.
+      diversity_penalty (float) : Penalty for repeating the action picked by an
+        earlier group (only used if `n_groups` > 1).
 
+    Returns:
+      Same as `build_graphs()`, for the (up to) `beam_width` finished graphs of
+      each group, ordered by group and by length-normalized NLL.
+    """
+    # start the timer
+    t = time.time()
+
+    n_max_actions = get_max_n_actions()
+
+    # start each group from a single empty graph
+    nodes = torch.zeros((n_groups, *C.dim_nodes), dtype=torch.float32, device=C.device)
+    edges = torch.zeros((n_groups, *C.dim_edges), dtype=torch.float32, device=C.device)
+    n_nodes = torch.zeros(n_groups, dtype=torch.int64, device=C.device)
+    nlls = torch.zeros((n_groups, n_max_actions), dtype=torch.float32, device=C.device)
+    action_idc = torch.zeros(n_groups, dtype=torch.int64, device=C.device)
+    scores = torch.zeros(n_groups, dtype=torch.float64, device=C.device)  # summed -log(p)
+    groups = list(range(n_groups))                                         # group of each beam
+
+    # dummy non-empty graph, since models cannot receive as input purely empty graphs
+    dummy_nodes = torch.ones((1, *C.dim_nodes), device=C.device)
+    dummy_edges = torch.zeros((1, *C.dim_edges), device=C.device)
+    dummy_edges[0, 0, 0, 0] = 1
+
+    finished = [[] for _ in range(n_groups)]  # (normalized NLL, beam index, step tensors) per group
+    n_steps = 0
+    keep_connections = predicts_connections(model)
+
+    while len(groups) > 0 and n_steps < n_max_actions:
+        # expand the beams of all groups with one forward pass
+        apd_pre, _, two_idx = model(torch.cat((dummy_nodes, nodes)), torch.cat((dummy_edges, edges)),
+                                    torch.cat((dummy_nodes, nodes)), torch.cat((dummy_edges, edges)))
+        logits = apd_pre[1:]
+        apds = torch.softmax(logits, dim=1)
+        connection_idc = two_idx[1:] if keep_connections else None
+
+        # length-normalized NLLs of the valid actions of every beam
+        log_probs = torch.log_softmax(logits, dim=1).double()
+        log_probs = log_probs.masked_fill(~get_valid_action_mask(edges, n_nodes), -float("inf"))
+        candidate_scores = (scores.unsqueeze(1) - log_probs) / (action_idc.unsqueeze(1) + 1).double()
+        term_action = logits.shape[1] - 1
+
+        parents, actions, new_groups = [], [], []
+        action_counts = torch.zeros(logits.shape[1], dtype=torch.float64, device=C.device)
+        for group in dict.fromkeys(groups):
+            beam_idc = torch.tensor([idx for idx, g in enumerate(groups) if g == group], device=C.device)
+            group_scores = candidate_scores[beam_idc] + diversity_penalty * action_counts
+            n_candidates = min(2 * beam_width, int(torch.isfinite(group_scores).sum()))
+            best_scores, best_idc = torch.topk(group_scores.view(-1), n_candidates, largest=False)
+
+            n_alive = 0
+            for score, idx in zip(best_scores.tolist(), best_idc.tolist()):
+                beam_idx = int(beam_idc[idx // logits.shape[1]])
+                action = idx % logits.shape[1]
+                if action == term_action:
+                    if len(finished[group]) < beam_width:
+                        # keep the graph (before the "terminate" action) as a finished graph
+                        nll_row = nlls[beam_idx].clone()
+                        nll_row[action_idc[beam_idx]] = apds[beam_idx, action]
+                        finished[group].append((
+                            float(candidate_scores[beam_idx, action]),
+                            nodes[beam_idx], edges[beam_idx], n_nodes[beam_idx], nll_row,
+                            None if connection_idc is None else connection_idc[beam_idx],
+                        ))
+                elif n_alive < beam_width:
+                    parents.append(beam_idx)
+                    actions.append(action)
+                    new_groups.append(group)
+                    n_alive += 1
+                else:
+                    continue
+                action_counts[action] += 1
+                if n_alive == beam_width or len(finished[group]) == beam_width:
+                    break
+
+            # the group is done once it has `beam_width` finished graphs
+            if len(finished[group]) == beam_width:
+                n_alive_group = sum(g == group for g in new_groups)
+                if n_alive_group > 0:
+                    del parents[-n_alive_group:], actions[-n_alive_group:], new_groups[-n_alive_group:]
+
+        if len(parents) == 0:
+            break
+
+        # continue the selected beams, applying their actions to copies of
+        # their parent graphs
+        parents = torch.tensor(parents, device=C.device)
+        actions = torch.tensor(actions, device=C.device).unsqueeze(1)
+        nodes, edges, n_nodes = nodes[parents], edges[parents], n_nodes[parents]
+        nlls, action_idc = nlls[parents], action_idc[parents]
+        nlls_sampled = apds[parents].gather(1, actions).view(-1)
+        scores = scores[parents] - log_probs[parents].gather(1, actions).view(-1)
+        groups = new_groups
+
+        add, conn = get_action_indices(actions, n_nodes, apds.shape[1])
+        apply_actions(add, conn, nodes, edges, n_nodes, action_idc, nlls, nlls_sampled)
+        action_idc += 1
+        n_steps += 1
+
+    # order the finished graphs by group and by length-normalized NLL
+    finished = [graph for group_graphs in finished for graph in sorted(group_graphs, key=lambda graph: graph[0])]
+
+    t = time.time() - t
+    print(f"Generated {len(finished)} molecules by beam search in {t:.4} s "
+          f"(beam width {beam_width}, {n_groups} group(s))")
+
+    graphs = GeneratedGraphs(torch.stack([graph[1] for graph in finished]),
+                             torch.stack([graph[2] for graph in finished]),
+                             torch.stack([graph[3] for graph in finished]))
+
+    generated_nlls = torch.stack([graph[4] for graph in finished])
+    final_nlls = torch.sum(generated_nlls, dim=1)
+    generated_nlls = generated_nlls[generated_nlls != 0]
+    properly_terminated_graphs = torch.ones(len(finished), device=C.device)
+    two_idx = None if finished[0][5] is None else torch.stack([graph[5] for graph in finished])
 
-    return graphs, generated_nlls, final_nlls, properly_terminated_graphs,generated_nodes_list,generated_edges_list,generated_n_nodes_list,two_idx
+    return graphs, generated_nlls, final_nlls, properly_terminated_graphs,graphs.host_nodes,graphs.host_edges,graphs.host_n_nodes,two_idx
@@ -0,0 +1,276 @@
+# load general packages and functions
+import http.server
+import json
+import queue
+import socketserver
+import threading
+import time
+import torch
+from rdkit import Chem
+
+# load program-specific functions
+from parameters.constants import constants as C
+import generate
+import linker_stitcher
+import util
+
+# defines the generation server, which keeps a model resident and answers
+# requests for linkers over HTTP; concurrent requests are coalesced into a
+# single call to `generate.build_graphs()`, so that the model is called on full
+# batches instead of once per request
+
+
+class GenerationRequest:
+    """ Request for `n_samples` linkers joined to the fragments in
+    `fragments_smi`, waiting for its results.
+
+    Args:
+      fragments_smi (str) : SMILES of the fragments, with two dummy atoms.
+      n_samples (int) : Number of molecules to generate.
+    """
+    def __init__(self, fragments_smi, n_samples):
+
+        self.fragments_smi = fragments_smi    # `str`
+        self.n_samples = n_samples            # `int`
+        self.arrival_time = time.perf_counter()
+        self.results = None                   # `list` of `dict`s, once generated
+        self.error = None                     # `str`, if generation failed
+        self.done = threading.Event()
+
+    def wait(self, timeout=None):
+        """ Waits for the results of the request, and returns them (`list` of
+        `dict`s with the linker SMILES, the stitched SMILES, and the NLL of each
+        molecule); raises a `RuntimeError` if generation failed.
+        """
+        if not self.done.wait(timeout):
+            raise RuntimeError("Timed out waiting for the generated molecules.")
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return self.results
+
+
+class RequestBatcher:
+    """ Coalesces the concurrent `GenerationRequest`s into batches, and
+    generates the molecules of each batch with a single call to
+    `generate.build_graphs()` in a worker thread.
+
+    A batch is started once it holds `max_batch_size` molecules, or once its
+    oldest request has waited `max_latency` seconds, whichever comes first; a
+    request larger than `max_batch_size` is generated on its own (in batches of
+    `max_batch_size`).
+
+    Args:
+      model (models.Model) : Neural net model.
+      max_batch_size (int) : Maximum number of molecules per batch.
+      max_latency (float) : Maximum time (in s) a request waits for others to
+        be batched with it.
+    """
+    def __init__(self, model, max_batch_size=1000, max_latency=0.05):
+
+        self.model = model                    # `models.Model`
+        self.max_batch_size = max_batch_size  # `int`
+        self.max_latency = max_latency        # `float`
+        self.requests = queue.Queue()
+        self.pending = None                   # request which did not fit in the last batch
+        self.n_batches = 0
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def submit(self, fragments_smi, n_samples):
+        """ Queues a request and returns it (see `GenerationRequest.wait()`).
+        """
+        request = GenerationRequest(fragments_smi, n_samples)
+        self.requests.put(request)
+        return request
+
+    def next_batch(self):
+        """ Waits for the requests of the next batch, and returns them (`list`).
+        """
+        batch = [self.pending if self.pending is not None else self.requests.get()]
+        self.pending = None
+        n_samples = batch[0].n_samples
+        deadline = batch[0].arrival_time + self.max_latency
+
+        while n_samples < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if n_samples + request.n_samples > self.max_batch_size:
+                self.pending = request
+                break
+            batch.append(request)
+            n_samples += request.n_samples
+
+        return batch
+
+    def run(self):
+        """ Generates the molecules of each batch of requests, until the server
+        stops.
+        """
+        while True:
+            batch = self.next_batch()
+            try:
+                self.generate(batch)
+            except Exception as error:  # return the error to the clients instead of stopping the server
+                for request in batch:
+                    request.error = f"{type(error).__name__}: {error}"
+            for request in batch:
+                request.done.set()
+
+    def generate(self, batch):
+        """ Generates the molecules of all requests in `batch` at once, and
+        splits the results between the requests; the linkers of each request
+        are joined to its fragments separately, so that a request whose
+        linkers cannot be stitched fails on its own.
+        """
+        n_samples = sum(request.n_samples for request in batch)
+        with torch.no_grad():
+            graphs, _, final_nlls, _, _, _, _, two_idx = generate.build_graphs(
+                model=self.model,
+                n_graphs_to_generate=n_samples,
+                batch_size=min(n_samples, self.max_batch_size)
+            )
+        self.n_batches += 1
+
+        linker_smi_list = []
+        for graph in graphs:
+            mol = graph.get_molecule()
+            linker_smi_list.append(Chem.MolToSmiles(mol) if mol is not None else "")
+
+        linker_atoms_list = two_idx.tolist() if two_idx is not None else None
+        final_nlls = final_nlls.tolist()
+        start = 0
+        for request in batch:
+            end = start + request.n_samples
+            try:
+                request.results = self.get_results(request,
+                                                   linker_smi_list[start:end],
+                                                   None if linker_atoms_list is None else linker_atoms_list[start:end],
+                                                   final_nlls[start:end])
+            except Exception as error:  # only fail this request, not the whole batch
+                request.error = f"{type(error).__name__}: {error}"
+            start = end
+
+    def get_results(self, request, linker_smi_list, linker_atoms_list, final_nlls):
+        """ Joins the linkers generated for `request` to its fragments, and
+        returns its results (see `GenerationRequest.wait()`); the stitched
+        SMILES are `None` if the model does not predict the connecting atoms.
+        """
+        if linker_atoms_list is not None:
+            stitched_smi_list = [result.smiles for result in
+                                 util.stitch_linkers([request.fragments_smi] * request.n_samples,
+                                                     linker_smi_list,
+                                                     linker_atoms_list)]
+        else:
+            stitched_smi_list = [None] * request.n_samples
+
+        return [{"linker": linker_smi, "smiles": stitched_smi, "nll": nll}
+                for linker_smi, stitched_smi, nll in zip(linker_smi_list, stitched_smi_list, final_nlls)]
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """ HTTP server handling each connection in its own thread (as
+    `http.server.ThreadingHTTPServer`, which is only available from Python 3.7).
+    """
+    daemon_threads = True
+
+
+class GenerationRequestHandler(http.server.BaseHTTPRequestHandler):
+    """ Handles the HTTP requests to the generation server:
+      POST /generate : JSON body `{"fragments": <SMILES>, "n_samples": <int>}`
+        (by default, `C.generate_fragments` and 1 molecule); the response
+        streams one JSON object per molecule and line (`{"linker": ...,
+        "smiles": ..., "nll": ...}`), where "smiles" is `null` if the linker
+        could not be joined to the fragments. Fragments which are not valid
+        SMILES with exactly two attachment points ("*") are rejected (400).
+      GET /health : Returns the number of batches generated so far.
+    """
+    batcher = None  # `RequestBatcher`, set by `serve()`
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_error(404, "Unknown path. Please use POST /generate or GET /health.")
+            return
+        self.send_json({"status": "ok", "n_batches": self.batcher.n_batches})
+
+    def do_POST(self):
+        if self.path != "/generate":
+            self.send_error(404, "Unknown path. Please use POST /generate or GET /health.")
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            fragments_smi = body.get("fragments", C.generate_fragments)
+            n_samples = int(body.get("n_samples", 1))
+        except (ValueError, TypeError, AttributeError):
+            self.send_error(400, "Invalid request. Please send {\"fragments\": <SMILES>, \"n_samples\": <int>}.")
+            return
+        if not 1 <= n_samples <= C.server_max_request_size:
+            self.send_error(400, f"Invalid `n_samples`: {n_samples}. "
+                                 f"Please request between 1 and {C.server_max_request_size} molecules.")
+            return
+        if not isinstance(fragments_smi, str):
+            self.send_error(400, "Invalid `fragments`. Please send the SMILES of the fragments as a string.")
+            return
+        fragment_attachments = linker_stitcher.get_fragment_attachments(fragments_smi)
+        if isinstance(fragment_attachments, str):  # the reason why the fragments cannot be used
+            self.send_error(400, f"Invalid `fragments`: {fragment_attachments}.")
+            return
+
+        try:
+            results = self.batcher.submit(fragments_smi, n_samples).wait(timeout=C.server_timeout)
+        except RuntimeError as error:
+            self.send_error(500, str(error))
+            return
+
+        # stream the molecules back, one JSON object per line
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for result in results:
+            self.wfile.write((json.dumps(result) + "\n").encode())
+            self.wfile.flush()
+
+    def send_json(self, content):
+        """ Sends `content` (`dict`) as a JSON response.
+        """
+        data = json.dumps(content).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # the server would otherwise log every request
+        pass
+
+
+def serve(model, host="127.0.0.1", port=8000, max_batch_size=1000, max_latency=0.05):
+    """ Serves molecules generated by `model` over HTTP at `host`:`port` until
+    interrupted (see `GenerationRequestHandler`).
+
+    Args:
+      model (models.Model) : Neural net model.
+      host (str) : Address to listen on.
+      port (int) : Port to listen on.
+      max_batch_size (int) : Maximum number of molecules generated at once.
+      max_latency (float) : Maximum time (in s) a request waits for others to
+        be batched with it.
+    """
+    GenerationRequestHandler.batcher = RequestBatcher(model=model,
+                                                      max_batch_size=max_batch_size,
+                                                      max_latency=max_latency)
+    server = ThreadingHTTPServer((host, port), GenerationRequestHandler)
+    print(f"* Serving molecules at http://{host}:{port}/generate "
+          f"(batches of up to {max_batch_size} molecules, {max_latency} s max. latency).", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        util.get_linker_stitcher().close()
@@ -19,9 +19,11 @@ class Connect_nodes(gnn.summation_mpnn.SummationlinkerMPNN):
                  gather_att_dropout_p, gather_att_hidden_dim, gather_width,
                  gather_emb_depth, gather_emb_dropout_p, gather_emb_hidden_dim,
                  hidden_node_features, initialization, message_passes,
-                 message_size, n_nodes_largest_graph, node_features):
+                 message_size, n_nodes_largest_graph, node_features,
+                 aggregation="scatter"):
 
-        super(Connect_nodes, self).__init__(node_features, hidden_node_features, edge_features, message_size, message_passes)
+        super(Connect_nodes, self).__init__(node_features, hidden_node_features, edge_features, message_size, message_passes,
+                                            aggregation)
 
         self.n_nodes_largest_graph = n_nodes_largest_graph
 
@@ -136,6 +138,7 @@ class GGNN(gnn.summation_mpnn.SummationMPNN):
       *n_nodes_largest_graph (int) : Number of nodes in the largest graph.
       *node_features (int) : Number of node features (e.g. `n_atom_types` +
         `n_formal_charge`).
+      aggregation (str) : Message aggregation backend ('scatter' or 'dense').
     """
     def __init__(self, edge_features, enn_depth, enn_dropout_p, enn_hidden_dim,
                  f_add_elems, mlp1_depth, mlp1_dropout_p, mlp1_hidden_dim,
@@ -143,9 +146,11 @@ class GGNN(gnn.summation_mpnn.SummationMPNN):
                  gather_att_dropout_p, gather_att_hidden_dim, gather_width,
                  gather_emb_depth, gather_emb_dropout_p, gather_emb_hidden_dim,
                  hidden_node_features, initialization, message_passes,
-                 message_size, n_nodes_largest_graph, node_features):
+                 message_size, n_nodes_largest_graph, node_features,
+                 aggregation="scatter"):
 
-        super(GGNN, self).__init__(node_features, hidden_node_features, edge_features, message_size, message_passes)
+        super(GGNN, self).__init__(node_features, hidden_node_features, edge_features, message_size, message_passes,
+                                   aggregation)
 
         self.n_nodes_largest_graph = n_nodes_largest_graph
 
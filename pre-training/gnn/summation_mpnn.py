@@ -2,18 +2,67 @@
 import torch
 
 
+def get_message_aggregator(aggregation, adjacency, node_batch_batch_idc,
+                           node_batch_node_idc, edge_batch_batch_idc,
+                           edge_batch_node_idc):
+    """ Returns a function which sums the message terms of all edges starting at
+    each node (i.e. the summation in eq. 1 of the NMPQC paper), mapping message
+    terms of size {number of edges in batch, message size} to messages of size
+    {number of nodes in batch, message size}.
+
+    Args:
+      aggregation (str) : Either "scatter", which adds each edge's message term
+        to its node's row (memory linear in the number of edges), or "dense",
+        which multiplies the message terms by a {number of nodes in batch,
+        number of edges in batch} summation matrix.
+      adjacency (torch.Tensor) : Batch of size {N, number of nodes, number of
+        nodes}.
+      node_batch_batch_idc (torch.Tensor) : Batch index of each node in batch.
+      node_batch_node_idc (torch.Tensor) : Node index of each node in batch.
+      edge_batch_batch_idc (torch.Tensor) : Batch index of each edge in batch.
+      edge_batch_node_idc (torch.Tensor) : Index of the node each edge in batch
+        starts at.
+    """
+    n_nodes_in_batch = node_batch_batch_idc.shape[0]
+
+    if aggregation == "dense":
+        same_batch = node_batch_batch_idc.view(-1, 1) == edge_batch_batch_idc
+        same_node = node_batch_node_idc.view(-1, 1) == edge_batch_node_idc
+
+        # element ij of `message_summation_matrix` is 1 if `edge_batch_edges[j]`
+        # is connected with `node_batch_nodes[i]`, else 0
+        message_summation_matrix = (same_batch * same_node).float()
+
+        return lambda message_terms: torch.matmul(message_summation_matrix, message_terms)
+
+    # map each edge to the row of the node it starts at
+    node_rows = torch.zeros(adjacency.shape[:2], dtype=torch.long, device=adjacency.device)
+    node_rows[node_batch_batch_idc, node_batch_node_idc] = torch.arange(n_nodes_in_batch,
+                                                                        device=adjacency.device)
+    edge_node_rows = node_rows[edge_batch_batch_idc, edge_batch_node_idc]
+
+    return lambda message_terms: torch.zeros(
+        n_nodes_in_batch, message_terms.shape[1], dtype=message_terms.dtype, device=message_terms.device
+    ).index_add(0, edge_node_rows, message_terms)
+
+
 class SummationMPNN(torch.nn.Module):
     """ Abstract `SummationMPNN` class. Specific models using this class are
     defined in `mpnn.py`; these are MNN, S2V, and GGNN.
     """
-    def __init__(self, node_features, hidden_node_features, edge_features, message_size, message_passes):
+    def __init__(self, node_features, hidden_node_features, edge_features, message_size, message_passes,
+                 aggregation="scatter"):
 
         super(SummationMPNN, self).__init__()
 
+        if aggregation not in ("scatter", "dense"):
+            raise ValueError(f"Unknown message aggregation backend: {aggregation}.")
+
         self.hidden_node_features = hidden_node_features
         self.edge_features = edge_features
         self.message_size = message_size
         self.message_passes = message_passes
+        self.aggregation = aggregation
 
     def message_terms(self, nodes, node_neighbours, edges):
         """ Message passing function, to be implemented in all `SummationMPNN`
@@ -77,17 +126,17 @@ class SummationMPNN(torch.nn.Module):
 
         (node_batch_batch_idc, node_batch_node_idc) = adjacency.sum(-1).nonzero(as_tuple=True)
 
-        same_batch = node_batch_batch_idc.view(-1, 1) == edge_batch_batch_idc
-        same_node = node_batch_node_idc.view(-1, 1) == edge_batch_node_idc
-
-        # element ij of `message_summation_matrix` is 1 if `edge_batch_edges[j]`
-        # is connected with `node_batch_nodes[i]`, else 0
-        message_summation_matrix = (same_batch * same_node).float()
+        aggregate_messages = get_message_aggregator(self.aggregation,
+                                                    adjacency,
+                                                    node_batch_batch_idc,
+                                                    node_batch_node_idc,
+                                                    edge_batch_batch_idc,
+                                                    edge_batch_node_idc)
 
         edge_batch_edges = edges[edge_batch_batch_idc, edge_batch_node_idc, edge_batch_nghb_idc, :]
 
         # pad up the hidden nodes
-        hidden_nodes = torch.zeros(nodes.shape[0], nodes.shape[1], self.hidden_node_features, device="cuda")
+        hidden_nodes = torch.zeros(nodes.shape[0], nodes.shape[1], self.hidden_node_features, device=nodes.device)
         hidden_nodes[:nodes.shape[0], :nodes.shape[1], :nodes.shape[2]] = nodes.clone()
         node_batch_nodes = hidden_nodes[node_batch_batch_idc, node_batch_node_idc, :]
 
@@ -104,7 +153,7 @@ class SummationMPNN(torch.nn.Module):
                 message_terms = message_terms.unsqueeze(0)
 
             # the summation in eq. 1 of the NMPQC paper happens here
-            messages = torch.matmul(message_summation_matrix, message_terms)
+            messages = aggregate_messages(message_terms)
 
             node_batch_nodes = self.update(node_batch_nodes, messages)
             hidden_nodes[node_batch_batch_idc, node_batch_node_idc, :] = node_batch_nodes.clone()
@@ -121,14 +170,19 @@ class SummationlinkerMPNN(torch.nn.Module):
     """ Abstract `SummationMPNN` class. Specific models using this class are
     defined in `mpnn.py`; these are MNN, S2V, and GGNN.
     """
-    def __init__(self, node_features, hidden_node_features, edge_features, message_size, message_passes):
+    def __init__(self, node_features, hidden_node_features, edge_features, message_size, message_passes,
+                 aggregation="scatter"):
 
         super(SummationlinkerMPNN, self).__init__()
 
+        if aggregation not in ("scatter", "dense"):
+            raise ValueError(f"Unknown message aggregation backend: {aggregation}.")
+
         self.hidden_node_features = hidden_node_features
         self.edge_features = edge_features
         self.message_size = message_size
         self.message_passes = message_passes
+        self.aggregation = aggregation
 
     def message_terms(self, nodes, node_neighbours, edges):
         """ Message passing function, to be implemented in all `SummationMPNN`
@@ -203,18 +257,18 @@ class SummationlinkerMPNN(torch.nn.Module):
 
         (node_batch_batch_idc, node_batch_node_idc,) = adjacency.sum(-1).nonzero(as_tuple=True)
 
-        same_batch = node_batch_batch_idc.view(-1, 1) == edge_batch_batch_idc
-        same_node = node_batch_node_idc.view(-1, 1) == edge_batch_node_idc
-
-        # element ij of `message_summation_matrix` is 1 if `edge_batch_edges[j]`
-        # is connected with `node_batch_nodes[i]`, else 0
-        message_summation_matrix = (same_batch * same_node).float()
+        aggregate_messages = get_message_aggregator(self.aggregation,
+                                                    adjacency,
+                                                    node_batch_batch_idc,
+                                                    node_batch_node_idc,
+                                                    edge_batch_batch_idc,
+                                                    edge_batch_node_idc)
 
         edge_batch_edges = edges[edge_batch_batch_idc, edge_batch_node_idc, edge_batch_nghb_idc, :]
 
         # pad up the hidden nodes
         
-        hidden_nodes = torch.zeros(nodes.shape[0], nodes.shape[1], self.hidden_node_features, device="cuda")
+        hidden_nodes = torch.zeros(nodes.shape[0], nodes.shape[1], self.hidden_node_features, device=nodes.device)
         
 
         hidden_nodes[:nodes.shape[0], :nodes.shape[1], :nodes.shape[2]] = nodes.clone()
@@ -237,7 +291,7 @@ class SummationlinkerMPNN(torch.nn.Module):
                 message_terms = message_terms.unsqueeze(0)
 
             # the summation in eq. 1 of the NMPQC paper happens here
-            messages = torch.matmul(message_summation_matrix, message_terms)
+            messages = aggregate_messages(message_terms)
             
             #update bug
             
@@ -1,5 +1,6 @@
 # load general packages and functions
 import datetime
+import torch
 
 # load program-specific functions
 import util
@@ -13,12 +14,18 @@ from Workflow import Workflow
 
 
 def main():
-    """ Defines the type of job (preprocessing, training, generation, testing, multiple validation, or computation of the validation loss), 
+    """ Defines the type of job (preprocessing, training, generation, serving, testing, multiple validation, or computation of the validation loss), 
     runs it, and writes the job parameters used.
     """
     # fix date/time
     _ = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+    # limit the number of CPU threads used by PyTorch, if specified
+    if C.n_cpu_threads is not None:
+        torch.set_num_threads(C.n_cpu_threads)
+    if C.n_interop_threads is not None:
+        torch.set_interop_threads(C.n_interop_threads)
+
     workflow = Workflow(constants=C)
 
     job_type = C.job_type
@@ -45,6 +52,13 @@ def main():
         # generate molecules only
         workflow.generation_phase()
 
+    elif job_type == "serve":
+        # write serving parameters
+        util.write_job_parameters(params=C)
+
+        # serve generated molecules until interrupted
+        workflow.serving_phase()
+
     elif job_type == "test":
         # write testing parameters
         util.write_job_parameters(params=C)
@@ -45,6 +45,7 @@ class Model(nn.Module):
             message_size=C.message_size,
             n_nodes_largest_graph=C.max_n_nodes,
             node_features=C.dim_nodes[1],
+            aggregation=C.mpnn_aggregation,
         )
         self.connect_model = gnn.mpnn.Connect_nodes(
             f_add_elems=C.dim_f_add_p1,
@@ -71,6 +72,7 @@ class Model(nn.Module):
             message_size=C.message_size,
             n_nodes_largest_graph=C.max_n_nodes,
             node_features=C.dim_nodes[1],
+            aggregation=C.mpnn_aggregation,
         )
 
     def forward(self, linker_nodes,linker_edges, fragment_nodes, fragment_edges,is_train=False,**kw):
@@ -82,12 +84,13 @@ class Model(nn.Module):
             ground_truth_list = kw['grountruth_smi_list']
             epoch = kw['epoch']
         # fragments_list,ground_truth_list = smi_list
-            g, a, f, t,generated_nodes,generated_edges,generated_n_nodes,_ = generate.build_graphs(model=self.generative_model,
-                                                n_graphs_to_generate=C.batch_size,
-                                                batch_size=C.batch_size)
+            with util.get_step_profiler().span("generation"):
+                g, a, f, t,generated_nodes,generated_edges,generated_n_nodes,_ = generate.build_graphs(model=self.generative_model,
+                                                    n_graphs_to_generate=C.batch_size,
+                                                    batch_size=C.batch_size)
             
             generated_n_nodesss = generated_n_nodes
-            generated_n_nodesss = torch.tensor(generated_n_nodesss).to(torch.device("cuda"))
+            generated_n_nodesss = torch.from_numpy(generated_n_nodesss).to(C.device)
             n_graphs_to_generate = C.n_samples
         
         
@@ -105,8 +108,8 @@ class Model(nn.Module):
                     
                 except (ValueError, RuntimeError, AttributeError):
                     pass
-            generated_nodes = torch.tensor(generated_nodes).to(torch.device("cuda"))
-            generated_edges = torch.tensor(generated_edges).to(torch.device("cuda"))
+            generated_nodes = torch.from_numpy(generated_nodes).to(C.device)
+            generated_edges = torch.from_numpy(generated_edges).to(C.device)
        
 
        
@@ -114,70 +117,29 @@ class Model(nn.Module):
         _,two_idx = torch.topk(connect_out, k=2, dim=1, largest=True)
        
         if is_train:
-            for id,atom_idx in enumerate(two_idx):
-                try:
-                    fragments_smi = fragments_list[id]
-                    fragments = Chem.MolFromSmiles(fragments_smi)
-                    linker_smi_1 = smi_list[id]
-                    
-                    linker = Chem.MolFromSmiles(linker_smi_1)
-                    #connect
-                    combo = Chem.CombineMols(fragments,linker)
-                    idx_list = []
-                    for atom in fragments.GetAtoms():
-                        if atom.GetSymbol() == '*':
-                            f2 = atom.GetIdx()
-                            idx_list.append(f2)
-
-                    du = Chem.MolFromSmiles('*')
-                    combo = AllChem.DeleteSubstructs(combo,du)
-                    edcombo = Chem.EditableMol(combo)
-                    try:
-                        edcombo.AddBond(idx_list[0],atom_idx[0]+idx_list[1]-2,order=Chem.rdchem.BondType.SINGLE)
-                        edcombo.AddBond(idx_list[1]-2,atom_idx[1]+idx_list[1]-2,order=Chem.rdchem.BondType.SINGLE)
-                        final_connect_mol = edcombo.GetMol()
-                    except:
-                
-                        fragment_smi_0 = fragments_smi.split('.')[0]
-                        fragment_smi_1 = fragments_smi.split('.')[1]
-                        
-                        match = '****sfs'
-                        for _ in range(1000):
-                            if not Chem.MolFromSmiles(match):
-                                s = linker_smi_1
-                                inStr = "(*)"
-                                for i in range(2):
-                                    index = random.randint(0, len(s))
-                                    s = "".join([s[:index], inStr, s[index:]])
-                                match = s
-                            else:
-                                break
-                        smi_linker = []
-                        for _ in range(1000):
-                            smi_link = Chem.MolToSmiles(Chem.MolFromSmiles(s), doRandom=True)
-                            if smi_link[0] == "*" and smi_link[-1] == '*':
-                                smi_linker.append(smi_link)
-                        
-                            
-                        final_smi = (fragment_smi_1 + smi_linker[0] + fragment_smi_0).replace("*", "")
-
-                        final_connect_mol = Chem.MolFromSmiles(final_smi)
-                        
-                    final_connect_smi = Chem.MolToSmiles(final_connect_mol)
-                       
-                    #calculate their tanimoto similarities
-                    k=0.8
-                    ground_truth_smi = ground_truth_list[id]
-                    query_mol = Chem.MolFromSmiles(ground_truth_smi)
-                    query_fp = AllChem.GetMorganFingerprint(query_mol, 2, useCounts=True, useFeatures=True)
-                    fp = AllChem.GetMorganFingerprint(final_connect_mol, 2, useCounts=True, useFeatures=True)
-                    tanimoto_score = DataStructs.TanimotoSimilarity(query_fp, fp)
-                    tanimoto_loss =1 - (min(tanimoto_score, k) / k)
-                    tanimoto_loss_list.append(tanimoto_loss)
-                except:
-                    print('error')
-                    tanimoto_loss_list.append(1)
-            tanimoto_tensor = torch.tensor(tanimoto_loss_list).to(torch.device("cuda"))
+            # there is one loss per graph in the batch; the batch may have fewer
+            # (e.g. the last batch of a block) or more graphs than there are
+            # fragments, ground truths, and generated linkers to score
+            n_graphs = len(two_idx)
+            n_scored = min(n_graphs, len(fragments_list), len(ground_truth_list), len(smi_list))
+
+            # join the generated linkers to their fragments
+            with util.get_step_profiler().span("stitching"):
+                stitch_results = util.stitch_linkers(fragments_list[:n_scored], smi_list[:n_scored],
+                                                     two_idx[:n_scored].tolist())
+
+            # score the joined molecules by their similarity to the ground truth
+            with util.get_step_profiler().span("scoring"):
+                k=0.8
+                final_connect_mols = [None if result.smiles is None else Chem.MolFromSmiles(result.smiles)
+                                      for result in stitch_results]
+                tanimoto_scores = util.get_fingerprint_engine().paired_similarity(final_connect_mols,
+                                                                                 ground_truth_list[:n_scored])
+                # molecules which could not be joined (or parsed), or scored,
+                # get the maximum loss
+                tanimoto_loss_list = np.ones(n_graphs)
+                tanimoto_loss_list[:n_scored] = np.nan_to_num(1 - np.minimum(tanimoto_scores, k) / k, nan=1.0)
+            tanimoto_tensor = torch.tensor(tanimoto_loss_list, dtype=torch.float32).to(C.device)
         else:
             tanimoto_tensor=torch.tensor(1)
         return apd_output,tanimoto_tensor,two_idx
@@ -213,7 +175,7 @@ def graph_to_mol(node_features, edge_features, n_nodes):
     # (which leads to an error), mask half of the edge features beyond diagonal
     n_max_nodes = C.dim_nodes[0]
     edge_mask = torch.triu(
-        torch.ones((n_max_nodes, n_max_nodes), device="cuda"), diagonal=1
+        torch.ones((n_max_nodes, n_max_nodes), device=C.device), diagonal=1
     )
     edge_mask = edge_mask.view(n_max_nodes, n_max_nodes, 1)
     edges_idc = torch.nonzero(edge_features * edge_mask)
@@ -317,7 +279,7 @@ def initialize_model():
         raise NotImplementedError("Model is not defined.")
 
     # net1 = net1.to("cuda", non_blocking=True)
-    net1 = net1.cuda()
+    net1 = net1.to(C.device)
     
 
     return net1
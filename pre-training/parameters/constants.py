@@ -6,6 +6,7 @@ import os
 import rdkit
 from rdkit.Chem.rdchem import BondType
 import sys
+import torch
 
 # load program-specific functions
 sys.path.insert(1, "./parameters/")  # search "parameters/" directory
@@ -132,6 +133,31 @@ def override_params(all_params):
     return all_params
 
 
+def get_device(device):
+    """ Resolves the `device` parameter ('auto', 'cpu', or 'cuda:N') to the name
+    of the `torch.device` on which all tensors are allocated.
+
+    Args:
+      device (str) : Requested device.
+
+    Returns:
+      device (str) : Resolved device; 'auto' becomes 'cuda:0' if a GPU is
+        available, and 'cpu' otherwise.
+    """
+    if device == "auto":
+        return "cuda:0" if torch.cuda.is_available() else "cpu"
+    elif device == "cpu":
+        return device
+    elif device.split(":")[0] == "cuda":
+        if not torch.cuda.is_available():
+            raise ValueError(f"Device '{device}' requested, but CUDA is not available.")
+        return device
+    else:
+        raise ValueError(
+            f"Unknown `device`: {device}. Please use 'auto', 'cpu', or 'cuda:N'."
+        )
+
+
 def collect_global_constants(parameters, job_dir):
     """ Collects constants defined in `features.py` with those defined by the
     ArgParser (`args.py`), and returns the bundle as a `namedtuple`.
@@ -152,6 +178,91 @@ def collect_global_constants(parameters, job_dir):
             f"Cannot use explicit H's and ignore H's "
             f"at the same time. Please fix flags."
         )
+
+    # check the window of steps captured with `torch.profiler`
+    steps = parameters["torch_profiler_steps"]
+    if steps is not None and (len(steps) != 2 or steps[0] > steps[1]):
+        raise ValueError(
+            f"Invalid `torch_profiler_steps`: {steps}. "
+            f"Please use [first_step, last_step] or None."
+        )
+
+    # check the settings used to sample the APDs during generation
+    if parameters["sampling_temperature"] <= 0:
+        raise ValueError(
+            f"Invalid `sampling_temperature`: {parameters['sampling_temperature']}. "
+            f"Please use a positive temperature."
+        )
+    if parameters["sampling_top_k"] is not None and parameters["sampling_top_k"] < 1:
+        raise ValueError(
+            f"Invalid `sampling_top_k`: {parameters['sampling_top_k']}. "
+            f"Please use a positive number of actions or None."
+        )
+    top_p = parameters["sampling_top_p"]
+    if top_p is not None and not 0 < top_p <= 1:
+        raise ValueError(
+            f"Invalid `sampling_top_p`: {top_p}. "
+            f"Please use a probability in (0, 1] or None."
+        )
+
+    # check the settings of the beam search
+    if parameters["generation_strategy"] not in ("sampling", "beam"):
+        raise ValueError(
+            f"Unknown `generation_strategy`: {parameters['generation_strategy']}. "
+            f"Please use 'sampling' or 'beam'."
+        )
+    if parameters["beam_width"] < 1 or parameters["beam_groups"] < 1:
+        raise ValueError(
+            f"Invalid `beam_width` ({parameters['beam_width']}) or `beam_groups` "
+            f"({parameters['beam_groups']}). Please use positive numbers."
+        )
+    if parameters["beam_diversity_penalty"] < 0:
+        raise ValueError(
+            f"Invalid `beam_diversity_penalty`: {parameters['beam_diversity_penalty']}. "
+            f"Please use a non-negative penalty."
+        )
+
+    # check the settings of the generation server
+    if parameters["server_max_batch_size"] < 1 or parameters["server_max_request_size"] < 1:
+        raise ValueError(
+            f"Invalid `server_max_batch_size` ({parameters['server_max_batch_size']}) or "
+            f"`server_max_request_size` ({parameters['server_max_request_size']}). "
+            f"Please use positive numbers."
+        )
+    if parameters["server_max_latency"] < 0 or parameters["server_timeout"] <= 0:
+        raise ValueError(
+            f"Invalid `server_max_latency` ({parameters['server_max_latency']}) or "
+            f"`server_timeout` ({parameters['server_timeout']}). "
+            f"Please use a non-negative latency and a positive timeout."
+        )
+
+    # select how the Tanimoto similarities are computed
+    if parameters["fingerprint_backend"] not in ("numpy", "rdkit"):
+        raise ValueError(
+            f"Unknown `fingerprint_backend`: {parameters['fingerprint_backend']}. "
+            f"Please use 'numpy' or 'rdkit'."
+        )
+
+    # select the format of the preprocessed HDF files
+    if parameters["dataset_format"] not in ("dense", "sparse"):
+        raise ValueError(
+            f"Unknown `dataset_format`: {parameters['dataset_format']}. "
+            f"Please use 'dense' or 'sparse'."
+        )
+
+    # select how preprocessed data is read
+    if parameters["dataset_backend"] not in ("hdf", "memmap"):
+        raise ValueError(
+            f"Unknown `dataset_backend`: {parameters['dataset_backend']}. "
+            f"Please use 'hdf' or 'memmap'."
+        )
+
+    # select the message aggregation backend used in the MPNNs
+    if parameters["mpnn_aggregation"] not in ("scatter", "dense"):
+        raise ValueError(
+            f"Unknown `mpnn_aggregation`: {parameters['mpnn_aggregation']}. "
+            f"Please use 'scatter' or 'dense'."
+        )
     
     # define edge feature (rdkit `GetBondType()` result -> `int`) constants
     bondtype_to_int = {BondType.SINGLE: 0, BondType.DOUBLE: 1, BondType.TRIPLE: 2}
@@ -210,6 +321,9 @@ def collect_global_constants(parameters, job_dir):
     
     # join with `features.args_dict`
     constants_dict.update(parameters)
+
+    # resolve the device on which to allocate tensors
+    constants_dict["device"] = get_device(parameters["device"])
     
     # define path to dataset splits
     constants_dict["test_set"] = parameters["dataset_dir"] + "test.smi"
@@ -218,6 +332,7 @@ def collect_global_constants(parameters, job_dir):
     constants_dict["training_fragment_set"] = parameters["dataset_dir"] + "train_fragment.smi"
     constants_dict["validation_fragment_set"] = parameters["dataset_dir"] + "valid_fragment.smi"
     constants_dict["test_fragment_set"] = parameters["dataset_dir"] + "test_fragment.smi"
+    constants_dict["training_groundtruth_set"] = parameters["dataset_dir"] + "train_groundtruth.smi"
     constants_dict['generate_fragments'] = parameters["generate_fragments"]
 
 
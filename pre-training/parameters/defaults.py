@@ -24,19 +24,84 @@ General settings for the generative model:
   chirality (list) : Contains chiral states (str) to encode in node features.
   group_size (int) : When preprocessing graphs, this is the size of the
     preprocessing groups (e.g. how many subgraphs preprocessed at once).
+  n_preprocessing_workers (int or None) : If specified, preprocesses each
+    dataset in shards of `preprocessing_shard_size` molecules using this many
+    worker processes, then merges the shards; the merged output does not depend
+    on the number of workers. If `None`, preprocesses in a single process.
+  preprocessing_shard_size (int) : Number of molecules per preprocessing shard
+    (only used if `n_preprocessing_workers` is specified).
+  dataset_format (str) : Format of the preprocessed HDF files ('dense', or
+    'sparse'); 'sparse' stores only the non-zero node, edge and APD elements
+    of each subgraph (with CSR offsets), which are densified when loading
+    batches. Files in either format can be read during training.
   generation_epoch (int) : Epoch to sample during a 'generation' job.
   n_samples (int) : Number of molecules to generate during each sampling epoch.
     Note: if `n_samples` > 100000 molecules, these will be generated in batches
     of 100000.
+  mask_invalid_actions (bool) : If specified, actions which are invalid for a
+    graph (adding a node beyond `max_n_nodes` or not bonded to an existing
+    node, connecting a node to itself, to a nonexisting node, or twice to the
+    same node) are masked out of its APD before sampling, instead of sampling
+    the full APD and terminating graphs which sampled an invalid action.
+  sampling_temperature (float) : Temperature by which the APD logits are
+    divided before sampling (1.0 samples the APD as predicted).
+  sampling_top_k (int or None) : If specified, only the `sampling_top_k` most
+    likely actions of each APD are sampled.
+  sampling_top_p (float or None) : If specified, only the most likely actions
+    whose cumulative probability reaches `sampling_top_p` are sampled (nucleus
+    sampling).
+  generation_strategy (str) : How the molecules of a 'generate' job are
+    generated; 'sampling' (sampling the APDs, as during training) or 'beam'
+    (beam search for the most likely molecules).
+  beam_width (int) : Number of beams (and molecules) per group in beam search.
+  beam_groups (int) : Number of groups in (diverse) beam search.
+  beam_diversity_penalty (float) : Penalty on the length-normalized NLL of
+    actions already taken by another beam group at the same step (only used if
+    `beam_groups` > 1).
+  server_host (str) : Address the generation server of a 'serve' job listens on.
+  server_port (int) : Port the generation server listens on.
+  server_max_batch_size (int) : Maximum number of molecules the generation
+    server generates at once (concurrent requests are batched together).
+  server_max_latency (float) : Maximum time (in s) a request to the generation
+    server waits for other requests to be batched with it.
+  server_max_request_size (int) : Maximum number of molecules per request.
+  server_timeout (float) : Time (in s) after which a request fails if its
+    molecules have not been generated.
   n_workers (int) : Number of subprocesses to use during data loading.
+  max_stitching_attempts (int) : Maximum number of pairs of linker atoms tried
+    when joining a generated linker to its fragments.
+  n_stitching_workers (int) : Number of subprocesses used to join generated
+    linkers to their fragments (0 joins them in the main process).
+  fingerprint_backend (str) : How the Tanimoto similarities of the rewards/scores
+    are computed ('numpy', or 'rdkit'); 'numpy' computes those of a whole batch
+    at once, 'rdkit' one molecule at a time (the similarities are the same).
+  fingerprint_cache_size (int) : Maximum number of reference (e.g. ground truth)
+    fingerprints kept in memory.
+  dataset_backend (str) : How preprocessed data is read during training ('hdf',
+    or 'memmap'); 'memmap' exports each (dense) HDF file once to uncompressed
+    `.npy` files next to it, and reads whole batches from read-only memory-maps
+    using workers which (from PyTorch 1.7) persist between epochs.
+  prefetch_factor (int) : Number of batches prefetched by each worker (only used
+    with the 'memmap' dataset backend, if `n_workers` > 0, from PyTorch 1.7).
+  device (str) : Device on which to run the job ('auto', 'cpu', or 'cuda:N');
+    'auto' uses the first GPU if one is available, and the CPU otherwise.
+  n_cpu_threads (int or None) : If specified, number of threads used by PyTorch
+    for intra-op parallelism on the CPU.
+  n_interop_threads (int or None) : If specified, number of threads used by
+    PyTorch for inter-op parallelism on the CPU.
+  max_batches_per_epoch (int or None) : If specified, caps the number of batches
+    seen per training epoch (the validation loss is always computed on the
+    whole validation set).
   restart (bool) : If specified, will restart training from previous saved state.
     Can only be used for preprocessing or training jobs.
   max_n_nodes (int) : Maximum number of allowed nodes in graph. Must be greater
     than or equal to the number of nodes in largest graph in training set.
-  job_type (str) : Options: 'preprocess', 'train', 'generate', or 'test'.
+  job_type (str) : Options: 'preprocess', 'train', 'generate', 'serve', or 'test'.
   sample_every (int) : Specifies when to sample the model (i.e. epochs between sampling).
   dataset_dir (str) : Full path to directory containing testing ("test.smi"),
-    training ("train.smi"), and validation ("valid.smi") sets.
+    training ("train.smi"), and validation ("valid.smi") sets, their fragments
+    (e.g. "train_fragment.smi"), and the ground-truth molecules of the training
+    set ("train_groundtruth.smi").
   use_aromatic_bonds (bool) : If specified, aromatic bond types will be used.
   use_canon (bool) : If specified, uses canonical RDKit ordering in graph representations.
   use_chirality (bool) : If specified, includes chirality in the atomic representations.
@@ -47,6 +112,13 @@ General settings for the generative model:
     added to graphs after generation is terminated.
   use_tensorboard (bool) : If specified, enables the use of tensorboard during training.
   tensorboard_dir (str) : Path to directory in which to write tensorboard things.
+  profiling (bool) : If specified, times each phase of the training/learning
+    steps (wall-clock time, CPU time and RSS), writing the timings to
+    "profile.csv", tensorboard, and the Chrome trace "profile_trace.json" in
+    the job directory.
+  torch_profiler_steps (list or None) : If specified, first and last step
+    (inclusive) to capture with `torch.profiler`, exported as the Chrome trace
+    "torch_trace.json" in the job directory.
 """
 # general job parameters
 params_dict = {
@@ -55,9 +127,36 @@ params_dict = {
     "imp_H": [0, 1, 2, 3],
     "chirality": ["None", "R", "S"],
     "group_size": 1000,
+    "n_preprocessing_workers": None,
+    "preprocessing_shard_size": 100000,
+    "dataset_format": "dense",
     "generation_epoch": 30,
     "n_samples": 2000,  #5000,
+    "mask_invalid_actions": False,
+    "sampling_temperature": 1.0,
+    "sampling_top_k": None,
+    "sampling_top_p": None,
+    "generation_strategy": "sampling",
+    "beam_width": 10,
+    "beam_groups": 1,
+    "beam_diversity_penalty": 0.5,
+    "server_host": "127.0.0.1",
+    "server_port": 8000,
+    "server_max_batch_size": 1000,
+    "server_max_latency": 0.05,
+    "server_max_request_size": 10000,
+    "server_timeout": 600.0,
     "n_workers": 2,
+    "max_stitching_attempts": 10,
+    "n_stitching_workers": 0,
+    "fingerprint_backend": "numpy",
+    "fingerprint_cache_size": 100000,
+    "dataset_backend": "hdf",
+    "prefetch_factor": 2,
+    "device": "auto",
+    "n_cpu_threads": None,
+    "n_interop_threads": None,
+    "max_batches_per_epoch": None,
     "restart": False,
     "max_n_nodes": 13,
     "job_type": "train",
@@ -69,6 +168,8 @@ params_dict = {
     "use_explicit_H": False,
     "ignore_H": True,
     "tensorboard_dir": "tensorboard/",
+    "profiling": False,
+    "torch_profiler_steps": None,
 }
 """ MPNN hyperparameters (common ones):
   batch_size (int) : Number of graphs in a mini-batch.
@@ -82,6 +183,9 @@ params_dict = {
     'uniform', or 'normal').
   model (str) : MPNN model to use ('MNN', 'S2V', 'AttS2V', 'GGNN', 'AttGGNN', or 'EMN').
   weight_decay (float) : Optimizer weight decay (L2 penalty).
+  mpnn_aggregation (str) : Backend used to sum messages in the MPNN ('scatter', or
+    'dense'); 'dense' uses a {nodes in batch, edges in batch} summation matrix,
+    so its memory use grows quadratically with the batch size.
 """
 # model common hyperparameters
 model_common_hp_dict = {
@@ -93,6 +197,7 @@ model_common_hp_dict = {
     "max_rel_lr": 1,
     "weights_initialization": "uniform",
     "weight_decay": 0.0,
+    "mpnn_aggregation": "scatter",
 }
 
 # make sure job dir ends in "/"
@@ -3,6 +3,7 @@ import numpy as np
 import rdkit
 import h5py
 import os
+import multiprocessing
 from tqdm import tqdm
 
 # load program-specific functions
@@ -51,6 +52,7 @@ def group_subgraphs(init_idx, molecule_set, dataset_dict, is_training_set, ts_pr
     data_subgraphs = []        # initialize
     data_APDs = []             # initialize
     molecular_graph_list = []  # initialize
+    subgraph_index = {}        # compact subgraph bytes --> idx in `data_subgraphs`
 
     # convert all molecules in `molecule_set` to `MolecularGraphs` to loop over
     molecular_graph_generator = map(get_graph, molecule_set)
@@ -63,43 +65,30 @@ def group_subgraphs(init_idx, molecule_set, dataset_dict, is_training_set, ts_pr
         # store `PreprocessingGraph` object
         molecular_graph_list.append(graph)
 
-        # get the number of decoding graphs
-        n_SGs = apd.get_decoding_route_length(molecular_graph=graph)
-
-        for new_SG_idx in range(n_SGs):  # **note: "idx" == "idx"
-
-            # `get_decoding_route_state() returns a list of [`SG`, `APD`],
-            # where `SG := "subgraph"; APD := "action probability distribution"
-            SG, APD = apd.get_decoding_route_state(molecular_graph=graph,
-                                                   subgraph_idx=new_SG_idx)
+        # `get_decoding_route()` yields every [`SG`, `APD`] along the decoding
+        # route, where `SG := "subgraph"; APD := "action probability distribution"
+        for SG, APD in apd.get_decoding_route(molecular_graph=graph):
 
             # "collect" all APDs corresponding to pre-existing subgraphs,
-            # otherwise append both new subgraph and new APD
-            count = 0
-            for idx, existing_subgraph in enumerate(data_subgraphs):
-
-                count += 1
-                # check if subgraph `SG` is "already" in `data_subgraphs` as
-                # `existing_subgraph`, and if so, add the "new" APD to the "old"
-                try:  # first compare the node feature matrices
-                    nodes_equal = (SG[0] == existing_subgraph[0]).all()
-                except AttributeError:
-                    nodes_equal = False
-                try:  # then compare the edge feature tensors
-                    edges_equal = (SG[1] == existing_subgraph[1]).all()
-                except AttributeError:
-                    edges_equal = False
-
-                # if both matrices have a match, then subgraphs are the same
-                if nodes_equal and edges_equal:
-                    existing_APD = data_APDs[idx]
-
-                    # add APDs
-                    existing_APD += APD
-                    break
-
-            # if subgraph is not already in `data_subgraphs`, append it
-            if count == len(data_subgraphs) or count == 0:
+            # otherwise append both new subgraph and new APD; subgraphs are
+            # looked up by their compact bytes (the `dict` compares the bytes
+            # themselves on a hash collision, so lookups are exact)
+            SG_key = get_subgraph_key(subgraph=SG)
+            idx = subgraph_index.get(SG_key)
+
+            if idx is not None:
+                # subgraph `SG` is "already" in `data_subgraphs`, so add the
+                # "new" APD to the "old"
+                existing_APD = data_APDs[idx]
+                existing_APD += APD
+
+            # if subgraph is not already in `data_subgraphs`, append it; note
+            # that a match with the most recently appended subgraph is also
+            # appended, as was done by the original linear search (this keeps
+            # the HDF output identical to that of previous versions)
+            if idx is None or idx == len(data_subgraphs) - 1:
+                if idx is None:
+                    subgraph_index[SG_key] = len(data_subgraphs)
                 data_subgraphs.append(SG)
                 data_APDs.append(APD)
 
@@ -139,6 +128,32 @@ def group_subgraphs(init_idx, molecule_set, dataset_dict, is_training_set, ts_pr
     # return the datasets, now updated with an additional group
     return molecules_processed, dataset_dict, len_data_subgraphs, ts_properties
 
+def get_subgraph_key(subgraph):
+    """ Returns a compact, hashable representation of a padded `subgraph`, used
+    to look up equivalent (*not* isomorphic) subgraphs. Two padded subgraphs are
+    equal if and only if their keys are equal.
+
+    Args:
+      subgraph (list) : Graph representation, structured as [X, E].
+
+    Returns:
+      key (tuple) : Contains the number of unpadded nodes (int) and the bytes of
+        the unpadded node and edge features cast to int8 (bytes).
+    """
+    nodes, edges = subgraph
+
+    # everything beyond the last non-empty row is padding
+    nonempty_rows = np.flatnonzero(nodes.any(axis=1) | edges.any(axis=(1, 2)))
+    n_nodes = int(nonempty_rows[-1]) + 1 if len(nonempty_rows) > 0 else 0
+
+    compact_bytes = (
+        nodes[:n_nodes].astype(np.int8).tobytes()
+        + edges[:n_nodes, :n_nodes].astype(np.int8).tobytes()
+    )
+
+    return n_nodes, compact_bytes
+
+
 def group_fragment_subgraphs(init_idx, molecule_set, dataset_dict, is_training_set, ts_properties_old=None):
     """ Collects graphs along all graphs in the decoding route for molecules
     in the training dataset by checking if they are equivalent (*not*
@@ -236,6 +251,10 @@ def create_HDF_file(path, is_training_set=False):
       path (str) : Full path/filename to SMILES file containing molecules.
       is_training_set (bool) : Indicates if this is the training set.
     """
+    # preprocess in shards instead if multiple processes have been requested
+    if C.n_preprocessing_workers is not None:
+        return create_sharded_HDF_file(path=path, is_training_set=is_training_set)
+
     # load the molecules
     molecule_set = load.molecules(path)
 
@@ -345,6 +364,315 @@ def create_HDF_file(path, is_training_set=False):
     os.remove(restart_index_file)
     os.remove(f"{path[:-3]}h5.chunked")
 
+    if C.dataset_format == "sparse":
+        sparsify_HDF_file(path=f"{path[:-3]}h5")
+
+    return None
+
+
+def create_sharded_HDF_file(path, is_training_set=False, n_workers=None, shard_size=None):
+    """ Preprocesses training data specified in `path` and writes it to HDF, as
+    in `create_HDF_file()`, but splits the molecules into shards of
+    `shard_size` molecules which are preprocessed in parallel
+    (see `preprocess_shard()`) and then merged (see `merge_shards()`).
+
+    The shards are fixed, contiguous slices of the SMILES file, so the merged
+    HDF file (and training set properties) do not depend on the number of
+    workers. Restart state is tracked per shard: a shard is complete once its
+    HDF file exists, so restarted jobs only preprocess incomplete shards.
+
+    Args:
+      path (str) : Full path/filename to SMILES file containing molecules.
+      is_training_set (bool) : Indicates if this is the training set.
+      n_workers (int or None) : Number of worker processes; if `None`, uses
+        `C.n_preprocessing_workers`.
+      shard_size (int or None) : Number of molecules per shard; if `None`, uses
+        `C.preprocessing_shard_size`.
+    """
+    if n_workers is None:
+        n_workers = C.n_preprocessing_workers
+    if shard_size is None:
+        shard_size = C.preprocessing_shard_size
+
+    if os.path.exists(f"{path[:-3]}h5"):
+        print(f"-- {path[:-3]}h5 already exists; skipping.", flush=True)
+        return None
+
+    # count the molecules to define the shards
+    n_molecules = len(load.molecules(path))
+    shard_bounds = [
+        (shard_start, min(shard_start + shard_size, n_molecules))
+        for shard_start in range(0, n_molecules, shard_size)
+    ]
+    print(f"-- {n_molecules} molecules in set.", flush=True)
+    print(f"-- Preprocessing {len(shard_bounds)} shard(s) using {n_workers} "
+          f"worker(s).", flush=True)
+
+    shard_args = [(path, shard_idx, shard_start, shard_end, is_training_set)
+                  for shard_idx, (shard_start, shard_end) in enumerate(shard_bounds)]
+
+    # `starmap()` returns the shards' outputs in shard order
+    with multiprocessing.Pool(processes=n_workers) as pool:
+        shard_paths = pool.starmap(preprocess_shard, shard_args)
+
+    merge_shards(path=path,
+                 shard_paths=shard_paths,
+                 shard_weights=[end - start for (start, end) in shard_bounds],
+                 is_training_set=is_training_set)
+
+    return None
+
+
+def get_shard_path(path, shard_idx):
+    """ Returns the path (without extension) of the shard `shard_idx` of the
+    SMILES file specified by `path`.
+    """
+    return f"{path[:-4]}.shard{shard_idx}"
+
+
+def preprocess_shard(path, shard_idx, shard_start, shard_end, is_training_set):
+    """ Preprocesses the molecules with indices in [`shard_start`, `shard_end`)
+    in the SMILES file specified by `path`, and writes them to their own HDF
+    file (and, for the training set, their properties to their own CSV).
+
+    Args:
+      path (str) : Full path/filename to SMILES file containing molecules.
+      shard_idx (int) : Index of the shard.
+      shard_start (int) : Index of the first molecule in the shard.
+      shard_end (int) : Index after the last molecule in the shard.
+      is_training_set (bool) : Indicates if this is the training set.
+
+    Returns:
+      shard_path (str) : Path (without extension) to the shard's output files.
+    """
+    shard_path = get_shard_path(path=path, shard_idx=shard_idx)
+
+    # skip shards which were completed before a restart
+    if os.path.exists(f"{shard_path}.h5"):
+        return shard_path
+
+    molecule_set = load.molecules(path)
+    molecule_shard = get_molecule_subset(molecule_set=molecule_set,
+                                         init_idx=shard_start,
+                                         n_molecules=shard_end,
+                                         subset_size=shard_end - shard_start)
+    n_molecules = len(molecule_shard)
+    total_n_subgraphs = get_n_subgraphs(molecule_set=molecule_shard)
+
+    dataset_names = ["nodes", "edges", "APDs"]
+    dims = get_dataset_dims()
+
+    # an incomplete shard is always preprocessed from scratch
+    with h5py.File(f"{shard_path}.h5.chunked", "w") as hdf_file:
+
+        ds = create_datasets(hdf_file=hdf_file,
+                             max_length=total_n_subgraphs,
+                             dataset_name_list=dataset_names,
+                             dims=dims)
+
+        last_molecule_idx = 0
+        dataset_size = 0
+        ts_properties = None
+
+        # process groups until all molecules in the shard have been processed
+        while last_molecule_idx < n_molecules:
+            molecule_subset = molecule_shard[last_molecule_idx:last_molecule_idx + C.group_size]
+
+            (final_molecule_idx, ds, group_size,
+             ts_properties) = group_subgraphs(init_idx=dataset_size,
+                                              molecule_set=molecule_subset,
+                                              dataset_dict=ds,
+                                              is_training_set=is_training_set,
+                                              ts_properties_old=ts_properties)
+
+            last_molecule_idx += final_molecule_idx
+            dataset_size += group_size
+
+        resize_datasets(dataset_dict=ds,
+                        dataset_names=dataset_names,
+                        dataset_size=dataset_size,
+                        dataset_dims=dims)
+
+    if is_training_set:
+        util.write_ts_properties(ts_properties_dict=ts_properties,
+                                 dict_path=f"{shard_path}.csv")
+
+    # mark the shard as complete
+    os.rename(f"{shard_path}.h5.chunked", f"{shard_path}.h5")
+
+    return shard_path
+
+
+def merge_shards(path, shard_paths, shard_weights, is_training_set, block_size=10000):
+    """ Merges the preprocessed shards in `shard_paths` into a single unchunked
+    HDF file, concatenating the HDF datasets in shard order. For the training
+    set, also combines the shards' properties with a weighted average (in shard
+    order) and shuffles the merged datasets with a fixed seed, so that the
+    merged output is deterministic. The datasets are copied one block of
+    `block_size` rows at a time (see `merge_shard_datasets()`), so that the
+    merged datasets are never held in memory.
+
+    Args:
+      path (str) : Full path/filename to SMILES file containing molecules.
+      shard_paths (list) : Contains the paths (without extension) to the shards.
+      shard_weights (list) : Contains the number of molecules in each shard.
+      is_training_set (bool) : Indicates if this is the training set.
+      block_size (int) : Number of rows copied at a time.
+    """
+    print(f"* Merging {len(shard_paths)} shard(s).", flush=True)
+    dataset_names = ["nodes", "edges", "APDs"]
+
+    if is_training_set:
+        print("Writing training set properties.", flush=True)
+        ts_properties = None
+        weight_prev = 0
+        for shard_path, weight_next in zip(shard_paths, shard_weights):
+            shard_properties = util.load_ts_properties(csv_path=f"{shard_path}.csv")
+            if ts_properties is None:
+                ts_properties = shard_properties
+            else:
+                bundle_properties = (ts_properties, shard_properties, weight_prev, weight_next)
+                ts_properties = {
+                    key: anal.weighted_average(b=bundle_properties, key=key[1])
+                    for key in ts_properties
+                }
+            weight_prev += weight_next
+        util.write_ts_properties(ts_properties_dict=ts_properties,
+                                 dict_path=f"{path[:-4]}.csv")
+
+    shard_files = [h5py.File(f"{shard_path}.h5", "r") for shard_path in shard_paths]
+    try:
+        with h5py.File(f"{path[:-3]}h5.chunked", "w") as merged_file:
+            for name in tqdm(dataset_names):
+                merge_shard_datasets(merged_file=merged_file,
+                                     shard_datasets=[shard_file[name] for shard_file in shard_files],
+                                     name=name,
+                                     shuffle=is_training_set,
+                                     block_size=block_size)
+    finally:
+        for shard_file in shard_files:
+            shard_file.close()
+
+    if C.dataset_format == "sparse":
+        sparsify_HDF_file(path=f"{path[:-3]}h5.chunked")
+
+    # only mark the merged file as complete once it has been fully written
+    os.rename(f"{path[:-3]}h5.chunked", f"{path[:-3]}h5")
+
+    # remove the shards once they have been merged
+    for shard_path in shard_paths:
+        os.remove(f"{shard_path}.h5")
+        if is_training_set:
+            os.remove(f"{shard_path}.csv")
+
+    return None
+
+
+def merge_shard_datasets(merged_file, shard_datasets, name, shuffle, block_size):
+    """ Writes the concatenation of `shard_datasets` (in shard order) to a new
+    dataset `name` in `merged_file`, created at its final shape and filled one
+    block of `block_size` rows at a time.
+
+    If `shuffle`, the rows are shuffled globally: each block of source rows
+    is written to the positions given by a random permutation of all rows,
+    drawn with a fixed seed (so the shuffle is the same for all datasets, and
+    deterministic). Only one block is held in memory at a time.
+
+    Args:
+      merged_file (h5py._hl.files.File) : HDF5 file to contain the dataset.
+      shard_datasets (list) : Contains the `h5py.Dataset`s of the shards.
+      name (str) : Name of the dataset.
+      shuffle (bool) : If specified, shuffles the merged dataset.
+      block_size (int) : Number of rows copied at a time.
+    """
+    shard_offsets = np.cumsum([0] + [len(dataset) for dataset in shard_datasets])
+    n_rows = int(shard_offsets[-1])
+    merged_dataset = merged_file.create_dataset(name,
+                                                (n_rows, *shard_datasets[0].shape[1:]),
+                                                chunks=None,
+                                                dtype=np.dtype("int8"))
+
+    # position of each (concatenated) source row in the merged dataset
+    merged_positions = np.random.default_rng(seed=0).permutation(n_rows) if shuffle else None
+
+    for shard_idx, dataset in enumerate(shard_datasets):
+        for start in range(0, len(dataset), block_size):
+            block = dataset[start:start + block_size]
+            merged_start = int(shard_offsets[shard_idx]) + start
+
+            if shuffle:
+                # HDF5 point selections must be in increasing order
+                positions = merged_positions[merged_start:merged_start + len(block)]
+                order = np.argsort(positions)
+                merged_dataset[positions[order]] = block[order]
+            else:
+                merged_dataset[merged_start:merged_start + len(block)] = block
+
+    return None
+
+
+def sparsify_HDF_file(path, block_size=10000):
+    """ Rewrites the dense HDF file in `path` in the "sparse" dataset format,
+    in place. Every dense HDF dataset (e.g. "nodes", with shape
+    {n_subgraphs, max_n_nodes, n_node_features}) is stored as an HDF group
+    holding, for the non-zero elements of all subgraphs:
+      * "indices" : the coordinates of the non-zero elements within their
+        subgraph, i.e. (node, feature) pairs for the nodes, (node, node, edge
+        type) triples for the edges, and flat indices for the APDs,
+      * "values" : the non-zero values (omitted for one-hot datasets, i.e.
+        if all values are 1),
+      * "offsets" : the CSR offsets, such that the elements of subgraph `i` are
+        found at `offsets[i]:offsets[i + 1]`.
+    The shape of the dense subgraphs is kept in the group attributes, so that
+    `SparseHDFDataset` can densify the subgraphs when loading batches.
+
+    Args:
+      path (str) : Full path/filename to the dense HDF file.
+      block_size (int) : Number of subgraphs converted at once.
+    """
+    print(f"* Rewriting {path} in sparse format.", flush=True)
+    with h5py.File(path, "r") as dense_file, h5py.File(f"{path}.sparse", "w") as sparse_file:
+        sparse_file.attrs["dataset_format"] = "sparse"
+
+        for name in dense_file.keys():
+            dense = dense_file.get(name)
+            n_subgraphs, shape = dense.shape[0], dense.shape[1:]
+            index_dtype = np.min_scalar_type(max(shape) - 1)
+
+            # first pass: check if the dataset is one-hot (only 0s and 1s)
+            is_binary = all(
+                np.isin(dense[start:start + block_size], (0, 1)).all()
+                for start in range(0, n_subgraphs, block_size)
+            )
+
+            group = sparse_file.create_group(name)
+            group.attrs["shape"] = shape
+            group.attrs["is_binary"] = is_binary
+            indices = group.create_dataset("indices", (0, len(shape)), maxshape=(None, len(shape)),
+                                           chunks=True, dtype=index_dtype)
+            values = None if is_binary else group.create_dataset("values", (0,), maxshape=(None,),
+                                                                    chunks=True, dtype=dense.dtype)
+            offsets = np.zeros(n_subgraphs + 1, dtype=np.int64)
+
+            for start in tqdm(range(0, n_subgraphs, block_size)):
+                block = dense[start:start + block_size]
+                coordinates = np.nonzero(block)  # sorted by subgraph (C order)
+                counts = np.bincount(coordinates[0], minlength=len(block))
+                offsets[start + 1:start + len(block) + 1] = offsets[start] + np.cumsum(counts)
+
+                n_stored = indices.shape[0]
+                n_new = len(coordinates[0])
+                indices.resize((n_stored + n_new, len(shape)))
+                indices[n_stored:] = np.stack(coordinates[1:], axis=1).astype(index_dtype)
+                if values is not None:
+                    values.resize((n_stored + n_new,))
+                    values[n_stored:] = block[coordinates]
+
+            group.create_dataset("offsets", data=offsets)
+
+    # only replace the dense file once the sparse one has been fully written
+    os.replace(f"{path}.sparse", path)
+
     return None
 
 
@@ -705,4 +1033,7 @@ def create_fragment_HDF_file(path, is_training_set=False):
     os.remove(restart_index_file)
     os.remove(f"{path[:-3]}h5.chunked")
 
+    if C.dataset_format == "sparse":
+        sparsify_HDF_file(path=f"{path[:-3]}h5")
+
     return None
\ No newline at end of file
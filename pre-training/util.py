@@ -1,4 +1,5 @@
 # load general packages and functions
+import collections
 import csv
 import numpy as np
 import torch
@@ -7,6 +8,9 @@ from tensorboard_writer import writer as tb_writer
 
 # load program-specific functions
 from parameters.constants import constants as C
+from linker_stitcher import LinkerStitcher
+from step_profiler import StepProfiler
+from fingerprints import FingerprintEngine
 
 # contains miscellaneous useful functions
 
@@ -449,7 +453,7 @@ def write_graphs_to_smi(smi_filename, molecular_graphs_list):
     """ Writes the `TrainingGraph`s in `molecular_graphs_list` to a SMILES
     file, where the full path/filename is specified by `smi_filename`.
     """
-    validity_tensor = torch.zeros(len(molecular_graphs_list), device="cuda")
+    validity_tensor = torch.zeros(len(molecular_graphs_list), device=C.device)
 
     with open(smi_filename, "w") as smi_file:
 
@@ -545,11 +549,13 @@ def write_nlls(nll_filename, nlls):
             nll_file.write(f"{nll}\n")
 
 
-def write_ts_properties(ts_properties_dict):
-    """ Writes the training set properties in `ts_properties_dict` to CSV.
+def write_ts_properties(ts_properties_dict, dict_path=None):
+    """ Writes the training set properties in `ts_properties_dict` to CSV. By
+    default, writes them next to the training set, unless `dict_path` is given.
     """
-    training_set = C.training_set  # path to "train.smi"
-    dict_path = f"{training_set[:-4]}.csv"
+    if dict_path is None:
+        training_set = C.training_set  # path to "train.smi"
+        dict_path = f"{training_set[:-4]}.csv"
 
     with open(dict_path, "w") as csv_file:
 
@@ -624,3 +630,65 @@ def write_validity(validity_file_path, validity_tensor):
     with open(validity_file_path, "w") as valid_file:
         for valid in validity_tensor:
             valid_file.write(f"{valid}\n")
+
+
+linker_stitcher = None
+
+
+def get_linker_stitcher():
+    """ Returns the `LinkerStitcher` used to join generated linkers to their
+    fragments (created on first use, so that its pool is only started if
+    needed).
+    """
+    global linker_stitcher
+    if linker_stitcher is None:
+        linker_stitcher = LinkerStitcher(max_attempts=C.max_stitching_attempts,
+                                         n_workers=C.n_stitching_workers)
+    return linker_stitcher
+
+
+def stitch_linkers(fragments_smi, linker_smi_list, linker_atoms_list):
+    """ Joins the linkers in `linker_smi_list` to their fragments (see
+    `LinkerStitcher.stitch_batch()`) and returns the `StitchResult`s; prints
+    how many molecules could not be stitched, and why.
+    """
+    results = get_linker_stitcher().stitch_batch(fragments_smi, linker_smi_list, linker_atoms_list)
+    failures = collections.Counter(result.failure for result in results if result.failure is not None)
+    if failures:
+        reasons = ", ".join(f"{reason} ({count})" for reason, count in failures.most_common())
+        print(f"-- Stitching failed for {sum(failures.values())} of {len(results)} molecules: {reasons}.",
+              flush=True)
+    return results
+
+
+step_profiler = None
+
+
+def get_step_profiler():
+    """ Returns the `StepProfiler` timing the phases of the training/learning
+    steps (created on first use); its spans are no-ops unless `profiling` or
+    `torch_profiler_steps` is specified.
+    """
+    global step_profiler
+    if step_profiler is None:
+        step_profiler = StepProfiler(enabled=C.profiling,
+                                     output_dir=C.job_dir,
+                                     device=C.device,
+                                     tb_writer=tb_writer,
+                                     torch_profiler_steps=C.torch_profiler_steps)
+    return step_profiler
+
+
+fingerprint_engine = None
+
+
+def get_fingerprint_engine():
+    """ Returns the `FingerprintEngine` computing the Tanimoto similarities used
+    as rewards/scores (created on first use, so that the cache of reference
+    fingerprints is shared by all steps).
+    """
+    global fingerprint_engine
+    if fingerprint_engine is None:
+        fingerprint_engine = FingerprintEngine(max_cache_size=C.fingerprint_cache_size,
+                                               backend=C.fingerprint_backend)
+    return fingerprint_engine
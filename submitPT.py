@@ -13,7 +13,7 @@ home = str(Path.home())
 
 # define what you want to do for the specified job(s)
 dataset = "chembl"
-job_type = "generate"     # "preprocess", "train", "generate", "test", "multiple_valid" or "valid_loss"
+job_type = "generate"     # "preprocess", "train", "generate", "serve", "test", "multiple_valid" or "valid_loss"
 jobdir_start_idx = 0        # where to start indexing job dirs
 n_jobs = 1                  # number of jobs to run per model
 restart = False
@@ -48,6 +48,7 @@ params = {
     "block_size": 1000,
     "generation_epoch": [5], #['None'] + [a for a in range(5, 201, 5)],  # <-- which model to use (i.e. which epoch) must be a number for "generate" and a list for "multiple_valid" and "valid_loss"
     "n_samples": 1000,       # <-- how many structures to generate
+    "generation_strategy": "sampling",  # <-- "sampling", or "beam" to generate the `beam_width` most likely structures per beam group
     # additional paramaters can be defined here, if different from the "defaults"
     # (!!!) for "generate" jobs, don't forget to specify "generation_epoch" and "n_samples"
     "n_workers": 0
@@ -93,7 +94,7 @@ def submit():
         os.makedirs(params["tensorboard_dir"], exist_ok=True)
         try:
             os.makedirs(params["job_dir"],
-                        exist_ok=bool(job_type in ["generate", "test", "multiple_valid", "valid_loss"] or force_overwrite))
+                        exist_ok=bool(job_type in ["generate", "serve", "test", "multiple_valid", "valid_loss"] or force_overwrite))
             print(
                 f"* Creating model subdirectory {dataset_output_path}/job_{job_idx}/",
                 flush=True,